@@ -0,0 +1,212 @@
+"""Benchmark end-to-end offline: investigate() + generate() sobre un corpus fijo.
+
+Todos los upstreams (DDG, Google, sitios corporativos, LinkedIn, Perplexity,
+DeepSeek, Anthropic) los sirve `bench.standin` en un proceso aparte, con
+latencias muestreadas del perfil de producción. Reporta p50/p95 por etapa y
+end-to-end, CPU del proceso y, en una segunda pasada sin latencia, el pico
+de memoria asignada (tracemalloc).
+
+Con `--record` el I/O de la corrida queda en un cassette (scraper/transport.py)
+y `--replay` lo reproduce sin stand-in ni red. Una investigación real de
+producción se graba con IO_MODE=record y se perfila localmente levantando la
+app con IO_MODE=replay y el mismo IO_CASSETTE.
+
+Uso:
+    python -m bench.bench_e2e [--limit N] [--concurrency 4] [--latency-scale 1.0]
+                              [--no-alloc] [--json] [--record|--replay CASSETTE]
+                              [--verdict-db PATH] [--snapshot-db PATH]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+from bench.standin import StandInServer, StandInTransport, load_corpus
+from config import metrics
+from config.settings import get_settings
+from scraper.base import BaseScraper
+from scraper.perplexity import clear_company_cache
+from scraper.transport import PASSTHROUGH, RECORD, REPLAY, Transport, set_transport
+from services.email_generator import EmailGenerator
+from services.researcher import ResearchService
+from scraper.page_cache import PageCache, set_page_cache
+from scraper.snapshots import SnapshotStore, set_snapshot_store
+from services.verdict_cache import VerdictCache, set_verdict_cache
+
+
+@contextmanager
+def use_transport(transport: Transport):
+    """Instalar `transport` en el proceso, con API keys de relleno si faltan
+    (sin keys los scrapers/LLM ni intentan el request)."""
+    settings = get_settings()
+    saved = (settings.llm.deepseek_api_key, settings.llm.anthropic_api_key, settings.perplexity_api_key)
+    settings.llm.deepseek_api_key = settings.llm.deepseek_api_key or "bench"
+    settings.llm.anthropic_api_key = settings.llm.anthropic_api_key or "bench"
+    settings.perplexity_api_key = settings.perplexity_api_key or "bench"
+    previous = set_transport(transport)
+    try:
+        yield transport
+    finally:
+        set_transport(previous)
+        settings.llm.deepseek_api_key, settings.llm.anthropic_api_key, settings.perplexity_api_key = saved
+
+
+async def run_corpus(prospects: list[dict], concurrency: int, verdict_db: str = ":memory:",
+                     snapshot_db: str = ":memory:") -> dict:
+    """Investigar + redactar email para cada prospecto; tiempos por etapa."""
+    clear_company_cache()  # cada corrida parte en frío: resultados comparables
+    previous_verdicts = set_verdict_cache(VerdictCache(verdict_db))  # ídem veredictos
+    snapshots = SnapshotStore(snapshot_db)
+    previous_snapshots = set_snapshot_store(snapshots)  # y snapshots (sin reuso)
+    previous_pages = set_page_cache(PageCache(":memory:", blobs=snapshots))  # y páginas corporativas
+    stages: dict[str, list[float]] = defaultdict(list)
+    observer = lambda stage, elapsed: stages[stage].append(elapsed)
+    metrics.stage_observers.append(observer)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def one(p: dict):
+        async with semaphore:
+            t0 = time.perf_counter()
+            # Servicios por prospecto, como la app (por request / job)
+            research = await ResearchService().investigate(p["name"], p["company"], p["role"], p["location"])
+            email = await EmailGenerator().generate(research)
+            elapsed = time.perf_counter() - t0
+            stages["end_to_end"].append(elapsed)
+            results.append({"id": p["id"], "score": research.score, "llm": research.llm_used,
+                            "error": research.error or ("" if email.subject else "email vacío"), "seconds": round(elapsed, 3)})
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    try:
+        await asyncio.gather(*(one(p) for p in prospects))
+    finally:
+        metrics.stage_observers.remove(observer)
+        set_verdict_cache(previous_verdicts)
+        set_page_cache(previous_pages)
+        set_snapshot_store(previous_snapshots)
+        await BaseScraper.cleanup()
+    return {
+        "wall_seconds": time.perf_counter() - wall0,
+        "cpu_seconds": time.process_time() - cpu0,
+        "stages": stages,
+        "results": sorted(results, key=lambda r: r["id"]),
+    }
+
+
+def percentile(samples: list[float], q: float) -> float:
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(q) - 1]
+
+
+def summarize(run: dict) -> dict:
+    return {
+        "prospects": len(run["results"]),
+        "wall_seconds": round(run["wall_seconds"], 3),
+        "cpu_seconds": round(run["cpu_seconds"], 3),
+        "errors": sum(1 for r in run["results"] if r["error"]),
+        "stages": {
+            stage: {"n": len(samples), "p50": round(percentile(samples, 50), 4),
+                    "p95": round(percentile(samples, 95), 4)}
+            for stage, samples in sorted(run["stages"].items()) if samples
+        },
+    }
+
+
+def measure_allocations(prospects: list[dict], concurrency: int, top: int = 10) -> dict:
+    """Segunda pasada (sin latencia) con tracemalloc: pico y sitios con más bytes."""
+    tracemalloc.start(10)
+    try:
+        asyncio.run(run_corpus(prospects, concurrency))
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")]
+        )
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_mib": round(peak / 2**20, 2),
+        "top": [{"site": str(s.traceback[0]), "kib": round(s.size / 1024, 1)}
+                for s in snapshot.statistics("lineno")[:top]],
+    }
+
+
+def run_bench(limit: Optional[int] = None, concurrency: int = 4, latency_scale: float = 1.0,
+              allocations: bool = True, record: Optional[str] = None, replay: Optional[str] = None,
+              verdict_db: str = ":memory:", snapshot_db: str = ":memory:") -> dict:
+    """Correr el corpus contra el stand-in (grabando opcionalmente un cassette)
+    o, con `replay`, desde un cassette sin red (latency_scale escala la grabada).
+    Con `verdict_db` los veredictos de la resolución de entidades quedan en ese
+    SQLite (datos para `python -m services.preclassifier`) y con `snapshot_db`
+    el HTML bajado (para `python -m scraper.snapshots extract`)."""
+    prospects = load_corpus()[:limit]
+    if replay:
+        with use_transport(Transport(REPLAY, replay, latency_scale)):
+            report = summarize(asyncio.run(run_corpus(prospects, concurrency, verdict_db, snapshot_db)))
+            if allocations:
+                set_transport(Transport(REPLAY, replay))
+                report["allocations"] = measure_allocations(prospects, concurrency)
+    else:
+        with StandInServer(latency_scale=latency_scale) as server:
+            mode = RECORD if record else PASSTHROUGH
+            with use_transport(StandInTransport(server.base_url, mode, record)) as transport:
+                report = summarize(asyncio.run(run_corpus(prospects, concurrency, verdict_db, snapshot_db)))
+                transport.save()
+                if allocations:
+                    server.set_latency_scale(0)
+                    set_transport(StandInTransport(server.base_url))
+                    report["allocations"] = measure_allocations(prospects, concurrency)
+    report["latency_scale"] = latency_scale
+    report["concurrency"] = concurrency
+    return report
+
+
+def print_report(report: dict, out=None):
+    out = out or sys.stdout
+    print(f"{report['prospects']} prospectos, concurrencia {report['concurrency']}, "
+          f"latencia x{report['latency_scale']}: wall {report['wall_seconds']:.2f}s, "
+          f"CPU {report['cpu_seconds']:.2f}s, errores {report['errors']}", file=out)
+    print(f"{'etapa':<20}{'n':>5}{'p50 (s)':>12}{'p95 (s)':>12}", file=out)
+    for stage, s in report["stages"].items():
+        print(f"{stage:<20}{s['n']:>5}{s['p50']:>12.3f}{s['p95']:>12.3f}", file=out)
+    if "allocations" in report:
+        alloc = report["allocations"]
+        print(f"\nPico tracemalloc: {alloc['peak_mib']} MiB", file=out)
+        for site in alloc["top"]:
+            print(f"  {site['kib']:>10.1f} KiB  {site['site']}", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=None, help="Solo los primeros N prospectos")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplicador de las latencias del perfil (0 = sin esperas)")
+    parser.add_argument("--no-alloc", action="store_true", help="Omitir la pasada con tracemalloc")
+    parser.add_argument("--json", action="store_true", help="Salida JSON (para comparar entre commits)")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="CASSETTE", help="Grabar el I/O de la corrida en un cassette")
+    cassette.add_argument("--replay", metavar="CASSETTE", help="Reproducir desde un cassette, sin stand-in ni red")
+    parser.add_argument("--verdict-db", default=":memory:",
+                        help="Guardar los veredictos de entidades en este SQLite (entrenar el preclasificador)")
+    parser.add_argument("--snapshot-db", default=":memory:",
+                        help="Guardar el HTML bajado en este SQLite (reprocesar extractores sin red)")
+    args = parser.parse_args()
+
+    report = run_bench(args.limit, args.concurrency, args.latency_scale, not args.no_alloc,
+                       args.record, args.replay, args.verdict_db, args.snapshot_db)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
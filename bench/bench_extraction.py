@@ -0,0 +1,191 @@
+"""Microbenchmark: extracción de educación/ubicación/trayectoria desde snippets.
+
+Compara `services.extraction.extract_profile_fields` (patrones compilados,
+scanner de marcadores, una pasada) con la implementación previa de
+`ResearchService._extract_*`, conservada aquí tal cual, y verifica que ambas
+den exactamente lo mismo sobre el corpus.
+
+Uso:
+    python -m bench.bench_extraction [--n 2000]
+"""
+import argparse
+import re
+import timeit
+
+from bench.standin import load_corpus
+from services.extraction import extract_profile_fields
+
+_OTHER = ["Constructora Sur", "Retail Andino", "Banco Austral"]
+
+
+# --- Implementación previa (ResearchService._extract_*) ---------------------
+
+def legacy_education(text: str) -> str:
+    """Extraer información de educación de texto de LinkedIn.
+
+    Only extracts clean education data: university names, degree titles.
+    Avoids capturing long fragments from LinkedIn snippets that happen to
+    contain education keywords mixed with other content.
+    """
+    # Patrones comunes de educación en LinkedIn
+    education_patterns = [
+        # "Educación: Universidad de Atacama" (formato Perplexity/LinkedIn enriquecido)
+        r"(?:^|[\s|])Educaci[oó]n:\s*(.{5,80}?)(?:\||$|\.|Ubicaci[oó]n|Logros|Cargo|Empresa|Trayectoria|Location)",
+        # "alumniOf" / universidades conocidas (limit to 80 chars to avoid long snippet fragments)
+        r"((?:Universidad|Pontificia|Instituto|Escuela|Facultad|UTFSM|USACH|U\. de|PUC|UC|IESA|DUOC)\s[^|.]{3,60})",
+        # Grados académicos (limit capture to avoid long garbage)
+        r"((?:Ingenier[oa]\s+Civil|MBA|Máster|Master|Magíster|Doctorad[oa]|Licenciad[oa])\s*(?:en\s)?[^|.]{0,50})",
+    ]
+
+    results = []
+    for pattern in education_patterns:
+        matches = re.findall(pattern, text, re.IGNORECASE)
+        for match in matches:
+            clean = match.strip().strip("|.,; ")
+            # Cortar ruido pegado cuando el snippet no tiene puntuación entre
+            # campos (ej: "Instituto X Ubicación: Valparaíso 172 contactos").
+            for kw in ("ubicaci", "location", "contacto", "seguidor", "connection", "follower"):
+                pos = clean.lower().find(kw)
+                if pos > 3:
+                    clean = clean[:pos].strip().strip("|.,;· ")
+            if not clean or len(clean) <= 3:
+                continue
+            if clean.lower().startswith("ucation"):
+                continue
+            # Skip if it looks like a snippet fragment (contains company/business words)
+            lower = clean.lower()
+            if any(w in lower for w in ("nuestro", "servicios", "empresa", "faymex", "experiencia en la")):
+                continue
+            # Skip if too long (likely a snippet fragment, not a clean education entry)
+            if len(clean) > 100:
+                continue
+            if clean in results:
+                continue
+            results.append(clean)
+
+    if results:
+        return ". ".join(results[:3])
+    return ""
+
+def legacy_location(text: str) -> str:
+    """Extraer ubicación de texto de LinkedIn."""
+    # Patrones de ubicación
+    location_patterns = [
+        # "Ubicación: Santiago, Chile" (formato enriquecido)
+        r"[Uu]bicaci[oó]n:\s*([^|.]+?)(?:\||$|\.)",
+        # "Chile" o "Santiago, Chile" al final o entre separadores
+        r"(?:^|\||\.\s+)((?:Santiago|Antofagasta|Calama|Copiap[oó]|La Serena|Vi[ñn]a del Mar|Valpara[ií]so|Concepci[oó]n|Temuco|Rancagua|Iquique|Arica|Puerto Montt|Punta Arenas)(?:\s*,\s*(?:Chile|Regi[oó]n\s+[^|.]+))?)",
+        # País solo
+        r"(?:^|\||\.\s+)(Chile)(?:\s*\||$|\.)",
+    ]
+
+    for pattern in location_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            loc = match.group(1).strip().strip("|.,; ")
+            # Cortar conteos de LinkedIn pegados: "Valparaíso 172 contactos"
+            cut = re.split(r"\s+\d", loc)[0].strip().strip("|.,;· ")
+            if len(cut) >= 3:
+                loc = cut
+            if loc and len(loc) >= 3:
+                return loc
+
+    return ""
+
+def legacy_trayectoria(linkedin_texts: list[str], name: str) -> str:
+    """Extraer resumen de trayectoria/headline de títulos LinkedIn.
+
+    LinkedIn titles have format: "Name - Headline | LinkedIn"
+    LinkedIn snippets often contain the full headline with titles and education.
+    """
+    headlines = []
+    name_parts = name.lower().split()
+
+    for text in linkedin_texts:
+        # Patrón de título LinkedIn: "Nombre - Headline | LinkedIn"
+        # También: "Nombre - Headline - Empresa | LinkedIn"
+        match = re.search(
+            r"(?:" + re.escape(name) + r"|" + r"\s+".join(re.escape(p) for p in name_parts) + r")\s*[-–—]\s*(.+?)(?:\s*\|\s*LinkedIn|\s*$)",
+            text,
+            re.IGNORECASE,
+        )
+        if match:
+            headline = match.group(1).strip().strip("| ")
+            if headline and len(headline) > 5:
+                headlines.append(headline)
+
+        # Patrón alternativo: "Trayectoria: ..." (formato Perplexity)
+        match2 = re.search(r"Trayectoria:\s*(.+?)(?:\||$|Educaci[oó]n|Logros)", text, re.IGNORECASE)
+        if match2:
+            tray = match2.group(1).strip().strip("|.,; ")
+            if tray and len(tray) > 5 and tray not in ("No disponible",):
+                headlines.append(tray)
+
+    if headlines:
+        # Usar el headline más largo
+        best = max(headlines, key=len)
+        return best
+    return ""
+
+
+def legacy_profile_fields(linkedin_texts: list[str], name: str) -> tuple[str, str, str]:
+    combined = " | ".join(linkedin_texts)
+    return (legacy_education(combined), legacy_location(combined), legacy_trayectoria(linkedin_texts, name))
+
+
+# --- Corpus -----------------------------------------------------------------
+
+def build_cases() -> list[tuple[list[str], str]]:
+    """Snippets de LinkedIn/Perplexity por prospecto del corpus, más casos borde."""
+    cases = []
+    for i, p in enumerate(load_corpus()):
+        other = _OTHER[i % len(_OTHER)]
+        own = (f"{p['name']} - {p['role']} - {p['company']} | LinkedIn "
+               f"{p['role']} en {p['company']} · Educación: {p['education']} · Ubicación: {p['city']}, Chile · 500+ contactos")
+        perplexity = (f"Cargo: {p['role']}. Empresa: {p['company']}. Trayectoria: Más de 10 años en "
+                      f"{p['industry'].lower()}. Educación: {p['education']}. Ubicación: {p['city']}, Chile")
+        plain = f"{p['name']} – {p['role']} | LinkedIn {p['company']} · {p['product']} · 300 seguidores"
+        homonym = f"{p['name']} - Analista - {other} | LinkedIn Analista en {other}. Santiago, Chile"
+        cases.append(([own, perplexity], p["name"]))
+        cases.append(([plain], p["name"]))
+        cases.append(([plain, homonym], p["name"]))
+        cases.append(([f"{p['company']} · {p['product']} · 1.200 seguidores"], p["name"]))
+    cases += [
+        (["Ubicación: Valparaíso 172 contactos en LinkedIn | otra cosa"], ""),
+        (["Educación: Instituto Profesional AIEP Ubicación: Valparaíso 172 contactos"], "Ana Soto"),
+        (["Ingeniero Civil Industrial, MBA UC. Magíster en Finanzas | Concepción, Región del Biobío"], "Luis Mora"),
+        (["Trayectoria: No disponible | Chile | DUOC UC Ingeniería"], "Marta Díaz"),
+        ([""], ""),
+    ]
+    return cases
+
+
+def check(cases) -> int:
+    for texts, name in cases:
+        new = extract_profile_fields(texts, name)
+        expected = legacy_profile_fields(texts, name)
+        assert (new.educacion, new.ubicacion, new.trayectoria) == expected, (texts, name, new, expected)
+    return len(cases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=2000)
+    args = parser.parse_args()
+
+    cases = build_cases()
+    check(cases)
+    # Sin el cache de `re` que disimula el costo de compilar: cada nombre es nuevo en producción
+    texts_per_pass = sum(len(texts) for texts, _ in cases)
+    print(f"{len(cases)} casos ({texts_per_pass} snippets), salidas idénticas; n={args.n} pasadas")
+    runs = {
+        "legacy (_extract_* x3, regex sin compilar)": lambda: [legacy_profile_fields(t, n) for t, n in cases],
+        "extract_profile_fields (compilado, 1 pasada)": lambda: [extract_profile_fields(t, n) for t, n in cases],
+    }
+    for label, fn in runs.items():
+        best = min(timeit.repeat(fn, number=max(args.n // 100, 1), repeat=5)) / max(args.n // 100, 1)
+        print(f"  {label:<46} {best / len(cases) * 1e6:8.2f} µs/prospecto")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Microbenchmark: filtros de nombre/empresa de una investigación.
+
+Corre sobre los items de cada prospecto del corpus los filtros que el
+pipeline aplica en cada etapa (filtro DDG del LinkedIn scraper, heurística
+de relevancia, raw_sources, enriquecimiento desde snippets, dominio
+corporativo), con la implementación previa (normalización por item y por
+etapa, conservada aquí) y con un `ProspectMatcher` por prospecto.
+
+Los conteos difieren solo donde la empresa lleva tildes: el dominio
+quimicapacifico.cl no calzaba con "Química Pacífico" y ahora sí.
+
+Uso:
+    python -m bench.bench_matching [--n 200]
+"""
+import argparse
+import re
+import timeit
+import unicodedata
+
+from bench.standin import load_corpus
+from scraper.base import ScrapedItem
+from scraper.matching import ProspectMatcher, fold
+
+_OTHER = ["Constructora Sur", "Retail Andino", "Banco Austral"]
+_SUFFIXES = {"spa", "ltda", "inc", "corp", "llc", "srl", "cia", "compania", "compañia", "del", "los", "las",
+             "the", "and", "group", "grupo", "holding"}
+
+
+def build_items(p: dict, other: str) -> list[ScrapedItem]:
+    """Resultados típicos de una investigación: propios, homónimos y noticias."""
+    name, company, slug = p["name"], p["company"], re.sub(r"[^a-z]", "", fold(p["company"]))
+    return [
+        ScrapedItem(url=f"https://cl.linkedin.com/in/{slug}-1", source="linkedin",
+                    title=f"{name} - {p['role']} - {company} | LinkedIn",
+                    snippet=f"{p['role']} en {company} · Educación: {p['education']} · {p['city']}, Chile"),
+        ScrapedItem(url="https://cl.linkedin.com/in/otro-2", source="linkedin",
+                    title=f"{name} - Analista - {other} | LinkedIn", snippet=f"Analista en {other}. Santiago, Chile"),
+        ScrapedItem(url=f"https://www.{slug}.cl/nosotros", source="duckduckgo",
+                    title=f"Nosotros | {company}", snippet=f"{company} es líder en {p['product']}."),
+        ScrapedItem(url="https://www.directorio.cl/x", source="google_search",
+                    title=f"{other} - Directorio", snippet=f"Contacto de {other}, {p['city']}."),
+        ScrapedItem(url="https://www.diario.cl/a", source="google_news",
+                    title=f"{company} anuncia expansión", snippet=f"La empresa invertirá en {p['product']}."),
+        ScrapedItem(url="https://www.diario.cl/b", source="duckduckgo_news",
+                    title=f"{other} reporta resultados", snippet="Resultados trimestrales del sector."),
+        ScrapedItem(url="https://www.diario.cl/c", source="google_news",
+                    title=f"Entrevista a {name}", snippet=f"{p['role']} habla del mercado."),
+    ]
+
+
+# --- Implementación previa (una normalización por etapa y por item) ---------
+
+def _strip_accents(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def _mentions_company(text: str, company_lower: str) -> bool:
+    return company_lower in text or any(w in text for w in company_lower.split() if len(w) > 3)
+
+
+def _mentions_full_name(text: str, name_lower: str) -> bool:
+    parts = [w for w in name_lower.split() if len(w) >= 3]
+    return bool(parts) and all(p in text for p in parts)
+
+
+def _domain_matches(netloc: str, company: str) -> bool:
+    host = netloc.lower().removeprefix("www.")
+    full = re.sub(r"[^a-z0-9]", "", company.lower())
+    words = [re.sub(r"[^a-z0-9]", "", w.lower()) for w in company.split()]
+    words = [w for w in words if len(w) >= 3 and w not in _SUFFIXES]
+    return any(c in host for c in ([full] if len(full) >= 3 else []) + words)
+
+
+def _relevant(it: ScrapedItem, name_lower: str, company_lower: str) -> bool:
+    item_text = f"{it.title} {it.snippet}".lower()
+    if it.source in ("duckduckgo", "google_search", "linkedin"):
+        if company_lower.replace(" ", "") in (it.url or "").lower().replace(" ", ""):
+            return True
+        if _mentions_company(item_text, company_lower):
+            return True
+        return it.source == "linkedin" and _mentions_full_name(item_text, name_lower)
+    if it.source in ("duckduckgo_news", "google_news"):
+        return _mentions_company(item_text, company_lower) or (bool(name_lower) and name_lower in item_text)
+    return True
+
+
+def legacy_stages(items: list[ScrapedItem], name: str, company: str) -> tuple:
+    company_lower, name_lower = company.lower().strip(), name.lower().strip()
+    # LinkedIn scraper (filtro DDG)
+    name_words = [w for w in _strip_accents(name).lower().split() if len(w) >= 3]
+    ddg = [it for it in items if it.source == "linkedin"
+           and (_mentions_company(f"{it.title} {it.snippet}".lower(), company_lower)
+                or all(w in _strip_accents(f"{it.title} {it.snippet}").lower() for w in name_words))]
+    # Resolución de entidades (heurística) y raw_sources
+    kept = [it for it in items if _relevant(it, name_lower, company_lower)]
+    raw = [it for it in kept if _relevant(it, name_lower, company_lower)]
+    # Enriquecimiento desde snippets
+    enrich = [it for it in kept if it.source == "linkedin"
+              and (_mentions_full_name(f"{it.title} {it.snippet}".lower(), name_lower)
+                   or _mentions_company(f"{it.title} {it.snippet}".lower(), company_lower))]
+    domains = [_domain_matches(re.sub(r"https?://", "", it.url).split("/")[0], company) for it in items]
+    return len(ddg), len(kept), len(raw), len(enrich), sum(domains)
+
+
+def matcher_stages(items: list[ScrapedItem], name: str, company: str) -> tuple:
+    matcher = ProspectMatcher(name, company)
+    ddg = [it for it in items if it.source == "linkedin"
+           and (matcher.item_mentions_company(it) or matcher.item_mentions_full_name(it))]
+    kept = [it for it in items if matcher.is_relevant(it)]
+    raw = [it for it in kept if matcher.is_relevant(it)]
+    enrich = [it for it in kept if it.source == "linkedin"
+              and (matcher.item_mentions_full_name(it) or matcher.item_mentions_company(it))]
+    domains = [matcher.domain_matches(re.sub(r"https?://", "", it.url).split("/")[0]) for it in items]
+    return len(ddg), len(kept), len(raw), len(enrich), sum(domains)
+
+
+def build_cases() -> list[tuple[list[ScrapedItem], str, str]]:
+    return [(build_items(p, _OTHER[i % len(_OTHER)]), p["name"], p["company"]) for i, p in enumerate(load_corpus())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=200)
+    args = parser.parse_args()
+
+    cases = build_cases()
+    same = sum(legacy_stages(*c) == matcher_stages(*c) for c in cases)
+    print(f"{len(cases)} prospectos x {len(cases[0][0])} items; mismos conteos en {same}/{len(cases)}")
+    runs = {
+        "legacy (normalización por etapa)": lambda: [legacy_stages(*c) for c in cases],
+        "ProspectMatcher (una vez por prospecto)": lambda: [matcher_stages(*c) for c in cases],
+    }
+    for label, fn in runs.items():
+        best = min(timeit.repeat(fn, number=args.n, repeat=5)) / args.n
+        print(f"  {label:<42} {best / len(cases) * 1e6:8.2f} µs/prospecto")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Microbenchmark: render del prompt de email (registro compilado vs. disco + str.replace).
+
+Uso:
+    python -m bench.bench_prompt_render [--n 20000]
+"""
+import argparse
+import timeit
+
+from services.prompt_registry import PROMPTS_DIR, PromptRegistry
+
+FIELDS = dict(
+    nombre="Nadia Ramirez Lara",
+    cargo="Jefa de Operaciones",
+    empresa="Desert King",
+    industria="Agroindustria",
+    research_summary="### Persona\n- nombre: Nadia Ramirez Lara\n" * 20,
+    hallazgo_tipo="A",
+    hallazgo_descripcion="Desert King anuncia ampliación de su planta de Quillota",
+    sender_name="Gustavo Peralta",
+    sender_company="Faymex",
+    location="Valparaíso, Chile",
+)
+
+
+def _legacy_render() -> str:
+    """Comportamiento previo: leer de disco + 10 str.replace encadenados."""
+    text = (PROMPTS_DIR / "email_generator.md").read_text(encoding="utf-8")
+    for key, value in FIELDS.items():
+        text = text.replace("{" + key + "}", value)
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=20000)
+    args = parser.parse_args()
+
+    registry = PromptRegistry()
+    registry.load_all()
+    tpl = registry.get("email_generator.md")
+    assert tpl.render(**FIELDS) == _legacy_render(), "render compilado difiere del legado"
+
+    cases = {
+        "legacy (disco + str.replace x10)": _legacy_render,
+        "registry.get + render": lambda: registry.get("email_generator.md").render(**FIELDS),
+        "render (template ya resuelto)": lambda: tpl.render(**FIELDS),
+    }
+    print(f"email_generator.md @ {tpl.version} — {len(tpl.text)} chars, "
+          f"{len(tpl.placeholders)} placeholders, n={args.n}")
+    for label, fn in cases.items():
+        best = min(timeit.repeat(fn, number=args.n, repeat=5)) / args.n
+        print(f"  {label:<36} {best * 1e6:8.2f} µs/render")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Load test: N llamadas concurrentes a `/api/research/json` contra la app real.
+
+La app FastAPI corre en este proceso (uvicorn en un thread con su propio
+event loop) con todo el I/O saliente redirigido a `bench.standin` (proceso
+aparte) vía `StandInTransport`. Para cada nivel de concurrencia reporta
+throughput, p50/p99 de latencia, tasa de error y el lag del event loop de la
+app (cuánto se atrasa un `asyncio.sleep` periódico): el lag alto indica CPU
+bloqueando el loop; la latencia alta con lag bajo, espera en I/O o en el
+lock de DDG.
+
+Uso:
+    python -m bench.load_test [--levels 1,2,4,8,16,32,64] [--per-worker 2]
+                              [--latency-scale 1.0] [--error-rate ddg=0.2 ...]
+                              [--profile perfil.json] [--json]
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+from bench.bench_e2e import percentile, use_transport
+from bench.standin import StandInServer, StandInTransport, free_port, load_corpus, load_profile
+from config.settings import get_settings
+
+DEFAULT_LEVELS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class LoopLagMonitor:
+    """Mide el atraso de un sleep periódico en el loop donde corre."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples: list[float] = []
+
+    async def run(self):
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(time.perf_counter() - t0 - self.interval, 0.0))
+
+    def take(self) -> list[float]:
+        samples, self.samples = self.samples, []
+        return samples
+
+
+class AppServer:
+    """La app web en un thread con su propio loop (+ monitor de lag)."""
+
+    def __init__(self):
+        import uvicorn
+        from webapp.app import app
+
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.lag = LoopLagMonitor()
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+
+    async def _serve(self):
+        monitor = asyncio.create_task(self.lag.run())
+        try:
+            await self._server.serve()
+        finally:
+            monitor.cancel()
+
+    def __enter__(self) -> "AppServer":
+        self._thread.start()
+        deadline = time.monotonic() + 20
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("La app no arrancó")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(10)
+
+
+async def drive(base_url: str, prospects: list[dict], concurrency: int, per_worker: int) -> dict:
+    """`concurrency` clientes en lazo cerrado, `per_worker` requests cada uno."""
+    latencies: list[float] = []
+    errors = 0
+    queue = list(prospects)
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        for _ in range(per_worker):
+            p = queue.pop()
+            t0 = time.perf_counter()
+            try:
+                response = await client.post("/api/research/json", json={
+                    "name": p["name"], "company": p["company"], "role": p["role"], "location": p["location"],
+                })
+                failed = response.status_code != 200 or bool(response.json().get("error"))
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - t0)
+            errors += failed
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=180, limits=limits) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+    return {"latencies": latencies, "errors": errors, "wall_seconds": wall}
+
+
+def _prospects_for(corpus: list[dict], n: int, offset: int) -> list[dict]:
+    # Copias con nombre único: investigaciones idénticas se coalescen
+    # (singleflight) y no medirían carga real.
+    out = []
+    for i in range(n):
+        p = dict(corpus[(offset + i) % len(corpus)])
+        if offset + i >= len(corpus):
+            p["name"] = f"{p['name']} {offset + i}"
+        out.append(p)
+    return out
+
+
+def run_load_test(levels=DEFAULT_LEVELS, per_worker: int = 2, latency_scale: float = 1.0,
+                  profile: Optional[dict] = None) -> dict:
+    corpus = load_corpus()
+    settings = get_settings()
+    saved_workers = settings.queue.workers
+    settings.queue.workers = 0  # /research/json es síncrono: sin pool de la cola
+    rows = []
+    try:
+        with StandInServer(latency_scale=latency_scale, profile=profile) as standin, \
+                use_transport(StandInTransport(standin.base_url)), AppServer() as app:
+            offset = 0
+            for level in levels:
+                n = level * per_worker
+                app.lag.take()
+                run = asyncio.run(drive(app.base_url, _prospects_for(corpus, n, offset), level, per_worker))
+                offset += n
+                lag = app.lag.take() or [0.0]
+                rows.append({
+                    "concurrency": level,
+                    "requests": n,
+                    "throughput_rps": round(n / run["wall_seconds"], 3),
+                    "p50_s": round(percentile(run["latencies"], 50), 3),
+                    "p99_s": round(percentile(run["latencies"], 99), 3),
+                    "error_rate": round(run["errors"] / n, 3),
+                    "loop_lag_p99_ms": round(percentile(lag, 99) * 1000, 1),
+                    "loop_lag_max_ms": round(max(lag) * 1000, 1),
+                })
+    finally:
+        settings.queue.workers = saved_workers
+    return {"latency_scale": latency_scale, "per_worker": per_worker, "levels": rows}
+
+
+def print_report(report: dict):
+    print(f"latencia x{report['latency_scale']}, {report['per_worker']} requests por cliente")
+    print(f"{'conc':>5}{'req':>6}{'req/s':>9}{'p50 (s)':>10}{'p99 (s)':>10}{'error':>8}"
+          f"{'lag p99 (ms)':>14}{'lag max (ms)':>14}")
+    for r in report["levels"]:
+        print(f"{r['concurrency']:>5}{r['requests']:>6}{r['throughput_rps']:>9.2f}{r['p50_s']:>10.2f}"
+              f"{r['p99_s']:>10.2f}{r['error_rate']:>8.1%}{r['loop_lag_p99_ms']:>14.1f}{r['loop_lag_max_ms']:>14.1f}")
+
+
+def _parse_error_rates(values: list[str], profile: dict) -> dict:
+    for value in values:
+        upstream, _, rate = value.partition("=")
+        if upstream not in profile:
+            raise SystemExit(f"Upstream desconocido: {upstream} (usar {', '.join(profile)})")
+        profile[upstream] = {**profile[upstream], "error_rate": float(rate)}
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default=",".join(map(str, DEFAULT_LEVELS)),
+                        help="Niveles de concurrencia separados por coma")
+    parser.add_argument("--per-worker", type=int, default=2, help="Requests por cliente concurrente")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplicador de las latencias del perfil (0 = sin esperas)")
+    parser.add_argument("--profile", help="Perfil de latencias/errores (JSON como bench/fixtures/latency_profile.json)")
+    parser.add_argument("--error-rate", action="append", default=[], metavar="UPSTREAM=TASA",
+                        help="Sobrescribe la tasa de error de un upstream (repetible)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    profile = load_profile()
+    if args.profile:
+        with open(args.profile, encoding="utf-8") as f:
+            profile.update({k: v for k, v in json.load(f).items() if not k.startswith("_")})
+    profile = _parse_error_rates(args.error_rate, profile)
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+
+    report = run_load_test(levels, args.per_worker, args.latency_scale, profile)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
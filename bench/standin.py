@@ -0,0 +1,595 @@
+"""Servidor local que hace de todos los upstreams (DDG, Google, sitios
+corporativos, LinkedIn, Perplexity, DeepSeek, Anthropic) para bench/.
+
+Las respuestas se generan desde el corpus fijo (`fixtures/prospects.json`)
+con el mismo formato que devuelven los servicios reales, y cada request
+espera una latencia muestreada del perfil de producción
+(`fixtures/latency_profile.json`, lognormal a partir de p50/p95).
+
+Rutas:
+    GET  /web?url=...             HTML de Google, sitio corporativo o LinkedIn
+                                  (status real en el header X-Upstream-Status)
+    GET  /ddg/{text|news|text_recent}?q=...&max_results=N
+    POST /perplexity/chat/completions (con "stream": true responde SSE)
+    POST /deepseek/chat/completions
+    POST /anthropic/v1/messages
+    POST /_control                {"latency_scale": 0.0} ajusta latencias
+    GET  /_health
+
+Uso directo (para pruebas manuales):
+    python -m bench.standin --port 8765
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import multiprocessing
+import random
+import re
+import socket
+import time
+import unicodedata
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+from scraper.transport import PASSTHROUGH, Transport
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+UPSTREAM_STATUS_HEADER = "X-Upstream-Status"
+# Headers de requests condicionales que se reenvían a /web
+_CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+
+_OTHER_COMPANIES = ["Constructora Sur", "Retail Andino", "Banco Austral", "Clínica Oriente", "Seguros Pacífico"]
+# Páginas del sitemap de los sitios corporativos
+_SITE_PAGES = ("nosotros", "productos", "proyectos", "sustentabilidad", "noticias", "contacto",
+               "politica-de-privacidad")
+
+
+def load_corpus() -> list[dict]:
+    return json.loads((FIXTURES_DIR / "prospects.json").read_text(encoding="utf-8"))
+
+
+def load_profile() -> dict:
+    data = json.loads((FIXTURES_DIR / "latency_profile.json").read_text(encoding="utf-8"))
+    return {k: v for k, v in data.items() if not k.startswith("_")}
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", _fold(text)).strip("-")
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class Upstreams:
+    """Genera las respuestas de cada upstream a partir del corpus."""
+
+    def __init__(self, corpus: list[dict], profile: dict, seed: int = 7, latency_scale: float = 1.0):
+        self.corpus = corpus
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.latency_scale = latency_scale
+        self._seen_prefixes: set[str] = set()
+        # Empresas más largas primero: "Celulosa Biobío" antes que un prefijo
+        self._by_company = sorted(corpus, key=lambda p: -len(p["company"]))
+
+    # --- Latencia / errores ------------------------------------------------
+
+    def latency(self, upstream: str) -> float:
+        """Latencia simulada (lognormal según p50/p95 del perfil) en segundos."""
+        cfg = self.profile.get(upstream, {})
+        if self.latency_scale <= 0 or not cfg.get("p50"):
+            return 0.0
+        mu = math.log(cfg["p50"])
+        sigma = max(math.log(cfg["p95"] / cfg["p50"]) / 1.645, 1e-6)
+        return self.rng.lognormvariate(mu, sigma) * self.latency_scale
+
+    def error(self, upstream: str) -> Optional[int]:
+        cfg = self.profile.get(upstream, {})
+        if self.rng.random() < cfg.get("error_rate", 0.0):
+            return cfg.get("error_status", 500)
+        return None
+
+    async def delay(self, upstream: str) -> Optional[int]:
+        """Esperar la latencia simulada; devuelve un status de error o None."""
+        seconds = self.latency(upstream)
+        if seconds:
+            await asyncio.sleep(seconds)
+        return self.error(upstream)
+
+    # --- Identificación del prospecto -------------------------------------
+
+    def by_company(self, text: str) -> Optional[dict]:
+        folded = _fold(text)
+        for p in self._by_company:
+            if _fold(p["company"]) in folded:
+                # Si el nombre también aparece, preferir ese prospecto exacto
+                same = [q for q in self.corpus if q["company"] == p["company"]]
+                for q in same:
+                    if _fold(" ".join(q["name"].split()[:2])) in folded:
+                        return q
+                return p
+        return None
+
+    def by_host(self, host: str) -> Optional[dict]:
+        host = host.lower().removeprefix("www.")
+        for p in self.corpus:
+            if urlparse(p["domain"]).netloc.removeprefix("www.") == host:
+                return p
+        return None
+
+    def by_linkedin_slug(self, slug: str) -> Optional[dict]:
+        for p in self.corpus:
+            if _slug(p["name"]) == slug:
+                return p
+        return None
+
+    @staticmethod
+    def linkedin_url(p: dict) -> str:
+        return f"https://cl.linkedin.com/in/{_slug(p['name'])}"
+
+    @staticmethod
+    def news_url(p: dict, i: int) -> str:
+        return f"https://www.diariofinanciero.cl/empresas/{_slug(p['company'])}-{_slug(p['news'][i])[:40]}"
+
+    # --- DDG ---------------------------------------------------------------
+
+    def ddg(self, kind: str, query: str, max_results: int) -> list[dict]:
+        p = self.by_company(query)
+        if p is None:
+            return []
+        if kind == "news":
+            return [
+                {"date": "2026-09-0%d" % (i + 1), "title": f"{p['company']} {n}", "url": self.news_url(p, i),
+                 "body": f"{p['company']} {n} en su operación de {p['city']}.", "source": "Diario Financiero"}
+                for i, n in enumerate(p["news"])
+            ][:max_results]
+        if kind == "text_recent":
+            return [
+                {"title": f"{p['company']} {n}", "href": self.news_url(p, i),
+                 "body": f"La empresa {p['company']} {n}. El proyecto se ubica en {p['city']}."}
+                for i, n in enumerate(p["news"])
+            ][:max_results]
+
+        q = _fold(query)
+        if "sitio web oficial" in q:
+            if not p["has_website"]:
+                return []
+            return [{"title": f"{p['company']} - Sitio oficial", "href": p["domain"] + "/",
+                     "body": f"{p['company']}: {p['product']}."}]
+        if "linkedin" in q:
+            results = []
+            if "site:" not in q or self.rng.random() < 0.7:
+                results.append({
+                    "title": f"{p['name']} - {p['role']} - {p['company']} | LinkedIn",
+                    "href": self.linkedin_url(p),
+                    "body": f"{p['role']} en {p['company']} · Educación: {p['education']} · "
+                            f"Ubicación: {p['city']}, Chile · 500+ contactos",
+                })
+            for h in range(p["homonyms"]):
+                other = _OTHER_COMPANIES[h % len(_OTHER_COMPANIES)]
+                results.append({
+                    "title": f"{p['name']} - Analista - {other} | LinkedIn",
+                    "href": f"https://cl.linkedin.com/in/{_slug(p['name'])}-{h + 1}",
+                    "body": f"Analista en {other}. Ubicación: Santiago, Chile",
+                })
+            return results[:max_results]
+
+        results = [
+            {"title": f"{p['company']} - {p['industry']} en Chile", "href": f"https://www.directorioindustrial.cl/{_slug(p['company'])}",
+             "body": f"{p['company']} produce {p['product']} en {p['city']}. Rubro: {p['industry']}."},
+            {"title": f"{p['name']} asume como {p['role']} de {p['company']}", "href": self.news_url(p, 0),
+             "body": f"{p['name']} fue nombrado {p['role']} de {p['company']}."},
+        ]
+        for h in range(p["homonyms"]):
+            other = _OTHER_COMPANIES[h % len(_OTHER_COMPANIES)]
+            results.append({"title": f"{p['name'].split()[0]} {p['name'].split()[1]} - {other}",
+                            "href": f"https://www.{_slug(other)}.cl/equipo",
+                            "body": f"Equipo de {other}: {p['name'].split()[0]} {p['name'].split()[1]}, ejecutiva comercial."})
+        return results[:max_results]
+
+    # --- HTML --------------------------------------------------------------
+
+    def web(self, url: str) -> tuple[str, int, str]:
+        """(upstream, status, html) para una URL de Google, LinkedIn o corporativa."""
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        if "google." in host:
+            q = parse_qs(parsed.query).get("q", [""])[0]
+            p = self.by_company(q)
+            if p is None:
+                return "google", 200, "<html><body></body></html>"
+            blocks = "".join(
+                f'<div class="g"><a href="{self.news_url(p, i)}"><h3>{p["company"]} {n}</h3></a>'
+                f'<div class="VwiC3b">{p["company"]} {n}.</div></div>'
+                for i, n in enumerate(p["news"])
+            )
+            return "google", 200, f"<html><body>{blocks}</body></html>"
+
+        if "linkedin.com" in host:
+            slug = parsed.path.rstrip("/").rsplit("/", 1)[-1]
+            p = self.by_linkedin_slug(slug)
+            if p is None:
+                return "linkedin", 404, ""
+            if not p["linkedin_public"]:
+                return "linkedin", 999, "<html><body>authwall join linkedin</body></html>" + " " * 600
+            ld = {
+                "@type": "Person", "name": p["name"], "jobTitle": p["role"],
+                "worksFor": {"name": p["company"]},
+                "address": {"addressLocality": p["city"], "addressRegion": "Chile"},
+                "alumniOf": [{"name": p["education"]}],
+            }
+            html = (
+                f"<html><head><title>{p['name']} - {p['role']} - {p['company']} | LinkedIn</title>"
+                f'<meta property="og:title" content="{p["name"]} - {p["role"]} - {p["company"]} | LinkedIn">'
+                f'<meta name="description" content="Experiencia: {p["company"]} · Educación: {p["education"]} · '
+                f'Ubicación: {p["city"]}, Chile · Más de 500 contactos en LinkedIn.">'
+                f'<script type="application/ld+json">{json.dumps(ld, ensure_ascii=False)}</script>'
+                f"</head><body>{'perfil ' * 100}</body></html>"
+            )
+            return "linkedin", 200, html
+
+        p = self.by_host(host)
+        if p is None or not p["has_website"] or not host.endswith(".cl"):
+            return "corporate", 404, ""
+        path = parsed.path.strip("/") or "inicio"
+        if path == "robots.txt":
+            return "corporate", 200, f"User-agent: *\nDisallow: /intranet\nSitemap: {p['domain']}/sitemap.xml\n"
+        if path == "sitemap.xml":
+            locs = "".join(f"<url><loc>{p['domain']}/{s}</loc></url>" for s in _SITE_PAGES)
+            return "corporate", 200, f'<?xml version="1.0"?><urlset>{locs}</urlset>'
+        # Barra superior (idioma, legal, intranet) antes del menú, como en muchos sitios reales
+        topbar = "".join(f'<a href="/{s}">{t}</a>' for s, t in (("en", "English"), ("politica-de-privacidad",
+                                                                 "Privacidad"), ("intranet", "Intranet")))
+        nav = "".join(f'<a href="/{s}">{s.title()}</a>' for s in ("nosotros", "productos", "noticias", "contacto"))
+        body = {
+            "inicio": f"{p['company']} es líder en {p['product']} para la industria de {p['industry'].lower()}.",
+            "nosotros": f"Fundada hace más de 30 años en {p['city']}, {p['company']} emplea a 450 personas.",
+            "productos": f"Nuestros productos: {p['product']}, servicios técnicos y soporte en terreno.",
+            "proyectos": f"Proyectos recientes de {p['company']} para la industria de {p['industry'].lower()}.",
+            "sustentabilidad": f"{p['company']} reporta su huella de carbono y programas con la comunidad.",
+            "noticias": " ".join(f"{p['company']} {n}." for n in p["news"]),
+            "contacto": f"Oficina central: {p['city']}, Chile. Teléfono +56 2 2345 6789.",
+            "politica-de-privacidad": "Tratamiento de datos personales conforme a la ley 19.628.",
+            "en": f"{p['company']} is a leader in {p['product']}.",
+        }.get(path, "")
+        html = (
+            f"<html><head><title>{p['company']} | {path.title()}</title>"
+            f'<meta name="description" content="{p["company"]}: {p["product"]} desde {p["city"]}, Chile.">'
+            f"</head><body><header>{topbar}</header><nav>{nav}</nav><main><h1>{p['company']}</h1><p>{body}</p>"
+            f"<p>{'Compromiso con la seguridad, la calidad y la sostenibilidad. ' * 8}</p></main></body></html>"
+        )
+        return "corporate", 200, html
+
+    # --- APIs --------------------------------------------------------------
+
+    def perplexity(self, payload: dict) -> dict:
+        user = payload["messages"][-1]["content"]
+        p = self.by_company(user)
+        if p is None:
+            content = {"persona": {}, "empresa": {}, "hallazgos": []}
+            citations = []
+        else:
+            content = {
+                "persona": {
+                    "nombre_completo": p["name"], "cargo_actual": p["role"], "empresa_actual": p["company"],
+                    "linkedin_url": self.linkedin_url(p), "trayectoria": f"Más de 10 años en {p['industry'].lower()}.",
+                    "educacion": p["education"], "ubicacion": f"{p['city']}, Chile", "logros_recientes": [],
+                },
+                "empresa": {
+                    "nombre": p["company"], "industria": p["industry"],
+                    "descripcion": f"{p['company']} produce {p['product']}.",
+                    "productos_servicios": [p["product"]], "tamano_empleados": "200-500",
+                    "ubicacion": f"{p['city']}, Chile", "sitio_web": p["domain"] if p["has_website"] else "",
+                    "desafios_sector": ["eficiencia energética"], "competidores": [], "presencia": "Chile",
+                },
+                "hallazgos": [{"titulo": f"{p['company']} {n}", "resumen": f"{p['company']} {n}.", "fecha": "2026"}
+                              for n in p["news"]],
+            }
+            citations = [self.linkedin_url(p)] + [self.news_url(p, i) for i in range(len(p["news"]))]
+        # Consultas separadas de persona y de empresa: solo las claves del esquema pedido
+        system = payload["messages"][0]["content"]
+        content = {k: v for k, v in content.items() if f'"{k}"' in system}
+        text = json.dumps(content, ensure_ascii=False)
+        return {
+            "choices": [{"message": {"content": f"```json\n{text}\n```"}}],
+            "citations": citations,
+            "usage": {"prompt_tokens": _tokens(user), "completion_tokens": _tokens(text)},
+        }
+
+    @staticmethod
+    def _classify(p: Optional[dict], user: str) -> list[dict]:
+        """Prospecto si el resultado nombra a la empresa del prospecto; si no, irrelevante."""
+        verdicts = []
+        for block in re.split(r"\n(?=\[\d+\] )", user):
+            m = re.match(r"\[(\d+)\] ", block)
+            if not m:
+                continue
+            relevant = p is not None and _fold(p["company"]) in _fold(block)
+            verdicts.append({"indice": int(m.group(1)), "categoria": "prospecto" if relevant else "irrelevante",
+                             "razon": "coincide empresa" if relevant else "otra empresa"})
+        return verdicts
+
+    def llm_content(self, system: str, user: str) -> str:
+        """Respuesta JSON según el prompt (resolución, análisis o email)."""
+        if "Resolución de Entidades" in system:
+            if "Modo lote" in system:
+                groups = re.split(r"\n# Grupo (\d+)\n", user)
+                return json.dumps({"grupos": [
+                    {"grupo": int(n), "clasificaciones": self._classify(self.by_company(text), text)}
+                    for n, text in zip(groups[1::2], groups[2::2])
+                ]}, ensure_ascii=False)
+            return json.dumps({"clasificaciones": self._classify(self.by_company(user), user)}, ensure_ascii=False)
+
+        p = self.by_company(user)
+
+        if "SMTYKM" in system[:200] and p is not None:
+            return json.dumps({
+                "asunto": f"{p['company']}: {p['news'][0]}",
+                "cuerpo_html": f"<p>Hola {p['name'].split()[0]},</p><p>Vi que {p['company']} {p['news'][0]}.</p>"
+                               f"<p>Saludos,<br>Gustavo Peralta</p>",
+                "cuerpo_texto": f"Hola {p['name'].split()[0]}, vi que {p['company']} {p['news'][0]}.",
+                "razonamiento": "Gancho con noticia reciente de la empresa.",
+            }, ensure_ascii=False)
+
+        if p is None:
+            return json.dumps({"persona": {}, "empresa": {}, "hallazgos": [], "hallazgo_tipo": "D",
+                               "score": 10, "cargo_descubierto": ""})
+        return json.dumps({
+            "persona": {
+                "nombre": p["name"], "cargo": p["role"], "empresa": p["company"],
+                "linkedin": self.linkedin_url(p), "trayectoria": f"Profesional de {p['industry'].lower()}.",
+                "educacion": p["education"], "intereses": "", "ubicacion": f"{p['city']}, Chile",
+                "logros_recientes": [], "experiencia_previa": [],
+            },
+            "empresa": {
+                "nombre": p["company"], "industria": p["industry"], "tamano_empleados": "200-500",
+                "descripcion": f"{p['company']} produce {p['product']}.",
+                "noticias_recientes": [f"{p['company']} {n}" for n in p["news"]],
+                "productos_servicios": [p["product"]], "desafios_sector": [], "competidores": [],
+                "ubicacion": p["city"], "presencia": "Chile",
+                "sitio_web": p["domain"] if p["has_website"] else "", "sitio_web_corresponde": True,
+            },
+            "hallazgos": [{"content": f"{p['company']} {n}", "tipo": "A", "sources": [self.news_url(p, i)],
+                           "confidence": "partial"} for i, n in enumerate(p["news"])],
+            "hallazgo_tipo": "A", "score": 75, "cargo_descubierto": p["role"],
+        }, ensure_ascii=False)
+
+    def cached_tokens(self, prefix: str) -> int:
+        """Simula el cache de prefijo del proveedor: hit desde la 2ª vez."""
+        key = hashlib.sha256(prefix.encode()).hexdigest()
+        hit = key in self._seen_prefixes
+        self._seen_prefixes.add(key)
+        return _tokens(prefix) if hit else 0
+
+    def deepseek(self, payload: dict) -> dict:
+        system = payload["messages"][0]["content"]
+        user = payload["messages"][-1]["content"]
+        content = self.llm_content(system, user)
+        prompt = _tokens(system) + _tokens(user)
+        hit = self.cached_tokens(system)
+        return {
+            "choices": [{"message": {"content": content}}],
+            "usage": {"prompt_tokens": prompt, "completion_tokens": _tokens(content),
+                      "prompt_cache_hit_tokens": hit, "prompt_cache_miss_tokens": prompt - hit},
+        }
+
+    def anthropic(self, payload: dict) -> dict:
+        system = "\n\n".join(b["text"] for b in payload.get("system", []))
+        user = payload["messages"][-1]["content"]
+        content = self.llm_content(system, user)
+        hit = self.cached_tokens(system)
+        return {
+            "content": [{"type": "text", "text": content}],
+            "usage": {"input_tokens": _tokens(user) + (0 if hit else _tokens(system)),
+                      "output_tokens": _tokens(content), "cache_read_input_tokens": hit,
+                      "cache_creation_input_tokens": 0 if hit else _tokens(system)},
+        }
+
+
+class StandInTransport(Transport):
+    """Transporte que manda todo el I/O de los scrapers al stand-in.
+
+    Las APIs (Perplexity, DeepSeek, Anthropic) van a su ruta del stand-in
+    conservando la URL real en el cassette; el resto de URLs se pide a
+    `/web?url=...` y ddgs a `/ddg/{kind}`. Admite los modos de `Transport`
+    (p. ej. grabar un cassette que luego se reproduce sin stand-in).
+    """
+
+    API_ROUTES = {"api.deepseek.com": "/deepseek", "api.anthropic.com": "/anthropic", "api.perplexity.ai": "/perplexity"}
+
+    def __init__(self, base_url: str, mode: str = PASSTHROUGH, cassette: Optional[str] = None):
+        super().__init__(mode, cassette)
+        self.base_url = base_url
+
+    @staticmethod
+    def _status(response: httpx.Response) -> int:
+        return int(response.headers.get(UPSTREAM_STATUS_HEADER, response.status_code))
+
+    async def _http(self, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+        parsed = urlparse(url)
+        if parsed.netloc in self.API_ROUTES:
+            url = f"{self.base_url}{self.API_ROUTES[parsed.netloc]}{parsed.path}"
+        if url.startswith(self.base_url):
+            return await super()._http(client, method, url, **kwargs)
+        target = str(httpx.URL(url, params=kwargs.get("params")))
+        sent = httpx.Headers(kwargs.get("headers") or {})
+        conditional = {name: sent[name] for name in _CONDITIONAL_HEADERS if name in sent}
+        response = await client.get(f"{self.base_url}/web", params={"url": target}, headers=conditional)
+        headers = {name: response.headers[name] for name in ("content-type", "etag") if name in response.headers}
+        content = response.content[:kwargs["max_bytes"]] if kwargs.get("max_bytes") else response.content
+        return httpx.Response(self._status(response), content=content, headers=headers,
+                              request=httpx.Request(method, target))
+
+    def _stream(self, client: httpx.AsyncClient, method: str, url: str, **kwargs):
+        parsed = urlparse(url)
+        if parsed.netloc in self.API_ROUTES:
+            url = f"{self.base_url}{self.API_ROUTES[parsed.netloc]}{parsed.path}"
+        return super()._stream(client, method, url, **kwargs)
+
+    def _ddg(self, kind: str, query: str, max_results: int) -> list[dict]:
+        response = httpx.get(f"{self.base_url}/ddg/{kind}", params={"q": query, "max_results": max_results}, timeout=30)
+        if response.status_code != 200:
+            raise RuntimeError(f"ddg {response.status_code}: ratelimit")
+        return response.json()
+
+    def _tls(self, url: str, profile, timeout: int) -> tuple[int, str]:
+        try:
+            response = httpx.get(f"{self.base_url}/web", params={"url": url}, timeout=timeout)
+            return self._status(response), response.text
+        except httpx.HTTPError:
+            return 0, ""
+
+
+def create_app(upstreams: Upstreams):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+
+    app = FastAPI()
+
+    @app.get("/_health")
+    async def health():
+        return {"ok": True}
+
+    @app.post("/_control")
+    async def control(request: Request):
+        data = await request.json()
+        if "latency_scale" in data:
+            upstreams.latency_scale = float(data["latency_scale"])
+        return {"latency_scale": upstreams.latency_scale}
+
+    @app.get("/web")
+    async def web(url: str, request: Request):
+        upstream, status, html = upstreams.web(url)
+        status = await upstreams.delay(upstream) or status
+        if upstream == "corporate" and status == 200:
+            # Los sitios corporativos mandan ETag y responden 304 si no cambió
+            etag = '"' + hashlib.blake2b(html.encode(), digest_size=8).hexdigest() + '"'
+            headers = {UPSTREAM_STATUS_HEADER: "200", "etag": etag}
+            if request.headers.get("if-none-match") == etag:
+                headers[UPSTREAM_STATUS_HEADER] = "304"
+                return Response(status_code=304, headers=headers)
+            return HTMLResponse(html, headers=headers)
+        # uvicorn no emite status fuera de 100-599 (LinkedIn usa 999): el
+        # status real viaja en UPSTREAM_STATUS_HEADER y lo aplica el cliente.
+        return HTMLResponse(html, status_code=status if status < 600 else 200,
+                            headers={UPSTREAM_STATUS_HEADER: str(status)})
+
+    @app.get("/ddg/{kind}")
+    async def ddg(kind: str, q: str, max_results: int = 5):
+        if await upstreams.delay("ddg"):
+            return JSONResponse({"error": "ratelimit"}, status_code=202)
+        return upstreams.ddg(kind, q, max_results)
+
+    @app.post("/perplexity/chat/completions")
+    async def perplexity(request: Request):
+        payload = await request.json()
+        if payload.get("stream"):
+            return perplexity_stream(payload)
+        error = await upstreams.delay("perplexity")
+        if error:
+            return JSONResponse({"error": "upstream"}, status_code=error)
+        return upstreams.perplexity(payload)
+
+    def perplexity_stream(payload: dict):
+        # Streaming: un cuarto de la latencia hasta el primer token y el resto
+        # repartido entre los chunks (la cola de hallazgos llega al final)
+        total = upstreams.latency("perplexity")
+        error = upstreams.error("perplexity")
+        if error:
+            return JSONResponse({"error": "upstream"}, status_code=error)
+        body = upstreams.perplexity(payload)
+        content = body["choices"][0]["message"]["content"]
+        pieces = [content[i:i + 24] for i in range(0, len(content), 24)] or [""]
+
+        async def events():
+            await asyncio.sleep(total * 0.25)
+            for piece in pieces:
+                chunk = {"choices": [{"delta": {"content": piece}}], "citations": body["citations"]}
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(total * 0.75 / len(pieces))
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/deepseek/chat/completions")
+    async def deepseek(request: Request):
+        payload = await request.json()
+        error = await upstreams.delay("deepseek")
+        if error:
+            return JSONResponse({"error": "upstream"}, status_code=error)
+        return upstreams.deepseek(payload)
+
+    @app.post("/anthropic/v1/messages")
+    async def anthropic(request: Request):
+        payload = await request.json()
+        error = await upstreams.delay("anthropic")
+        if error:
+            return JSONResponse({"error": "upstream"}, status_code=error)
+        return upstreams.anthropic(payload)
+
+    return app
+
+
+def serve(port: int, latency_scale: float = 1.0, seed: int = 7, profile: Optional[dict] = None):
+    import uvicorn
+
+    upstreams = Upstreams(load_corpus(), profile or load_profile(), seed=seed, latency_scale=latency_scale)
+    uvicorn.run(create_app(upstreams), host="127.0.0.1", port=port, log_level="warning")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class StandInServer:
+    """Servidor stand-in en un proceso aparte (no contamina CPU/allocs medidos)."""
+
+    def __init__(self, latency_scale: float = 1.0, seed: int = 7, profile: Optional[dict] = None):
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._args = (self.port, latency_scale, seed, profile)
+        self._process: Optional[multiprocessing.Process] = None
+
+    def __enter__(self) -> "StandInServer":
+        ctx = multiprocessing.get_context("spawn")
+        self._process = ctx.Process(target=serve, args=self._args, daemon=True)
+        self._process.start()
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(f"{self.base_url}/_health", timeout=0.5).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        self.__exit__(None, None, None)
+        raise RuntimeError("El servidor stand-in no arrancó")
+
+    def set_latency_scale(self, scale: float):
+        httpx.post(f"{self.base_url}/_control", json={"latency_scale": scale}, timeout=5)
+
+    def __exit__(self, *exc):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(5)
+            self._process = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor stand-in de upstreams")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    args = parser.parse_args()
+    serve(args.port, args.latency_scale)
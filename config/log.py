@@ -0,0 +1,137 @@
+"""Logging estructurado y no bloqueante con ID de request.
+
+Antes cada módulo hacía `print()` síncrono en los caminos calientes (varias
+líneas por item scrapeado): bajo carga el proceso se bloqueaba escribiendo a
+stdout y las investigaciones concurrentes quedaban intercaladas sin forma de
+separarlas. Ahora:
+
+- Los módulos usan `logging.getLogger(__name__)`.
+- El root logger solo tiene un `QueueHandler`: emitir un registro es
+  encolarlo. Un `QueueListener` (hilo aparte) formatea y escribe a stdout.
+- Cada registro lleva `request_id` (contextvar fijado por el middleware HTTP
+  o por el worker de la cola a partir del job).
+- Niveles por módulo con `LOG_LEVELS="scraper=WARNING,services.researcher=DEBUG"`;
+  el detalle por item va en DEBUG.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import uuid
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from typing import Optional, TextIO
+
+from config.settings import get_settings
+
+_request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Atributos estándar de LogRecord: lo demás (extra=...) va como campo JSON
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s [%(name)s] [%(request_id)s] %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def get_request_id() -> str:
+    return _request_id.get()
+
+
+def set_request_id(request_id: str) -> Token:
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token: Token) -> None:
+    _request_id.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """Anota el request_id del contexto actual (corre en el hilo emisor)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def parse_module_levels(spec: str) -> dict[str, int]:
+    """'scraper=WARNING, services.researcher=debug' → {logger: nivel}."""
+    levels = {}
+    for part in spec.split(","):
+        name, sep, level = part.partition("=")
+        if not sep or not name.strip():
+            continue
+        value = logging.getLevelName(level.strip().upper())
+        if isinstance(value, int):
+            levels[name.strip()] = value
+    return levels
+
+
+def setup_logging(level: Optional[str] = None, module_levels: Optional[str] = None,
+                  fmt: Optional[str] = None, stream: Optional[TextIO] = None) -> logging.handlers.QueueListener:
+    """Configurar el root logger (idempotente: reconfigura si se llama de nuevo)."""
+    global _listener
+    cfg = get_settings().log
+    level = level or cfg.level
+    module_levels = cfg.module_levels if module_levels is None else module_levels
+    fmt = fmt or cfg.format
+
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        if isinstance(old, logging.handlers.QueueHandler):
+            root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name, value in parse_module_levels(module_levels).items():
+        logging.getLogger(name).setLevel(value)
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Vaciar la cola y detener el hilo escritor."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
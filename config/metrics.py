@@ -0,0 +1,137 @@
+"""Métricas Prometheus del pipeline y de los upstreams (expuestas en /metrics).
+
+Hasta ahora la única señal de rendimiento eran líneas `print()`: ajustar
+WEB_SCRAPE_TIMEOUT / PERPLEXITY_TIMEOUT era adivinar. Estas métricas cubren:
+
+- Cada scraper del orquestador: latencia por desenlace (ok, error, timeout,
+  cancelled), items devueltos y el timeout adaptativo vigente.
+- Etapas del pipeline: scraping, resolución de entidades, verificación,
+  análisis LLM, email.
+- LLM por proveedor y propósito: latencia y tokens (entrada, cacheados,
+  salida), y fallos; prospectos por llamada de resolución en lote.
+- Espera por el lock de DDG y resultados de TLS fetch por status.
+
+Las métricas son por proceso (registro por defecto de prometheus_client):
+los procesos worker de la cola aparte no se ven en el /metrics del web.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Buckets en segundos pensados para los timeouts actuales (12 s web, 30 s Perplexity)
+_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 12, 20, 30, 45, 60)
+_ITEM_BUCKETS = (0, 1, 2, 3, 5, 8, 10, 15, 20, 30, 50)
+
+SCRAPER_SECONDS = Histogram(
+    "scraper_duration_seconds", "Duración de cada scraper del orquestador",
+    ["scraper", "outcome"], buckets=_LATENCY_BUCKETS,
+)
+SCRAPER_TIMEOUT = Gauge(
+    "scraper_timeout_seconds", "Último timeout aplicado a cada scraper (adaptativo, ver scraper/latency.py)",
+    ["scraper"],
+)
+SCRAPER_ITEMS = Histogram(
+    "scraper_items", "Items devueltos por scraper (solo ejecuciones ok)",
+    ["scraper"], buckets=_ITEM_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_duration_seconds", "Duración de cada etapa del pipeline de investigación",
+    ["stage"], buckets=_LATENCY_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    "llm_request_duration_seconds", "Latencia de las llamadas LLM exitosas",
+    ["provider", "purpose"], buckets=_LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens", "Tokens consumidos por proveedor, propósito y tipo",
+    ["provider", "purpose", "kind"],
+)
+LLM_FAILURES = Counter(
+    "llm_failures", "Llamadas LLM fallidas (el cliente cae al siguiente proveedor)",
+    ["provider", "purpose"],
+)
+PERPLEXITY_COMPANY_CACHE = Counter(
+    "perplexity_company_cache", "Consultas de empresa a Perplexity servidas desde cache (hit) o la API (miss)",
+    ["result"],
+)
+ENTITY_VERDICT_CACHE = Counter(
+    "entity_verdict_cache", "Candidatos de la resolución de entidades con veredicto guardado (hit) o enviados al LLM (miss)",
+    ["result"],
+)
+ENTITY_PRECLASSIFIER = Counter(
+    "entity_preclassifier", "Candidatos decididos por el preclasificador local (keep/drop) o enviados al LLM (ambiguous, audit)",
+    ["result"],
+)
+ENTITY_BATCH_PROSPECTS = Histogram(
+    "entity_batch_prospects", "Prospectos por llamada de resolución de entidades en modo lote",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16),
+)
+DDG_LOCK_WAIT = Histogram(
+    "ddg_lock_wait_seconds", "Espera por el lock que serializa las búsquedas DDG",
+    ["kind"], buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20),
+)
+CORPORATE_CRAWL_PAGES = Counter(
+    "corporate_crawl_pages", "Páginas internas pedidas por el crawl corporativo: con contenido, vacías o fallidas",
+    ["result"],
+)
+CORPORATE_PAGE_CACHE = Counter(
+    "corporate_page_cache",
+    "Páginas corporativas servidas desde el cache tras un 304 (revalidated), bajadas de nuevo (changed) o sin copia (miss)",
+    ["result"],
+)
+TLS_FETCHES = Counter(
+    "tls_fetch", "Requests con TLS impersonation por status HTTP (0 = error de red)",
+    ["status"],
+)
+TLS_SECONDS = Histogram(
+    "tls_fetch_duration_seconds", "Duración de los requests con TLS impersonation",
+    buckets=_LATENCY_BUCKETS,
+)
+
+
+_current_stage: ContextVar[str] = ContextVar("pipeline_stage", default="other")
+
+# Observadores extra de duración por etapa, (stage, segundos): los usa bench/
+# para percentiles exactos (los histogramas solo dan buckets).
+stage_observers: list[Callable[[str, float], None]] = []
+
+
+def current_stage() -> str:
+    """Etapa en curso (etiqueta `purpose` de las métricas LLM)."""
+    return _current_stage.get()
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Medir una etapa del pipeline (se registra también si lanza excepción).
+
+    Mientras dura, las llamadas LLM se atribuyen a esta etapa.
+    """
+    token = _current_stage.set(stage)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        for observer in stage_observers:
+            observer(stage, elapsed)
+        _current_stage.reset(token)
+
+
+def observe_llm(provider: str, purpose: str, usage) -> None:
+    """Registrar latencia y tokens de una respuesta LLM (`LLMUsage`)."""
+    if usage is None:
+        return
+    LLM_SECONDS.labels(provider, purpose).observe(usage.latency_s)
+    LLM_TOKENS.labels(provider, purpose, "input_uncached").inc(usage.uncached_input_tokens)
+    LLM_TOKENS.labels(provider, purpose, "input_cached").inc(usage.cached_input_tokens)
+    LLM_TOKENS.labels(provider, purpose, "output").inc(usage.output_tokens)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Cuerpo y content-type para el endpoint /metrics."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -14,15 +14,136 @@ class LLMConfig:
     anthropic_api_key: str
     deepseek_model: str = "deepseek-chat"
     haiku_model: str = "claude-haiku-4-5"
+    # Presupuesto (tokens estimados) para los hechos del prompt de análisis
+    context_token_budget: int = 3000
+    corporate_snippet_chars: int = 600
 
 
 @dataclass
 class ScraperConfig:
     max_results_per_source: int = 10
     timeout_seconds: int = 8
+    ddg_timeout_seconds: int = 15
+    # Terminación temprana de search_all (ver scraper/completion.py): complete | quorum | fast
+    completion_policy: str = "complete"
     user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 
 
+@dataclass
+class UpstreamConfig:
+    """Endpoints de las APIs externas (sobrescribibles para bench/ y load tests)."""
+    deepseek_url: str = "https://api.deepseek.com/chat/completions"
+    anthropic_url: str = "https://api.anthropic.com/v1/messages"
+    perplexity_url: str = "https://api.perplexity.ai/chat/completions"
+
+
+@dataclass
+class DeadlineConfig:
+    """Tiempo total por investigación (ver scraper/deadline.py)."""
+    default_seconds: float = 90.0
+    max_seconds: float = 300.0  # tope para el deadline que pida el cliente
+    # Tiempo que el scraping deja libre para resolución de entidades + análisis,
+    # y que la resolución deja para el análisis
+    scraping_reserve_seconds: float = 25.0
+    analysis_reserve_seconds: float = 15.0
+    # Tope de cada reserva como fracción de lo que queda (deadlines cortos)
+    reserve_max_share: float = 0.4
+
+
+@dataclass
+class PerplexityConfig:
+    """Consultas a Perplexity: cache de empresa y streaming (ver scraper/perplexity.py)."""
+    company_ttl_seconds: float = 6 * 3600  # 0 = sin cache
+    company_cache_size: int = 512
+    # Con persona/empresa ya cerradas en el stream, cuánto más esperar la cola de hallazgos
+    tail_grace_seconds: float = 2.0
+
+
+@dataclass
+class EntityResolutionConfig:
+    """Clasificación de resultados de búsqueda antes del análisis (ver services/dedup.py)."""
+    # Copias del mismo contenido: bits de SimHash para considerarlas candidatas (-1 = solo URL)
+    near_duplicate_bits: int = 12
+    # Modo lote entre investigaciones concurrentes (ver services/entity_batcher.py); 0 = desactivado
+    batch_window_ms: float = 0.0
+    batch_max_prospects: int = 8
+    batch_max_candidates: int = 40  # la respuesta tiene que caber en la salida del LLM
+    # Veredictos guardados entre investigaciones (ver services/verdict_cache.py); "" = desactivado.
+    # Se activa por entorno (ENTITY_VERDICT_CACHE_PATH), como el modo lote
+    verdict_cache_path: str = ""
+    verdict_ttl_days: float = 30
+    # Modelo del preclasificador local (ver services/preclassifier.py); sin archivo = desactivado
+    preclassifier_path: str = str(Path(__file__).parent.parent / "data" / "entity_preclassifier.json")
+    # Fracción de decisiones del preclasificador que igual van al LLM (auditoría y log de entrenamiento)
+    preclassifier_audit_rate: float = 0.05
+
+
+@dataclass
+class CorporateCrawlConfig:
+    """Crawl del sitio corporativo (ver scraper/site_crawl.py)."""
+    max_pages: int = 4  # páginas internas además de la homepage
+    max_bytes: int = 2_000_000  # HTML de las páginas por sitio
+    # Leer robots.txt y sitemap.xml para encontrar candidatas. Desactivado: en
+    # el corpus da las mismas páginas útiles que los links de la homepage con
+    # más requests por sitio
+    sitemap: bool = False
+    max_sitemap_urls: int = 2000
+    max_sitemap_bytes: int = 500_000  # tope de lectura de cada robots.txt/sitemap, aparte de max_bytes
+    # Páginas con ETag/Last-Modified para revalidar con 304 (ver scraper/page_cache.py); "" = desactivado
+    page_cache_path: str = str(Path(__file__).parent.parent / "data" / "corporate_pages.sqlite3")
+    page_cache_ttl_days: float = 30
+
+
+@dataclass
+class AdaptiveTimeoutConfig:
+    """Timeouts por scraper derivados de su latencia reciente (ver scraper/latency.py)."""
+    percentile: float = 0.95
+    multiplier: float = 1.25  # margen sobre el percentil observado
+    window: int = 200  # ejecuciones recientes por scraper
+    min_samples: int = 20  # antes de esto, timeouts fijos (12 s web, 30 s Perplexity)
+    # Piso:techo en segundos por scraper
+    bounds: str = ("LinkedInScraper=6:20,CorporateSiteScraper=4:15,GoogleSearchScraper=3:12,"
+                   "GoogleNewsScraper=3:12,PerplexityScraper=10:30")
+
+
+@dataclass
+class IOConfig:
+    """Transporte del I/O saliente (ver scraper/transport.py)."""
+    mode: str = "passthrough"  # passthrough | record | replay
+    cassette: str = ""  # ruta del cassette gzip (record/replay)
+    replay_latency: float = 0.0  # en replay: 0 = sin esperas, 1 = latencia grabada
+
+
+@dataclass
+class SnapshotConfig:
+    """HTML crudo bajado por los scrapers, comprimido (ver scraper/snapshots.py)."""
+    # Se activa por entorno (SNAPSHOT_PATH), como el cache de veredictos
+    path: str = ""
+    retention_days: float = 30
+    reuse_seconds: float = 0  # URL bajada hace menos de esto: se sirve del snapshot (0 = siempre bajar)
+    offline: bool = False  # reprocesar: solo snapshots, sin red
+
+
+@dataclass
+class QueueConfig:
+    """Cola persistente de investigaciones (SQLite) y su pool de workers."""
+    db_path: str = str(Path(__file__).parent.parent / "data" / "jobs.sqlite3")
+    workers: int = 2  # workers async dentro del proceso web; 0 = solo procesos worker aparte
+    poll_interval: float = 0.5
+    lease_seconds: int = 60  # sin heartbeat en este plazo, el job vuelve a la cola
+    max_attempts: int = 3
+    retention_days: float = 7  # jobs terminados hace más de esto se borran (0 = nunca)
+
+
+@dataclass
+class LogConfig:
+    """Logging estructurado (ver config/log.py)."""
+    level: str = "INFO"
+    # Niveles por módulo: "scraper=WARNING,services.researcher=DEBUG"
+    module_levels: str = ""
+    format: str = "text"  # "text" (legible) o "json" (una línea por registro)
+
+
 @dataclass
 class AppConfig:
     mode: str = "development"
@@ -46,15 +167,76 @@ class Settings:
         self.llm = LLMConfig(
             deepseek_api_key=os.getenv("DEEPSEEK_API_KEY", ""),
             anthropic_api_key=os.getenv("ANTHROPIC_API_KEY", ""),
+            context_token_budget=int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", "3000")),
+        )
+        self.scraper = ScraperConfig(
+            completion_policy=os.getenv("COMPLETION_POLICY", "complete"),
+        )
+        self.upstream = UpstreamConfig(
+            deepseek_url=os.getenv("DEEPSEEK_URL", UpstreamConfig.deepseek_url),
+            anthropic_url=os.getenv("ANTHROPIC_URL", UpstreamConfig.anthropic_url),
+            perplexity_url=os.getenv("PERPLEXITY_URL", UpstreamConfig.perplexity_url),
+        )
+        self.deadline = DeadlineConfig(
+            default_seconds=float(os.getenv("RESEARCH_DEADLINE_SECONDS", "90")),
+            max_seconds=float(os.getenv("RESEARCH_MAX_DEADLINE_SECONDS", "300")),
+        )
+        self.entity_resolution = EntityResolutionConfig(
+            near_duplicate_bits=int(os.getenv("ENTITY_NEAR_DUPLICATE_BITS", "12")),
+            batch_window_ms=float(os.getenv("ENTITY_BATCH_WINDOW_MS", "0")),
+            batch_max_prospects=int(os.getenv("ENTITY_BATCH_MAX_PROSPECTS", "8")),
+            batch_max_candidates=int(os.getenv("ENTITY_BATCH_MAX_CANDIDATES", "40")),
+            verdict_cache_path=os.getenv("ENTITY_VERDICT_CACHE_PATH", ""),
+            verdict_ttl_days=float(os.getenv("ENTITY_VERDICT_TTL_DAYS", "30")),
+            preclassifier_path=os.getenv("ENTITY_PRECLASSIFIER_PATH", EntityResolutionConfig.preclassifier_path),
+            preclassifier_audit_rate=float(os.getenv("ENTITY_PRECLASSIFIER_AUDIT_RATE", "0.05")),
+        )
+        self.corporate_crawl = CorporateCrawlConfig(
+            max_pages=int(os.getenv("CORPORATE_CRAWL_MAX_PAGES", "4")),
+            max_bytes=int(os.getenv("CORPORATE_CRAWL_MAX_BYTES", "2000000")),
+            sitemap=os.getenv("CORPORATE_CRAWL_SITEMAP", "false").lower() in ("1", "true", "yes"),
+            max_sitemap_bytes=int(os.getenv("CORPORATE_CRAWL_MAX_SITEMAP_BYTES", "500000")),
+            page_cache_path=os.getenv("CORPORATE_PAGE_CACHE_PATH", CorporateCrawlConfig.page_cache_path),
+            page_cache_ttl_days=float(os.getenv("CORPORATE_PAGE_CACHE_TTL_DAYS", "30")),
+        )
+        self.adaptive_timeouts = AdaptiveTimeoutConfig(
+            percentile=float(os.getenv("SCRAPER_TIMEOUT_PERCENTILE", "0.95")),
+            multiplier=float(os.getenv("SCRAPER_TIMEOUT_MULTIPLIER", "1.25")),
+            min_samples=int(os.getenv("SCRAPER_TIMEOUT_MIN_SAMPLES", "20")),
+            bounds=os.getenv("SCRAPER_TIMEOUT_BOUNDS", AdaptiveTimeoutConfig.bounds),
+        )
+        self.io = IOConfig(
+            mode=os.getenv("IO_MODE", "passthrough"),
+            cassette=os.getenv("IO_CASSETTE", ""),
+            replay_latency=float(os.getenv("IO_REPLAY_LATENCY", "0")),
+        )
+        self.snapshots = SnapshotConfig(
+            path=os.getenv("SNAPSHOT_PATH", ""),
+            retention_days=float(os.getenv("SNAPSHOT_RETENTION_DAYS", "30")),
+            reuse_seconds=float(os.getenv("SNAPSHOT_REUSE_SECONDS", "0")),
+            offline=os.getenv("SNAPSHOT_OFFLINE", "false").lower() in ("1", "true", "yes"),
         )
-        self.scraper = ScraperConfig()
         self.app = AppConfig(
             mode=os.getenv("APP_MODE", "development"),
             port=int(os.getenv("PORT", "8000")),
             sender_name=os.getenv("SENDER_NAME", "Gustavo Peralta"),
             sender_company=os.getenv("SENDER_COMPANY", "Faymex"),
         )
+        self.queue = QueueConfig(
+            db_path=os.getenv("JOBS_DB_PATH", QueueConfig.db_path),
+            workers=int(os.getenv("RESEARCH_WORKERS", "2")),
+            retention_days=float(os.getenv("JOBS_RETENTION_DAYS", "7")),
+        )
+        self.log = LogConfig(
+            level=os.getenv("LOG_LEVEL", "INFO"),
+            module_levels=os.getenv("LOG_LEVELS", ""),
+            format=os.getenv("LOG_FORMAT", "text" if self.app.mode == "development" else "json"),
+        )
         self.perplexity_api_key: str = os.getenv("PERPLEXITY_API_KEY", "")
+        self.perplexity = PerplexityConfig(
+            company_ttl_seconds=float(os.getenv("PERPLEXITY_COMPANY_TTL_SECONDS", str(6 * 3600))),
+            tail_grace_seconds=float(os.getenv("PERPLEXITY_TAIL_GRACE_SECONDS", "2")),
+        )
 
     def validate(self) -> list[str]:
         errors = []
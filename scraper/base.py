@@ -1,15 +1,23 @@
 """Base scraper interface y tipos compartidos."""
 import asyncio
+import logging
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Optional
 
 import httpx
 
+from config import metrics
 from config.settings import get_settings
+from scraper.deadline import budget
+from scraper.snapshots import get_snapshot_store
+from scraper.transport import get_transport
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+
+@dataclass(slots=True)
 class ScrapedItem:
     url: str
     title: str
@@ -18,6 +26,11 @@ class ScrapedItem:
     timestamp: str = ""
 
 
+def truncated(response: httpx.Response, max_bytes: Optional[int]) -> bool:
+    """¿El cuerpo quedó cortado en `max_bytes` (ver `Transport.request`)?"""
+    return bool(max_bytes) and len(response.content) >= max_bytes
+
+
 class BaseScraper(ABC):
     """Interfaz base para todos los scrapers."""
 
@@ -27,6 +40,11 @@ class BaseScraper(ABC):
     # Lock compartido para serializar requests a DDG (evita rate limiting 202)
     _ddg_lock: Optional[asyncio.Lock] = None
 
+    # Event loop en que se crearon cliente y lock: ninguno de los dos sirve en
+    # otro loop (varios asyncio.run() en un mismo proceso, p. ej. bench/)
+    _client_loop: Optional[asyncio.AbstractEventLoop] = None
+    _ddg_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
     def __init__(self):
         self.settings = get_settings()
         self.headers = {
@@ -45,24 +63,28 @@ class BaseScraper(ABC):
 
     @classmethod
     def _get_ddg_lock(cls) -> asyncio.Lock:
-        """Obtener lock compartido para DDG (lazy init)."""
-        if cls._ddg_lock is None:
+        """Obtener lock compartido para DDG (lazy init, uno por event loop)."""
+        loop = asyncio.get_running_loop()
+        if cls._ddg_lock is None or cls._ddg_lock_loop is not loop:
             cls._ddg_lock = asyncio.Lock()
+            cls._ddg_lock_loop = loop
         return cls._ddg_lock
 
     @classmethod
     async def _get_client(cls, settings) -> httpx.AsyncClient:
         """Obtener cliente HTTP compartido con cookie jar persistente."""
-        if cls._shared_client is None or cls._shared_client.is_closed:
+        loop = asyncio.get_running_loop()
+        if cls._shared_client is None or cls._shared_client.is_closed or cls._client_loop is not loop:
             cls._shared_client = httpx.AsyncClient(
                 timeout=settings.scraper.timeout_seconds,
                 follow_redirects=True,
             )
+            cls._client_loop = loop
         return cls._shared_client
 
     @classmethod
     async def cleanup(cls):
-        """Cerrar el cliente HTTP compartido."""
+        """Cerrar el cliente HTTP compartido (al apagar el proceso: lifespan de la app, worker)."""
         if cls._shared_client and not cls._shared_client.is_closed:
             await cls._shared_client.aclose()
             cls._shared_client = None
@@ -73,41 +95,94 @@ class BaseScraper(ABC):
         """Buscar información sobre un prospecto."""
         ...
 
-    async def _make_request(self, url: str, params: Optional[dict] = None) -> Optional[str]:
-        """Hacer request HTTP con cliente compartido y cookie jar."""
+    async def _make_request(self, url: str, params: Optional[dict] = None,
+                            max_bytes: Optional[int] = None) -> Optional[str]:
+        """Hacer request HTTP con cliente compartido y cookie jar (cuerpo cortado en `max_bytes`)."""
+        response = await self._get(url, params, max_bytes=max_bytes)
+        if response is None:
+            return None
+        if response.status_code == 200:
+            return response.text
+        logger.debug("HTTP %s para %s", response.status_code, url)
+        return None
+
+    async def _get(self, url: str, params: Optional[dict] = None, extra_headers: Optional[dict] = None,
+                   max_bytes: Optional[int] = None) -> Optional[httpx.Response]:
+        """GET con cliente compartido; la respuesta con cualquier status, o None si no hubo respuesta.
+
+        Los 200 completos quedan en los snapshots de HTML (scraper/snapshots.py),
+        que también pueden responder en lugar de la red (reuso o modo
+        offline); esas respuestas llevan `extensions["snapshot"]`.
+        """
+        store = get_snapshot_store()
+        full_url = str(httpx.URL(url, params=params))
+        if store:
+            html = await asyncio.to_thread(store.reusable, full_url)
+            if html is not None:
+                return httpx.Response(200, text=html[:max_bytes] if max_bytes else html,
+                                      request=httpx.Request("GET", full_url), extensions={"snapshot": True})
+            if store.offline:
+                return None
+        timeout = budget(self.settings.scraper.timeout_seconds)
+        if timeout <= 0:
+            logger.debug("Sin tiempo para %s", url)
+            return None
+        headers = {**self.headers, **extra_headers} if extra_headers else self.headers
+        limit = {"max_bytes": max_bytes} if max_bytes else {}
         try:
             client = await self._get_client(self.settings)
-            response = await client.get(url, params=params, headers=self.headers)
-            if response.status_code == 200:
-                return response.text
-            print(f"[{self.__class__.__name__}] HTTP {response.status_code} para {url}")
-            return None
+            response = await get_transport().request(
+                client, "GET", url, params=params, headers=headers, timeout=timeout, **limit
+            )
+            if store and response.status_code == 200 and not truncated(response, max_bytes):
+                await asyncio.to_thread(store.put, full_url, response.text, "http")
+            return response
         except httpx.TimeoutException:
-            print(f"[{self.__class__.__name__}] Timeout para {url}")
+            logger.debug("Timeout para %s", url)
             return None
         except httpx.HTTPError as e:
-            print(f"[{self.__class__.__name__}] Error HTTP: {e}")
+            logger.debug("Error HTTP: %s", e)
             return None
 
+    async def _ddg_call(self, kind: str, query: str, max_results: int) -> list[dict]:
+        """Llamada ddgs en un thread, serializada por el lock de DDG y acotada al deadline del request.
+
+        El thread de DDGS no se puede interrumpir: si vence el plazo o cancelan
+        la tarea, el lock sigue tomado hasta que el thread termine, así la
+        siguiente búsqueda no sale mientras la anterior sigue en vuelo.
+        """
+        lock = self._get_ddg_lock()
+        t_wait = time.perf_counter()
+        await lock.acquire()
+        metrics.DDG_LOCK_WAIT.labels(kind).observe(time.perf_counter() - t_wait)
+        timeout = budget(self.settings.scraper.ddg_timeout_seconds)
+        if timeout <= 0:
+            lock.release()
+            return []
+        call = asyncio.ensure_future(asyncio.to_thread(get_transport().ddg, kind, query, max_results))
+
+        def release(done: asyncio.Future):
+            lock.release()
+            if not done.cancelled():
+                done.exception()  # leída aunque nadie la espere (plazo vencido)
+
+        call.add_done_callback(release)
+        return await asyncio.wait_for(asyncio.shield(call), timeout)
+
     async def _ddg_text_search(self, query: str, max_results: int = 5) -> list[dict]:
         """Search DDG using ddgs library (API-based, works from datacenter IPs).
 
         Returns list of dicts with keys: title, href, body.
         Uses Lock to serialize calls and avoid rate limiting.
         """
-        lock = self._get_ddg_lock()
-        async with lock:
-            try:
-                from ddgs import DDGS
-                results = await asyncio.to_thread(
-                    lambda: list(DDGS().text(query, max_results=max_results))
-                )
-                if results:
-                    print(f"[{self.__class__.__name__}] ddgs text: {len(results)} results for '{query[:50]}...'")
-                return results
-            except Exception as e:
-                print(f"[{self.__class__.__name__}] ddgs text error: {e}")
-                return []
+        try:
+            results = await self._ddg_call("text", query, max_results)
+            if results:
+                logger.debug("ddgs text: %s results for '%s...'", len(results), query[:50])
+            return results
+        except Exception as e:
+            logger.debug("ddgs text error: %s", e)
+            return []
 
     async def _ddg_news_search(self, query: str, max_results: int = 5) -> list[dict]:
         """Search DDG news using ddgs library (API-based).
@@ -116,19 +191,14 @@ class BaseScraper(ABC):
         NOTE: DDG news API works best with English/simple queries.
         For Spanish queries or complex names, use _ddg_text_search_recent instead.
         """
-        lock = self._get_ddg_lock()
-        async with lock:
-            try:
-                from ddgs import DDGS
-                results = await asyncio.to_thread(
-                    lambda: list(DDGS().news(query, max_results=max_results))
-                )
-                if results:
-                    print(f"[{self.__class__.__name__}] ddgs news: {len(results)} results for '{query[:50]}...'")
-                return results
-            except Exception as e:
-                print(f"[{self.__class__.__name__}] ddgs news error: {e}")
-                return []
+        try:
+            results = await self._ddg_call("news", query, max_results)
+            if results:
+                logger.debug("ddgs news: %s results for '%s...'", len(results), query[:50])
+            return results
+        except Exception as e:
+            logger.debug("ddgs news error: %s", e)
+            return []
 
     async def _ddg_text_search_recent(self, query: str, max_results: int = 5) -> list[dict]:
         """Search DDG text with time filter for recent results (last month).
@@ -136,16 +206,11 @@ class BaseScraper(ABC):
         Useful as fallback when DDG news API returns no results.
         Returns same format as _ddg_text_search: title, href, body.
         """
-        lock = self._get_ddg_lock()
-        async with lock:
-            try:
-                from ddgs import DDGS
-                results = await asyncio.to_thread(
-                    lambda: list(DDGS().text(query, max_results=max_results, timelimit="m"))
-                )
-                if results:
-                    print(f"[{self.__class__.__name__}] ddgs text recent: {len(results)} results for '{query[:50]}...'")
-                return results
-            except Exception as e:
-                print(f"[{self.__class__.__name__}] ddgs text recent error: {e}")
-                return []
+        try:
+            results = await self._ddg_call("text_recent", query, max_results)
+            if results:
+                logger.debug("ddgs text recent: %s results for '%s...'", len(results), query[:50])
+            return results
+        except Exception as e:
+            logger.debug("ddgs text recent error: %s", e)
+            return []
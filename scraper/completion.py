@@ -0,0 +1,107 @@
+"""Políticas de terminación temprana de `ScraperOrchestrator.search_all`.
+
+Sin política, `search_all` espera a que cada scraper termine o venza su
+timeout. Muchas investigaciones ya tienen lo que el análisis necesita
+(Perplexity, el perfil de LinkedIn y algunas noticias) bastante antes de que
+venza la fuente más lenta; una política decide, cada vez que termina un
+scraper, si alcanza con lo llegado. Si alcanza, el orquestador cancela el
+resto (desenlace "cancelled" en las métricas).
+
+Las políticas se eligen por nombre por request (`completion` en la API) o
+con el default COMPLETION_POLICY, y viajan en un ContextVar igual que el
+deadline. Nuevas políticas: subclase de `CompletionPolicy` + `register()`.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from scraper.base import ScrapedItem
+from scraper.matching import prospect_matcher
+
+
+class CompletionPolicy:
+    """Esperar a todos los scrapers (comportamiento histórico)."""
+
+    name = "complete"
+
+    def satisfied(self, results: dict[str, list[ScrapedItem]], name: str, company: str) -> bool:
+        """¿Alcanza con `results` (items por scraper, solo los que ya terminaron)?"""
+        return False
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name!r})"
+
+
+def is_validated_profile(item: ScrapedItem, name: str, company: str) -> bool:
+    """Perfil de LinkedIn (/in/) que trae el nombre completo o la empresa del prospecto."""
+    if item.source != "linkedin" or "linkedin.com/in/" not in item.url:
+        return False
+    matcher = prospect_matcher(name, company)
+    return matcher.item_mentions_full_name(item) or (bool(matcher.company_folded) and matcher.item_mentions_company(item))
+
+
+class Quorum(CompletionPolicy):
+    """Terminar cuando llegaron Perplexity, un perfil validado y `min_news` noticias."""
+
+    def __init__(self, name: str = "quorum", perplexity: bool = True, linkedin_profile: bool = True,
+                 min_news: int = 2):
+        self.name = name
+        self.perplexity = perplexity
+        self.linkedin_profile = linkedin_profile
+        self.min_news = min_news
+
+    def satisfied(self, results: dict[str, list[ScrapedItem]], name: str, company: str) -> bool:
+        items = [item for scraper_items in results.values() for item in scraper_items]
+        if self.perplexity and not any(item.source.startswith("perplexity") for item in items):
+            return False
+        if self.linkedin_profile and not any(is_validated_profile(item, name, company) for item in items):
+            return False
+        news = sum(1 for item in items if item.source.endswith("news"))
+        return news >= self.min_news
+
+
+_policies: dict[str, CompletionPolicy] = {}
+
+
+def register(policy: CompletionPolicy) -> CompletionPolicy:
+    _policies[policy.name] = policy
+    return policy
+
+
+register(CompletionPolicy())
+register(Quorum())
+# Perplexity + una noticia: el mínimo para un email con contexto
+register(Quorum("fast", linkedin_profile=False, min_news=1))
+
+
+def policy_names() -> list[str]:
+    return sorted(_policies)
+
+
+def get_policy(name: Optional[str] = None) -> CompletionPolicy:
+    """Política por nombre (None: COMPLETION_POLICY). ValueError si no existe."""
+    if name is None:
+        from config.settings import get_settings
+
+        name = get_settings().scraper.completion_policy
+    try:
+        return _policies[name]
+    except KeyError:
+        raise ValueError(f"Política de terminación desconocida: {name!r} (usar {', '.join(policy_names())})") from None
+
+
+_current: ContextVar[Optional[CompletionPolicy]] = ContextVar("completion_policy", default=None)
+
+
+def current_policy() -> Optional[CompletionPolicy]:
+    return _current.get()
+
+
+@contextmanager
+def use_policy(policy: Optional[CompletionPolicy]):
+    """Activar `policy` para los `search_all` dentro del bloque."""
+    token = _current.set(policy)
+    try:
+        yield policy
+    finally:
+        _current.reset(token)
@@ -1,11 +1,25 @@
 """Scraper de sitios web corporativos."""
 import asyncio
+import logging
 import re
-from urllib.parse import urlparse, urljoin
+from dataclasses import replace
+from urllib.parse import urlparse
 
 from bs4 import BeautifulSoup
 
-from scraper.base import BaseScraper, ScrapedItem
+from config import metrics
+from scraper.base import BaseScraper, ScrapedItem, truncated
+from scraper.matching import prospect_matcher
+from scraper.page_cache import get_page_cache
+from scraper.singleflight import SingleFlight, normalize_key
+from scraper.site_crawl import Robots, parse_robots, parse_sitemap, pick_child_sitemap, plan_crawl
+from scraper.snapshots import get_snapshot_store
+
+logger = logging.getLogger(__name__)
+
+# Descubrimientos de dominio y scraping corporativo en curso (por empresa/dominio)
+_domain_flights = SingleFlight("corporate_domain")
+_site_flights = SingleFlight("corporate_site")
 
 
 class CorporateSiteScraper(BaseScraper):
@@ -14,13 +28,6 @@ class CorporateSiteScraper(BaseScraper):
     # Dominio encontrado, accesible para el researcher
     discovered_domain: str | None = None
 
-    # Sufijos societarios y palabras sin valor identificatorio
-    _CORP_SUFFIXES = {
-        "spa", "ltda", "inc", "corp", "llc", "srl", "cia",
-        "compania", "compañia", "del", "los", "las", "the", "and",
-        "group", "grupo", "holding",
-    }
-
     @staticmethod
     def _domain_matches_company(netloc: str, company: str) -> bool:
         """True si el dominio parece pertenecer a la empresa buscada.
@@ -30,51 +37,81 @@ class CorporateSiteScraper(BaseScraper):
         aparecen en buscadores por noticias sobre la empresa (ej: el proveedor
         metso.com rankea para 'Noracid' porque construyó su planta).
         """
-        host = netloc.lower()
-        if host.startswith("www."):
-            host = host[4:]
-        full = re.sub(r"[^a-z0-9]", "", company.lower())
-        words = [re.sub(r"[^a-z0-9]", "", w.lower()) for w in company.split()]
-        words = [
-            w for w in words
-            if len(w) >= 3 and w not in CorporateSiteScraper._CORP_SUFFIXES
-        ]
-        candidates = ([full] if len(full) >= 3 else []) + words
-        return any(c in host for c in candidates)
+        return prospect_matcher("", company).domain_matches(netloc)
 
     async def search(self, name: str, company: str, role: str = "", location: str = "") -> list[ScrapedItem]:
         items = []
 
+        # Descubrimiento y scraping son a nivel empresa: dos prospectos de la
+        # misma empresa investigados a la vez comparten una sola ejecución.
+        domain = await _domain_flights.do(normalize_key(company), lambda: self._discover_domain(company))
+
+        if domain:
+            self.discovered_domain = domain
+            logger.info("Dominio encontrado: %s", domain)
+            corp_items = await _site_flights.do(domain, lambda: self._scrape_homepage_and_links(domain))
+            items.extend(replace(it) for it in corp_items)
+
+        return items[:self.settings.scraper.max_results_per_source]
+
+    async def _discover_domain(self, company: str) -> str | None:
         # 1. Intentar dominios directamente (no depende de Google)
         domain = await self._guess_company_domain(company)
 
         # 2. Si no funciona, intentar DDG
         if not domain:
             domain = await self._find_domain_via_ddg(company)
+        return domain
 
-        if domain:
-            self.discovered_domain = domain
-            print(f"[CorporateSiteScraper] Dominio encontrado: {domain}")
-            corp_items = await self._scrape_homepage_and_links(domain)
-            items.extend(corp_items)
-
-        return items[:self.settings.scraper.max_results_per_source]
-
-    async def _fetch_html(self, url: str) -> str | None:
-        """Request HTTP con fallback a TLS impersonation.
+    async def _fetch_html(self, url: str, max_bytes: int | None = None) -> str | None:
+        """Request HTTP con fallback a TLS impersonation (HTML cortado en `max_bytes`).
 
         Algunos sitios corporativos (ej: noracid.cl) bloquean con 403 el
         cliente plano, sobre todo desde IPs de datacenter como Railway.
+        Las páginas con ETag/Last-Modified se guardan y se revalidan con una
+        request condicional (ver scraper/page_cache.py).
         """
-        html = await self._make_request(url)
-        if html:
-            return html
-        from scraper.tls_client import tls_fetch
-        status, html = await tls_fetch(url, timeout=8)
-        if status == 200 and html:
-            print(f"[CorporateSiteScraper] {url} recuperado via TLS impersonation")
-            return html
-        return None
+        if get_page_cache():
+            html = await self._fetch_revalidated(url, max_bytes)
+        else:
+            html = await self._make_request(url, max_bytes=max_bytes)
+        if not html:
+            from scraper.tls_client import tls_fetch
+            status, html = await tls_fetch(url, timeout=8)
+            if status != 200 or not html:
+                return None
+            logger.debug("%s recuperado via TLS impersonation", url)
+        # La copia guardada y el fetch TLS vienen completos
+        return html[:max_bytes] if max_bytes else html
+
+    async def _fetch_revalidated(self, url: str, max_bytes: int | None = None) -> str | None:
+        """GET condicional contra la copia guardada; un 304 devuelve la copia."""
+        cache = get_page_cache()
+        cached = await asyncio.to_thread(cache.get, url)
+        response = await self._get(url, extra_headers=cached.validators() if cached else None, max_bytes=max_bytes)
+        if response is None:
+            return None
+        if response.extensions.get("snapshot"):
+            # Servida de los snapshots sin request condicional: no dice nada
+            # de los validadores y no debe reemplazar la copia guardada
+            return response.text
+        if response.status_code == 304 and cached:
+            metrics.CORPORATE_PAGE_CACHE.labels("revalidated").inc()
+            await asyncio.to_thread(cache.touch, url)
+            store = get_snapshot_store()
+            if store:  # sin bajar nada, pero el prospecto usó esta versión
+                await asyncio.to_thread(store.put, url, cached.body, "revalidated")
+            return cached.body
+        if response.status_code != 200:
+            logger.debug("HTTP %s para %s", response.status_code, url)
+            return None
+        metrics.CORPORATE_PAGE_CACHE.labels("changed" if cached else "miss").inc()
+        if truncated(response, max_bytes):
+            await asyncio.to_thread(cache.discard, url)  # una página cortada no sirve como copia
+        else:
+            await asyncio.to_thread(cache.put, url, response.text, response.headers.get("etag", ""),
+                                    response.headers.get("last-modified", ""))
+        return response.text
 
     async def _guess_company_domain(self, company: str) -> str | None:
         """Intentar adivinar el dominio probando TLDs comunes.
@@ -108,7 +145,7 @@ class CorporateSiteScraper(BaseScraper):
                 # Validar que el sitio es de la empresa correcta
                 if not self._validate_domain(html, company_lower):
                     parsed = urlparse(url)
-                    print(f"[CorporateSiteScraper] {parsed.netloc} descartado (no coincide con '{company}')")
+                    logger.debug("%s descartado (no coincide con '%s')", parsed.netloc, company)
                     return None
 
                 return url
@@ -181,57 +218,91 @@ class CorporateSiteScraper(BaseScraper):
             # para empresas con poca presencia web; sin esta validación se
             # scrapea el sitio de OTRA empresa como si fuera el corporativo.
             if not self._domain_matches_company(parsed.netloc, company):
-                print(f"[CorporateSiteScraper] {parsed.netloc} descartado (dominio no coincide con '{company}')")
+                logger.debug("%s descartado (dominio no coincide con '%s')", parsed.netloc, company)
                 continue
             return f"{parsed.scheme}://{parsed.netloc}"
 
         return None
 
+    async def _discover_sitemap(self, domain: str) -> tuple[Robots, list[str]]:
+        """(robots.txt, URLs del sitemap).
+
+        robots.txt y /sitemap.xml van en paralelo; el sitemap que declare
+        robots.txt solo se pide si /sitemap.xml no existe. De un índice de
+        sitemaps se baja un solo hijo (el de páginas, si lo hay). Cada
+        archivo se lee hasta `max_sitemap_bytes` (un sitemap de varios MB no
+        se baja entero) y no cuenta en el presupuesto de páginas.
+        """
+        cfg = self.settings.corporate_crawl
+        cap = cfg.max_sitemap_bytes
+        robots_txt, xml = await asyncio.gather(self._make_request(domain + "/robots.txt", max_bytes=cap),
+                                               self._make_request(domain + "/sitemap.xml", max_bytes=cap))
+        robots = parse_robots(robots_txt) if robots_txt else Robots()
+        declared = [u for u in robots.sitemaps if urlparse(u).path != "/sitemap.xml"]
+        if not xml and declared:
+            xml = await self._make_request(declared[0], max_bytes=cap)
+        if not xml:
+            return robots, []
+        urls, children = parse_sitemap(xml)
+        if children:
+            xml = await self._make_request(pick_child_sitemap(children)[0], max_bytes=cap)
+            urls = parse_sitemap(xml)[0] if xml else []
+        return robots, urls[:cfg.max_sitemap_urls]
+
     async def _scrape_homepage_and_links(self, domain: str) -> list[ScrapedItem]:
-        """Scrape homepage y luego links internos descubiertos (sin paths hardcodeados)."""
+        """Homepage y las páginas internas más útiles (ver scraper/site_crawl.py).
+
+        Las candidatas salen de los links de la homepage y del sitemap,
+        ordenadas por tema; se bajan de a tandas hasta juntar
+        `max_pages` páginas o gastar `max_bytes` de HTML (contando la
+        homepage). Cada página de una tanda lee a lo sumo su parte de lo
+        que queda del presupuesto, así ninguna tanda lo pasa. Una página que
+        falla libera su lugar (y su parte) para la siguiente candidata.
+        """
+        cfg = self.settings.corporate_crawl
         items = []
-        internal_urls = []
 
-        # 1. Scrape homepage
+        # 1. Homepage (y robots.txt + sitemap en paralelo)
         homepage_url = domain + "/"
-        html = await self._fetch_html(homepage_url)
+        if cfg.sitemap:
+            html, (robots, sitemap_urls) = await asyncio.gather(
+                self._fetch_html(homepage_url, cfg.max_bytes), self._discover_sitemap(domain)
+            )
+        else:
+            html, robots, sitemap_urls = await self._fetch_html(homepage_url, cfg.max_bytes), None, []
         if not html:
             return items
+        spent = len(html)
 
         soup = BeautifulSoup(html, "html.parser")
-        base_domain = urlparse(domain).netloc.replace("www.", "")
-
-        # Descubrir links internos
-        seen = {homepage_url, domain}
-        for a in soup.select("a[href]"):
-            href = a.get("href", "")
-            full_url = urljoin(domain, href)
-            link_domain = urlparse(full_url).netloc.replace("www.", "")
-
-            if (link_domain == base_domain
-                and full_url not in seen
-                and not any(full_url.endswith(ext) for ext in ['.pdf', '.jpg', '.png', '.zip'])
-                and '#' not in href and 'mailto' not in href and 'tel:' not in href):
-                seen.add(full_url)
-                internal_urls.append(full_url)
+        links = [(a.get("href", ""), a.get_text(" ", strip=True)) for a in soup.select("a[href]")]
+        plan = plan_crawl(homepage_url, links, sitemap_urls, robots, limit=2 * cfg.max_pages)
 
         item = self._extract_page_content(soup, homepage_url)
         if item:
             items.append(item)
 
-        # 2. Scrape links internos en paralelo (máx 4 para velocidad)
-        async def scrape_url(url):
-            page_html = await self._fetch_html(url)
+        # 2. Páginas internas por prioridad, en paralelo dentro de cada tanda
+        async def scrape_url(url, cap):
+            page_html = await self._fetch_html(url, cap)
             if not page_html:
-                return None
+                return 0, None
             page_soup = BeautifulSoup(page_html, "html.parser")
-            return self._extract_page_content(page_soup, url)
-
-        if internal_urls:
-            results = await asyncio.gather(*[scrape_url(u) for u in internal_urls[:4]])
-            for r in results:
-                if r:
-                    items.append(r)
+            return len(page_html), self._extract_page_content(page_soup, url)
+
+        pages = 0
+        while plan and pages < cfg.max_pages and spent < cfg.max_bytes:
+            wave, plan = plan[:cfg.max_pages - pages], plan[cfg.max_pages - pages:]
+            cap = (cfg.max_bytes - spent) // len(wave)
+            if cap <= 0:
+                break
+            for size, page in await asyncio.gather(*[scrape_url(u, cap) for u in wave]):
+                spent += size
+                if size:
+                    pages += 1
+                metrics.CORPORATE_CRAWL_PAGES.labels("useful" if page else "empty" if size else "failed").inc()
+                if page:
+                    items.append(page)
 
         return items
 
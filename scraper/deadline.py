@@ -0,0 +1,86 @@
+"""Deadline de request propagado por todo el pipeline de investigación.
+
+El router crea un `Deadline` (total pedido por el cliente o el default de
+settings) y lo pasa a `ResearchService.investigate` y de ahí a
+`ScraperOrchestrator.search_all`. Bajo ellos viaja en un ContextVar (igual
+que el request_id y la etapa de métricas), así cada punto de I/O —
+`_make_request`, `_ddg_*`, `tls_fetch`, Perplexity, `LLMClient` — acota su
+timeout con `budget()` sin cambiar la firma de los scrapers.
+
+Las etapas tempranas corren con `deadline.reserve(s, share)`: vencen `s`
+segundos antes para dejar tiempo a las siguientes (scraping deja tiempo a
+resolución de entidades y análisis; la resolución, al análisis). Con
+`share` la reserva no pasa de esa fracción de lo que queda: un deadline
+corto se reparte en vez de darle a la primera etapa uno ya vencido.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Se agotó el tiempo total del request."""
+
+
+class Deadline:
+    """Instante límite (monotónico) de un request."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def at(cls, expires_at: float) -> "Deadline":
+        deadline = cls.__new__(cls)
+        deadline.expires_at = expires_at
+        return deadline
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: float) -> float:
+        """Timeout para una operación: `cap` acotado a lo que queda."""
+        return min(cap, self.remaining())
+
+    def reserve(self, seconds: float, share: Optional[float] = None) -> "Deadline":
+        """Deadline que vence `seconds` antes (tiempo para etapas posteriores),
+        o `share` de lo que queda si eso es menos."""
+        if share is not None:
+            seconds = min(seconds, share * self.remaining())
+        return Deadline.at(self.expires_at - seconds)
+
+    def check(self, what: str = ""):
+        if self.expired:
+            raise DeadlineExceeded(f"Tiempo límite del request agotado{f' antes de {what}' if what else ''}")
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.1f}s)"
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+@contextmanager
+def use_deadline(deadline: Optional[Deadline]):
+    """Activar `deadline` para el código (y las tasks creadas) dentro del bloque."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def budget(cap: float) -> float:
+    """Timeout para una operación de I/O: `cap` acotado al deadline activo (si hay)."""
+    deadline = _current.get()
+    return cap if deadline is None else deadline.timeout(cap)
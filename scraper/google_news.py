@@ -1,8 +1,12 @@
 """Scraper de noticias: Google News + DDG News API + DDG Text reciente."""
+import logging
+
 from bs4 import BeautifulSoup
 
 from scraper.base import BaseScraper, ScrapedItem
 
+logger = logging.getLogger(__name__)
+
 
 class GoogleNewsScraper(BaseScraper):
     """Busca noticias recientes sobre la EMPRESA (no la persona).
@@ -29,13 +33,13 @@ class GoogleNewsScraper(BaseScraper):
             return items[:max_results]
 
         # 2. DDG News API (funciona mejor con queries simples/inglés)
-        print("[GoogleNewsScraper] Google News sin resultados, intentando DDG News API")
+        logger.debug("Google News sin resultados, intentando DDG News API")
         items = await self._search_ddg_news_api(company)
         if items:
             return items[:max_results]
 
         # 3. DDG Text reciente (último mes, funciona con queries en español)
-        print("[GoogleNewsScraper] DDG News sin resultados, intentando DDG Text reciente")
+        logger.debug("DDG News sin resultados, intentando DDG Text reciente")
         location_ctx = f" {location}" if location else " Chile"
         items = await self._search_ddg_text_recent(company, location_ctx)
         return items[:max_results]
@@ -1,8 +1,12 @@
 """Scraper de búsqueda general: Google con fallback a DuckDuckGo (ddgs API)."""
+import logging
+
 from bs4 import BeautifulSoup
 
 from scraper.base import BaseScraper, ScrapedItem
 
+logger = logging.getLogger(__name__)
+
 
 class GoogleSearchScraper(BaseScraper):
     """Busca resultados generales sobre el prospecto."""
@@ -20,7 +24,7 @@ class GoogleSearchScraper(BaseScraper):
 
         # Fallback a DDG API (ddgs library, funciona desde datacenter IPs)
         if not items:
-            print("[GoogleSearchScraper] Google sin resultados, intentando DDG API")
+            logger.debug("Google sin resultados, intentando DDG API")
             items = await self._search_ddg_api(query)
 
         return items
@@ -0,0 +1,162 @@
+"""Parser incremental del objeto JSON de una respuesta LLM en streaming.
+
+Perplexity responde un objeto JSON (a veces envuelto en ```json y con texto
+alrededor) token a token. `JSONStreamParser.feed()` recibe cada fragmento y
+expone cada valor de nivel superior apenas se cierra (`values`), y los
+elementos ya cerrados de los arrays de nivel superior mientras el array
+sigue abierto (`items`). Así el scraper puede cortar el stream cuando tiene
+`persona`/`empresa` sin esperar la cola de `hallazgos`.
+
+Solo escanea estructura (comillas, escapes, anidamiento); cada valor cerrado
+se decodifica con `json.loads`. Un valor que no decodifica se ignora.
+"""
+import json
+from typing import Any, Optional
+
+_WHITESPACE = " \t\r\n"
+
+
+class JSONStreamParser:
+    """Estado del escaneo de un objeto JSON recibido por partes."""
+
+    def __init__(self):
+        self.text = ""
+        self.values: dict[str, Any] = {}
+        self.items: dict[str, list] = {}
+        self.done = False  # se cerró el objeto de nivel superior
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = True
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._array_value = False  # el valor en curso es un array
+        self._elem_start: Optional[int] = None
+        self._elem_primitive = False
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def feed(self, chunk: str) -> list[str]:
+        """Agregar texto; devuelve las claves de nivel superior cerradas en este fragmento."""
+        self.text += chunk
+        closed: list[str] = []
+        text = self.text
+        i = self._pos
+        while i < len(text) and not self.done:
+            c = text[i]
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._string_closed(i, closed)
+            elif c == '"':
+                self._in_string = True
+                self._string_start = i
+                if self._depth == 1 and not self._expect_key and self._value_start is None:
+                    self._value_start = i
+                elif self._depth == 2 and self._array_value and self._elem_start is None:
+                    self._elem_start = i
+            elif c in _WHITESPACE:
+                pass
+            elif self._depth == 1:
+                self._top_level_char(i, c, closed)
+            elif c in "{[":
+                if self._depth == 2 and self._array_value and self._elem_start is None:
+                    self._elem_start = i
+                    self._elem_primitive = False
+                self._depth += 1
+            elif c in "}]":
+                if self._depth == 2 and self._elem_primitive:
+                    self._close_element(i)
+                self._depth -= 1
+                if self._depth == 1:
+                    self._close_value(i + 1, closed)
+                elif self._depth == 2 and self._array_value and self._elem_start is not None:
+                    self._close_element(i + 1)
+            elif self._depth == 2 and self._array_value:
+                if c == ",":
+                    if self._elem_primitive:
+                        self._close_element(i)
+                elif self._elem_start is None:
+                    self._elem_start = i
+                    self._elem_primitive = True
+            i += 1
+        self._pos = i
+        return closed
+
+    def _string_closed(self, i: int, closed: list[str]):
+        if self._depth == 1 and self._expect_key:
+            self._key = self._decode(self._string_start, i + 1)
+        elif self._depth == 1 and self._value_start == self._string_start:
+            self._close_value(i + 1, closed)
+        elif self._depth == 2 and self._array_value and self._elem_start == self._string_start:
+            self._close_element(i + 1)
+
+    def _top_level_char(self, i: int, c: str, closed: list[str]):
+        if self._expect_key:
+            if c == ":":
+                self._expect_key = False
+                self._value_start = None
+            elif c == "}":
+                self.done = True
+            return
+        if c in ",}":
+            if self._value_start is not None:  # primitivo (número, true/false/null)
+                self._close_value(i, closed)
+            self._expect_key = True
+            self._key = None
+            if c == "}":
+                self.done = True
+        elif c in "{[":
+            self._value_start = i
+            self._array_value = c == "["
+            self._elem_start = None
+            self._elem_primitive = False
+            if self._array_value and self._key is not None:
+                self.items[self._key] = []
+            self._depth += 1
+        elif self._value_start is None:
+            self._value_start = i
+
+    def _close_value(self, end: int, closed: list[str]):
+        if self._key is not None and self._value_start is not None:
+            value = self._decode(self._value_start, end)
+            if value is not _INVALID:
+                self.values[self._key] = value
+                closed.append(self._key)
+        self._value_start = None
+        self._array_value = False
+        self._elem_start = None
+
+    def _close_element(self, end: int):
+        if self._key is not None and self._elem_start is not None:
+            value = self._decode(self._elem_start, end)
+            if value is not _INVALID:
+                self.items.setdefault(self._key, []).append(value)
+        self._elem_start = None
+        self._elem_primitive = False
+
+    def _decode(self, start: int, end: int) -> Any:
+        try:
+            return json.loads(self.text[start:end].strip())
+        except json.JSONDecodeError:
+            return _INVALID
+
+    def partial(self) -> dict[str, Any]:
+        """Valores cerrados más los arrays de nivel superior truncados (solo sus elementos completos)."""
+        return {**self.items, **self.values}
+
+
+_INVALID = object()
@@ -0,0 +1,89 @@
+"""Timeouts adaptativos por scraper a partir de su latencia reciente.
+
+Cada scraper tiene un perfil de latencia muy distinto (LinkedIn con TLS
+enrichment, crawl corporativo, noticias, Perplexity): un solo corte fijo
+cancela a LinkedIn justo antes de terminar o deja que un crawl colgado
+atrase todo. El orquestador registra la duración de cada ejecución y pide
+aquí el timeout de la próxima:
+
+    timeout = clamp(percentil(ventana) * multiplicador, piso, techo)
+
+Mientras un scraper tenga menos de `min_samples` observaciones se usa el
+timeout fijo histórico (12 s web, 30 s Perplexity). Las ejecuciones que
+vencen con su timeout adaptativo se registran con el timeout como duración
+(observación censurada), así un scraper que siempre se corta empuja su
+timeout hacia el techo; las que corta el deadline del request no se
+registran, como tampoco las que cancela una política de terminación
+temprana (lo transcurrido hasta el corte es solo una cota inferior).
+"""
+import logging
+import math
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BOUNDS = (2.0, 30.0)
+
+
+def parse_bounds(spec: str) -> dict[str, tuple[float, float]]:
+    """'LinkedInScraper=6:20,PerplexityScraper=10:30' → {nombre: (piso, techo)}."""
+    bounds = {}
+    for part in spec.split(","):
+        name, _, values = part.partition("=")
+        floor, _, ceiling = values.partition(":")
+        try:
+            floor_s, ceiling_s = float(floor), float(ceiling)
+        except ValueError:
+            if part.strip():
+                logger.warning("Límite de timeout inválido ignorado: %r", part.strip())
+            continue
+        bounds[name.strip()] = (min(floor_s, ceiling_s), max(floor_s, ceiling_s))
+    return bounds
+
+
+class AdaptiveTimeouts:
+    """Ventana móvil de latencias por scraper y el timeout que se deriva."""
+
+    def __init__(self, percentile: float = 0.95, multiplier: float = 1.25, window: int = 200,
+                 min_samples: int = 20, bounds: Optional[dict[str, tuple[float, float]]] = None):
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.window = window
+        self.min_samples = min_samples
+        self.bounds = bounds or {}
+        self._samples: dict[str, deque] = {}
+
+    def observe(self, name: str, seconds: float):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def timeout(self, name: str, default: float) -> float:
+        """Timeout para la próxima ejecución de `name` (`default` sin datos suficientes)."""
+        samples = self._samples.get(name)
+        if not samples or len(samples) < self.min_samples:
+            return default
+        ordered = sorted(samples)
+        value = ordered[max(math.ceil(self.percentile * len(ordered)) - 1, 0)] * self.multiplier
+        floor, ceiling = self.bounds.get(name, DEFAULT_BOUNDS)
+        return min(max(value, floor), ceiling)
+
+    def reset(self):
+        self._samples.clear()
+
+
+_timeouts: Optional[AdaptiveTimeouts] = None
+
+
+def get_adaptive_timeouts() -> AdaptiveTimeouts:
+    """Instancia del proceso, configurada desde settings.adaptive_timeouts."""
+    global _timeouts
+    if _timeouts is None:
+        from config.settings import get_settings
+
+        cfg = get_settings().adaptive_timeouts
+        _timeouts = AdaptiveTimeouts(cfg.percentile, cfg.multiplier, cfg.window, cfg.min_samples,
+                                     parse_bounds(cfg.bounds))
+    return _timeouts
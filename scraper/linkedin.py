@@ -7,6 +7,7 @@ Pipeline:
 """
 
 import json
+import logging
 import re
 import unicodedata
 from typing import Optional
@@ -14,8 +15,11 @@ from typing import Optional
 from bs4 import BeautifulSoup
 
 from scraper.base import BaseScraper, ScrapedItem
+from scraper.matching import prospect_matcher
 from scraper.tls_client import tls_fetch
 
+logger = logging.getLogger(__name__)
+
 
 class LinkedInScraper(BaseScraper):
     """Busca perfiles de LinkedIn y extrae datos frescos con TLS impersonation.
@@ -66,13 +70,13 @@ class LinkedInScraper(BaseScraper):
                 items = await self._search_ddg_api(query, company=company, name=name)
 
             if items:
-                print(f"[LinkedInScraper] Encontrado con: {engine} - {query[:60]}...")
+                logger.debug("Encontrado con: %s - %s...", engine, query[:60])
                 break
-            print(f"[LinkedInScraper] Sin resultados: {engine} - {query[:60]}...")
+            logger.debug("Sin resultados: %s - %s...", engine, query[:60])
 
         # Ultimo recurso: URLs directas con TLS
         if not items:
-            print("[LinkedInScraper] Buscadores sin resultados, intentando URLs directas")
+            logger.debug("Buscadores sin resultados, intentando URLs directas")
             items = await self._try_direct_profile(name)
 
         # Enriquecer con datos frescos del perfil via TLS impersonation
@@ -91,10 +95,7 @@ class LinkedInScraper(BaseScraper):
     async def _search_ddg_api(self, query: str, company: str = "", name: str = "") -> list[ScrapedItem]:
         """Search LinkedIn profiles via ddgs library with company filtering."""
         results = await self._ddg_text_search(query, max_results=8)
-        company_lower = company.lower().strip() if company else ""
-        company_words = [w for w in company_lower.split() if len(w) > 3] if company_lower else []
-        name_lower = self._strip_accents(name).lower().strip() if name else ""
-        name_words = [w for w in name_lower.split() if len(w) >= 3]
+        matcher = prospect_matcher(name, company)
 
         matching = []
         non_matching = []
@@ -113,8 +114,7 @@ class LinkedInScraper(BaseScraper):
                 snippet=r.get("body", ""),
                 source="linkedin",
             )
-            item_text = f"{item.title} {item.snippet}".lower()
-            if company_lower and (company_lower in item_text or any(w in item_text for w in company_words)):
+            if matcher.company_folded and matcher.item_mentions_company(item):
                 matching.append(item)
             else:
                 non_matching.append(item)
@@ -123,18 +123,15 @@ class LinkedInScraper(BaseScraper):
         # NOMBRE COMPLETO del prospecto. Las queries de fallback acortan el
         # nombre ("Nadia Ramirez") y DDG devuelve homónimos de otras empresas;
         # devolverlos contamina educación/ubicación con datos de otra persona.
-        if not matching and name_words:
+        if not matching and matcher.name_words:
             before = len(non_matching)
-            non_matching = [
-                it for it in non_matching
-                if all(w in self._strip_accents(f"{it.title} {it.snippet}").lower() for w in name_words)
-            ]
+            non_matching = [it for it in non_matching if matcher.item_mentions_full_name(it)]
             if before and not non_matching:
-                print(f"[LinkedInScraper] {before} perfiles sin empresa ni nombre completo descartados (homónimos)")
+                logger.debug("%s perfiles sin empresa ni nombre completo descartados (homónimos)", before)
 
         items = matching[:3] if matching else non_matching[:2]
         if matching and non_matching:
-            print(f"[LinkedInScraper] Filtrado anti-homonimia: {len(matching)} match, {len(non_matching)} descartados")
+            logger.debug("Filtrado anti-homonimia: %s match, %s descartados", len(matching), len(non_matching))
         return items
 
     def _parse_google_results(self, html: str) -> list[ScrapedItem]:
@@ -194,15 +191,15 @@ class LinkedInScraper(BaseScraper):
 
                     if self._is_authwall(html):
                         authwall_count += 1
-                        print(f"[LinkedInScraper] Authwall en perfil directo: {url}")
+                        logger.debug("Authwall en perfil directo: %s", url)
                         if authwall_count >= 2:
-                            print("[LinkedInScraper] Multiples authwalls, abortando")
+                            logger.debug("Multiples authwalls, abortando")
                             return []
                         continue
 
                     profile_data = self._extract_profile_data(html)
                     if profile_data["title"] or profile_data["snippet"]:
-                        print(f"[LinkedInScraper] Perfil directo encontrado: {url}")
+                        logger.debug("Perfil directo encontrado: %s", url)
                         return [ScrapedItem(
                             url=url,
                             title=profile_data["title"],
@@ -210,7 +207,7 @@ class LinkedInScraper(BaseScraper):
                             source="linkedin",
                         )]
                 except Exception as e:
-                    print(f"[LinkedInScraper] Error en perfil directo {url}: {e}")
+                    logger.debug("Error en perfil directo %s: %s", url, e)
                     continue
         return []
 
@@ -240,7 +237,7 @@ class LinkedInScraper(BaseScraper):
                     if status == 999 or (status == 0 and not html):
                         if attempt < 2:
                             continue  # Reintentar con otro TLS profile
-                        print(f"[LinkedInScraper] TLS blocked after {attempt + 1} attempts (status {status})")
+                        logger.debug("TLS blocked after %s attempts (status %s)", attempt + 1, status)
                         break
 
                     if not html or len(html) < 500:
@@ -249,7 +246,7 @@ class LinkedInScraper(BaseScraper):
                     if self._is_authwall(html):
                         if attempt < 2:
                             continue
-                        print("[LinkedInScraper] Authwall persistente, usando datos de busqueda")
+                        logger.debug("Authwall persistente, usando datos de busqueda")
                         break
 
                     profile_data = self._extract_profile_data(html)
@@ -257,7 +254,7 @@ class LinkedInScraper(BaseScraper):
                     if profile_data["snippet"] and len(profile_data["snippet"]) > len(item.snippet):
                         item.snippet = profile_data["snippet"]
                         enriched = True
-                        print(f"[LinkedInScraper] Perfil enriquecido via TLS (intento {attempt + 1}): {len(item.snippet)} chars")
+                        logger.info("Perfil enriquecido via TLS (intento %s): %s chars", attempt + 1, len(item.snippet))
 
                     if profile_data["title"] and len(profile_data["title"]) > len(item.title):
                         item.title = profile_data["title"]
@@ -267,7 +264,7 @@ class LinkedInScraper(BaseScraper):
                         break
 
                 except Exception as e:
-                    print(f"[LinkedInScraper] TLS attempt {attempt + 1} error: {e}")
+                    logger.debug("TLS attempt %s error: %s", attempt + 1, e)
                     continue
 
             # Si TLS no funciono, intentar extraer cargo del titulo DDG
@@ -298,7 +295,7 @@ class LinkedInScraper(BaseScraper):
             if headline.lower() not in item.snippet.lower():
                 prefix = f"Cargo actual (LinkedIn): {headline}"
                 item.snippet = f"{prefix} | {item.snippet}" if item.snippet else prefix
-                print(f"[LinkedInScraper] Cargo extraido de titulo DDG: {headline}")
+                logger.debug("Cargo extraido de titulo DDG: %s", headline)
 
     @staticmethod
     def _is_authwall(html: str) -> bool:
@@ -502,7 +499,7 @@ class LinkedInScraper(BaseScraper):
                     continue
 
                 if self._is_authwall(html):
-                    print("[LinkedInScraper] Authwall detectada (httpx fallback), usando datos de busqueda")
+                    logger.debug("Authwall detectada (httpx fallback), usando datos de busqueda")
                     break
 
                 profile_data = self._extract_profile_data(html)
@@ -513,6 +510,6 @@ class LinkedInScraper(BaseScraper):
                     item.title = profile_data["title"]
 
             except Exception as e:
-                print(f"[LinkedInScraper] Error enriqueciendo perfil (fallback): {e}")
+                logger.warning("Error enriqueciendo perfil (fallback): %s", e)
                 continue
         return items
@@ -0,0 +1,155 @@
+"""Matching de nombre y empresa del prospecto, precalculado por investigación.
+
+Cada etapa del pipeline (filtro de DDG del LinkedIn scraper, validación de
+dominio corporativo, resolución de entidades por heurística, filtro de
+raw_sources, enriquecimiento desde snippets y Perplexity, política de
+quórum) decidía por su cuenta si un texto menciona a la empresa o al
+prospecto, recalculando minúsculas, tildes y palabras por item, y con
+criterios levemente distintos (unas quitaban tildes y otras no).
+
+`ProspectMatcher` normaliza nombre y empresa una vez (palabras
+significativas, nombre compacto, candidatos de dominio) y todas las etapas
+lo piden a `prospect_matcher(name, company)`, cacheado por prospecto, así
+una misma investigación obtiene siempre la misma respuesta. Los textos se
+comparan plegados: minúsculas y sin tildes ("Compañía" == "compania").
+
+Ambos cachés (matchers y textos plegados de cada uno) viven en el proceso
+web, que no se reinicia: son chicos y `clear_matchers()` los vacía al
+terminar cada investigación.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+_COMBINING = re.compile("[\u0300-\u036f]")
+
+
+def fold(text: str) -> str:
+    """Minúsculas y sin tildes: 'Juliá Núñez' → 'julia nunez'."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return _COMBINING.sub("", unicodedata.normalize("NFKD", text))
+
+
+# Sufijos societarios y palabras sin valor identificatorio en un dominio
+CORP_SUFFIXES = frozenset({
+    "spa", "ltda", "inc", "corp", "llc", "srl", "cia",
+    "compania", "del", "los", "las", "the", "and",
+    "group", "grupo", "holding",
+})
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]")
+# Textos de items plegados que guarda cada matcher
+_TEXT_CACHE_SIZE = 128
+
+
+class ProspectMatcher:
+    """Nombre y empresa de un prospecto, normalizados para comparar textos."""
+
+    def __init__(self, name: str = "", company: str = ""):
+        self.name = name
+        self.company = company
+        self.name_folded = fold(name).strip()
+        # Palabras del nombre que exige el match de nombre completo
+        self.name_words = tuple(w for w in self.name_folded.split() if len(w) >= 3)
+        self.company_folded = fold(company).strip()
+        # Palabras significativas (>3) de nombres de empresa de varias palabras
+        self.company_words = tuple(w for w in self.company_folded.split() if len(w) > 3)
+        self.company_compact = self.company_folded.replace(" ", "")
+        full = _NON_ALNUM.sub("", self.company_folded)
+        words = [_NON_ALNUM.sub("", w) for w in self.company_folded.split()]
+        self.domain_candidates = tuple(
+            ([full] if len(full) >= 3 else []) + [w for w in words if len(w) >= 3 and w not in CORP_SUFFIXES]
+        )
+        self._texts: dict[tuple[str, str], str] = {}
+
+    def __repr__(self) -> str:
+        return f"ProspectMatcher({self.name!r}, {self.company!r})"
+
+    # --- Textos ya plegados ---
+
+    def _company_in(self, folded: str) -> bool:
+        return self.company_folded in folded or any(w in folded for w in self.company_words)
+
+    def _full_name_in(self, folded: str) -> bool:
+        return bool(self.name_words) and all(w in folded for w in self.name_words)
+
+    def _name_in(self, folded: str) -> bool:
+        return bool(self.name_folded) and self.name_folded in folded
+
+    def item_text(self, item) -> str:
+        """Título + snippet de un ScrapedItem, plegado (memoizado: cada etapa pregunta por los mismos items)."""
+        key = (item.title, item.snippet)
+        text = self._texts.get(key)
+        if text is None:
+            if len(self._texts) >= _TEXT_CACHE_SIZE:
+                self._texts.clear()
+            text = self._texts[key] = fold(f"{item.title} {item.snippet}")
+        return text
+
+    # --- Textos crudos ---
+
+    def mentions_company(self, text: str) -> bool:
+        """El texto nombra a la empresa completa o alguna palabra significativa suya.
+
+        'Faymex' calza con 'FAYMEX SpA'; 'Desert King' con '... King Chile'.
+        Sin empresa, cualquier texto calza.
+        """
+        return self._company_in(fold(text))
+
+    def mentions_full_name(self, text: str) -> bool:
+        """El texto trae TODAS las palabras significativas del nombre, en cualquier orden."""
+        return self._full_name_in(fold(text))
+
+    def mentions_name(self, text: str) -> bool:
+        """El nombre tal cual (para noticias); sin nombre, nunca calza."""
+        return self._name_in(fold(text))
+
+    def is_company_url(self, url: str) -> bool:
+        """La URL contiene el nombre de la empresa sin espacios (su propio sitio)."""
+        return self.company_compact in fold(url).replace(" ", "")
+
+    def domain_matches(self, netloc: str) -> bool:
+        """El host parece de la empresa: nombre concatenado o una palabra significativa."""
+        host = netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        return any(c in host for c in self.domain_candidates)
+
+    # --- ScrapedItems ---
+
+    def item_mentions_company(self, item) -> bool:
+        return self._company_in(self.item_text(item))
+
+    def item_mentions_full_name(self, item) -> bool:
+        return self._full_name_in(self.item_text(item))
+
+    def is_relevant(self, item) -> bool:
+        """¿Un resultado de buscador/noticias corresponde al prospecto o su empresa?
+
+        Buscadores: sitio de la empresa, mención de la empresa, o el perfil
+        del LinkedIn scraper con el nombre completo. Noticias: mención de la
+        empresa o del nombre. Otras fuentes (corporate, Perplexity) ya vienen
+        validadas aguas arriba.
+        """
+        if item.source in ("duckduckgo", "google_search", "linkedin"):
+            if self.is_company_url(item.url or ""):
+                return True
+            text = self.item_text(item)
+            return self._company_in(text) or (item.source == "linkedin" and self._full_name_in(text))
+        if item.source in ("duckduckgo_news", "google_news"):
+            text = self.item_text(item)
+            return self._company_in(text) or self._name_in(text)
+        return True
+
+
+@lru_cache(maxsize=64)
+def prospect_matcher(name: str = "", company: str = "") -> ProspectMatcher:
+    """Matcher compartido por todas las etapas de la investigación de (name, company)."""
+    return ProspectMatcher(name, company)
+
+
+def clear_matchers() -> None:
+    """Soltar los matchers cacheados y sus textos plegados (al terminar una investigación)."""
+    prospect_matcher.cache_clear()
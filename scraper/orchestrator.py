@@ -1,16 +1,24 @@
-"""Ejecuta los 5 scrapers en paralelo con timeout diferenciado."""
+"""Ejecuta los 5 scrapers en paralelo, cada uno con su timeout adaptativo."""
 import asyncio
+import logging
 import time
 
+from config import metrics
 from scraper.google_search import GoogleSearchScraper
 from scraper.google_news import GoogleNewsScraper
 from scraper.linkedin import LinkedInScraper
 from scraper.corporate_site import CorporateSiteScraper
 from scraper.perplexity import PerplexityScraper
 from scraper.base import BaseScraper, ScrapedItem
+from scraper.completion import CompletionPolicy, current_policy, get_policy
+from scraper.deadline import Deadline, current_deadline, use_deadline
+from scraper.latency import get_adaptive_timeouts
 
-# Timeouts diferenciados: Perplexity es API (confiable, lenta),
-# el resto son scrapers web (poco confiables desde datacenter IPs).
+logger = logging.getLogger(__name__)
+
+# Timeouts iniciales (arranque en frío): Perplexity es API (confiable, lenta),
+# el resto son scrapers web (poco confiables desde datacenter IPs). Con
+# suficientes ejecuciones, cada scraper pasa a su timeout adaptativo.
 WEB_SCRAPE_TIMEOUT = 12  # Google/DDG/LinkedIn (a menudo bloqueados)
 PERPLEXITY_TIMEOUT = 30  # API confiable, necesita más tiempo
 
@@ -22,6 +30,7 @@ class ScraperOrchestrator:
         self.google_scraper = GoogleSearchScraper()
         self.news_scraper = GoogleNewsScraper()
         self.perplexity_scraper = PerplexityScraper()
+        self.timeouts = get_adaptive_timeouts()
 
         # Scrapers web (pueden bloquearse, timeout corto)
         self.web_scrapers = [
@@ -36,78 +45,112 @@ class ScraperOrchestrator:
         """Dominio corporativo descubierto durante el scraping."""
         return self.corporate_scraper.discovered_domain
 
-    async def search_all(self, name: str, company: str, role: str = "", location: str = "") -> list[ScrapedItem]:
-        """Ejecuta scrapers web y Perplexity API con timeouts diferenciados.
-
-        - Scrapers web (Google, DDG, LinkedIn, Corporate): 12s timeout
-        - Perplexity API: 30s timeout (más confiable, más lenta)
-
-        Esto asegura que Perplexity complete incluso si los scrapers web fallan.
+    def timeout_for(self, scraper: BaseScraper) -> float:
+        """Timeout de `scraper`: adaptativo según su latencia reciente."""
+        default = PERPLEXITY_TIMEOUT if scraper is self.perplexity_scraper else WEB_SCRAPE_TIMEOUT
+        return self.timeouts.timeout(scraper.__class__.__name__, default)
+
+    async def search_all(self, name: str, company: str, role: str = "", location: str = "",
+                         deadline: Deadline | None = None,
+                         policy: CompletionPolicy | None = None) -> list[ScrapedItem]:
+        """Ejecuta scrapers web y Perplexity API, cada uno con su propio timeout.
+
+        El timeout de cada scraper sale de su latencia reciente
+        (`timeout_for`, ver scraper/latency.py); hasta juntar muestras es
+        12s para los web y 30s para Perplexity. Un scraper lento se cancela
+        sin afectar a los demás, así Perplexity completa aunque los web fallen.
+        Con `deadline` (o el del request en curso) cada timeout se acota a lo
+        que queda, y los scrapers lo heredan para su propio I/O.
+
+        `policy` (o la del request en curso, o COMPLETION_POLICY) puede dar
+        el scraping por terminado antes: se consulta cada vez que termina un
+        scraper y, si alcanza con lo llegado, se cancelan los demás.
         """
         t0 = time.perf_counter()
-
-        # Lanzar todos en paralelo
-        web_tasks = {
-            asyncio.create_task(s.search(name, company, role, location)): s
-            for s in self.web_scrapers
-        }
-        pplx_task = asyncio.create_task(
-            self.perplexity_scraper.search(name, company, role, location)
-        )
-
-        # Esperar scrapers web con timeout corto
-        done_web, pending_web = await asyncio.wait(
-            web_tasks.keys(), timeout=WEB_SCRAPE_TIMEOUT
-        )
-
-        # Cancelar web scrapers lentos
-        for task in pending_web:
-            scraper = web_tasks[task]
-            task.cancel()
-            print(f"[Orchestrator] {scraper.__class__.__name__} cancelado (timeout {WEB_SCRAPE_TIMEOUT}s)")
-
-        # Recopilar resultados web
-        all_items = []
-        for task in done_web:
-            scraper = web_tasks[task]
+        deadline = deadline or current_deadline()
+        policy = policy or current_policy() or get_policy()
+        scrapers = [*self.web_scrapers, self.perplexity_scraper]
+
+        # Lanzar todos en paralelo (las tasks copian el contexto: heredan el deadline)
+        with use_deadline(deadline):
+            tasks = []
+            for scraper in scrapers:
+                adaptive = self.timeout_for(scraper)
+                timeout = deadline.timeout(adaptive) if deadline else adaptive
+                metrics.SCRAPER_TIMEOUT.labels(scraper.__class__.__name__).set(timeout)
+                tasks.append(asyncio.create_task(
+                    self._instrumented(scraper, timeout, name, company, role, location,
+                                       own_timeout=timeout >= adaptive)
+                ))
+
+        labels = {task: scraper.__class__.__name__ for task, scraper in zip(tasks, scrapers)}
+        results: dict[str, list[ScrapedItem]] = {}
+        pending = set(tasks)
+        while pending:
             try:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            except asyncio.CancelledError:
+                for task in pending:
+                    task.cancel()
+                raise
+            for task in done:
+                label = labels[task]
+                if task.exception() is not None:
+                    logger.warning("%s error: %s", label, task.exception())
+                    continue
                 result = task.result()
-                if isinstance(result, list):
-                    all_items.extend(result)
-                    print(f"[Orchestrator] {scraper.__class__.__name__}: {len(result)} items")
-                else:
-                    print(f"[Orchestrator] {scraper.__class__.__name__}: 0 items")
-            except Exception as e:
-                print(f"[Orchestrator] {scraper.__class__.__name__} error: {e}")
-
-        web_elapsed = time.perf_counter() - t0
-        print(f"[Orchestrator] Web scrapers: {len(all_items)} items en {web_elapsed:.1f}s")
-
-        # Esperar Perplexity con timeout generoso
-        remaining_pplx_time = max(PERPLEXITY_TIMEOUT - web_elapsed, 10)
-        try:
-            done_pplx, pending_pplx = await asyncio.wait(
-                {pplx_task}, timeout=remaining_pplx_time
-            )
-            if pplx_task in done_pplx:
-                try:
-                    pplx_result = pplx_task.result()
-                    if isinstance(pplx_result, list):
-                        all_items.extend(pplx_result)
-                        print(f"[Orchestrator] PerplexityScraper: {len(pplx_result)} items")
-                    else:
-                        print(f"[Orchestrator] PerplexityScraper: 0 items")
-                except Exception as e:
-                    print(f"[Orchestrator] PerplexityScraper error: {e}")
-            else:
-                pplx_task.cancel()
-                print(f"[Orchestrator] PerplexityScraper cancelado (timeout {remaining_pplx_time:.0f}s)")
-        except Exception as e:
-            print(f"[Orchestrator] Error esperando Perplexity: {e}")
+                results[label] = result if isinstance(result, list) else []
+                logger.debug("%s: %s items", label, len(results[label]))
+            if pending and policy.satisfied(results, name, company):
+                logger.info("Política %s: suficiente en %.1fs, cancelando %s", policy.name,
+                            time.perf_counter() - t0, ", ".join(sorted(labels[t] for t in pending)))
+                # Los cancelados no se observan: lo transcurrido es una cota
+                # inferior, no su latencia, y achicaría justo el timeout de
+                # los más lentos
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                break
+
+        # Orden estable (el de los scrapers), no el de llegada
+        all_items = [item for task in tasks if labels[task] in results for item in results[labels[task]]]
 
         elapsed = time.perf_counter() - t0
-        print(f"[Orchestrator] Total: {len(all_items)} items en {elapsed:.1f}s")
-
-        await BaseScraper.cleanup()
+        logger.info("Total: %s items en %.1fs", len(all_items), elapsed)
 
+        # El cliente HTTP compartido queda abierto: lo usan las demás
+        # investigaciones en curso del proceso (se cierra al apagarlo)
         return all_items
+
+    async def _instrumented(self, scraper: BaseScraper, timeout: float, name: str, company: str,
+                            role: str, location: str, own_timeout: bool = True) -> list[ScrapedItem]:
+        """Ejecutar un scraper con su timeout, registrando latencia, items y desenlace.
+
+        Las ejecuciones ok y las que vencen con su propio timeout adaptativo
+        (con el timeout como duración) alimentan los timeouts adaptativos. No
+        lo hacen los errores rápidos, para que un scraper bloqueado no achique
+        su propio timeout, ni los cortes por el deadline del request
+        (`own_timeout=False`): esa duración dice cuánto quedaba, no cuánto
+        tarda el scraper.
+        """
+        label = scraper.__class__.__name__
+        t0 = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(scraper.search(name, company, role, location), timeout)
+        except asyncio.TimeoutError:
+            metrics.SCRAPER_SECONDS.labels(label, "timeout").observe(time.perf_counter() - t0)
+            if own_timeout:
+                self.timeouts.observe(label, timeout)
+            logger.warning("%s cancelado (timeout %.0fs)", label, timeout)
+            return []
+        except asyncio.CancelledError:
+            metrics.SCRAPER_SECONDS.labels(label, "cancelled").observe(time.perf_counter() - t0)
+            raise
+        except Exception:
+            metrics.SCRAPER_SECONDS.labels(label, "error").observe(time.perf_counter() - t0)
+            raise
+        elapsed = time.perf_counter() - t0
+        metrics.SCRAPER_SECONDS.labels(label, "ok").observe(elapsed)
+        metrics.SCRAPER_ITEMS.labels(label).observe(len(result) if isinstance(result, list) else 0)
+        self.timeouts.observe(label, elapsed)
+        return result
@@ -0,0 +1,153 @@
+"""Páginas corporativas guardadas para revalidación condicional (SQLite).
+
+Los sitios corporativos cambian poco, pero cada prospecto de una empresa
+ya visitada volvía a bajar la homepage y las páginas internas completas.
+Aquí se guarda el HTML de cada página que respondió con `ETag` o
+`Last-Modified`; la siguiente vez `CorporateSiteScraper._fetch_html` manda
+`If-None-Match`/`If-Modified-Since` y, si el sitio responde 304, usa el
+HTML guardado. Las páginas sin validadores no se guardan: sin ellos no hay
+forma barata de saber si cambiaron.
+
+Con los snapshots de HTML activos (scraper/snapshots.py) el cuerpo no se
+duplica: `_get` ya lo dejó en un blob y aquí solo queda su hash. Si la
+retención de los snapshots borró el blob, la página cuenta como no
+guardada y se baja completa.
+
+Como la cola, las operaciones son cortas y bloqueantes; desde código async
+se llaman con `asyncio.to_thread`.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from scraper.snapshots import SnapshotStore, body_hash, get_snapshot_store
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body TEXT NOT NULL,  -- '' si está en los blobs de los snapshots
+    hash TEXT,
+    stored_at REAL NOT NULL,
+    validated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_validated ON pages (validated_at);
+"""
+
+
+@dataclass
+class CachedPage:
+    url: str
+    body: str
+    etag: str = ""
+    last_modified: str = ""
+
+    def validators(self) -> dict[str, str]:
+        """Headers de la request condicional."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """HTML por URL con sus validadores; se descarta lo no revalidado en `ttl_seconds`."""
+
+    def __init__(self, db_path: str, ttl_seconds: float = 30 * 86400, max_body: int = 1_000_000,
+                 blobs: Optional[SnapshotStore] = None):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_body = max_body
+        self.blobs = blobs
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            if ttl_seconds > 0:
+                self._conn.execute("DELETE FROM pages WHERE validated_at < ?", (time.time() - ttl_seconds,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        since = time.time() - self.ttl_seconds if self.ttl_seconds > 0 else 0
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, hash, etag, last_modified FROM pages WHERE url = ? AND validated_at >= ?", (url, since)
+            ).fetchone()
+        if row is None:
+            return None
+        body = row[0] or (self.blobs.body(row[1]) if self.blobs and row[1] else None)
+        if not body:
+            return None
+        return CachedPage(url, body, row[2] or "", row[3] or "")
+
+    def put(self, url: str, body: str, etag: str = "", last_modified: str = "") -> bool:
+        """Guardar la página si trae validadores; True si quedó guardada."""
+        if not (etag or last_modified) or not body or len(body) > self.max_body:
+            self.discard(url)
+            return False
+        digest = body_hash(body)
+        inline = "" if self.blobs and self.blobs.has(digest) else body
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, body, hash, stored_at, validated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag or None, last_modified or None, inline, digest, now, now),
+            )
+        return True
+
+    def touch(self, url: str):
+        """Marcar la página como revalidada (304) ahora."""
+        with self._lock:
+            self._conn.execute("UPDATE pages SET validated_at = ? WHERE url = ?", (time.time(), url))
+
+    def discard(self, url: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+
+_cache: Optional[PageCache] = None
+_configured = False
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Instancia del proceso, o None si está desactivado (CORPORATE_PAGE_CACHE_PATH vacío)."""
+    global _cache, _configured
+    if not _configured:
+        from config.settings import get_settings
+
+        cfg = get_settings().corporate_crawl
+        if cfg.page_cache_path:
+            try:
+                _cache = PageCache(cfg.page_cache_path, cfg.page_cache_ttl_days * 86400,
+                                   blobs=get_snapshot_store())
+            except sqlite3.Error as e:
+                logger.warning("Cache de páginas corporativas no disponible (%s): se bajan completas", e)
+        _configured = True
+    return _cache
+
+
+def set_page_cache(cache: Optional[PageCache]) -> Optional[PageCache]:
+    """Reemplazar el cache del proceso (tests, bench/); devuelve el anterior."""
+    global _cache, _configured
+    previous, _cache, _configured = _cache, cache, True
+    return previous
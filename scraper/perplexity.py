@@ -1,10 +1,62 @@
 """Scraper que usa Perplexity API (sonar-pro) para búsqueda web real."""
+import asyncio
+import copy
 import json
+import logging
+import re
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from typing import Optional
 
 import httpx
 
+from config import metrics
 from scraper.base import BaseScraper, ScrapedItem
+from scraper.deadline import budget
+from scraper.json_stream import JSONStreamParser
+from scraper.singleflight import SingleFlight, normalize_key
+from scraper.transport import get_transport
+
+logger = logging.getLogger(__name__)
+
+# Consulta de empresa por (empresa, ubicación): el segundo prospecto de la
+# misma empresa no vuelve a pagarla. LRU con TTL; solo respuestas parseables.
+_company_cache: "OrderedDict[tuple, tuple[float, dict]]" = OrderedDict()
+_company_flight = SingleFlight("perplexity_empresa")
+
+
+def clear_company_cache():
+    _company_cache.clear()
+
+
+def _cache_get(key: tuple) -> Optional[dict]:
+    entry = _company_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, value = entry
+    if time.monotonic() >= expires_at:
+        del _company_cache[key]
+        return None
+    _company_cache.move_to_end(key)
+    return value
+
+
+def _cache_put(key: tuple, value: dict, ttl: float, max_entries: int):
+    if ttl <= 0:
+        return
+    _company_cache[key] = (time.monotonic() + ttl, value)
+    _company_cache.move_to_end(key)
+    while len(_company_cache) > max_entries:
+        _company_cache.popitem(last=False)
+
+
+_RULES = (
+    "Eres un investigador B2B. Tu tarea es buscar información REAL y VERIFICABLE.\n\n"
+    "REGLAS ANTI-ALUCINACIÓN (CRÍTICAS - LEER CON ATENCIÓN):\n"
+    "1. NUNCA inventes información. Si no encuentras datos reales, deja el campo vacío ''.\n"
+    "2. NUNCA fabriques URLs. Si no tienes una URL REAL que hayas encontrado, deja el campo vacío.\n"
+)
 
 
 class PerplexityScraper(BaseScraper):
@@ -15,14 +67,21 @@ class PerplexityScraper(BaseScraper):
     - Tiene acceso web real → busca LinkedIn, noticias, etc.
     - Devuelve `citations` con URLs reales verificables
 
+    Son dos consultas concurrentes: la de empresa (industria, tamaño,
+    competidores, noticias recientes) se cachea por empresa durante
+    PERPLEXITY_COMPANY_TTL_SECONDS y se comparte entre investigaciones en
+    vuelo; la de persona es más chica y va siempre. Ambas llegan en
+    streaming y se parsean a medida que llegan (scraper/json_stream.py):
+    con `persona`/`empresa` cerradas no se espera la cola de `hallazgos`.
+
     Precauciones anti-alucinación:
     - Las URLs se toman de `citations` del API response (NO del contenido)
     - Datos de persona solo se usan para enriquecimiento
     - Temperatura 0.1 (muy conservadora)
     """
 
-    API_URL = "https://api.perplexity.ai/chat/completions"
     MODEL = "sonar-pro"
+    TIMEOUT = 28
 
     def __init__(self):
         super().__init__()
@@ -34,51 +93,56 @@ class PerplexityScraper(BaseScraper):
         self.citations = []
         api_key = self.settings.perplexity_api_key
         if not api_key:
-            print("[PerplexityScraper] WARN: PERPLEXITY_API_KEY no configurada - scraper deshabilitado")
+            logger.warning("PERPLEXITY_API_KEY no configurada - scraper deshabilitado")
             return []
 
-        today = datetime.now()
-        six_months_ago = today - timedelta(days=180)
-        date_limit = six_months_ago.strftime("%B %Y")
-        current_date = today.strftime("%d de %B de %Y")
+        timeout = budget(self.TIMEOUT)
+        if timeout < 1:
+            logger.warning("Sin tiempo para consultar Perplexity (deadline del request)")
+            return []
 
+        person, company_data = await asyncio.gather(
+            self._query_person(name, company, role, location, timeout),
+            self._query_company(company, location, timeout),
+        )
+        if person is None and company_data is None:
+            return []
+        person = person or {"persona": {}, "citations": []}
+        company_data = company_data or {"empresa": {}, "hallazgos": [], "citations": []}
+
+        self.citations = list(dict.fromkeys(person["citations"] + company_data["citations"]))
+        if self.citations:
+            logger.debug("%s citations reales obtenidas", len(self.citations))
+        items = self._build_items(
+            {"persona": person["persona"], "empresa": company_data["empresa"],
+             "hallazgos": company_data["hallazgos"]},
+            name, company, person["citations"], company_data["citations"],
+        )
+        logger.info("%s items generados", len(items))
+        return items
+
+    async def _query_person(self, name: str, company: str, role: str, location: str,
+                            timeout: float) -> Optional[dict]:
+        """Perfil de la persona: {"persona", "citations"} o None si falló."""
+        current_date = datetime.now().strftime("%d de %B de %Y")
         system_prompt = (
-            "Eres un investigador B2B. Tu tarea es buscar información REAL y VERIFICABLE.\n\n"
-            "REGLAS ANTI-ALUCINACIÓN (CRÍTICAS - LEER CON ATENCIÓN):\n"
-            "1. NUNCA inventes información. Si no encuentras datos reales, deja el campo vacío ''.\n"
-            "2. NUNCA fabriques URLs. Si no tienes una URL REAL que hayas encontrado, deja el campo vacío.\n"
-            "3. NUNCA inventes noticias, eventos, conferencias, montos de inversión ni proyectos.\n"
-            "4. Si no encuentras información sobre la PERSONA, devuelve persona con campos vacíos.\n"
-            "5. CUIDADO con empresas homónimas: verifica que la empresa encontrada sea la CORRECTA.\n"
-            "   - Verifica país, industria y contexto. Si hay ambigüedad, indica cuál empresa encontraste.\n"
-            "6. CUIDADO con PERSONAS HOMÓNIMAS: puede haber varias personas con el mismo nombre.\n"
+            _RULES
+            + "3. Si no encuentras información sobre la PERSONA, devuelve persona con campos vacíos.\n"
+            "4. CUIDADO con PERSONAS HOMÓNIMAS: puede haber varias personas con el mismo nombre.\n"
             "   - SOLO incluye datos de la persona que trabaja en la empresa indicada.\n"
             "   - Si encuentras perfiles de personas con el mismo nombre en OTRAS empresas, IGNÓRALOS completamente.\n"
             "   - NO mezcles trayectorias, educación ni cargos de diferentes personas.\n"
-            "7. Es MIL VECES mejor devolver campos vacíos que mezclar datos de personas diferentes.\n\n"
-            f"FECHA ACTUAL: {current_date}.\n"
-            f"Solo información de los últimos 6 meses (desde {date_limit}).\n\n"
+            "5. Es MIL VECES mejor devolver campos vacíos que mezclar datos de personas diferentes.\n\n"
+            f"FECHA ACTUAL: {current_date}.\n\n"
             "Responde en JSON con esta estructura:\n"
             "{\n"
             '  "persona": {\n'
             '    "nombre_completo": "", "cargo_actual": "", "empresa_actual": "",\n'
             '    "linkedin_url": "", "trayectoria": "", "educacion": "",\n'
             '    "ubicacion": "", "logros_recientes": []\n'
-            "  },\n"
-            '  "empresa": {\n'
-            '    "nombre": "", "industria": "", "descripcion": "",\n'
-            '    "productos_servicios": [], "tamano_empleados": "",\n'
-            '    "ubicacion": "", "sitio_web": "",\n'
-            '    "desafios_sector": [], "competidores": [], "presencia": ""\n'
-            "  },\n"
-            '  "hallazgos": [\n'
-            '    {"titulo": "Título de la noticia/evento", "resumen": "Breve descripción", "fecha": "Fecha aproximada"}\n'
-            "  ]\n"
-            "}\n\n"
-            "NOTA SOBRE HALLAZGOS: Solo incluye noticias/eventos que REALMENTE hayas encontrado "
-            "en tu búsqueda web. Las URLs de las fuentes se extraerán automáticamente."
+            "  }\n"
+            "}"
         )
-
         location_part = f" en {location}" if location else ""
         role_part = f" ({role})" if role else ""
         user_prompt = (
@@ -87,27 +151,112 @@ class PerplexityScraper(BaseScraper):
             f"1. El perfil de LinkedIn de {name} - busca su headline, experiencia laboral, "
             f"educación universitaria, ubicación geográfica (ciudad/país)\n"
             f"2. Si no encuentras LinkedIn, busca cualquier perfil público con su trayectoria "
-            f"profesional, formación académica y ubicación\n"
-            f"3. Información de {company}: industria, productos/servicios, tamaño (empleados), "
-            f"sitio web, descripción del negocio, competidores, presencia geográfica\n"
-            f"4. Noticias recientes de {company} en los últimos 6 meses: nuevos proyectos, "
-            f"contratos, inversiones, cambios ejecutivos, expansiones, resultados financieros\n\n"
+            f"profesional, formación académica y ubicación\n\n"
             f"CAMPOS PRIORITARIOS para la persona:\n"
             f"- educacion: nombre de universidad/institución y título/carrera obtenida\n"
             f"- ubicacion: ciudad y país donde trabaja o reside\n"
             f"- trayectoria: resumen de su carrera profesional y cargos anteriores\n"
             f"- cargo_actual: su puesto actual en {company}\n\n"
-            f"IMPORTANTE: {company} puede tener homónimos en otros países. "
-            f"Asegúrate de que la información corresponda a la empresa correcta"
-            f"{location_part}.\n"
             f"Si no encuentras información verificable, devuelve campos vacíos. "
             f"NO inventes datos ni URLs."
         )
-
+        data, citations, _ = await self._ask("persona", system_prompt, user_prompt, 1500, timeout,
+                                             required=("persona",))
+        if data is None:
+            return None
+        return {"persona": data.get("persona") or {}, "citations": citations}
+
+    async def _query_company(self, company: str, location: str, timeout: float) -> Optional[dict]:
+        """Empresa y noticias: {"empresa", "hallazgos", "citations"} (cacheado) o None."""
+        key = normalize_key(company, location)
+        cached = _cache_get(key)
+        if cached is not None:
+            metrics.PERPLEXITY_COMPANY_CACHE.labels("hit").inc()
+            logger.debug("Empresa %r desde cache", company)
+            return copy.deepcopy(cached)
+        metrics.PERPLEXITY_COMPANY_CACHE.labels("miss").inc()
+
+        async def fetch() -> Optional[dict]:
+            today = datetime.now()
+            date_limit = (today - timedelta(days=180)).strftime("%B %Y")
+            current_date = today.strftime("%d de %B de %Y")
+            system_prompt = (
+                _RULES
+                + "3. NUNCA inventes noticias, eventos, conferencias, montos de inversión ni proyectos.\n"
+                "4. CUIDADO con empresas homónimas: verifica que la empresa encontrada sea la CORRECTA.\n"
+                "   - Verifica país, industria y contexto. Si hay ambigüedad, indica cuál empresa encontraste.\n\n"
+                f"FECHA ACTUAL: {current_date}.\n"
+                f"Solo información de los últimos 6 meses (desde {date_limit}).\n\n"
+                "Responde en JSON con esta estructura:\n"
+                "{\n"
+                '  "empresa": {\n'
+                '    "nombre": "", "industria": "", "descripcion": "",\n'
+                '    "productos_servicios": [], "tamano_empleados": "",\n'
+                '    "ubicacion": "", "sitio_web": "",\n'
+                '    "desafios_sector": [], "competidores": [], "presencia": ""\n'
+                "  },\n"
+                '  "hallazgos": [\n'
+                '    {"titulo": "Título de la noticia/evento", "resumen": "Breve descripción", "fecha": "Fecha aproximada"}\n'
+                "  ]\n"
+                "}\n\n"
+                "NOTA SOBRE HALLAZGOS: Solo incluye noticias/eventos que REALMENTE hayas encontrado "
+                "en tu búsqueda web. Las URLs de las fuentes se extraerán automáticamente."
+            )
+            location_part = f" en {location}" if location else ""
+            user_prompt = (
+                f"Investiga la empresa {company}{location_part}.\n\n"
+                f"Busca ESPECÍFICAMENTE:\n"
+                f"1. Información de {company}: industria, productos/servicios, tamaño (empleados), "
+                f"sitio web, descripción del negocio, competidores, presencia geográfica\n"
+                f"2. Noticias recientes de {company} en los últimos 6 meses: nuevos proyectos, "
+                f"contratos, inversiones, cambios ejecutivos, expansiones, resultados financieros\n\n"
+                f"IMPORTANTE: {company} puede tener homónimos en otros países. "
+                f"Asegúrate de que la información corresponda a la empresa correcta"
+                f"{location_part}.\n"
+                f"Si no encuentras información verificable, devuelve campos vacíos. "
+                f"NO inventes datos ni URLs."
+            )
+            data, citations, complete = await self._ask("empresa", system_prompt, user_prompt, 2500, timeout,
+                                                        required=("empresa",), optional=("hallazgos",))
+            if data is None:
+                return None
+            value = {"empresa": data.get("empresa") or {}, "hallazgos": data.get("hallazgos") or [],
+                     "citations": citations}
+            # Solo respuestas completas: una empresa vacía o unos hallazgos
+            # cortados por el margen de gracia valen para este prospecto, no
+            # para los próximos de la empresa durante todo el TTL
+            empresa = value["empresa"]
+            if complete and isinstance(empresa, dict) and any(empresa.values()):
+                cfg = self.settings.perplexity
+                _cache_put(key, value, cfg.company_ttl_seconds, cfg.company_cache_size)
+            return value
+
+        value = await _company_flight.do(key, fetch)
+        return copy.deepcopy(value) if value is not None else None
+
+    async def _ask(self, what: str, system_prompt: str, user_prompt: str, max_tokens: int,
+                   timeout: float, required: tuple[str, ...],
+                   optional: tuple[str, ...] = ()) -> tuple[Optional[dict], list[str], bool]:
+        """Una consulta a sonar-pro en streaming: (JSON parseado o None, citations,
+        si cerraron todas las claves pedidas).
+
+        El JSON se parsea a medida que llegan los tokens. Cuando cerraron las
+        claves `required` se deja de leer; las `optional` (la cola de
+        `hallazgos`) tienen PERPLEXITY_TAIL_GRACE_SECONDS más para cerrar y,
+        si no alcanzan, se usan sus elementos ya completos.
+        """
+        api_key = self.settings.perplexity_api_key
+        grace = self.settings.perplexity.tail_grace_seconds
+        parser = JSONStreamParser()
+        citations: list[str] = []
+        raw: list[str] = []  # respuesta no-SSE (proveedor que ignora "stream")
+        streamed = False
+        loop = asyncio.get_running_loop()
+        tail_until: Optional[float] = None
         try:
-            async with httpx.AsyncClient(timeout=28) as client:
-                response = await client.post(
-                    self.API_URL,
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                lines = get_transport().stream_lines(
+                    client, "POST", self.settings.upstream.perplexity_url,
                     headers={
                         "Authorization": f"Bearer {api_key}",
                         "Content-Type": "application/json",
@@ -119,35 +268,61 @@ class PerplexityScraper(BaseScraper):
                             {"role": "user", "content": user_prompt},
                         ],
                         "temperature": 0.1,
-                        "max_tokens": 4096,
+                        "max_tokens": max_tokens,
+                        "stream": True,
                     },
                 )
-                response.raise_for_status()
-
-            data = response.json()
-
-            # Extraer citations (URLs reales de la búsqueda)
-            self.citations = data.get("citations", [])
-            if self.citations:
-                print(f"[PerplexityScraper] {len(self.citations)} citations reales obtenidas")
-
-            content = data["choices"][0]["message"]["content"]
-            items = self._parse_response(content, name, company)
-            print(f"[PerplexityScraper] OK: {len(items)} items generados")
-            return items
+                try:
+                    while not parser.done:
+                        try:
+                            if tail_until is None:
+                                line = await anext(lines)
+                            else:
+                                line = await asyncio.wait_for(anext(lines), max(tail_until - loop.time(), 0))
+                        except (StopAsyncIteration, asyncio.TimeoutError):
+                            break
+                        if not line.startswith("data:"):
+                            raw.append(line)
+                            continue
+                        streamed = True
+                        payload = line[5:].strip()
+                        if payload == "[DONE]":
+                            break
+                        chunk = json.loads(payload)
+                        # Citations: URLs reales de la búsqueda (vienen en cada chunk)
+                        citations = chunk.get("citations") or citations
+                        choice = (chunk.get("choices") or [{}])[0]
+                        parser.feed((choice.get("delta") or {}).get("content") or "")
+                        if all(k in parser.values for k in required):
+                            if all(k in parser.values for k in optional) or grace <= 0:
+                                break
+                            if tail_until is None:
+                                tail_until = loop.time() + grace
+                finally:
+                    await lines.aclose()
+
+            if not streamed and raw:
+                data = json.loads("\n".join(raw))
+                citations = data.get("citations") or []
+                parser.feed(data["choices"][0]["message"]["content"])
+            if tail_until is not None and not all(k in parser.values for k in optional):
+                logger.debug("Perplexity (%s): cola de %s cortada tras %.0fs", what, ", ".join(optional), grace)
+            if any(k in parser.values for k in required) or parser.done:
+                return parser.partial(), citations, all(k in parser.values for k in (*required, *optional))
+            data = self._parse_json(parser.text)
+            return data, citations, data is not None
 
         except httpx.TimeoutException:
-            print("[PerplexityScraper] WARN: Timeout (28s) - Perplexity demoro demasiado")
-            return []
+            logger.warning("Timeout (%.0fs) - Perplexity (%s) demoro demasiado", timeout, what)
         except httpx.HTTPStatusError as e:
-            print(f"[PerplexityScraper] WARN: HTTP {e.response.status_code}: {e.response.text[:200]}")
-            return []
+            logger.warning("HTTP %s (%s): %s", e.response.status_code, what, e.response.text[:200])
         except Exception as e:
-            print(f"[PerplexityScraper] WARN: Error: {e}")
-            return []
+            logger.warning("Error (%s): %s", what, e)
+        return None, [], False
 
-    def _parse_response(self, content: str, name: str, company: str) -> list[ScrapedItem]:
-        """Parsea la respuesta JSON de Perplexity en ScrapedItems."""
+    @staticmethod
+    def _parse_json(content: str) -> Optional[dict]:
+        """JSON de la respuesta (con o sin bloque ```json); None si no es parseable."""
         try:
             clean = content
             if "```json" in clean:
@@ -157,18 +332,20 @@ class PerplexityScraper(BaseScraper):
 
             data = json.loads(clean.strip())
         except (json.JSONDecodeError, IndexError) as e:
-            print(f"[PerplexityScraper] Error parseando JSON: {e}")
+            logger.warning("Error parseando JSON: %s", e)
             # Intentar extraer JSON con regex como fallback
-            import re
             match = re.search(r"\{.*\}", content, re.DOTALL)
-            if match:
-                try:
-                    data = json.loads(match.group(0))
-                except json.JSONDecodeError:
-                    return []
-            else:
-                return []
-
+            if not match:
+                return None
+            try:
+                data = json.loads(match.group(0))
+            except json.JSONDecodeError:
+                return None
+        return data if isinstance(data, dict) else None
+
+    def _build_items(self, data: dict, name: str, company: str,
+                     person_citations: list[str], company_citations: list[str]) -> list[ScrapedItem]:
+        """ScrapedItems de persona, empresa y hallazgos (con citations de su consulta)."""
         # Guardar datos estructurados para enriquecimiento directo
         safe_data = {
             "persona": data.get("persona", {}),
@@ -200,7 +377,7 @@ class PerplexityScraper(BaseScraper):
             if parts:
                 # Usar primera citation de LinkedIn si existe
                 linkedin_url = ""
-                for cite in self.citations:
+                for cite in person_citations:
                     if "linkedin.com" in cite:
                         linkedin_url = cite
                         break
@@ -237,7 +414,7 @@ class PerplexityScraper(BaseScraper):
                 # Usar citation del sitio web corporativo si existe
                 corp_url = empresa.get("sitio_web", "")
                 if not corp_url:
-                    for cite in self.citations:
+                    for cite in company_citations:
                         if company.lower().replace(" ", "") in cite.lower().replace(" ", ""):
                             corp_url = cite
                             break
@@ -251,10 +428,10 @@ class PerplexityScraper(BaseScraper):
 
         # Items de hallazgos/noticias con citations REALES
         hallazgos = data.get("hallazgos", [])
-        if hallazgos and self.citations:
+        if hallazgos and company_citations:
             # Filtrar citations que NO son LinkedIn ni la empresa misma
             news_citations = [
-                c for c in self.citations
+                c for c in company_citations
                 if "linkedin.com" not in c
                 and not c.endswith((".cl/", ".com/"))  # Skip homepages
             ]
@@ -0,0 +1,71 @@
+"""Coalescencia de llamadas idénticas en vuelo (singleflight).
+
+Si dos usuarios (o un doble click) investigan el mismo prospecto a la vez,
+el pipeline corría dos veces completo: doble scraping, doble costo LLM. Con
+`SingleFlight.do(key, fn)` el primer llamador ejecuta `fn` y los demás con la
+misma clave esperan ese mismo resultado (o excepción).
+
+La ejecución compartida está protegida con `asyncio.shield`: si un llamador
+se cancela (ej: timeout del orquestador), los demás siguen esperando. Solo
+se cancela la tarea cuando ya no queda ningún llamador esperándola.
+"""
+import asyncio
+import logging
+import re
+import unicodedata
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def normalize_key(*parts: str) -> tuple[str, ...]:
+    """Clave de identidad: minúsculas, sin tildes ni espacios repetidos."""
+    out = []
+    for part in parts:
+        text = unicodedata.normalize("NFKD", part or "")
+        text = "".join(c for c in text if not unicodedata.combining(c))
+        out.append(re.sub(r"\s+", " ", text).strip().casefold())
+    return tuple(out)
+
+
+class SingleFlight:
+    """Una ejecución por clave mientras esté en vuelo."""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._calls: dict[Hashable, tuple[asyncio.Task, list[int]]] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        entry = self._calls.get(key)
+        return entry is not None and not entry[0].done()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        entry = self._calls.get(key)
+        if entry is not None and (entry[0].done() or entry[0].get_loop() is not loop):
+            entry = None
+        if entry is None:
+            task = asyncio.ensure_future(fn())
+            entry = (task, [0])
+            self._calls[key] = entry
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        else:
+            logger.debug("%s %r ya en curso: esperando resultado compartido", self.name or "call", key)
+
+        task, waiters = entry
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if waiters[0] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            waiters[0] -= 1
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        entry = self._calls.get(key)
+        if entry is not None and entry[0] is task:
+            del self._calls[key]
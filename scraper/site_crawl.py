@@ -0,0 +1,191 @@
+"""Qué páginas de un sitio corporativo vale la pena bajar.
+
+El crawl tomaba los primeros 4 links internos en orden de documento, que
+suelen ser la política de privacidad, el login de clientes o el selector de
+idioma. Aquí se juntan candidatos de la homepage (con su texto de ancla) y
+del sitemap (`robots.txt` → `Sitemap:` o `/sitemap.xml`), se descartan los
+que prohíbe robots.txt y los que no aportan (legal, login, carrito,
+archivos, otros idiomas) y se ordenan por tema:
+
+    nosotros/empresa > servicios/productos > proyectos/clientes >
+    equipo, noticias, sustentabilidad > inversionistas > contacto
+
+Se elige primero lo mejor de cada tema (cubrir "nosotros" y "servicios"
+dice más que dos páginas de servicios) y luego se completa por puntaje. Las
+páginas más profundas y con query string puntúan menos. Los links de la
+homepage sin tema conocido quedan al final con puntaje bajo; las URLs del
+sitemap sin tema (posts, fichas) no entran.
+"""
+import re
+from dataclasses import dataclass, field
+from urllib.parse import urljoin, urlsplit
+
+from scraper.matching import fold
+
+# Tema → (peso, palabras en path o texto del link, ya plegadas)
+TOPICS = {
+    "nosotros": (5.0, ("nosotros", "quienes-somos", "quienessomos", "quienes somos", "empresa", "compania",
+                       "about", "acerca", "historia", "who-we-are", "company", "institucional")),
+    "servicios": (4.0, ("servicio", "service", "producto", "product", "solucion", "solution", "negocio",
+                        "capacidad", "que-hacemos", "what-we-do")),
+    "proyectos": (3.5, ("proyecto", "project", "obras", "cliente", "client", "casos", "/case", "portafolio",
+                        "portfolio", "experiencia")),
+    "equipo": (3.0, ("equipo", "/team", "directorio", "liderazgo", "leadership", "ejecutivo", "management",
+                     "gobierno-corporativo", "gobierno corporativo")),
+    "noticias": (3.0, ("noticia", "news", "prensa", "/press", "novedad", "actualidad", "comunicado", "blog")),
+    "sustentabilidad": (3.0, ("sustentab", "sostenib", "sustainab", "/esg", "medio-ambiente", "responsabilidad")),
+    "inversionistas": (2.0, ("inversionista", "investor", "memoria", "reporte", "report")),
+    "contacto": (1.0, ("contacto", "contact", "ubicacion", "oficina", "sucursal")),
+}
+# Páginas que nunca aportan contexto del prospecto o la empresa: en cualquier
+# parte del path o del texto del link...
+_SKIP = ("privacidad", "privacy", "cookie", "login", "acceso cliente", "acceso-cliente", "portal cliente",
+         "portal-cliente", "ingresar", "intranet", "registro", "signup", "sign-in", "carrito", "checkout",
+         "mi-cuenta", "my-account", "terminos", "legal", "politica", "policy", "wp-admin", "wp-login",
+         "trabaja-con", "trabaje-con", "trabaja con", "careers")
+# ... o como segmento completo del path ("cartera" contiene "cart", "research" contiene "search")
+_SKIP_SEGMENTS = frozenset({"acceso", "cart", "terms", "feed", "tag", "category", "author", "page", "buscar",
+                            "search", "empleo", "empleos"})
+_FILE_EXT = re.compile(r"\.(pdf|jpe?g|png|gif|svg|webp|zip|rar|docx?|xlsx?|pptx?|mp4|mp3|xml|json|css|js)$")
+_LANG_PREFIX = re.compile(r"^/([a-z]{2})(?:[-_][a-z]{2})?(?:/|$)")
+_LANGS = frozenset({"es", "en", "pt", "fr", "de", "it", "zh", "ja", "ko", "ru"})
+_LOC = re.compile(r"<loc>\s*(.*?)\s*</loc>", re.IGNORECASE | re.DOTALL)
+# Links de la homepage sin tema conocido: después de todo lo que tenga tema
+_UNKNOWN_SCORE = 0.5
+
+
+def host_key(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+@dataclass
+class Robots:
+    """Lo que usa el crawl de robots.txt: sitemaps y prefijos prohibidos para `*`."""
+    sitemaps: list[str] = field(default_factory=list)
+    disallow: list[str] = field(default_factory=list)
+
+    def allowed(self, url: str) -> bool:
+        path = urlsplit(url).path or "/"
+        return not any(path.startswith(rule) for rule in self.disallow)
+
+
+def parse_robots(text: str) -> Robots:
+    robots = Robots()
+    applies = False
+    in_agents = False
+    for raw in text[:65536].splitlines():
+        line = raw.split("#", 1)[0].strip()
+        key, _, value = line.partition(":")
+        key, value = key.strip().lower(), value.strip()
+        if key == "sitemap" and value:
+            robots.sitemaps.append(value)
+        elif key == "user-agent":
+            # Varias líneas User-agent seguidas forman un mismo grupo
+            applies = (applies and in_agents) or value == "*"
+            in_agents = True
+            continue
+        elif key == "disallow" and applies and value:
+            rule = value.split("*", 1)[0].rstrip("$")
+            if rule:
+                robots.disallow.append(rule)
+        in_agents = False
+    return robots
+
+
+def parse_sitemap(xml: str) -> tuple[list[str], list[str]]:
+    """(URLs de páginas, sitemaps hijos) de un sitemap o índice de sitemaps."""
+    locs = [loc.replace("&amp;", "&") for loc in _LOC.findall(xml)]
+    if "<sitemapindex" in xml[:2000].lower():
+        return [], locs
+    return locs, []
+
+
+def pick_child_sitemap(children: list[str]) -> list[str]:
+    """Sitemaps hijos ordenados: los de páginas antes que los de posts/productos/imágenes."""
+    def rank(url: str) -> int:
+        name = url.lower().rsplit("/", 1)[-1]
+        if "page" in name or "pagina" in name:
+            return 0
+        if any(w in name for w in ("post", "product", "image", "video", "tag", "categor", "author")):
+            return 2
+        return 1
+    return sorted(children, key=rank)
+
+
+def _language(path: str) -> str:
+    m = _LANG_PREFIX.match(path)
+    return m.group(1) if m and m.group(1) in _LANGS else ""
+
+
+def score_url(url: str, anchor: str = "", from_homepage: bool = True, site_language: str = "") -> tuple[float, str]:
+    """(puntaje, tema) de una URL candidata; puntaje ≤ 0 = no bajarla."""
+    parts = urlsplit(url)
+    path = fold(parts.path)
+    if _FILE_EXT.search(path):
+        return 0.0, ""
+    text = f"{path} {fold(anchor)}"
+    if any(w in text for w in _SKIP) or not _SKIP_SEGMENTS.isdisjoint(path.split("/")):
+        return 0.0, ""
+    if _language(path) != site_language:
+        return 0.0, ""  # selector de idioma: la misma página en otro idioma
+    best, topic = 0.0, ""
+    for name, (weight, words) in TOPICS.items():
+        if weight > best and any(w in text for w in words):
+            best, topic = weight, name
+    if not topic:
+        if not from_homepage:
+            return 0.0, ""
+        best = _UNKNOWN_SCORE
+    depth = len([s for s in parts.path.split("/") if s]) - (1 if site_language else 0)
+    best -= 0.5 * max(0, depth - 1)
+    if parts.query:
+        best -= 1.0
+    return max(best, 0.0), topic
+
+
+def normalize(url: str) -> str:
+    """URL sin fragmento ni `/` final (para no bajar dos veces la misma página)."""
+    url = url.split("#", 1)[0]
+    return url[:-1] if url.endswith("/") and urlsplit(url).path not in ("", "/") else url
+
+
+def plan_crawl(homepage_url: str, links: list[tuple[str, str]], sitemap_urls: list[str],
+               robots: Robots | None = None, limit: int = 12) -> list[str]:
+    """Hasta `limit` URLs internas por prioridad: primero un tema de cada uno, luego por puntaje.
+
+    `links` son (href, texto) de la homepage en orden de documento.
+    """
+    base = host_key(homepage_url)
+    seen = {normalize(homepage_url), normalize(homepage_url.rstrip("/"))}
+    candidates: dict[str, tuple[str, bool]] = {}
+    for href, anchor in links:
+        if href.startswith(("mailto:", "tel:", "javascript:")):
+            continue
+        url = normalize(urljoin(homepage_url, href))
+        if url.startswith("http") and url not in seen and host_key(url) == base and url not in candidates:
+            candidates[url] = (anchor, True)
+    for loc in sitemap_urls:
+        url = normalize(loc)
+        if url.startswith("http") and url not in seen and host_key(url) == base and url not in candidates:
+            candidates[url] = ("", False)
+    if robots:
+        candidates = {u: c for u, c in candidates.items() if robots.allowed(u)}
+    # Idioma del sitio: el prefijo (/en/, /es/...) de la mayoría de los candidatos
+    languages = [_language(urlsplit(u).path) for u in candidates]
+    site_language = max(set(languages), key=languages.count) if languages else ""
+
+    scored = []
+    for order, (url, (anchor, from_homepage)) in enumerate(candidates.items()):
+        score, topic = score_url(url, anchor, from_homepage, site_language)
+        if score > 0:
+            scored.append((-score, order, url, topic))
+    scored.sort()
+    chosen, topics, rest = [], set(), []
+    for _, _, url, topic in scored:
+        if topic and topic not in topics:
+            topics.add(topic)
+            chosen.append(url)
+        else:
+            rest.append(url)
+    return (chosen + rest)[:limit]
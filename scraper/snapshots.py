@@ -0,0 +1,267 @@
+"""Snapshots del HTML crudo que bajan los scrapers (SQLite + zstd).
+
+Cada página que llega con 200 a `BaseScraper._get` (y por lo tanto a
+`_make_request` y `CorporateSiteScraper._fetch_html`) o a `tls_fetch` se
+guarda comprimida con zstd, direccionada por su contenido: la tabla `blobs`
+tiene una fila por hash (blake2b del HTML) y `fetches` una por fetch (URL,
+hora, vía, hash). La misma homepage bajada por diez prospectos ocupa un
+blob y diez filas de índice.
+
+Sirve para dos cosas:
+
+- reprocesar sin red: al cambiar un extractor (`_extract_profile_data`,
+  `_extract_page_content`) o un prompt se vuelve a correr sobre el HTML del
+  último mes. `python -m scraper.snapshots extract ...` pasa los extractores
+  por los snapshots; con `SNAPSHOT_OFFLINE=true` los scrapers leen solo de
+  aquí (lo que no está cuenta como fallo de red);
+- cache de fetches: con `SNAPSHOT_REUSE_SECONDS` > 0 una URL bajada hace
+  menos de eso no se vuelve a pedir. Esas respuestas llevan
+  `extensions["snapshot"]` para que quien las reciba no las trate como
+  recién bajadas.
+
+Los blobs también guardan el HTML del cache de páginas corporativas
+(scraper/page_cache.py), que solo indexa URL y validadores → hash.
+
+Como la cola, las operaciones son cortas y bloqueantes; desde código async
+se llaman con `asyncio.to_thread`.
+
+    python -m scraper.snapshots stats
+    python -m scraper.snapshots extract --days 30 --url-contains linkedin.com/in/
+"""
+import argparse
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+import zstandard
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    via TEXT NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fetches_url ON fetches (url, fetched_at);
+CREATE INDEX IF NOT EXISTS idx_fetches_time ON fetches (fetched_at);
+"""
+
+ZSTD_LEVEL = 3
+
+
+def body_hash(body: str) -> str:
+    return hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+
+
+@dataclass
+class Snapshot:
+    """Una fila del índice: qué se bajó, cuándo, por dónde y con qué contenido."""
+    url: str
+    fetched_at: float
+    via: str  # "http", "tls" o "revalidated" (304 del cache de páginas)
+    hash: str
+
+
+class SnapshotStore:
+    """HTML comprimido por hash de contenido + índice (URL, hora) → hash."""
+
+    def __init__(self, db_path: str, retention_seconds: float = 30 * 86400, reuse_seconds: float = 0,
+                 offline: bool = False, max_body: int = 5_000_000, prune_every: int = 1000):
+        self.db_path = db_path
+        self.retention_seconds = retention_seconds
+        self.reuse_seconds = reuse_seconds
+        self.offline = offline
+        self.max_body = max_body
+        # Un proceso web vive semanas: la retención se aplica también cada `prune_every` fetches
+        self.prune_every = prune_every
+        self._puts = 0
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        # Los contextos de zstd no se comparten entre threads
+        self._local = threading.local()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        if self._retains():
+            self.prune(time.time() - retention_seconds)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.compressor
+
+    def _retains(self) -> bool:
+        return self.retention_seconds > 0 and not self.offline
+
+    def put(self, url: str, body: str, via: str = "http") -> Optional[str]:
+        """Registrar un fetch; el HTML se comprime y guarda solo si su hash es nuevo."""
+        if not body or len(body) > self.max_body:
+            return None
+        digest = body_hash(body)
+        data = None if self.has(digest) else self._compressor().compress(body.encode())
+        with self._lock:
+            if data is not None:
+                self._conn.execute("INSERT OR IGNORE INTO blobs (hash, size, data) VALUES (?, ?, ?)",
+                                   (digest, len(body), data))
+            self._conn.execute("INSERT INTO fetches (url, fetched_at, via, hash) VALUES (?, ?, ?, ?)",
+                               (url, time.time(), via, digest))
+            self._puts += 1
+            due = self.prune_every > 0 and self._puts % self.prune_every == 0
+        if due and self._retains():
+            self.prune(time.time() - self.retention_seconds)
+        return digest
+
+    def has(self, digest: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is not None
+
+    def body(self, digest: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        self._compressor()
+        return self._local.decompressor.decompress(row[0]).decode()
+
+    def latest(self, url: str, max_age: Optional[float] = None) -> Optional[Snapshot]:
+        """Último fetch de `url` (de hace menos de `max_age` segundos, si se indica)."""
+        since = time.time() - max_age if max_age is not None else 0
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, fetched_at, via, hash FROM fetches WHERE url = ? AND fetched_at >= ? "
+                "ORDER BY fetched_at DESC, id DESC LIMIT 1", (url, since)
+            ).fetchone()
+        return Snapshot(*row) if row else None
+
+    def reusable(self, url: str) -> Optional[str]:
+        """HTML a usar en vez de ir a la red: cualquier snapshot en modo offline, o uno reciente."""
+        if self.offline:
+            snapshot = self.latest(url)
+        elif self.reuse_seconds > 0:
+            snapshot = self.latest(url, self.reuse_seconds)
+        else:
+            return None
+        return self.body(snapshot.hash) if snapshot else None
+
+    def fetches(self, since: float = 0, url_contains: str = "") -> Iterator[Snapshot]:
+        """Fetches desde `since`, en orden cronológico."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, fetched_at, via, hash FROM fetches WHERE fetched_at >= ? AND instr(url, ?) > 0 "
+                "ORDER BY fetched_at, id", (since, url_contains)
+            ).fetchall()
+        return (Snapshot(*row) for row in rows)
+
+    def prune(self, before: float):
+        """Borrar los fetches anteriores a `before` y los blobs que quedan sin fetch."""
+        with self._lock:
+            self._conn.execute("DELETE FROM fetches WHERE fetched_at < ?", (before,))
+            self._conn.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM fetches)")
+
+    def stats(self) -> dict:
+        with self._lock:
+            fetches, urls = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT url) FROM fetches").fetchone()
+            blobs, raw, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length(data)), 0) FROM blobs"
+            ).fetchone()
+        return {"fetches": fetches, "urls": urls, "blobs": blobs, "html_chars": raw, "stored_bytes": stored}
+
+
+_store: Optional[SnapshotStore] = None
+_configured = False
+
+
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    """Instancia del proceso, o None si está desactivado (SNAPSHOT_PATH vacío)."""
+    global _store, _configured
+    if not _configured:
+        from config.settings import get_settings
+
+        cfg = get_settings().snapshots
+        if cfg.path:
+            try:
+                _store = SnapshotStore(cfg.path, cfg.retention_days * 86400, cfg.reuse_seconds, cfg.offline)
+            except sqlite3.Error as e:
+                logger.warning("Snapshots de HTML no disponibles (%s): no se guardan", e)
+        _configured = True
+    return _store
+
+
+def set_snapshot_store(store: Optional[SnapshotStore]) -> Optional[SnapshotStore]:
+    """Reemplazar el store del proceso (tests, bench/); devuelve el anterior."""
+    global _store, _configured
+    previous, _store, _configured = _store, store, True
+    return previous
+
+
+def _extract(snapshot: Snapshot, html: str) -> Optional[dict]:
+    """Pasar el extractor actual que corresponde a la URL por el HTML guardado
+    (None para lo que no pasa por un extractor: buscadores, robots.txt, sitemaps)."""
+    from bs4 import BeautifulSoup
+
+    from scraper.corporate_site import CorporateSiteScraper
+    from scraper.linkedin import LinkedInScraper
+
+    if "linkedin.com/in/" in snapshot.url:
+        return {"extractor": "linkedin", "data": LinkedInScraper._extract_profile_data(html)}
+    host, _, path = snapshot.url.split("://", 1)[-1].partition("/")
+    if "google." in host or "linkedin.com" in host or path.split("?", 1)[0].endswith((".xml", ".txt")):
+        return None
+    item = CorporateSiteScraper()._extract_page_content(BeautifulSoup(html, "html.parser"), snapshot.url)
+    return {"extractor": "corporate", "data": {"title": item.title, "snippet": item.snippet} if item else None}
+
+
+def main():
+    from config.settings import get_settings
+
+    cfg = get_settings().snapshots
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("stats", "extract"))
+    parser.add_argument("--db", default=cfg.path or None, required=not cfg.path, help="Snapshots (SQLite)")
+    parser.add_argument("--days", type=float, default=30, help="extract: fetches de los últimos N días")
+    parser.add_argument("--url-contains", default="", help="extract: solo URLs que contengan este texto")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.db, retention_seconds=0)
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+        return
+    # Un JSON por URL (su último fetch en la ventana): comparable con diff entre versiones del extractor
+    latest: dict[str, Snapshot] = {}
+    for snapshot in store.fetches(time.time() - args.days * 86400, args.url_contains):
+        latest[snapshot.url] = snapshot
+    t0 = time.perf_counter()
+    done = 0
+    for snapshot in latest.values():
+        result = _extract(snapshot, store.body(snapshot.hash) or "")
+        if result is None:
+            continue
+        done += 1
+        print(json.dumps({"url": snapshot.url, "fetched_at": snapshot.fetched_at, **result}, ensure_ascii=False))
+    print(f"{done} páginas reprocesadas en {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,20 @@ Adapted from Super Scraper's network layer.
 """
 
 import asyncio
+import logging
 import random
 import time
 from dataclasses import dataclass, field
 
 from curl_cffi import requests as curl_requests
 
+from config import metrics
+from scraper.deadline import budget
+from scraper.snapshots import get_snapshot_store
+from scraper.transport import get_transport
+
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class TLSProfile:
@@ -115,7 +123,7 @@ def _sync_fetch(url: str, profile: TLSProfile, timeout: int = 15) -> tuple[int,
         )
         return resp.status_code, resp.text
     except Exception as e:
-        print(f"[TLSClient] Error fetching {url}: {e}")
+        logger.debug("Error fetching %s: %s", url, e)
         return 0, ""
 
 
@@ -128,8 +136,27 @@ async def tls_fetch(url: str, timeout: int = 15) -> tuple[int, str]:
     Returns (status_code, html_text). Uses a rotating browser profile
     to bypass bot detection (LinkedIn authwall, CloudFlare, etc.).
     Each consecutive call uses a different profile to maximize bypass chance.
+    The timeout is capped by the active request deadline (scraper/deadline.py).
+    200 responses are kept in the HTML snapshot store (scraper/snapshots.py),
+    which may also answer instead of the network (reuse or offline mode).
     """
     global _last_profile_idx
+    store = get_snapshot_store()
+    if store:
+        html = await asyncio.to_thread(store.reusable, url)
+        if html is not None:
+            return 200, html
+        if store.offline:
+            return 0, ""
+    timeout = budget(timeout)
+    if timeout <= 0:
+        return 0, ""
     _last_profile_idx = (_last_profile_idx + 1) % len(PROFILES)
     profile = PROFILES[_last_profile_idx]
-    return await asyncio.to_thread(_sync_fetch, url, profile, timeout)
+    t0 = time.perf_counter()
+    status, html = await asyncio.to_thread(get_transport().tls, url, profile, timeout)
+    metrics.TLS_SECONDS.observe(time.perf_counter() - t0)
+    metrics.TLS_FETCHES.labels(str(status)).inc()
+    if store and status == 200:
+        await asyncio.to_thread(store.put, url, html, "tls")
+    return status, html
@@ -0,0 +1,361 @@
+"""Capa de transporte de todo el I/O saliente: passthrough, record y replay.
+
+Todos los puntos de red pasan por aquí: `BaseScraper._make_request`, los
+helpers `_ddg_*`, `tls_fetch`, `PerplexityScraper` (en streaming, vía
+`stream_lines`) y `LLMClient`.
+
+Modos (`IO_MODE`):
+- passthrough: red real, sin overhead (por defecto).
+- record: red real y cada par request/response (o error) se guarda en un
+  cassette gzip (`IO_CASSETTE`), escrito al salir del proceso o con `save()`.
+- replay: sin red; las respuestas salen del cassette. `IO_REPLAY_LATENCY`
+  escala la latencia grabada (0 = sin esperas, 1 = la real).
+
+En replay cada request se busca primero por contenido exacto (método, URL,
+params, body); si no está, se usa la interacción no servida más parecida
+(palabras en común) del mismo endpoint. Así los prompts con la fecha del día
+(Perplexity) o con los hechos en otro orden (scrapers que terminan en otro
+orden) siguen reproduciéndose.
+"""
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+PASSTHROUGH = "passthrough"
+RECORD = "record"
+REPLAY = "replay"
+MODES = (PASSTHROUGH, RECORD, REPLAY)
+
+CASSETTE_VERSION = 1
+# Headers de respuesta que se graban además del content-type
+_VALIDATOR_HEADERS = ("etag", "last-modified")
+
+
+class CassetteMiss(httpx.TransportError):
+    """En replay, el cassette no tiene respuesta para el request."""
+
+
+def _canonical(request: dict) -> str:
+    return hashlib.sha1(json.dumps(request, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def _split_url(url: str, params: Optional[dict]) -> tuple[str, list]:
+    """URL sin query + params (de la URL y del dict) ordenados."""
+    parts = urlsplit(str(url))
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    query += [(k, str(v)) for k, v in (params or {}).items()]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", "")), sorted(query)
+
+
+def _words(request: dict) -> frozenset:
+    return frozenset(json.dumps(request, sort_keys=True, ensure_ascii=False).split())
+
+
+def _similarity(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / (len(a | b) or 1)
+
+
+class Transport:
+    """Punto único del I/O saliente. Los métodos `_http`, `_ddg` y `_tls`
+    hacen el I/O real; subclases pueden redirigirlo (ver bench/)."""
+
+    def __init__(self, mode: str = PASSTHROUGH, cassette: Optional[str] = None, replay_latency: float = 0.0):
+        if mode not in MODES:
+            raise ValueError(f"IO_MODE inválido: {mode!r} (usar {', '.join(MODES)})")
+        if mode != PASSTHROUGH and not cassette:
+            raise ValueError(f"IO_MODE={mode} requiere IO_CASSETTE")
+        self.mode = mode
+        self.cassette = Path(cassette) if cassette else None
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._interactions: list[dict] = []
+        self._exact: dict[str, deque] = defaultdict(deque)
+        self._by_endpoint: dict[tuple, deque] = defaultdict(deque)
+        self._last_served: dict[str, int] = {}
+        self._served: set[int] = set()
+        if mode == REPLAY:
+            self._load()
+        elif mode == RECORD:
+            atexit.register(self.save)
+
+    # --- API para los llamadores --------------------------------------------
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, *,
+                      params: Optional[dict] = None, **kwargs) -> httpx.Response:
+        """GET/POST vía `client` (kwargs de httpx: headers, json...). Con
+        `max_bytes` el cuerpo se lee en streaming y se corta en ese tamaño."""
+        if self.mode == PASSTHROUGH:
+            return await self._http(client, method, url, params=params, **kwargs)
+
+        base, query = _split_url(url, params)
+        req = {"method": method.upper(), "url": base, "params": query, "json": kwargs.get("json")}
+
+        async def fetch() -> dict:
+            response = await self._http(client, method, url, params=params, **kwargs)
+            data = {"status": response.status_code, "text": response.text,
+                    "content_type": response.headers.get("content-type", "")}
+            # Validadores para la revalidación condicional (scraper/page_cache.py)
+            for name in _VALIDATOR_HEADERS:
+                if name in response.headers:
+                    data[name] = response.headers[name]
+            return data
+
+        data = await self._acall("http", req, base, fetch)
+        headers = {"content-type": data["content_type"]}
+        headers.update((name, data[name]) for name in _VALIDATOR_HEADERS if name in data)
+        return httpx.Response(
+            data["status"], text=data["text"], headers=headers,
+            request=httpx.Request(method.upper(), url, params=params),
+        )
+
+    async def stream_lines(self, client: httpx.AsyncClient, method: str, url: str, *,
+                           params: Optional[dict] = None, **kwargs) -> AsyncIterator[str]:
+        """Líneas de una respuesta en streaming (SSE). Un status >= 400 lanza
+        HTTPStatusError. El llamador puede dejar de iterar antes del final:
+        en record se graban las líneas recibidas hasta ese momento."""
+        if self.mode == PASSTHROUGH:
+            async for line in self._stream(client, method, url, params=params, **kwargs):
+                yield line
+            return
+
+        base, query = _split_url(url, params)
+        req = {"method": method.upper(), "url": base, "params": query, "json": kwargs.get("json")}
+        if self.mode == REPLAY:
+            interaction = self._lookup("stream", req, base)
+            data = self._unwrap(interaction)
+            if data["status"] >= 400:
+                response = httpx.Response(data["status"], text=data["text"],
+                                          request=httpx.Request(method.upper(), url, params=params))
+                response.raise_for_status()
+            last = 0.0
+            for offset, line in data["lines"]:
+                if self.replay_latency > 0:
+                    await asyncio.sleep((offset - last) * self.replay_latency)
+                    last = offset
+                yield line
+            return
+
+        t0 = time.perf_counter()
+        lines: list = []
+        outcome: dict = {"status": 200, "text": "", "lines": lines}
+        error: Optional[Exception] = None
+        try:
+            async for line in self._stream(client, method, url, params=params, **kwargs):
+                lines.append([round(time.perf_counter() - t0, 4), line])
+                yield line
+        except httpx.HTTPStatusError as e:
+            outcome.update(status=e.response.status_code, text=e.response.text)
+            raise
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if error is not None:
+                self._record("stream", req, base, time.perf_counter() - t0, error=error)
+            else:
+                self._record("stream", req, base, time.perf_counter() - t0, result=outcome)
+
+    def ddg(self, kind: str, query: str, max_results: int = 5) -> list[dict]:
+        """Búsqueda ddgs síncrona (`text`, `news` o `text_recent`); correr en un thread."""
+        if self.mode == PASSTHROUGH:
+            return self._ddg(kind, query, max_results)
+        req = {"kind": kind, "query": query, "max_results": max_results}
+        return self._call("ddg", req, kind, lambda: self._ddg(kind, query, max_results))
+
+    def tls(self, url: str, profile, timeout: int = 15) -> tuple[int, str]:
+        """Fetch con TLS impersonation síncrono; correr en un thread."""
+        if self.mode == PASSTHROUGH:
+            return self._tls(url, profile, timeout)
+        base, query = _split_url(url, None)
+        data = self._call("tls", {"url": base, "params": query}, base,
+                          lambda: list(self._tls(url, profile, timeout)))
+        return data[0], data[1]
+
+    # --- I/O real (sobrescribible) -------------------------------------------
+
+    async def _http(self, client: httpx.AsyncClient, method: str, url: str,
+                    max_bytes: Optional[int] = None, **kwargs) -> httpx.Response:
+        if max_bytes is None:
+            return await getattr(client, method.lower())(url, **kwargs)
+        async with client.stream(method.upper(), url, **kwargs) as response:
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) >= max_bytes:
+                    break  # el resto no se baja
+            # Cuerpo ya decodificado: solo los headers que no describen la codificación
+            headers = {name: response.headers[name] for name in ("content-type", *_VALIDATOR_HEADERS)
+                       if name in response.headers}
+            return httpx.Response(response.status_code, content=bytes(body[:max_bytes]), headers=headers,
+                                  request=response.request)
+
+    async def _stream(self, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> AsyncIterator[str]:
+        async with client.stream(method.upper(), url, **kwargs) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                yield line
+
+    def _ddg(self, kind: str, query: str, max_results: int) -> list[dict]:
+        from ddgs import DDGS
+
+        if kind == "news":
+            return list(DDGS().news(query, max_results=max_results))
+        if kind == "text_recent":
+            return list(DDGS().text(query, max_results=max_results, timelimit="m"))
+        return list(DDGS().text(query, max_results=max_results))
+
+    def _tls(self, url: str, profile, timeout: int) -> tuple[int, str]:
+        from scraper.tls_client import _sync_fetch
+
+        return _sync_fetch(url, profile, timeout)
+
+    # --- Record / replay -----------------------------------------------------
+
+    async def _acall(self, kind: str, req: dict, endpoint: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self.mode == REPLAY:
+            interaction = self._lookup(kind, req, endpoint)
+            if self.replay_latency > 0:
+                await asyncio.sleep(interaction["elapsed"] * self.replay_latency)
+            return self._unwrap(interaction)
+        t0 = time.perf_counter()
+        try:
+            result = await fn()
+        except Exception as e:
+            self._record(kind, req, endpoint, time.perf_counter() - t0, error=e)
+            raise
+        self._record(kind, req, endpoint, time.perf_counter() - t0, result=result)
+        return result
+
+    def _call(self, kind: str, req: dict, endpoint: str, fn: Callable[[], Any]) -> Any:
+        if self.mode == REPLAY:
+            interaction = self._lookup(kind, req, endpoint)
+            if self.replay_latency > 0:
+                time.sleep(interaction["elapsed"] * self.replay_latency)
+            return self._unwrap(interaction)
+        t0 = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            self._record(kind, req, endpoint, time.perf_counter() - t0, error=e)
+            raise
+        self._record(kind, req, endpoint, time.perf_counter() - t0, result=result)
+        return result
+
+    def _record(self, kind: str, req: dict, endpoint: str, elapsed: float,
+                result: Any = None, error: Optional[Exception] = None):
+        interaction = {"kind": kind, "endpoint": endpoint, "request": req, "elapsed": round(elapsed, 4)}
+        if error is not None:
+            interaction["error"] = {"timeout": isinstance(error, httpx.TimeoutException),
+                                    "http": isinstance(error, httpx.HTTPError),
+                                    "message": str(error)[:500]}
+        else:
+            interaction["response"] = result
+        with self._lock:
+            self._interactions.append(interaction)
+
+    @staticmethod
+    def _unwrap(interaction: dict) -> Any:
+        error = interaction.get("error")
+        if error is None:
+            return interaction["response"]
+        if error["timeout"]:
+            raise httpx.TimeoutException(error["message"])
+        if error["http"]:
+            raise httpx.TransportError(error["message"])
+        raise RuntimeError(error["message"])
+
+    def _lookup(self, kind: str, req: dict, endpoint: str) -> dict:
+        key = _canonical({"kind": kind, **req})
+        with self._lock:
+            queue = self._exact.get(key)
+            while queue:
+                idx = queue.popleft()
+                if idx not in self._served:
+                    return self._serve(key, idx)
+            # Request idéntico repetido más veces que al grabar: misma respuesta
+            if key in self._last_served:
+                return self._interactions[self._last_served[key]]
+            # Sin match exacto: la interacción no servida más parecida del endpoint
+            candidates = [i for i in self._by_endpoint.get((kind, endpoint), ()) if i not in self._served]
+            if candidates:
+                words = _words(req)
+                best = max(candidates, key=lambda i: _similarity(words, self._words_of(i)))
+                return self._serve(key, best)
+        raise CassetteMiss(f"Sin respuesta en el cassette para {kind} {endpoint}")
+
+    def _serve(self, key: str, idx: int) -> dict:
+        self._served.add(idx)
+        self._last_served[key] = idx
+        return self._interactions[idx]
+
+    def _words_of(self, idx: int) -> frozenset:
+        interaction = self._interactions[idx]
+        if "_words" not in interaction:
+            interaction["_words"] = _words(interaction["request"])
+        return interaction["_words"]
+
+    def _load(self):
+        if not self.cassette.exists():
+            raise FileNotFoundError(f"Cassette no encontrado: {self.cassette}")
+        with gzip.open(self.cassette, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Versión de cassette no soportada: {data.get('version')}")
+        self._interactions = data["interactions"]
+        for idx, interaction in enumerate(self._interactions):
+            kind = interaction["kind"]
+            self._exact[_canonical({"kind": kind, **interaction["request"]})].append(idx)
+            self._by_endpoint[(kind, interaction["endpoint"])].append(idx)
+        logger.info("Cassette %s: %s interacciones", self.cassette, len(self._interactions))
+
+    def save(self):
+        """Escribir el cassette (record). Atómico: tmp + rename."""
+        if self.mode != RECORD:
+            return
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "recorded_at": datetime.now().isoformat(timespec="seconds"),
+                    "interactions": list(self._interactions)}
+        self.cassette.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cassette.with_name(self.cassette.name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.cassette)
+        logger.info("Cassette %s: %s interacciones grabadas", self.cassette, len(data["interactions"]))
+
+
+_transport: Optional[Transport] = None
+
+
+def get_transport() -> Transport:
+    """Transporte del proceso según settings (IO_MODE, IO_CASSETTE, IO_REPLAY_LATENCY)."""
+    global _transport
+    if _transport is None:
+        from config.settings import get_settings
+
+        io = get_settings().io
+        _transport = Transport(io.mode, io.cassette, io.replay_latency)
+    return _transport
+
+
+def set_transport(transport: Optional[Transport]) -> Optional[Transport]:
+    """Reemplazar el transporte del proceso (tests, bench/); devuelve el anterior."""
+    global _transport
+    previous, _transport = _transport, transport
+    return previous
@@ -0,0 +1,128 @@
+"""Compactación del contexto de análisis con presupuesto de tokens.
+
+`_build_llm_context` metía al prompt todos los hechos no descartados, sin
+límite. En sitios corporativos ricos eso producía prompts enormes y la
+latencia de DeepSeek crece con el tamaño de entrada. El compactador:
+
+1. Descarta hechos casi duplicados (mismo contenido con otra redacción).
+2. Recorta snippets corporativos largos (homepage + 4 subpáginas de 1500 chars).
+3. Ordena por confianza y diversidad de fuentes, penalizando que una sola
+   fuente acapare el presupuesto.
+4. Llena el presupuesto de tokens en ese orden.
+
+La estimación de tokens es local y aproximada (sin tokenizer del proveedor).
+"""
+import re
+from dataclasses import replace
+from urllib.parse import urlparse
+
+from services.verifier import VerifiedFact, _tokenize
+
+# Palabras y signos sueltos; las palabras largas pesan más (BPE las parte).
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+_CONFIDENCE_WEIGHT = {"verified": 10.0, "partial": 5.0}
+
+# Fuentes que alimentan los campos de persona: no deben quedar fuera del
+# presupuesto por tener un solo dominio.
+_PROFILE_SOURCES = ("linkedin", "perplexity_persona")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación rápida de tokens: 1 por palabra/signo + 1 cada 7 chars extra."""
+    return sum(1 + len(piece) // 7 for piece in _TOKEN_RE.findall(text))
+
+
+def _overlap(tokens_a: set[str], tokens_b: set[str]) -> float:
+    """Coeficiente de solapamiento: 1.0 si uno está contenido en el otro.
+
+    A diferencia de Jaccard, detecta el hecho corto que repite lo que ya dice
+    uno largo (ej: la meta description del sitio repetida en cada subpágina).
+    """
+    if not tokens_a or not tokens_b:
+        return 0.0
+    return len(tokens_a & tokens_b) / min(len(tokens_a), len(tokens_b))
+
+
+def _trim(text: str, max_chars: int) -> str:
+    """Recortar en límite de oración (o palabra) sin pasar de max_chars."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    sentence = max(cut.rfind(". "), cut.rfind(" | "))
+    if sentence > max_chars // 2:
+        return cut[:sentence + 1].rstrip(" |") + " …"
+    space = cut.rfind(" ")
+    return (cut[:space] if space > max_chars // 2 else cut) + " …"
+
+
+class ContextCompactor:
+    """Selecciona los hechos que entran al prompt de análisis."""
+
+    DUPLICATE_THRESHOLD = 0.8
+    SAME_SOURCE_PENALTY = 2.0
+
+    def __init__(self, token_budget: int = 3000, corporate_max_chars: int = 600):
+        self.token_budget = token_budget
+        self.corporate_max_chars = corporate_max_chars
+
+    @staticmethod
+    def _domains(fact: VerifiedFact) -> set[str]:
+        return {urlparse(u).netloc.replace("www.", "").lower() for u in fact.sources if u}
+
+    def _base_score(self, fact: VerifiedFact) -> float:
+        score = _CONFIDENCE_WEIGHT.get(fact.confidence, 0.0)
+        score += len(set(fact.source_names)) + len(self._domains(fact))
+        if any(s in _PROFILE_SOURCES for s in fact.source_names):
+            score += 4.0
+        return score
+
+    def compact(self, facts: list[VerifiedFact], token_budget: int | None = None) -> list[VerifiedFact]:
+        """Hechos a incluir, en orden de prioridad, dentro del presupuesto."""
+        budget = self.token_budget if token_budget is None else token_budget
+
+        # 1. Quitar descartados, recortar corporativos y colapsar casi duplicados
+        candidates: list[tuple[VerifiedFact, set[str]]] = []
+        for fact in facts:
+            if fact.confidence == "discarded":
+                continue
+            if set(fact.source_names) == {"corporate"} and len(fact.content) > self.corporate_max_chars:
+                fact = replace(fact, content=_trim(fact.content, self.corporate_max_chars))
+            tokens = _tokenize(fact.content)
+            if any(_overlap(tokens, seen) >= self.DUPLICATE_THRESHOLD for _, seen in candidates):
+                continue
+            candidates.append((fact, tokens))
+
+        # 2. Ranking greedy: cada hecho extra de la misma fuente pesa menos,
+        # así noticias/LinkedIn/Perplexity no quedan fuera por 5 páginas
+        # corporativas que llenan el presupuesto.
+        pending = [(self._base_score(f), f) for f, _ in candidates]
+        per_source: dict[str, int] = {}
+
+        def effective(entry: tuple[float, VerifiedFact]) -> float:
+            score, fact = entry
+            return score - self.SAME_SOURCE_PENALTY * per_source.get(self._source_key(fact), 0)
+
+        selected: list[VerifiedFact] = []
+        used = 0
+        while pending:
+            best = max(pending, key=effective)
+            pending.remove(best)
+            fact = best[1]
+            cost = self.fact_tokens(fact)
+            if used + cost > budget:
+                continue
+            used += cost
+            key = self._source_key(fact)
+            per_source[key] = per_source.get(key, 0) + 1
+            selected.append(fact)
+        return selected
+
+    @staticmethod
+    def _source_key(fact: VerifiedFact) -> str:
+        return ",".join(sorted(set(fact.source_names)))
+
+    @staticmethod
+    def fact_tokens(fact: VerifiedFact) -> int:
+        """Costo aproximado del hecho ya renderizado (encabezado + texto + URLs)."""
+        return 15 + estimate_tokens(fact.content) + estimate_tokens(" | ".join(fact.sources[:3]))
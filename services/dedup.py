@@ -0,0 +1,146 @@
+"""Colapso de casi duplicados antes de la resolución de entidades.
+
+El mismo artículo o perfil de LinkedIn llega por Google, DDG, DDG News y las
+citations de Perplexity con URLs distintas (parámetros de tracking,
+`cl.linkedin.com` vs `www.linkedin.com`, `/` final) y cada copia ocupaba un
+índice en el prompt del clasificador. Aquí se agrupan:
+
+1. Por URL canónica: sin esquema, `www.`, subdominio de país de LinkedIn,
+   parámetros de tracking, fragmento ni `/` final.
+2. Por texto: SimHash de 64 bits sobre las palabras de título + snippet
+   plegados como filtro barato (`max_distance` bits o menos), confirmado con
+   el solapamiento de palabras (≥ 0.8, como el compactador de contexto). En
+   snippets cortos el SimHash solo no alcanza: "Codelco adjudica contrato a
+   Faymex" y "... a Sitrans" quedan tan cerca como dos copias reales. Dos
+   perfiles de LinkedIn con distinta URL nunca se agrupan por texto (los
+   headlines de homónimos se parecen mucho).
+
+El clasificador ve un candidato por grupo con las fuentes fusionadas y su
+veredicto se aplica a todos los miembros: el verificador sigue recibiendo
+cada copia y cuenta la corroboración entre fuentes igual que antes.
+"""
+import hashlib
+import re
+from dataclasses import dataclass, field
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from scraper.base import ScrapedItem
+from scraper.matching import fold
+
+# Parámetros que no cambian el contenido (campañas, clicks, sesiones)
+_TRACKING_PARAMS = frozenset({
+    "gclid", "fbclid", "msclkid", "yclid", "dclid", "igshid", "mc_cid", "mc_eid", "_hsenc", "_hsmi",
+    "ref", "ref_src", "refid", "src", "trk", "trkinfo", "originalsubdomain", "si", "spm", "cmpid", "ocid",
+})
+_WORD = re.compile(r"\w+")
+# Menos palabras que esto y el texto no distingue contenidos (solo agrupa la URL)
+_MIN_WORDS = 6
+# Fracción de palabras del texto más corto que debe estar en el otro
+MIN_OVERLAP = 0.8
+
+
+def canonical_url(url: str) -> str:
+    """URL sin las variaciones que no cambian el recurso: 'host/path?query' ordenado."""
+    parts = urlsplit(url.strip())
+    host = parts.hostname or ""
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/")
+    if host.endswith(".linkedin.com"):
+        # cl.linkedin.com, es.linkedin.com, mx.linkedin.com... son el mismo perfil
+        host = "linkedin.com"
+        path = path.lower()
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else "")
+
+
+def _words(text: str) -> set[str]:
+    return set(_WORD.findall(fold(text)))
+
+
+# Byte → sus 8 bits, uno por byte: sumar enteros "esparcidos" cuenta los
+# unos de cada posición en paralelo (un carril de 8 bits por bit del hash)
+_SPREAD = [bytes((b >> i) & 1 for i in range(8)) for b in range(256)]
+
+
+def simhash(text: str) -> int:
+    """Huella de 64 bits de las palabras del texto: textos parecidos difieren en pocos bits."""
+    return _simhash(_words(text))
+
+
+def _simhash(words: set[str]) -> int:
+    features = sorted(words)
+    counts = [0] * 64
+    for start in range(0, len(features), 255):  # hasta 255 por carril sin desbordar
+        total = 0
+        for feature in features[start:start + 255]:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            total += int.from_bytes(b"".join([_SPREAD[b] for b in digest]), "little")
+        for bit, ones in enumerate(total.to_bytes(64, "little")):
+            counts[bit] += ones
+    return sum(1 << bit for bit, ones in enumerate(counts) if 2 * ones > len(features))
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+@dataclass
+class CandidateGroup:
+    """Un candidato para el clasificador: el item representante y sus copias."""
+    item: ScrapedItem
+    members: list[ScrapedItem] = field(default_factory=list)
+
+    @property
+    def sources(self) -> list[str]:
+        """Fuentes de los miembros, sin repetir, en orden de llegada."""
+        return list(dict.fromkeys(m.source for m in self.members))
+
+
+def _is_profile(canonical: str) -> bool:
+    return canonical.startswith("linkedin.com/in/")
+
+
+def _overlap(a: set[str], b: set[str]) -> float:
+    return len(a & b) / min(len(a), len(b))
+
+
+def collapse_candidates(items: list[ScrapedItem], max_distance: int = 12) -> list[CandidateGroup]:
+    """Agrupar copias del mismo contenido, en el orden del primer miembro de cada grupo.
+
+    El representante es el miembro con más texto (título + snippet), que es
+    el que más señales de identidad le da al clasificador. Con
+    `max_distance` negativo solo se agrupa por URL canónica.
+    """
+    groups: list[CandidateGroup] = []
+    by_url: dict[str, CandidateGroup] = {}
+    hashes: list[tuple[int, set[str], str, CandidateGroup]] = []
+    for it in items:
+        canonical = canonical_url(it.url) if it.url else ""
+        group = by_url.get(canonical) if canonical else None
+        text = f"{it.title} {it.snippet}"
+        fingerprint = None
+        words = _words(text)
+        if group is None and max_distance >= 0 and len(words) >= _MIN_WORDS:
+            fingerprint = _simhash(words)
+            for other, other_words, other_url, candidate in hashes:
+                if hamming(fingerprint, other) > max_distance or _overlap(words, other_words) < MIN_OVERLAP:
+                    continue
+                if _is_profile(canonical) and _is_profile(other_url) and canonical != other_url:
+                    continue
+                group = candidate
+                break
+        if group is None:
+            group = CandidateGroup(it)
+            groups.append(group)
+        group.members.append(it)
+        if len(text) > len(f"{group.item.title} {group.item.snippet}"):
+            group.item = it
+        if canonical:
+            by_url.setdefault(canonical, group)
+        if fingerprint is not None:
+            hashes.append((fingerprint, words, canonical, group))
+    return groups
@@ -1,16 +1,18 @@
 """Genera emails SMTYKM personalizados."""
 import json
+import logging
 import re
 from dataclasses import dataclass
-from pathlib import Path
 from typing import Optional
 
 from services.llm_client import LLMClient
 from services.researcher import ResearchResult
 from services.schemas import EMAIL_SCHEMA
+from services.prompt_registry import get_prompt_registry
+from config.metrics import stage_timer
 from config.settings import get_settings
 
-PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -31,9 +33,9 @@ class EmailGenerator:
         sender_name = sender_name or self.settings.app.sender_name
         sender_company = sender_company or self.settings.app.sender_company
 
-        # Cargar prompts
+        # Prompts compilados (registro cargado al arrancar)
         system_prompt = self._load_prompt("smtykm_system.md")
-        email_template = self._load_prompt("email_generator.md")
+        email_template = get_prompt_registry().get("email_generator.md")
 
         # Construir resumen de investigación
         research_summary = self._build_research_summary(research)
@@ -49,20 +51,24 @@ class EmailGenerator:
         cargo_raw = research.cargo_descubierto or research.persona.get("cargo", "")
         cargo = "" if cargo_raw.lower().strip() in ("no disponible", "no encontrado", "no especificado") else cargo_raw
 
-        user_prompt = email_template.replace("{nombre}", research.persona.get("nombre", ""))
-        user_prompt = user_prompt.replace("{cargo}", cargo)
-        user_prompt = user_prompt.replace("{empresa}", research.empresa.get("nombre", ""))
-        user_prompt = user_prompt.replace("{industria}", research.empresa.get("industria", ""))
-        user_prompt = user_prompt.replace("{research_summary}", research_summary)
-        user_prompt = user_prompt.replace("{hallazgo_tipo}", research.hallazgo_tipo)
-        user_prompt = user_prompt.replace("{hallazgo_descripcion}", hallazgo_desc)
-        user_prompt = user_prompt.replace("{sender_name}", sender_name)
-        user_prompt = user_prompt.replace("{sender_company}", sender_company)
         location = getattr(research, 'location', '') or ''
-        user_prompt = user_prompt.replace("{location}", location)
+        fields = dict(
+            nombre=research.persona.get("nombre", ""),
+            cargo=cargo,
+            empresa=research.empresa.get("nombre", ""),
+            industria=research.empresa.get("industria", ""),
+            research_summary=research_summary,
+            hallazgo_tipo=research.hallazgo_tipo,
+            hallazgo_descripcion=hallazgo_desc,
+            sender_name=sender_name,
+            sender_company=sender_company,
+            location=location,
+        )
+        user_prompt = email_template.render(**fields) if email_template else ""
 
         # Llamar al LLM
-        llm_response = await self.llm.complete(system_prompt, user_prompt, json_schema=EMAIL_SCHEMA)
+        with stage_timer("email"):
+            llm_response = await self.llm.complete(system_prompt, user_prompt, json_schema=EMAIL_SCHEMA)
 
         # Parsear respuesta JSON
         parsed = self._parse_response(llm_response.content)
@@ -142,12 +148,11 @@ class EmailGenerator:
         return "\n".join(lines)
 
     def _load_prompt(self, filename: str) -> str:
-        """Cargar prompt desde archivo .md."""
-        path = PROMPTS_DIR / filename
-        if path.exists():
-            return path.read_text(encoding="utf-8")
-        print(f"[EmailGen] Prompt no encontrado: {path}")
-        return ""
+        """Prompt compilado desde el registro (cargado al arrancar)."""
+        text = get_prompt_registry().text(filename)
+        if not text:
+            logger.warning("Prompt no encontrado: %s", filename)
+        return text
 
     def _fix_email_closing(self, parsed: dict, sender_name: str) -> dict:
         """Fix spacing if LLM omits linebreak in closing."""
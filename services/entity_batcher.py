@@ -0,0 +1,177 @@
+"""Resolución de entidades en lote entre investigaciones concurrentes.
+
+En corridas por lote (cola con varios workers, bench) cada prospecto hacía
+su propia llamada de clasificación con un puñado de candidatos: casi todo
+el costo era fijo por llamada (system prompt, conexión, cola del
+proveedor). `EntityBatcher` junta las listas de candidatos que llegan
+dentro de una ventana corta (`ENTITY_BATCH_WINDOW_MS`) y las manda en una
+sola llamada, un bloque `# Grupo N` por prospecto, con el esquema
+`ENTITY_BATCH_SCHEMA`; cada investigación recibe solo las clasificaciones
+de su grupo.
+
+- Una ventana con un solo prospecto se manda con el prompt y esquema de
+  siempre: una investigación interactiva solo paga la ventana.
+- La ventana se corta antes al llegar a `max_prospects` o `max_candidates`
+  (la respuesta tiene que caber en la salida del LLM).
+- La llamada corre con el deadline más próximo del lote.
+- Si la llamada falla, cada investigación recibe la excepción (y cae a la
+  heurística); si a un grupo le falta su respuesta, recibe None.
+
+Desactivado por defecto (ventana 0).
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from config import metrics
+from scraper.deadline import Deadline, current_deadline, use_deadline
+from services.dedup import CandidateGroup
+from services.prompt_registry import get_prompt_registry
+from services.schemas import ENTITY_BATCH_SCHEMA, ENTITY_RESOLUTION_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+
+def prospect_block(name: str, company: str, role: str, location: str, candidates: list[CandidateGroup]) -> list[str]:
+    """Líneas del prompt con el prospecto y sus resultados numerados (uno por grupo de copias)."""
+    lines = [
+        "## Prospecto",
+        f"- Nombre: {name}",
+        f"- Empresa: {company}",
+        f"- Cargo: {role or 'No especificado'}",
+        f"- Ubicacion: {location or 'No especificada'}",
+        "",
+        "## Resultados de búsqueda a clasificar",
+        "",
+    ]
+    for i, group in enumerate(candidates):
+        it = group.item
+        lines.append(f"[{i}] fuente={'+'.join(group.sources)} url={it.url}")
+        if it.title:
+            lines.append(f"    título: {it.title}")
+        snippet = (it.snippet or "").strip()
+        if snippet:
+            lines.append(f"    texto: {snippet[:300]}")
+        lines.append("")
+    return lines
+
+
+def single_instruction(size: int) -> str:
+    return (
+        f"Clasifica cada índice de [0] a [{size - 1}] en "
+        "prospecto/empresa/irrelevante. Devuelve un objeto por cada índice."
+    )
+
+
+@dataclass
+class _Request:
+    block: list[str]
+    size: int
+    future: asyncio.Future
+    llm: Any
+    system_prompt: str
+    parse: Callable[[str], Optional[dict]]
+    deadline: Optional[Deadline]
+
+
+class EntityBatcher:
+    """Junta clasificaciones de varias investigaciones en una llamada LLM."""
+
+    def __init__(self, window_seconds: float = 0.05, max_prospects: int = 8, max_candidates: int = 40):
+        self.window_seconds = window_seconds
+        self.max_prospects = max_prospects
+        self.max_candidates = max_candidates
+        self._pending: list[_Request] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def classify(self, llm, system_prompt: str, block: list[str], size: int,
+                       parse: Callable[[str], Optional[dict]]) -> Optional[dict]:
+        """Clasificaciones (`{"clasificaciones": [...]}`) de los `size` candidatos de `block`."""
+        loop = asyncio.get_running_loop()
+        request = _Request(block, size, loop.create_future(), llm, system_prompt, parse, current_deadline())
+        if self._pending and (len(self._pending) >= self.max_prospects
+                              or sum(r.size for r in self._pending) + size > self.max_candidates):
+            self._flush()
+        self._pending.append(request)
+        if len(self._pending) >= self.max_prospects or sum(r.size for r in self._pending) >= self.max_candidates:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await request.future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Los que se cancelaron mientras esperaban (timeout del llamador) ya no viajan
+        batch = [r for r in self._pending if not r.future.done()]
+        self._pending = []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list[_Request]):
+        deadlines = [r.deadline for r in batch if r.deadline]
+        deadline = min(deadlines, key=lambda d: d.expires_at) if deadlines else None
+        metrics.ENTITY_BATCH_PROSPECTS.observe(len(batch))
+        try:
+            with use_deadline(deadline):
+                if len(batch) == 1:
+                    results = [await self._send_single(batch[0])]
+                else:
+                    results = await self._send_batch(batch)
+        except Exception as e:
+            for r in batch:
+                if not r.future.done():
+                    r.future.set_exception(e)
+            return
+        for r, parsed in zip(batch, results):
+            if not r.future.done():
+                r.future.set_result(parsed)
+
+    @staticmethod
+    async def _send_single(r: _Request) -> Optional[dict]:
+        user_prompt = "\n".join([*r.block, single_instruction(r.size)])
+        resp = await r.llm.complete(r.system_prompt, user_prompt, json_schema=ENTITY_RESOLUTION_SCHEMA)
+        return r.parse(resp.content)
+
+    @staticmethod
+    async def _send_batch(batch: list[_Request]) -> list[Optional[dict]]:
+        first = batch[0]
+        system_prompt = first.system_prompt + "\n\n" + get_prompt_registry().text("entity_resolver_batch.md")
+        lines = [f"Clasifica los resultados de {len(batch)} prospectos independientes.", ""]
+        for n, r in enumerate(batch, 1):
+            lines += [f"# Grupo {n}", "", *r.block]
+        lines.append(
+            f"Devuelve en `grupos` un objeto por cada grupo de 1 a {len(batch)}; en cada uno, "
+            "clasifica en prospecto/empresa/irrelevante cada índice de su lista."
+        )
+        resp = await first.llm.complete(system_prompt, "\n".join(lines), json_schema=ENTITY_BATCH_SCHEMA)
+        parsed = first.parse(resp.content)
+        by_group: dict[int, dict] = {}
+        for g in (parsed or {}).get("grupos") or []:
+            if isinstance(g, dict) and isinstance(g.get("grupo"), int) and isinstance(g.get("clasificaciones"), list):
+                by_group[g["grupo"]] = {"clasificaciones": g["clasificaciones"]}
+        missing = len(batch) - sum(1 for n in range(1, len(batch) + 1) if n in by_group)
+        if missing:
+            logger.warning("Resolución en lote: %s/%s grupos sin respuesta", missing, len(batch))
+        return [by_group.get(n) for n in range(1, len(batch) + 1)]
+
+
+_batcher: Optional[EntityBatcher] = None
+
+
+def get_entity_batcher() -> Optional[EntityBatcher]:
+    """Instancia del proceso, o None si el modo lote está desactivado (ENTITY_BATCH_WINDOW_MS=0)."""
+    global _batcher
+    from config.settings import get_settings
+
+    cfg = get_settings().entity_resolution
+    if cfg.batch_window_ms <= 0:
+        return None
+    if _batcher is None:
+        _batcher = EntityBatcher(cfg.batch_window_ms / 1000, cfg.batch_max_prospects, cfg.batch_max_candidates)
+    return _batcher
@@ -0,0 +1,173 @@
+"""Extracción de educación, ubicación y trayectoria desde snippets de LinkedIn.
+
+Antes cada `_extract_*` de `ResearchService` recorría el texto con listas de
+regex sin compilar y `_extract_trayectoria` armaba una regex nueva con el
+nombre del prospecto por cada snippet. Aquí:
+
+- Los patrones se compilan al importar el módulo; el de headline (depende
+  del nombre) se compila una vez por nombre (`lru_cache`).
+- Antes de correr los patrones se buscan sus marcadores (literales que todo
+  match contiene: "universidad", "mba", ciudades, "ubicaci"...) en el texto
+  en minúsculas; un patrón sin marcador presente no se ejecuta.
+- `extract_profile_fields` llena los tres campos con ese único escaneo.
+
+Los resultados son idénticos a la implementación anterior (ver
+bench/bench_extraction.py, que la conserva para compararla).
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+# Patrones de educación, en orden de prioridad
+_EDUCATION_PATTERNS = [
+    # "Educación: Universidad de Atacama" (formato Perplexity/LinkedIn enriquecido)
+    re.compile(r"(?:^|[\s|])Educaci[oó]n:\s*(.{5,80}?)(?:\||$|\.|Ubicaci[oó]n|Logros|Cargo|Empresa|Trayectoria|Location)",
+               re.IGNORECASE),
+    # "alumniOf" / universidades conocidas (limit to 80 chars to avoid long snippet fragments)
+    re.compile(r"((?:Universidad|Pontificia|Instituto|Escuela|Facultad|UTFSM|USACH|U\. de|PUC|UC|IESA|DUOC)\s[^|.]{3,60})",
+               re.IGNORECASE),
+    # Grados académicos (limit capture to avoid long garbage)
+    re.compile(r"((?:Ingenier[oa]\s+Civil|MBA|Máster|Master|Magíster|Doctorad[oa]|Licenciad[oa])\s*(?:en\s)?[^|.]{0,50})",
+               re.IGNORECASE),
+]
+# Ruido pegado cuando el snippet no tiene puntuación entre campos
+_EDUCATION_TAIL_NOISE = ("ubicaci", "location", "contacto", "seguidor", "connection", "follower")
+_EDUCATION_FRAGMENT_WORDS = ("nuestro", "servicios", "empresa", "faymex", "experiencia en la")
+
+# Patrones de ubicación, en orden de prioridad (gana el primero que matchea)
+_LOCATION_PATTERNS = [
+    # "Ubicación: Santiago, Chile" (formato enriquecido)
+    re.compile(r"[Uu]bicaci[oó]n:\s*([^|.]+?)(?:\||$|\.)", re.IGNORECASE),
+    # "Chile" o "Santiago, Chile" al final o entre separadores
+    re.compile(r"(?:^|\||\.\s+)((?:Santiago|Antofagasta|Calama|Copiap[oó]|La Serena|Vi[ñn]a del Mar|Valpara[ií]so|Concepci[oó]n|Temuco|Rancagua|Iquique|Arica|Puerto Montt|Punta Arenas)(?:\s*,\s*(?:Chile|Regi[oó]n\s+[^|.]+))?)",
+               re.IGNORECASE),
+    # País solo
+    re.compile(r"(?:^|\||\.\s+)(Chile)(?:\s*\||$|\.)", re.IGNORECASE),
+]
+# Conteos de LinkedIn pegados: "Valparaíso 172 contactos"
+_LOCATION_COUNT = re.compile(r"\s+\d")
+
+# "Trayectoria: ..." (formato Perplexity)
+_TRAYECTORIA = re.compile(r"Trayectoria:\s*(.+?)(?:\||$|Educaci[oó]n|Logros)", re.IGNORECASE)
+
+# Marcadores: literales que todo match del patrón contiene (en minúsculas).
+# Si ninguno aparece en el texto, el patrón no puede matchear y no se corre.
+_MARKERS = {
+    "edu_label": ("educaci",),
+    "edu_school": ("universidad", "pontificia", "instituto", "escuela", "facultad", "utfsm", "usach", "u. de",
+                   "uc", "iesa", "duoc"),
+    "edu_degree": ("ingenier", "mba", "máster", "master", "magíster", "doctorad", "licenciad"),
+    "loc_label": ("ubicaci",),
+    "loc_city": ("santiago", "antofagasta", "calama", "copiap", "la serena", "viña", "vina", "valpara",
+                 "concepci", "temuco", "rancagua", "iquique", "arica", "puerto montt", "punta arenas"),
+    "loc_country": ("chile",),
+    "tray_label": ("trayectoria:",),
+}
+# Caracteres que `re.IGNORECASE` iguala a una letra ASCII y `str.lower()` no
+_FOLD = str.maketrans({"İ": "i", "ı": "i", "ſ": "s", "\u212a": "k"})
+_EDUCATION_MARKERS = ("edu_label", "edu_school", "edu_degree")
+_LOCATION_MARKERS = ("loc_label", "loc_city", "loc_country")
+
+
+def scan_markers(text: str) -> frozenset:
+    """Grupos de marcadores presentes en `text`."""
+    folded = text.translate(_FOLD).lower()
+    return frozenset(group for group, words in _MARKERS.items() if any(w in folded for w in words))
+
+
+@lru_cache(maxsize=256)
+def _headline_pattern(name: str) -> re.Pattern:
+    # "Nombre - Headline | LinkedIn" / "Nombre - Headline - Empresa | LinkedIn"
+    name_parts = name.lower().split()
+    return re.compile(
+        r"(?:" + re.escape(name) + r"|" + r"\s+".join(re.escape(p) for p in name_parts) + r")\s*[-–—]\s*(.+?)(?:\s*\|\s*LinkedIn|\s*$)",
+        re.IGNORECASE,
+    )
+
+
+def extract_education(text: str, markers: Optional[frozenset] = None) -> str:
+    """Universidades y títulos (hasta 3, sin fragmentos de snippet)."""
+    if markers is None:
+        markers = scan_markers(text)
+    results = []
+    for group, pattern in zip(_EDUCATION_MARKERS, _EDUCATION_PATTERNS):
+        if group not in markers:
+            continue
+        for match in pattern.findall(text):
+            clean = match.strip().strip("|.,; ")
+            for kw in _EDUCATION_TAIL_NOISE:
+                pos = clean.lower().find(kw)
+                if pos > 3:
+                    clean = clean[:pos].strip().strip("|.,;· ")
+            if not clean or len(clean) <= 3:
+                continue
+            if clean.lower().startswith("ucation"):
+                continue
+            lower = clean.lower()
+            if any(w in lower for w in _EDUCATION_FRAGMENT_WORDS):
+                continue
+            if len(clean) > 100:
+                continue
+            if clean in results:
+                continue
+            results.append(clean)
+    return ". ".join(results[:3])
+
+
+def extract_location(text: str, markers: Optional[frozenset] = None) -> str:
+    """Primera ubicación por prioridad: etiqueta, ciudad chilena, país."""
+    if markers is None:
+        markers = scan_markers(text)
+    for group, pattern in zip(_LOCATION_MARKERS, _LOCATION_PATTERNS):
+        if group not in markers:
+            continue
+        match = pattern.search(text)
+        if match:
+            loc = match.group(1).strip().strip("|.,; ")
+            cut = _LOCATION_COUNT.split(loc)[0].strip().strip("|.,;· ")
+            if len(cut) >= 3:
+                loc = cut
+            if loc and len(loc) >= 3:
+                return loc
+    return ""
+
+
+def extract_trayectoria(linkedin_texts: list[str], name: str, markers: Optional[frozenset] = None) -> str:
+    """El headline o "Trayectoria:" más largo de los snippets."""
+    if markers is None:
+        markers = scan_markers(" | ".join(linkedin_texts))
+    headline_pattern = _headline_pattern(name)
+    with_label = "tray_label" in markers
+    headlines = []
+    for text in linkedin_texts:
+        match = headline_pattern.search(text)
+        if match:
+            headline = match.group(1).strip().strip("| ")
+            if headline and len(headline) > 5:
+                headlines.append(headline)
+        if with_label:
+            match = _TRAYECTORIA.search(text)
+            if match:
+                tray = match.group(1).strip().strip("|.,; ")
+                if tray and len(tray) > 5 and tray not in ("No disponible",):
+                    headlines.append(tray)
+    return max(headlines, key=len) if headlines else ""
+
+
+@dataclass
+class ProfileFields:
+    educacion: str = ""
+    ubicacion: str = ""
+    trayectoria: str = ""
+
+
+def extract_profile_fields(linkedin_texts: list[str], name: str) -> ProfileFields:
+    """Los tres campos desde los snippets, con un solo escaneo de marcadores."""
+    combined = " | ".join(linkedin_texts)
+    markers = scan_markers(combined)
+    return ProfileFields(
+        educacion=extract_education(combined, markers),
+        ubicacion=extract_location(combined, markers),
+        trayectoria=extract_trayectoria(linkedin_texts, name, markers),
+    )
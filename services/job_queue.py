@@ -0,0 +1,400 @@
+"""Cola persistente de investigaciones (SQLite) + pool de workers async.
+
+El endpoint HTML corría el pipeline completo (30–60 s de scraping + LLM)
+dentro del request: una conexión ocupada todo ese tiempo, cortes por timeout
+del proxy y trabajo perdido en cada deploy. Ahora el HTTP solo encola y
+responde al instante; los workers consumen la cola y la UI consulta el estado.
+
+- Persistencia: SQLite en modo WAL. Para que la cola sobreviva a un deploy,
+  `JOBS_DB_PATH` tiene que estar en un volumen persistente: `data/` en el
+  disco efímero de un PaaS se pierde con cada deploy.
+- Leases: el worker renueva `lease_until` mientras trabaja. Si el proceso
+  muere (deploy, crash), el lease expira y otro worker retoma el job, hasta
+  `max_attempts` intentos.
+- Workers: N tareas async dentro del proceso web (`RESEARCH_WORKERS`), o
+  procesos aparte (`python -m services.job_queue --workers 4`) en la misma
+  máquina y con el mismo archivo; en ese caso el proceso web va con
+  `RESEARCH_WORKERS=0`. Un proceso de otro dyno/contenedor no ve el SQLite
+  del web.
+- Retención: el pool borra los jobs terminados hace más de
+  `JOBS_RETENTION_DAYS` (payload y resultado completos).
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from config.log import get_request_id, reset_request_id, set_request_id, setup_logging
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    request_id TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+"""
+
+# Estados: queued → running → done | failed | cancelled
+FINAL_STATUSES = ("done", "failed", "cancelled")
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str
+    payload: dict
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    request_id: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+
+class JobQueue:
+    """Cola de jobs sobre SQLite. Todas las operaciones son cortas y bloqueantes;
+    desde código async se llaman con `asyncio.to_thread`."""
+
+    def __init__(self, db_path: str, lease_seconds: int = 60, max_attempts: int = 3):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Job:
+        return Job(
+            id=row["id"],
+            kind=row["kind"],
+            status=row["status"],
+            payload=json.loads(row["payload"]),
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            attempts=row["attempts"],
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            request_id=row["request_id"],
+        )
+
+    def submit(self, kind: str, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        # El worker retoma el request_id de quien encoló (correlación de logs)
+        request_id = get_request_id()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, request_id, created_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(payload, ensure_ascii=False),
+                 request_id if request_id != "-" else None, time.time()),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def claim(self, worker_id: str) -> Optional[Job]:
+        """Tomar el job más antiguo disponible (queued o con lease vencido)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs huérfanos que ya agotaron sus intentos: fallan definitivamente
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Worker perdido (lease vencido)', finished_at = ? "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, self.max_attempts),
+                )
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, started_at = ?, "
+                    "attempts = attempts + 1 WHERE id = ?",
+                    (worker_id, now + self.lease_seconds, now, row["id"]),
+                )
+                claimed = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._row_to_job(claimed)
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Renovar el lease. False si el job ya no es de este worker (cancelado/retomado)."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time() + self.lease_seconds, job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        return self._finish(job_id, worker_id, "done", result=result)
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return self._finish(job_id, worker_id, "failed", error=error)
+
+    def _finish(self, job_id: str, worker_id: str, status: str, result: Optional[dict] = None,
+                error: Optional[str] = None) -> bool:
+        # Solo el dueño del lease cierra el job: un worker "zombi" cuyo job ya
+        # fue retomado o cancelado no pisa el resultado.
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 error, time.time(), job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+                "WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id),
+            )
+        return cur.rowcount == 1
+
+    def purge(self, older_than: float) -> int:
+        """Borrar los jobs terminados (done, failed, cancelled) antes de `older_than`; cuántos."""
+        with self._lock:
+            cur = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINAL_STATUSES))}) AND finished_at < ?",
+                (*FINAL_STATUSES, older_than),
+            )
+        return cur.rowcount
+
+    def position(self, job_id: str) -> int:
+        """Cuántos jobs en cola hay antes de este (0 = es el siguiente)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' "
+                "AND created_at < (SELECT created_at FROM jobs WHERE id = ?)",
+                (job_id,),
+            ).fetchone()
+        return row[0]
+
+
+JobHandler = Callable[[dict], Awaitable[dict]]
+
+
+class WorkerPool:
+    """N workers async que consumen la cola y ejecutan el handler por tipo de job."""
+
+    def __init__(self, queue: JobQueue, handlers: dict[str, JobHandler], concurrency: int = 2,
+                 poll_interval: float = 0.5, retention_seconds: float = 7 * 86400, purge_interval: float = 3600):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds  # 0 = no borrar
+        self.purge_interval = purge_interval
+        self._workers: list[asyncio.Task] = []
+        self._stopping = False
+        self._prefix = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    def start(self):
+        self._stopping = False
+        for i in range(self.concurrency):
+            self._workers.append(asyncio.create_task(self._loop(f"{self._prefix}-{i}")))
+        if self.retention_seconds > 0:
+            self._workers.append(asyncio.create_task(self._purge_loop()))
+        logger.info("%s workers iniciados (%s)", self.concurrency, self.queue.db_path)
+
+    async def stop(self):
+        """Detener workers. Los jobs en curso quedan 'running' y su lease
+        vence: otro proceso (o este mismo tras reiniciar) los retoma."""
+        self._stopping = True
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    async def _loop(self, worker_id: str):
+        while not self._stopping:
+            try:
+                job = await asyncio.to_thread(self.queue.claim, worker_id)
+            except Exception as e:
+                logger.warning("Error tomando job: %s", e)
+                job = None
+            if job is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            # Logs del job con el request_id de quien lo encoló
+            token = set_request_id(job.request_id or job.id[:12])
+            try:
+                await self._run(job, worker_id)
+            finally:
+                reset_request_id(token)
+
+    async def _purge_loop(self):
+        while not self._stopping:
+            try:
+                purged = await asyncio.to_thread(self.queue.purge, time.time() - self.retention_seconds)
+                if purged:
+                    logger.info("%s jobs terminados borrados de la cola", purged)
+            except Exception as e:
+                logger.warning("Error purgando la cola: %s", e)
+            await asyncio.sleep(self.purge_interval)
+
+    async def _run(self, job: Job, worker_id: str):
+        handler = self.handlers.get(job.kind)
+        if handler is None:
+            await asyncio.to_thread(self.queue.fail, job.id, worker_id, f"Tipo de job desconocido: {job.kind}")
+            return
+
+        logger.info("%s ejecutando %s %s (intento %s)", worker_id, job.kind, job.id, job.attempts)
+        t0 = time.perf_counter()
+        task = asyncio.create_task(handler(job.payload))
+        heartbeat = asyncio.create_task(self._heartbeat(job.id, worker_id, task))
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if self._stopping:
+                raise
+            logger.info("%s cancelado", job.id)
+            return
+        except Exception as e:
+            logger.warning("%s falló: %s", job.id, e)
+            await asyncio.to_thread(self.queue.fail, job.id, worker_id, str(e))
+            return
+        finally:
+            heartbeat.cancel()
+        await asyncio.to_thread(self.queue.complete, job.id, worker_id, result)
+        logger.info("%s terminado en %.1fs", job.id, time.perf_counter() - t0)
+
+    async def _heartbeat(self, job_id: str, worker_id: str, task: asyncio.Task):
+        interval = max(self.queue.lease_seconds / 3, 1)
+        while not task.done():
+            await asyncio.sleep(interval)
+            owned = await asyncio.to_thread(self.queue.heartbeat, job_id, worker_id)
+            if not owned:
+                # Cancelado desde la API (posiblemente en otro proceso)
+                task.cancel()
+                return
+
+
+async def run_research_job(payload: dict) -> dict:
+    """Handler del job 'research': investigación + email automático opcional."""
+    from scraper.deadline import Deadline, use_deadline
+    from services.researcher import ResearchService
+    from services.email_generator import EmailGenerator
+
+    # El deadline corre desde que un worker toma el job (no cuenta la espera en cola)
+    deadline = Deadline(payload.get("deadline_seconds") or get_settings().deadline.default_seconds)
+    service = ResearchService()
+    result = await service.investigate(
+        payload["name"], payload["company"], payload.get("role", ""), payload.get("location", ""),
+        deadline=deadline, completion=payload.get("completion"),
+    )
+    email = None
+    if payload.get("generate_email") and result.score > 0:
+        try:
+            with use_deadline(deadline):
+                email = await EmailGenerator().generate(result)
+            logger.info("Email generado automaticamente")
+        except Exception as e:
+            logger.warning("Error generando email: %s", e)
+    return {
+        "research": dataclasses.asdict(result),
+        "email": dataclasses.asdict(email) if email else None,
+    }
+
+
+HANDLERS: dict[str, JobHandler] = {"research": run_research_job}
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Cola compartida del proceso (se crea en el primer uso)."""
+    global _queue
+    if _queue is None:
+        cfg = get_settings().queue
+        _queue = JobQueue(cfg.db_path, cfg.lease_seconds, cfg.max_attempts)
+    return _queue
+
+
+def build_worker_pool(concurrency: Optional[int] = None) -> WorkerPool:
+    cfg = get_settings().queue
+    return WorkerPool(
+        get_job_queue(), HANDLERS,
+        concurrency=cfg.workers if concurrency is None else concurrency,
+        poll_interval=cfg.poll_interval,
+        retention_seconds=cfg.retention_days * 86400,
+    )
+
+
+async def _serve(concurrency: int):
+    from scraper.base import BaseScraper
+
+    pool = build_worker_pool(concurrency)
+    pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+        await BaseScraper.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Proceso worker de la cola de investigaciones")
+    parser.add_argument("--workers", type=int, default=get_settings().queue.workers or 2)
+    args = parser.parse_args()
+    setup_logging()
+    try:
+        asyncio.run(_serve(args.workers))
+    except KeyboardInterrupt:
+        pass
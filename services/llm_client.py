@@ -1,14 +1,36 @@
 """Cliente LLM híbrido: DeepSeek primario + Haiku fallback."""
 import json
+import logging
+import time
 from dataclasses import dataclass
 from typing import Optional
 
 import httpx
 
+from config import metrics
 from config.settings import get_settings
+from scraper.deadline import Deadline, current_deadline
+from scraper.transport import get_transport
 
-DEEPSEEK_URL = "https://api.deepseek.com/chat/completions"
-ANTHROPIC_URL = "https://api.anthropic.com/v1/messages"
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LLMUsage:
+    """Tokens de una llamada según el campo `usage` de la respuesta.
+
+    `input_tokens` es el total de entrada; `cached_input_tokens` la parte
+    servida desde el cache de prompts del proveedor (más barata y rápida).
+    """
+    input_tokens: int = 0
+    cached_input_tokens: int = 0
+    cache_write_tokens: int = 0  # Anthropic: tokens escritos al cache en esta llamada
+    output_tokens: int = 0
+    latency_s: float = 0.0
+
+    @property
+    def uncached_input_tokens(self) -> int:
+        return self.input_tokens - self.cached_input_tokens
 
 
 @dataclass
@@ -16,40 +38,63 @@ class LLMResponse:
     content: str
     model_used: str
     fallback: bool = False
+    usage: Optional[LLMUsage] = None
 
 
 class LLMClient:
     """Cliente que intenta DeepSeek primero y cae a Haiku si falla."""
 
+    TIMEOUT = 60
+
     def __init__(self):
         self.settings = get_settings()
 
     async def complete(
-        self, system_prompt: str, user_prompt: str, json_schema: Optional[dict] = None
+        self, system_prompt: str, user_prompt: str, json_schema: Optional[dict] = None,
+        deadline: Optional[Deadline] = None,
     ) -> LLMResponse:
         """Enviar prompt al LLM. DeepSeek primario, Haiku fallback.
 
         Si se pasa json_schema, la respuesta viene en JSON garantizado:
         - DeepSeek: modo json_object (JSON válido, sin enforcement de esquema)
         - Haiku: structured outputs (la API valida contra el esquema)
+
+        Las métricas se etiquetan con la etapa del pipeline en curso
+        (`metrics.stage_timer`): analysis, entity_resolution, email...
+
+        Cada llamada se acota al deadline (el pasado o el del request en
+        curso); si ya no queda tiempo lanza DeadlineExceeded, también antes
+        del fallback a Haiku.
         """
+        purpose = metrics.current_stage()
+        deadline = deadline or current_deadline()
         # Intentar DeepSeek primero si tiene API key
         if self.settings.llm.deepseek_api_key:
-            result = await self._call_deepseek(system_prompt, user_prompt, json_schema)
+            if deadline:
+                deadline.check("llamar al LLM")
+            timeout = deadline.timeout(self.TIMEOUT) if deadline else self.TIMEOUT
+            result = await self._call_deepseek(system_prompt, user_prompt, json_schema, timeout)
             if result:
+                metrics.observe_llm("deepseek", purpose, result.usage)
                 return result
-            print("[LLM] DeepSeek falló, usando Haiku como fallback")
+            metrics.LLM_FAILURES.labels("deepseek", purpose).inc()
+            logger.warning("DeepSeek falló, usando Haiku como fallback")
 
         # Fallback a Haiku
         if self.settings.llm.anthropic_api_key:
-            result = await self._call_haiku(system_prompt, user_prompt, json_schema)
+            if deadline:
+                deadline.check("el fallback a Haiku")
+            timeout = deadline.timeout(self.TIMEOUT) if deadline else self.TIMEOUT
+            result = await self._call_haiku(system_prompt, user_prompt, json_schema, timeout)
             if result:
+                metrics.observe_llm("haiku", purpose, result.usage)
                 return result
+            metrics.LLM_FAILURES.labels("haiku", purpose).inc()
 
         raise RuntimeError("No hay LLM disponible. Configura DEEPSEEK_API_KEY o ANTHROPIC_API_KEY")
 
     async def _call_deepseek(
-        self, system_prompt: str, user_prompt: str, json_schema: Optional[dict] = None
+        self, system_prompt: str, user_prompt: str, json_schema: Optional[dict] = None, timeout: float = TIMEOUT
     ) -> Optional[LLMResponse]:
         """Llamar a DeepSeek API (OpenAI-compatible)."""
         headers = {
@@ -59,6 +104,8 @@ class LLMClient:
         payload = {
             "model": self.settings.llm.deepseek_model,
             "messages": [
+                # System estático primero y datos del prospecto después: el
+                # cache de contexto de DeepSeek (automático, por prefijo) acierta
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
@@ -71,30 +118,36 @@ class LLMClient:
             payload["response_format"] = {"type": "json_object"}
 
         try:
-            async with httpx.AsyncClient(timeout=60) as client:
-                response = await client.post(DEEPSEEK_URL, headers=headers, json=payload)
+            t0 = time.perf_counter()
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                response = await get_transport().request(
+                    client, "POST", self.settings.upstream.deepseek_url, headers=headers, json=payload
+                )
 
                 if response.status_code == 429:
-                    print("[LLM] DeepSeek rate limit (429)")
+                    logger.warning("DeepSeek rate limit (429)")
                     return None
 
                 if response.status_code != 200:
-                    print(f"[LLM] DeepSeek error {response.status_code}: {response.text[:200]}")
+                    logger.warning("DeepSeek error %s: %s", response.status_code, response.text[:200])
                     return None
 
                 data = response.json()
                 content = data["choices"][0]["message"]["content"]
+                usage = self._deepseek_usage(data.get("usage") or {}, time.perf_counter() - t0)
+                self._log_usage(self.settings.llm.deepseek_model, usage)
                 return LLMResponse(
                     content=content,
                     model_used=self.settings.llm.deepseek_model,
                     fallback=False,
+                    usage=usage,
                 )
         except Exception as e:
-            print(f"[LLM] DeepSeek exception: {e}")
+            logger.warning("DeepSeek exception: %s", e)
             return None
 
     async def _call_haiku(
-        self, system_prompt: str, user_prompt: str, json_schema: Optional[dict] = None
+        self, system_prompt: str, user_prompt: str, json_schema: Optional[dict] = None, timeout: float = TIMEOUT
     ) -> Optional[LLMResponse]:
         """Llamar a Anthropic Haiku API."""
         headers = {
@@ -105,7 +158,9 @@ class LLMClient:
         payload = {
             "model": self.settings.llm.haiku_model,
             "max_tokens": 3000,
-            "system": system_prompt,
+            # Mismo system prompt, como bloque con breakpoint de cache; el user
+            # prompt (datos del prospecto) queda después, fuera del prefijo
+            "system": [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}],
             "messages": [
                 {"role": "user", "content": user_prompt},
             ],
@@ -118,20 +173,57 @@ class LLMClient:
             }
 
         try:
-            async with httpx.AsyncClient(timeout=60) as client:
-                response = await client.post(ANTHROPIC_URL, headers=headers, json=payload)
+            t0 = time.perf_counter()
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                response = await get_transport().request(
+                    client, "POST", self.settings.upstream.anthropic_url, headers=headers, json=payload
+                )
 
                 if response.status_code != 200:
-                    print(f"[LLM] Haiku error {response.status_code}: {response.text[:200]}")
+                    logger.warning("Haiku error %s: %s", response.status_code, response.text[:200])
                     return None
 
                 data = response.json()
                 content = data["content"][0]["text"]
+                usage = self._anthropic_usage(data.get("usage") or {}, time.perf_counter() - t0)
+                self._log_usage(self.settings.llm.haiku_model, usage)
                 return LLMResponse(
                     content=content,
                     model_used=self.settings.llm.haiku_model,
                     fallback=True,
+                    usage=usage,
                 )
         except Exception as e:
-            print(f"[LLM] Haiku exception: {e}")
+            logger.warning("Haiku exception: %s", e)
             return None
+
+    @staticmethod
+    def _deepseek_usage(usage: dict, latency_s: float) -> LLMUsage:
+        """DeepSeek: prompt_tokens = prompt_cache_hit_tokens + prompt_cache_miss_tokens."""
+        return LLMUsage(
+            input_tokens=usage.get("prompt_tokens", 0),
+            cached_input_tokens=usage.get("prompt_cache_hit_tokens", 0),
+            output_tokens=usage.get("completion_tokens", 0),
+            latency_s=latency_s,
+        )
+
+    @staticmethod
+    def _anthropic_usage(usage: dict, latency_s: float) -> LLMUsage:
+        """Anthropic: input_tokens excluye lo leído/escrito en cache, se suma aparte."""
+        cache_read = usage.get("cache_read_input_tokens") or 0
+        cache_write = usage.get("cache_creation_input_tokens") or 0
+        return LLMUsage(
+            input_tokens=(usage.get("input_tokens") or 0) + cache_read + cache_write,
+            cached_input_tokens=cache_read,
+            cache_write_tokens=cache_write,
+            output_tokens=usage.get("output_tokens") or 0,
+            latency_s=latency_s,
+        )
+
+    @staticmethod
+    def _log_usage(model: str, usage: LLMUsage):
+        pct = 100 * usage.cached_input_tokens / usage.input_tokens if usage.input_tokens else 0
+        extra = f", escritos {usage.cache_write_tokens}" if usage.cache_write_tokens else ""
+        logger.info("%s: %.1fs, entrada %s tokens (cache %s = %.0f%%, sin cache %s%s), salida %s",
+                    model, usage.latency_s, usage.input_tokens, usage.cached_input_tokens, pct,
+                    usage.uncached_input_tokens, extra, usage.output_tokens)
@@ -0,0 +1,311 @@
+"""Preclasificador local delante del clasificador LLM de entidades.
+
+La mayoría de los candidatos de `_resolve_entities` son obvios: el perfil
+con nombre completo y empresa, la nota que nombra a la empresa, el perfil de
+un homónimo en otra empresa y otro país. Una regresión logística sobre
+señales baratas del item (`features`: nombre y empresa en título/snippet,
+sitio de la empresa, URL de perfil, fuente) los decide en microsegundos y
+solo los ambiguos van al LLM:
+
+- probabilidad de conservar ≥ `keep_threshold` → se conserva;
+- ≤ `drop_threshold` → se descarta;
+- en el medio → LLM.
+
+Los umbrales se calibran al entrenar para que los casos decididos coincidan
+con el LLM al menos en `target` (0.99 por defecto). El modelo se entrena con
+el log de veredictos del LLM que guarda el cache (services/verdict_cache.py,
+tabla `samples`, sin vencimiento). Con el modelo activo ese log solo recibe
+los ambiguos más la muestra de auditoría (ENTITY_PRECLASSIFIER_AUDIT_RATE de
+las decisiones locales, que igual van al LLM), así los casos obvios siguen
+entrando y el reporte mide la coincidencia del modelo en producción:
+
+    python -m services.preclassifier [--db data/entity_verdicts.sqlite3]
+                                     [--out data/entity_preclassifier.json] [--target 0.99]
+
+Separa un 20 % de los prospectos para evaluar, imprime el reporte
+(coincidencia con el LLM, candidatos y llamadas que se habrían ahorrado) y
+guarda pesos, umbrales y reporte en `--out`. Sin ese archivo el
+preclasificador está desactivado y todo va al LLM como antes.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from itertools import groupby
+from pathlib import Path
+from typing import Optional
+
+from scraper.base import ScrapedItem
+from scraper.matching import ProspectMatcher, fold, prospect_matcher
+
+logger = logging.getLogger(__name__)
+
+FEATURES = (
+    "bias", "full_name", "name_exact", "name_partial", "name_in_title", "company", "company_in_title",
+    "company_site", "profile_url", "profile_full_name_no_company", "source_linkedin", "source_search",
+    "source_news", "no_snippet",
+)
+KEEP, DROP = "keep", "drop"
+
+
+def features(item: ScrapedItem, matcher: ProspectMatcher) -> dict[str, float]:
+    """Señales del item para el prospecto de `matcher` (0/1, salvo `name_partial`)."""
+    text = matcher.item_text(item)
+    url = item.url or ""
+    host = url.split("://", 1)[-1].split("/", 1)[0]
+    full_name = matcher.item_mentions_full_name(item)
+    company = matcher.item_mentions_company(item)
+    words = matcher.name_words
+    hits = sum(w in text for w in words)
+    profile = "linkedin.com/in/" in url.lower()
+    return {
+        "bias": 1.0,
+        "full_name": float(full_name),
+        "name_exact": float(matcher.mentions_name(text)),
+        # Comparte algunas palabras del nombre (apellido de un homónimo) pero no todas
+        "name_partial": hits / len(words) if words and not full_name else 0.0,
+        "name_in_title": float(matcher.mentions_full_name(item.title or "")),
+        "company": float(company),
+        "company_in_title": float(matcher.mentions_company(item.title or "")),
+        "company_site": float(not profile and (matcher.is_company_url(url) or matcher.domain_matches(host))),
+        "profile_url": float(profile),
+        "profile_full_name_no_company": float(profile and full_name and not company),
+        "source_linkedin": float(item.source == "linkedin"),
+        "source_search": float(item.source in ("duckduckgo", "google_search")),
+        "source_news": float(item.source in ("duckduckgo_news", "google_news")),
+        "no_snippet": float(not (item.snippet or "").strip()),
+    }
+
+
+def _sigmoid(z: float) -> float:
+    if z < -30:
+        return 0.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+@dataclass
+class PreClassifier:
+    """Regresión logística con umbrales de decisión: P(conservar) por item."""
+    weights: dict[str, float]
+    keep_threshold: float = 1.01  # > 1: nunca decide
+    drop_threshold: float = -0.01
+    report: dict = field(default_factory=dict)
+
+    def probability(self, item: ScrapedItem, matcher: ProspectMatcher) -> float:
+        x = features(item, matcher)
+        return _sigmoid(sum(self.weights.get(k, 0.0) * v for k, v in x.items()))
+
+    def decide(self, item: ScrapedItem, matcher: ProspectMatcher) -> Optional[str]:
+        """KEEP, DROP o None (ambiguo: lo decide el LLM)."""
+        p = self.probability(item, matcher)
+        if p >= self.keep_threshold:
+            return KEEP
+        if p <= self.drop_threshold:
+            return DROP
+        return None
+
+    def to_dict(self) -> dict:
+        return {"features": list(FEATURES), "weights": self.weights, "keep_threshold": self.keep_threshold,
+                "drop_threshold": self.drop_threshold, "report": self.report}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PreClassifier":
+        return cls({k: float(v) for k, v in data["weights"].items()}, float(data["keep_threshold"]),
+                   float(data["drop_threshold"]), data.get("report", {}))
+
+
+# --- Entrenamiento -------------------------------------------------------------
+
+Sample = tuple[str, str, ScrapedItem, str]  # (nombre, empresa, item, veredicto del LLM)
+
+
+def _label(verdict: str) -> int:
+    return 0 if verdict == "irrelevante" else 1
+
+
+def fit(rows: list[tuple[dict[str, float], int]], epochs: int = 400, lr: float = 0.5,
+        l2: float = 1e-3) -> dict[str, float]:
+    """Regresión logística por descenso de gradiente (pocas features, sin dependencias)."""
+    weights = dict.fromkeys(FEATURES, 0.0)
+    n = len(rows)
+    for _ in range(epochs):
+        grad = dict.fromkeys(FEATURES, 0.0)
+        for x, y in rows:
+            err = _sigmoid(sum(weights[k] * v for k, v in x.items())) - y
+            for k, v in x.items():
+                if v:
+                    grad[k] += err * v
+        for k in FEATURES:
+            weights[k] -= lr * (grad[k] / n + l2 * weights[k])
+    return {k: round(w, 4) for k, w in weights.items()}
+
+
+def calibrate(scored: list[tuple[float, int]], target: float, min_support: int = 20) -> tuple[float, float]:
+    """Umbrales más amplios con los que los decididos coinciden con el LLM en ≥ target.
+
+    Un umbral que deja menos de `min_support` items de su lado no se usa (sin
+    ejemplos no hay cómo saber si coincide).
+    """
+    keep_threshold, drop_threshold = 1.01, -0.01
+    # Las features son casi todas 0/1: muchos items empatan en probabilidad y
+    # un umbral solo puede cortar entre valores distintos
+    agree = total = 0
+    for p, group in groupby(sorted(scored, reverse=True), key=lambda s: s[0]):
+        labels = [y for _, y in group]
+        agree, total = agree + sum(labels), total + len(labels)
+        if total >= min_support and agree / total >= target:
+            keep_threshold = p
+    agree = total = 0
+    for p, group in groupby(sorted(scored), key=lambda s: s[0]):
+        labels = [y for _, y in group]
+        agree, total = agree + len(labels) - sum(labels), total + len(labels)
+        if total >= min_support and agree / total >= target:
+            drop_threshold = p
+    if drop_threshold >= keep_threshold:  # sin margen entre ambos: no decidir
+        return 1.01, -0.01
+    return keep_threshold, drop_threshold
+
+
+def _holdout(name: str, company: str, fraction: float) -> bool:
+    digest = hashlib.blake2b(f"{fold(name)}|{fold(company)}".encode(), digest_size=2).digest()
+    return int.from_bytes(digest, "big") / 0xFFFF < fraction
+
+
+def audit_sampled(name: str, company: str, item: ScrapedItem, rate: float) -> bool:
+    """Si la decisión sobre `item` va igual al LLM (muestra de auditoría, estable por prospecto e item)."""
+    if rate <= 0:
+        return False
+    digest = hashlib.blake2b(f"{fold(name)}|{fold(company)}|{item.url}|{item.title}".encode(),
+                             digest_size=4).digest()
+    return int.from_bytes(digest, "big") / 0xFFFFFFFF < rate
+
+
+def evaluate(model: PreClassifier, samples: list[Sample]) -> dict:
+    """Coincidencia con el LLM y candidatos/llamadas que el preclasificador habría evitado."""
+    decided = agree = kept_wrong = dropped_wrong = 0
+    by_prospect: dict[tuple[str, str], bool] = {}
+    for name, company, item, verdict in samples:
+        decision = model.decide(item, prospect_matcher(name, company))
+        key = (fold(name), fold(company))
+        by_prospect[key] = by_prospect.get(key, True) and decision is not None
+        if decision is None:
+            continue
+        decided += 1
+        y = _label(verdict)
+        if (decision == KEEP) == bool(y):
+            agree += 1
+        elif decision == KEEP:
+            kept_wrong += 1
+        else:
+            dropped_wrong += 1
+    return {
+        "samples": len(samples),
+        "decided": decided,
+        "decided_rate": round(decided / len(samples), 4) if samples else 0.0,
+        "agreement": round(agree / decided, 4) if decided else 1.0,
+        "kept_but_llm_dropped": kept_wrong,
+        "dropped_but_llm_kept": dropped_wrong,
+        "prospects": len(by_prospect),
+        "llm_calls_saved": sum(by_prospect.values()),
+    }
+
+
+def train(samples: list[Sample], target: float = 0.99, holdout: float = 0.2) -> PreClassifier:
+    """Entrenar con los prospectos fuera del holdout y evaluar sobre él."""
+    train_set = [s for s in samples if not _holdout(s[0], s[1], holdout)]
+    test_set = [s for s in samples if _holdout(s[0], s[1], holdout)]
+    rows = [(features(item, prospect_matcher(name, company)), _label(v)) for name, company, item, v in train_set]
+    model = PreClassifier(fit(rows))
+    scored = [(model.probability(item, prospect_matcher(name, company)), _label(v))
+              for name, company, item, v in train_set]
+    model.keep_threshold, model.drop_threshold = calibrate(scored, target)
+    model.report = {"target": target, "trained_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "train": evaluate(model, train_set), "holdout": evaluate(model, test_set)}
+    return model
+
+
+def format_report(model: PreClassifier) -> str:
+    lines = [f"Umbrales: conservar ≥ {model.keep_threshold:.3f}, descartar ≤ {model.drop_threshold:.3f} "
+             f"(objetivo {model.report.get('target')})"]
+    for split in ("train", "holdout"):
+        r = model.report.get(split)
+        if not r:
+            continue
+        lines.append(
+            f"  {split:<8} {r['samples']:>5} candidatos: {r['decided_rate']:.0%} decididos sin LLM, "
+            f"coincidencia {r['agreement']:.2%} ({r['kept_but_llm_dropped']} conservados de más, "
+            f"{r['dropped_but_llm_kept']} descartados de más); "
+            f"llamadas evitadas {r['llm_calls_saved']}/{r['prospects']} prospectos"
+        )
+    lines.append("Pesos: " + ", ".join(f"{k}={w:+.2f}" for k, w in model.weights.items()))
+    return "\n".join(lines)
+
+
+# --- Instancia del proceso -------------------------------------------------------
+
+_model: Optional[PreClassifier] = None
+_configured = False
+
+
+def get_preclassifier() -> Optional[PreClassifier]:
+    """Modelo entrenado (ENTITY_PRECLASSIFIER_PATH), o None si no hay archivo."""
+    global _model, _configured
+    if not _configured:
+        from config.settings import get_settings
+
+        path = get_settings().entity_resolution.preclassifier_path
+        if path and Path(path).exists():
+            try:
+                _model = PreClassifier.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+                logger.info("Preclasificador de entidades cargado: conservar ≥ %.3f, descartar ≤ %.3f",
+                            _model.keep_threshold, _model.drop_threshold)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Preclasificador inválido en %s (%s): todo va al LLM", path, e)
+        _configured = True
+    return _model
+
+
+def set_preclassifier(model: Optional[PreClassifier]) -> Optional[PreClassifier]:
+    """Reemplazar el modelo del proceso (tests, bench/); devuelve el anterior."""
+    global _model, _configured
+    previous, _model, _configured = _model, model, True
+    return previous
+
+
+def main():
+    from config.settings import get_settings
+    from services.verdict_cache import VerdictCache
+
+    cfg = get_settings().entity_resolution
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=cfg.verdict_cache_path or None, required=not cfg.verdict_cache_path,
+                        help="Cache de veredictos del LLM (SQLite; por defecto ENTITY_VERDICT_CACHE_PATH)")
+    parser.add_argument("--out", default=cfg.preclassifier_path, help="Dónde guardar el modelo (JSON)")
+    parser.add_argument("--target", type=float, default=0.99, help="Coincidencia mínima con el LLM al decidir")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fracción de prospectos para evaluar")
+    parser.add_argument("--dry-run", action="store_true", help="Solo el reporte, sin guardar el modelo")
+    args = parser.parse_args()
+
+    cache = VerdictCache(args.db, ttl_seconds=0)
+    samples = cache.samples()
+    if not samples:
+        raise SystemExit(f"Sin veredictos con item guardado en {args.db}")
+    audits = cache.audits()
+    cache.close()
+    model = train(samples, args.target, args.holdout)
+    print(format_report(model))
+    if audits:
+        agree = sum((decision == DROP) == (verdict == "irrelevante") for decision, verdict in audits)
+        print(f"Auditoría del modelo en producción: {agree}/{len(audits)} decisiones coinciden con el LLM "
+              f"({agree / len(audits):.2%})")
+    if not args.dry_run:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(model.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Modelo guardado en {args.out}")
+
+
+if __name__ == "__main__":
+    main()
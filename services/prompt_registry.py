@@ -0,0 +1,141 @@
+"""Registro de prompts: carga y compila los .md de prompts/ una sola vez.
+
+Antes cada llamada leía el archivo desde disco y el email se armaba con ~10
+`str.replace` encadenados. Ahora cada prompt se compila al arrancar en un
+`PromptTemplate` (segmentos literales + placeholders) que se renderiza en una
+sola pasada. Si el archivo cambia en disco (mtime), se recarga solo.
+
+Cada template expone `version` (hash del contenido): sirve para trazar qué
+versión del prompt produjo un resultado y como componente de cache keys.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
+
+# Placeholders del estilo {nombre} / {research_summary}. El ejemplo JSON de
+# email_generator.md usa llaves dobles ({{ ... }}) y el JSON literal de los
+# demás prompts nunca calza con un identificador entre llaves, así que quedan
+# intactos igual que con str.replace.
+_PLACEHOLDER_RE = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+# Cada cuánto (segundos) se revisa el mtime de un prompt al pedirlo.
+RELOAD_CHECK_INTERVAL = 1.0
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """Prompt compilado: partes literales alternadas con nombres de placeholder."""
+
+    name: str
+    text: str
+    version: str
+    mtime_ns: int
+    parts: tuple[str, ...]  # índices pares = literal, impares = placeholder
+
+    @classmethod
+    def compile(cls, name: str, text: str, mtime_ns: int = 0) -> "PromptTemplate":
+        parts = tuple(_PLACEHOLDER_RE.split(text))
+        version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        return cls(name=name, text=text, version=version, mtime_ns=mtime_ns, parts=parts)
+
+    @property
+    def placeholders(self) -> frozenset[str]:
+        return frozenset(self.parts[1::2])
+
+    def render(self, **values) -> str:
+        """Rellenar placeholders en una pasada.
+
+        Un placeholder sin valor queda literal (`{nombre}`), igual que con
+        str.replace. A diferencia del reemplazo encadenado, un valor que
+        contenga `{otro}` no se vuelve a sustituir.
+        """
+        parts = self.parts
+        out = list(parts)
+        for i in range(1, len(parts), 2):
+            value = values.get(parts[i])
+            out[i] = "{" + parts[i] + "}" if value is None else str(value)
+        return "".join(out)
+
+
+class PromptRegistry:
+    """Prompts compilados en memoria con recarga por mtime."""
+
+    def __init__(self, prompts_dir: Path = PROMPTS_DIR, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.prompts_dir = Path(prompts_dir)
+        self.check_interval = check_interval
+        self._templates: dict[str, PromptTemplate] = {}
+        self._last_check: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def load_all(self) -> int:
+        """Compilar todos los .md del directorio (se llama al arrancar)."""
+        if not self.prompts_dir.is_dir():
+            logger.warning("Directorio no encontrado: %s", self.prompts_dir)
+            return 0
+        for path in sorted(self.prompts_dir.glob("*.md")):
+            self._load(path.name)
+        logger.info("%d prompts compilados: %s", len(self._templates),
+                    ", ".join(sorted(f"{t.name}@{t.version}" for t in self._templates.values())))
+        return len(self._templates)
+
+    def get(self, filename: str) -> Optional[PromptTemplate]:
+        """Template compilado, recargado si el archivo cambió en disco."""
+        tpl = self._templates.get(filename)
+        now = time.monotonic()
+        if tpl is not None and now - self._last_check.get(filename, 0.0) < self.check_interval:
+            return tpl
+        self._last_check[filename] = now
+        try:
+            mtime_ns = os.stat(self.prompts_dir / filename).st_mtime_ns
+        except OSError:
+            return tpl
+        if tpl is None or mtime_ns != tpl.mtime_ns:
+            tpl = self._load(filename)
+        return tpl
+
+    def text(self, filename: str) -> str:
+        """Texto del prompt, o "" si no existe."""
+        tpl = self.get(filename)
+        return tpl.text if tpl else ""
+
+    def version(self, filename: str) -> str:
+        tpl = self.get(filename)
+        return tpl.version if tpl else ""
+
+    def _load(self, filename: str) -> Optional[PromptTemplate]:
+        path = self.prompts_dir / filename
+        with self._lock:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+                text = path.read_text(encoding="utf-8")
+            except OSError:
+                return self._templates.get(filename)
+            previous = self._templates.get(filename)
+            tpl = PromptTemplate.compile(filename, text, mtime_ns)
+            self._templates[filename] = tpl
+            self._last_check[filename] = time.monotonic()
+        if previous is not None and previous.version != tpl.version:
+            logger.info("%s recargado: %s → %s", filename, previous.version, tpl.version)
+        return tpl
+
+
+_registry: Optional[PromptRegistry] = None
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Registro compartido del proceso (se compila en el primer uso)."""
+    global _registry
+    if _registry is None:
+        _registry = PromptRegistry()
+        _registry.load_all()
+    return _registry
@@ -1,22 +1,40 @@
 """Orquesta scraping + verificación + análisis LLM."""
+import asyncio
+import copy
 import json
+import logging
 import re
 from dataclasses import dataclass, field
-from pathlib import Path
 from typing import Optional
 
+from config import metrics
+from config.metrics import stage_timer
+from config.settings import get_settings
+from scraper.completion import get_policy, use_policy
+from scraper.deadline import Deadline, current_deadline, use_deadline
+from scraper.matching import clear_matchers, prospect_matcher
 from scraper.orchestrator import ScraperOrchestrator
 from scraper.base import ScrapedItem
+from scraper.singleflight import SingleFlight, normalize_key
 from services.verifier import Verifier
+from services.context_builder import ContextCompactor, estimate_tokens
+from services.dedup import CandidateGroup, collapse_candidates
+from services.entity_batcher import get_entity_batcher, prospect_block, single_instruction
+from services.extraction import extract_education, extract_location, extract_profile_fields, extract_trayectoria
 from services.llm_client import LLMClient
 from services.schemas import RESEARCH_SCHEMA, ENTITY_RESOLUTION_SCHEMA
+from services.preclassifier import DROP, audit_sampled, get_preclassifier
+from services.verdict_cache import get_verdict_cache
+from services.prompt_registry import get_prompt_registry
+
+logger = logging.getLogger(__name__)
 
 # Fuentes de buscadores con riesgo de homónimos/ruido (se clasifican con LLM).
 # Corporate (dominio validado) y Perplexity (curado + gate) pasan sin clasificar.
 SEARCH_SOURCES = ("duckduckgo", "google_search", "linkedin", "duckduckgo_news", "google_news")
 
-
-PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
+# Investigaciones en curso en este proceso (compartido entre instancias)
+_investigations = SingleFlight("investigate")
 
 
 @dataclass
@@ -39,19 +57,53 @@ class ResearchService:
         self.orchestrator = ScraperOrchestrator()
         self.verifier = Verifier()
         self.llm = LLMClient()
+        llm_cfg = self.llm.settings.llm
+        self.compactor = ContextCompactor(llm_cfg.context_token_budget, llm_cfg.corporate_snippet_chars)
+
+    async def investigate(self, name: str, company: str, role: str = "", location: str = "",
+                          deadline: Optional[Deadline] = None, completion: Optional[str] = None) -> ResearchResult:
+        """Pipeline completo: scrape → verify → LLM analysis → structured result.
+
+        Investigaciones idénticas concurrentes (mismo nombre/empresa/cargo/
+        ubicación normalizados) comparten una sola ejecución del pipeline.
+        Cada llamador recibe su propia copia del resultado.
 
-    async def investigate(self, name: str, company: str, role: str = "", location: str = "") -> ResearchResult:
-        """Pipeline completo: scrape → verify → LLM analysis → structured result."""
+        Todo el pipeline corre contra `deadline` (por defecto el del request
+        en curso, o RESEARCH_DEADLINE_SECONDS desde ahora). Una ejecución
+        compartida usa el deadline del primer llamador.
+
+        `completion` elige la política de terminación temprana del scraping
+        (ver scraper/completion.py); por defecto COMPLETION_POLICY.
+        """
+        deadline = deadline or current_deadline() or Deadline(get_settings().deadline.default_seconds)
+        key = normalize_key(name, company, role, location)
+        try:
+            with use_deadline(deadline), use_policy(get_policy(completion)):
+                result = await _investigations.do(key, lambda: self._investigate(name, company, role, location))
+        finally:
+            # Los matchers y sus textos plegados no sobreviven a la investigación
+            clear_matchers()
+        return copy.deepcopy(result)
+
+    async def _investigate(self, name: str, company: str, role: str = "", location: str = "") -> ResearchResult:
         from scraper.linkedin import LinkedInScraper
 
         result = ResearchResult()
         result.linkedin_search_url = LinkedInScraper.build_search_url(name, company)
         result.location = location
+        # Cada etapa deja tiempo a las siguientes (ver scraper/deadline.py)
+        deadline = current_deadline()
+        deadline_cfg = get_settings().deadline
 
         try:
             # 1. Scrape all sources in parallel
-            print(f"[Research] Investigando: {name} @ {company}")
-            items = await self.orchestrator.search_all(name, company, role, location)
+            logger.info("Investigando: %s @ %s", name, company)
+            with stage_timer("scraping"):
+                items = await self.orchestrator.search_all(
+                    name, company, role, location,
+                    deadline=deadline.reserve(deadline_cfg.scraping_reserve_seconds,
+                                              deadline_cfg.reserve_max_share) if deadline else None,
+                )
 
             # 1b. Resolución de entidades: clasificar cada resultado de búsqueda
             # según si corresponde al prospecto/empresa o es ruido (homónimo,
@@ -59,14 +111,16 @@ class ResearchService:
             # esto se hacía solo con heurísticas regex y los homónimos llegaban
             # igual al LLM de análisis como "hechos" (ej: la educación de una
             # Nadia Ramirez de California atribuida a la Nadia de Desert King).
-            # Si la llamada LLM falla, cae a las heurísticas (_is_relevant_item).
+            # Si la llamada LLM falla, cae a las heurísticas (`ProspectMatcher.is_relevant`).
             if items:
-                items = await self._resolve_entities(name, company, role, location, items)
+                resolution_deadline = (deadline.reserve(deadline_cfg.analysis_reserve_seconds,
+                                                        deadline_cfg.reserve_max_share) if deadline else None)
+                with stage_timer("entity_resolution"), use_deadline(resolution_deadline):
+                    items = await self._resolve_entities(name, company, role, location, items)
 
             if items:
                 # 2. Guardar fuentes raw (filtrar homónimos, fuentes no útiles, noticias irrelevantes)
-                company_lower = company.lower().strip()
-                name_lower = name.lower().strip()
+                matcher = prospect_matcher(name, company)
                 # Sites that don't provide useful clickable info for the user
                 _noisy_domains = ("zoominfo.com", "rocketreach.co", "theorg.com", "twitchtracker.com", "chiletrabajos.cl")
                 result.raw_sources = []
@@ -82,37 +136,30 @@ class ResearchService:
                     # Filter out noisy/paywalled sources
                     if any(d in url_lower for d in _noisy_domains):
                         continue
-                    item_text = f"{it.title} {it.snippet}".lower()
-                    # For search engine results (DDG, Google): only keep if they
-                    # mention the company or are the company's own site.
-                    # This prevents homonym contamination (other people with same name).
-                    if it.source in ("duckduckgo", "google_search", "linkedin"):
-                        is_company_site = company_lower.replace(" ", "") in url_lower.replace(" ", "")
-                        # Excepción: el item del LinkedIn scraper viene de una búsqueda
-                        # ya acotada por empresa y es su perfil seleccionado; el snippet
-                        # DDG a veces trunca la mención de la empresa. Si trae el nombre
-                        # completo del prospecto, se conserva.
-                        is_own_profile = it.source == "linkedin" and self._text_mentions_full_name(item_text, name_lower)
-                        if not is_company_site and not is_own_profile and not self._text_mentions_company(item_text, company_lower):
-                            continue
-                    # Filter news results: only keep if they mention the company or person
-                    if it.source in ("duckduckgo_news", "google_news"):
-                        if not self._text_mentions_company(item_text, company_lower) and name_lower not in item_text:
-                            continue
+                    # Buscadores (DDG, Google, LinkedIn): solo si mencionan la empresa,
+                    # son su propio sitio o el perfil seleccionado por el LinkedIn
+                    # scraper con el nombre completo (el snippet DDG a veces trunca
+                    # la empresa). Noticias: solo si mencionan la empresa o la persona.
+                    # Evita contaminación por homónimos (mismo criterio que la
+                    # heurística de resolución de entidades).
+                    if not matcher.is_relevant(it):
+                        continue
                     seen_urls.add(url_normalized)
                     result.raw_sources.append(
                         {"url": it.url, "title": it.title, "source": it.source}
                     )
 
                 # 3. Verificar hechos cruzando fuentes
-                verified_facts = self.verifier.verify(items)
+                with stage_timer("verify"):
+                    verified_facts = self.verifier.verify(items)
 
                 if verified_facts:
                     # 4. Construir contexto para el LLM con datos scrapeados
                     corporate_domain = self.orchestrator.discovered_domain
                     context = self._build_llm_context(name, company, role, verified_facts, location, corporate_domain)
                     system_prompt = self._load_prompt("research_analyzer.md")
-                    llm_response = await self.llm.complete(system_prompt, context, json_schema=RESEARCH_SCHEMA)
+                    with stage_timer("analysis"):
+                        llm_response = await self.llm.complete(system_prompt, context, json_schema=RESEARCH_SCHEMA)
                     result.llm_used = llm_response.model_used
 
                     parsed = self._parse_llm_response(llm_response.content)
@@ -152,14 +199,14 @@ class ResearchService:
                         return result
 
             # Fallback: si no hay datos de scraping, investigar directo con LLM
-            print("[Research] Sin datos de scraping, usando LLM directo como fallback")
+            logger.info("Sin datos de scraping, usando LLM directo como fallback")
             result = await self._llm_direct_research(name, company, role, location)
             result.linkedin_search_url = LinkedInScraper.build_search_url(name, company)
             result.location = location
 
         except Exception as e:
             result.error = str(e)
-            print(f"[Research] Error: {e}")
+            logger.warning("Error: %s", e)
 
         return result
 
@@ -239,7 +286,8 @@ Si la persona no es una figura publica conocida, devuelve la mayoria de campos c
 IMPORTANTE: Si no conoces a esta persona o empresa, devuelve campos vacios con score bajo (10-20).
 NO inventes nada. Responde SOLO con el JSON estructurado."""
 
-        llm_response = await self.llm.complete(system_prompt, user_prompt, json_schema=RESEARCH_SCHEMA)
+        with stage_timer("direct_research"):
+            llm_response = await self.llm.complete(system_prompt, user_prompt, json_schema=RESEARCH_SCHEMA)
         result = ResearchResult(llm_used=f"{llm_response.model_used} (sin verificar)")
 
         parsed = self._parse_llm_response(llm_response.content)
@@ -301,9 +349,15 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
             "",
         ])
 
-        for i, fact in enumerate(facts, 1):
-            if fact.confidence == "discarded":
-                continue
+        # Presupuesto de tokens: sin límite, un sitio corporativo rico inflaba
+        # el prompt (y la latencia del LLM) sin aportar campos nuevos.
+        selected = self.compactor.compact(facts)
+        non_discarded = sum(1 for f in facts if f.confidence != "discarded")
+        if len(selected) < non_discarded:
+            logger.info("Contexto compactado: %s/%s hechos (presupuesto %s tokens)",
+                        len(selected), non_discarded, self.compactor.token_budget)
+
+        for i, fact in enumerate(selected, 1):
             # Skip ZoomInfo/RocketReach facts about cargo when user already provided one
             is_zoominfo = any(s in url for url in fact.sources for s in ("zoominfo.com", "rocketreach.co", "theorg.com"))
             if is_zoominfo and role:
@@ -312,7 +366,7 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
                 role_lower = role.lower()
                 has_role_keywords = any(kw in fact_lower for kw in ("cargo", "title", "jefe", "gerente", "director", "manager", "head", "chief", "ingeniero", "analista", "coordinador", "supervisor"))
                 if has_role_keywords and role_lower not in fact_lower:
-                    print(f"[Research] Descartando dato ZoomInfo con cargo contradictorio: {fact.content[:80]}...")
+                    logger.debug("Descartando dato ZoomInfo con cargo contradictorio: %s...", fact.content[:80])
                     continue
             # Detect company LinkedIn page data (lists multiple employees)
             is_company_page = any("linkedin.com/company" in url for url in fact.sources)
@@ -332,15 +386,16 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
             lines.append("")
 
         lines.append("Analiza estos datos y responde en el formato JSON especificado.")
-        return "\n".join(lines)
+        context = "\n".join(lines)
+        logger.debug("Contexto de análisis: ~%s tokens", estimate_tokens(context))
+        return context
 
     def _load_prompt(self, filename: str) -> str:
-        """Cargar prompt desde archivo .md."""
-        path = PROMPTS_DIR / filename
-        if path.exists():
-            return path.read_text(encoding="utf-8")
-        print(f"[Research] Prompt no encontrado: {path}")
-        return ""
+        """Prompt compilado desde el registro (cargado al arrancar)."""
+        text = get_prompt_registry().text(filename)
+        if not text:
+            logger.warning("Prompt no encontrado: %s", filename)
+        return text
 
     def _enrich_from_perplexity(self, result: ResearchResult):
         """Enriquecer campos vacíos del resultado con datos estructurados de Perplexity."""
@@ -357,11 +412,11 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
         # Perplexity tiene reglas anti-homónimo en su prompt pero a veces trae
         # a otra persona con el mismo nombre (ej: una Nadia Ramirez Lara de
         # Mexicali al investigar a la de Desert King Chile).
-        company_lower = result.empresa.get("nombre", "").lower().strip()
-        if company_lower and pplx_persona:
-            persona_text = " ".join(str(v) for v in pplx_persona.values() if v).lower()
-            if not self._text_mentions_company(persona_text, company_lower):
-                print("[Research] Persona de Perplexity descartada (no menciona la empresa — posible homónimo)")
+        matcher = prospect_matcher(result.persona.get("nombre") or "", result.empresa.get("nombre", ""))
+        if matcher.company_folded and pplx_persona:
+            persona_text = " ".join(str(v) for v in pplx_persona.values() if v)
+            if not matcher.mentions_company(persona_text):
+                logger.debug("Persona de Perplexity descartada (no menciona la empresa — posible homónimo)")
                 pplx_persona = {}
 
         # Enriquecer persona
@@ -408,7 +463,7 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
             if pplx_cargo and pplx_cargo not in ("No disponible", "No verificado"):
                 result.cargo_descubierto = pplx_cargo
 
-        print(f"[Research] Resultado enriquecido con datos de Perplexity")
+        logger.debug("Resultado enriquecido con datos de Perplexity")
 
     def _enrich_from_scraped_items(self, result: ResearchResult, items: list[ScrapedItem]):
         """Enriquecer campos vacíos de persona con datos extraídos de snippets de LinkedIn.
@@ -420,9 +475,8 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
         IMPORTANTE: Solo usa items que mencionan la empresa del prospecto para evitar
         mezclar datos de personas homónimas en otras empresas.
         """
-        company = result.empresa.get("nombre", "")
-        company_lower = company.lower().strip()
-        name_lower = (result.persona.get("nombre") or "").lower().strip()
+        matcher = prospect_matcher(result.persona.get("nombre") or "", result.empresa.get("nombre", ""))
+        has_company = bool(matcher.company_folded)
 
         # Recopilar texto SOLO de items que correspondan a la empresa correcta
         # EXCLUIR company pages que listan cargos de otros empleados
@@ -437,7 +491,7 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
                 continue
             # Skip company LinkedIn pages — they list multiple employees
             if "linkedin.com/company" in item.url or "linkedin.com/posts" in item.url:
-                print(f"[Research] Excluyendo company/post page de enriquecimiento: {item.url[:60]}")
+                logger.debug("Excluyendo company/post page de enriquecimiento: %s", item.url[:60])
                 continue
             # Filtrar: solo usar si el item menciona la empresa del prospecto.
             # Excepción: el perfil seleccionado por el LinkedIn scraper (búsqueda
@@ -445,158 +499,53 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
             # snippet DDG a veces trunca la mención de la empresa y sin esta
             # excepción se descarta el perfil de la propia persona (y con él
             # su educación/ubicación).
-            item_text = f"{item.title} {item.snippet}".lower()
-            is_own_profile = item.source == "linkedin" and self._text_mentions_full_name(item_text, name_lower)
-            if company_lower and not is_own_profile and not self._text_mentions_company(item_text, company_lower):
-                print(f"[Research] Descartando LinkedIn item (empresa no coincide): {item.title[:60]}...")
+            is_own_profile = item.source == "linkedin" and matcher.item_mentions_full_name(item)
+            if has_company and not is_own_profile and not matcher.item_mentions_company(item):
+                logger.debug("Descartando LinkedIn item (empresa no coincide): %s...", item.title[:60])
                 continue
             linkedin_texts.append(f"{item.title} {item.snippet}")
 
         # También buscar items de Google/DDG que tengan URLs de LinkedIn
         for item in items:
             if item.source in ("google_search", "duckduckgo") and "linkedin.com" in item.url:
-                item_text = f"{item.title} {item.snippet}".lower()
-                if company_lower and not self._text_mentions_company(item_text, company_lower):
+                if has_company and not matcher.item_mentions_company(item):
                     continue
                 linkedin_texts.append(f"{item.title} {item.snippet}")
 
         if not linkedin_texts:
             return
 
-        combined = " | ".join(linkedin_texts)
         persona = result.persona
         _fill = self._fill_if_empty
 
-        # Extraer educación de snippets de LinkedIn
-        education = self._extract_education(combined)
+        # Educación, ubicación y trayectoria/headline en una sola pasada
+        fields = extract_profile_fields(linkedin_texts, result.persona.get("nombre", ""))
+        education, location, trayectoria = fields.educacion, fields.ubicacion, fields.trayectoria
         if education:
             _fill(persona, "educacion", education)
-
-        # Extraer ubicación de snippets de LinkedIn
-        location = self._extract_location(combined)
         if location:
             _fill(persona, "ubicacion", location)
-
-        # Extraer trayectoria/headline de títulos LinkedIn
-        trayectoria = self._extract_trayectoria(linkedin_texts, result.persona.get("nombre", ""))
         if trayectoria:
             _fill(persona, "trayectoria", trayectoria)
 
         if any(field_filled := [education, location, trayectoria]):
-            print(f"[Research] Enriquecido con datos de LinkedIn snippets: "
-                  f"edu={'Y' if education else 'N'} "
-                  f"loc={'Y' if location else 'N'} "
-                  f"tray={'Y' if trayectoria else 'N'}")
+            logger.debug("Enriquecido con datos de LinkedIn snippets: edu=%s loc=%s tray=%s",
+                         *("Y" if field else "N" for field in field_filled))
 
     @staticmethod
     def _extract_education(text: str) -> str:
-        """Extraer información de educación de texto de LinkedIn.
-
-        Only extracts clean education data: university names, degree titles.
-        Avoids capturing long fragments from LinkedIn snippets that happen to
-        contain education keywords mixed with other content.
-        """
-        # Patrones comunes de educación en LinkedIn
-        education_patterns = [
-            # "Educación: Universidad de Atacama" (formato Perplexity/LinkedIn enriquecido)
-            r"(?:^|[\s|])Educaci[oó]n:\s*(.{5,80}?)(?:\||$|\.|Ubicaci[oó]n|Logros|Cargo|Empresa|Trayectoria|Location)",
-            # "alumniOf" / universidades conocidas (limit to 80 chars to avoid long snippet fragments)
-            r"((?:Universidad|Pontificia|Instituto|Escuela|Facultad|UTFSM|USACH|U\. de|PUC|UC|IESA|DUOC)\s[^|.]{3,60})",
-            # Grados académicos (limit capture to avoid long garbage)
-            r"((?:Ingenier[oa]\s+Civil|MBA|Máster|Master|Magíster|Doctorad[oa]|Licenciad[oa])\s*(?:en\s)?[^|.]{0,50})",
-        ]
-
-        results = []
-        for pattern in education_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
-                clean = match.strip().strip("|.,; ")
-                # Cortar ruido pegado cuando el snippet no tiene puntuación entre
-                # campos (ej: "Instituto X Ubicación: Valparaíso 172 contactos").
-                for kw in ("ubicaci", "location", "contacto", "seguidor", "connection", "follower"):
-                    pos = clean.lower().find(kw)
-                    if pos > 3:
-                        clean = clean[:pos].strip().strip("|.,;· ")
-                if not clean or len(clean) <= 3:
-                    continue
-                if clean.lower().startswith("ucation"):
-                    continue
-                # Skip if it looks like a snippet fragment (contains company/business words)
-                lower = clean.lower()
-                if any(w in lower for w in ("nuestro", "servicios", "empresa", "faymex", "experiencia en la")):
-                    continue
-                # Skip if too long (likely a snippet fragment, not a clean education entry)
-                if len(clean) > 100:
-                    continue
-                if clean in results:
-                    continue
-                results.append(clean)
-
-        if results:
-            return ". ".join(results[:3])
-        return ""
+        """Extraer información de educación de texto de LinkedIn (ver services/extraction.py)."""
+        return extract_education(text)
 
     @staticmethod
     def _extract_location(text: str) -> str:
-        """Extraer ubicación de texto de LinkedIn."""
-        # Patrones de ubicación
-        location_patterns = [
-            # "Ubicación: Santiago, Chile" (formato enriquecido)
-            r"[Uu]bicaci[oó]n:\s*([^|.]+?)(?:\||$|\.)",
-            # "Chile" o "Santiago, Chile" al final o entre separadores
-            r"(?:^|\||\.\s+)((?:Santiago|Antofagasta|Calama|Copiap[oó]|La Serena|Vi[ñn]a del Mar|Valpara[ií]so|Concepci[oó]n|Temuco|Rancagua|Iquique|Arica|Puerto Montt|Punta Arenas)(?:\s*,\s*(?:Chile|Regi[oó]n\s+[^|.]+))?)",
-            # País solo
-            r"(?:^|\||\.\s+)(Chile)(?:\s*\||$|\.)",
-        ]
-
-        for pattern in location_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                loc = match.group(1).strip().strip("|.,; ")
-                # Cortar conteos de LinkedIn pegados: "Valparaíso 172 contactos"
-                cut = re.split(r"\s+\d", loc)[0].strip().strip("|.,;· ")
-                if len(cut) >= 3:
-                    loc = cut
-                if loc and len(loc) >= 3:
-                    return loc
-
-        return ""
+        """Extraer ubicación de texto de LinkedIn (ver services/extraction.py)."""
+        return extract_location(text)
 
     @staticmethod
     def _extract_trayectoria(linkedin_texts: list[str], name: str) -> str:
-        """Extraer resumen de trayectoria/headline de títulos LinkedIn.
-
-        LinkedIn titles have format: "Name - Headline | LinkedIn"
-        LinkedIn snippets often contain the full headline with titles and education.
-        """
-        headlines = []
-        name_parts = name.lower().split()
-
-        for text in linkedin_texts:
-            # Patrón de título LinkedIn: "Nombre - Headline | LinkedIn"
-            # También: "Nombre - Headline - Empresa | LinkedIn"
-            match = re.search(
-                r"(?:" + re.escape(name) + r"|" + r"\s+".join(re.escape(p) for p in name_parts) + r")\s*[-–—]\s*(.+?)(?:\s*\|\s*LinkedIn|\s*$)",
-                text,
-                re.IGNORECASE,
-            )
-            if match:
-                headline = match.group(1).strip().strip("| ")
-                if headline and len(headline) > 5:
-                    headlines.append(headline)
-
-            # Patrón alternativo: "Trayectoria: ..." (formato Perplexity)
-            match2 = re.search(r"Trayectoria:\s*(.+?)(?:\||$|Educaci[oó]n|Logros)", text, re.IGNORECASE)
-            if match2:
-                tray = match2.group(1).strip().strip("|.,; ")
-                if tray and len(tray) > 5 and tray not in ("No disponible",):
-                    headlines.append(tray)
-
-        if headlines:
-            # Usar el headline más largo
-            best = max(headlines, key=len)
-            return best
-        return ""
+        """Extraer resumen de trayectoria/headline de títulos LinkedIn (ver services/extraction.py)."""
+        return extract_trayectoria(linkedin_texts, name)
 
     async def _resolve_entities(
         self, name: str, company: str, role: str, location: str, items: list[ScrapedItem]
@@ -606,128 +555,159 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
         Capa primaria contra contaminación por homónimos. Solo clasifica items
         de buscadores (riesgo de homónimo/ruido); corporate y perplexity pasan
         sin tocar. Si la llamada falla o no parsea, cae a la heurística
-        `_is_relevant_item` para no romper el pipeline.
+        `ProspectMatcher.is_relevant` para no romper el pipeline.
+
+        Las copias del mismo contenido (misma URL canónica o texto casi igual,
+        ver services/dedup.py) van al clasificador como un solo candidato con
+        sus fuentes fusionadas; el veredicto vale para todas las copias.
+
+        Los grupos con un veredicto guardado (services/verdict_cache.py: el
+        mismo prospecto antes, o un colega para las notas de la empresa) no
+        vuelven al LLM; si todos lo tienen, no hay llamada. Con un
+        preclasificador entrenado (services/preclassifier.py), los candidatos
+        obvios se deciden localmente y solo los ambiguos van al LLM.
         """
         safe = [it for it in items if it.source not in SEARCH_SOURCES]
         candidates = [it for it in items if it.source in SEARCH_SOURCES]
         if not candidates:
             return items
 
-        name_lower = name.lower().strip()
-        company_lower = company.lower().strip()
+        groups = collapse_candidates(candidates, get_settings().entity_resolution.near_duplicate_bits)
+        if len(groups) < len(candidates):
+            logger.debug("Resolución de entidades: %s resultados → %s candidatos", len(candidates), len(groups))
+
+        cache = get_verdict_cache()
+        version = get_prompt_registry().version("entity_resolver.md")
+        verdicts: dict[int, str] = {}
+        if cache:
+            verdicts = await self._cached_verdicts(cache, name, company, groups, version)
+        if verdicts:
+            logger.info("Resolución de entidades: %s/%s candidatos con veredicto guardado",
+                        len(verdicts), len(groups))
+        preclassifier = get_preclassifier()
+        audited: dict[int, str] = {}
+        if preclassifier:
+            decided, audited = self._preclassify(preclassifier, name, company, groups, verdicts)
+            verdicts.update(decided)
+        pending = [i for i in range(len(groups)) if i not in verdicts]
 
         parsed = None
         try:
             system_prompt = self._load_prompt("entity_resolver.md")
-            user_prompt = self._build_entity_resolution_prompt(name, company, role, location, candidates)
-            if system_prompt:
+            batcher = get_entity_batcher()
+            to_classify = [groups[i] for i in pending]
+            if not to_classify:
+                parsed = {"clasificaciones": []}
+            elif system_prompt and batcher:
+                # Modo lote: la misma llamada clasifica a otras investigaciones en curso
+                block = prospect_block(name, company, role, location, to_classify)
+                parsed = await batcher.classify(self.llm, system_prompt, block, len(to_classify),
+                                                self._parse_llm_response)
+            elif system_prompt:
+                user_prompt = self._build_entity_resolution_prompt(name, company, role, location, to_classify)
                 resp = await self.llm.complete(system_prompt, user_prompt, json_schema=ENTITY_RESOLUTION_SCHEMA)
                 parsed = self._parse_llm_response(resp.content)
         except Exception as e:
-            print(f"[Research] Resolución de entidades falló ({e}), usando heurística")
+            logger.warning("Resolución de entidades falló (%s), usando heurística", e)
 
-        # Fallback heurístico si el LLM no respondió un JSON válido
+        # Fallback heurístico si el LLM no respondió un JSON válido (solo para
+        # los candidatos sin veredicto guardado)
         if not parsed or not isinstance(parsed.get("clasificaciones"), list):
-            kept = [it for it in candidates if self._is_relevant_item(it, name_lower, company_lower)]
+            matcher = prospect_matcher(name, company)
+            dropped = {
+                id(it) for i, group in enumerate(groups) for it in group.members
+                if (verdicts[i] == "irrelevante" if i in verdicts else not matcher.is_relevant(it))
+            }
+            kept = [it for it in candidates if id(it) not in dropped]
             if len(kept) != len(candidates):
-                print(f"[Research] Resolución (heurística): {len(candidates) - len(kept)}/{len(candidates)} items descartados")
+                logger.info("Resolución (heurística): %s/%s items descartados",
+                            len(candidates) - len(kept), len(candidates))
             return safe + kept
 
-        verdicts: dict[int, str] = {}
+        new_verdicts: dict[int, str] = {}
         for c in parsed["clasificaciones"]:
             idx = c.get("indice")
-            if isinstance(idx, int):
-                verdicts[idx] = c.get("categoria", "prospecto")
-
-        kept = []
-        descartados = 0
-        for i, it in enumerate(candidates):
+            if isinstance(idx, int) and 0 <= idx < len(pending):
+                new_verdicts[pending[idx]] = c.get("categoria", "prospecto")
+        verdicts.update(new_verdicts)
+        if cache and new_verdicts:
+            stored: list[tuple[ScrapedItem, str]] = []
+            decisions: dict[int, str] = {}  # posición en `stored` → decisión auditada del preclasificador
+            for i, verdict in new_verdicts.items():
+                for it in groups[i].members:
+                    if i in audited:
+                        decisions[len(stored)] = audited[i]
+                    stored.append((it, verdict))
+            try:
+                await asyncio.to_thread(cache.store, name, company, stored, version, decisions)
+            except Exception as e:
+                logger.warning("No se pudieron guardar los veredictos (%s)", e)
+
+        dropped = set()
+        for i, group in enumerate(groups):
             # Default permisivo: si el LLM omitió un índice, conservar (no
             # perder datos válidos por una omisión del modelo).
             if verdicts.get(i, "prospecto") == "irrelevante":
-                descartados += 1
-                print(f"[Research] Item irrelevante (LLM): {(it.title or it.url)[:70]}")
-                continue
-            kept.append(it)
+                dropped.update(id(it) for it in group.members)
+                logger.debug("Item irrelevante (LLM): %s", (group.item.title or group.item.url)[:70])
+        kept = [it for it in candidates if id(it) not in dropped]
+        descartados = len(candidates) - len(kept)
         if descartados:
-            print(f"[Research] Resolución de entidades (LLM): {descartados}/{len(candidates)} items irrelevantes descartados")
+            logger.info("Resolución de entidades (LLM): %s/%s items irrelevantes descartados",
+                        descartados, len(candidates))
         return safe + kept
 
     @staticmethod
-    def _build_entity_resolution_prompt(
-        name: str, company: str, role: str, location: str, candidates: list[ScrapedItem]
-    ) -> str:
-        """User prompt con el prospecto y los resultados numerados a clasificar."""
-        lines = [
-            "## Prospecto",
-            f"- Nombre: {name}",
-            f"- Empresa: {company}",
-            f"- Cargo: {role or 'No especificado'}",
-            f"- Ubicacion: {location or 'No especificada'}",
-            "",
-            "## Resultados de búsqueda a clasificar",
-            "",
-        ]
-        for i, it in enumerate(candidates):
-            lines.append(f"[{i}] fuente={it.source} url={it.url}")
-            if it.title:
-                lines.append(f"    título: {it.title}")
-            snippet = (it.snippet or "").strip()
-            if snippet:
-                lines.append(f"    texto: {snippet[:300]}")
-            lines.append("")
-        lines.append(
-            f"Clasifica cada índice de [0] a [{len(candidates) - 1}] en "
-            "prospecto/empresa/irrelevante. Devuelve un objeto por cada índice."
-        )
-        return "\n".join(lines)
-
-    def _is_relevant_item(self, it: ScrapedItem, name_lower: str, company_lower: str) -> bool:
-        """Heurística de relevancia (FALLBACK de `_resolve_entities`).
-
-        Aplica a resultados de buscadores (homónimos) y noticias (irrelevantes).
-        Corporate y Perplexity ya vienen validados/curados aguas arriba.
-        """
-        item_text = f"{it.title} {it.snippet}".lower()
-        url_lower = (it.url or "").lower()
-        if it.source in ("duckduckgo", "google_search", "linkedin"):
-            if company_lower.replace(" ", "") in url_lower.replace(" ", ""):
-                return True
-            if self._text_mentions_company(item_text, company_lower):
-                return True
-            # Perfil seleccionado por el LinkedIn scraper con nombre completo
-            return it.source == "linkedin" and self._text_mentions_full_name(item_text, name_lower)
-        if it.source in ("duckduckgo_news", "google_news"):
-            return self._text_mentions_company(item_text, company_lower) or (
-                bool(name_lower) and name_lower in item_text
-            )
-        return True
+    async def _cached_verdicts(cache, name: str, company: str, groups: list[CandidateGroup],
+                               version: str) -> dict[int, str]:
+        """Veredictos guardados por grupo: vale el de cualquiera de sus copias."""
+        members = [(i, it) for i, group in enumerate(groups) for it in group.members]
+        try:
+            found = await asyncio.to_thread(cache.lookup, name, company, [it for _, it in members], version)
+        except Exception as e:
+            logger.warning("Cache de veredictos no disponible (%s)", e)
+            return {}
+        verdicts: dict[int, str] = {}
+        for pos, verdict in sorted(found.items()):
+            verdicts.setdefault(members[pos][0], verdict)
+        metrics.ENTITY_VERDICT_CACHE.labels("hit").inc(len(verdicts))
+        metrics.ENTITY_VERDICT_CACHE.labels("miss").inc(len(groups) - len(verdicts))
+        return verdicts
 
     @staticmethod
-    def _text_mentions_full_name(text: str, name_lower: str) -> bool:
-        """True si el texto contiene TODAS las palabras significativas del nombre.
+    def _preclassify(preclassifier, name: str, company: str, groups: list[CandidateGroup],
+                     known: dict[int, str]) -> tuple[dict[int, str], dict[int, str]]:
+        """(veredictos de los grupos obvios según el preclasificador, decisiones en auditoría).
 
-        Mucho más específico que el match de empresa: exige nombre y apellidos
-        completos, en cualquier orden.
+        Los ambiguos quedan fuera de ambos. Una fracción de los obvios
+        (ENTITY_PRECLASSIFIER_AUDIT_RATE) va igual al LLM: su veredicto queda
+        en el log de entrenamiento junto a la decisión del preclasificador.
         """
-        parts = [w for w in name_lower.split() if len(w) >= 3]
-        return bool(parts) and all(p in text for p in parts)
+        matcher = prospect_matcher(name, company)
+        audit_rate = get_settings().entity_resolution.preclassifier_audit_rate
+        decided: dict[int, str] = {}
+        audited: dict[int, str] = {}
+        for i, group in enumerate(groups):
+            if i in known:
+                continue
+            decision = preclassifier.decide(group.item, matcher)
+            if decision and audit_sampled(name, company, group.item, audit_rate):
+                metrics.ENTITY_PRECLASSIFIER.labels("audit").inc()
+                audited[i] = decision
+                continue
+            metrics.ENTITY_PRECLASSIFIER.labels(decision or "ambiguous").inc()
+            if decision:
+                decided[i] = "irrelevante" if decision == DROP else "prospecto"
+        if decided:
+            logger.info("Resolución de entidades: %s/%s candidatos decididos sin LLM", len(decided), len(groups))
+        return decided, audited
 
     @staticmethod
-    def _text_mentions_company(text: str, company_lower: str) -> bool:
-        """Check if text mentions the target company (case-insensitive).
-
-        Handles common variations: 'Faymex' matches 'faymex spa', 'FAYMEX SpA', etc.
-        Also checks individual significant words for multi-word company names.
-        """
-        if company_lower in text:
-            return True
-        # Check significant words (>3 chars) of company name
-        company_words = [w for w in company_lower.split() if len(w) > 3]
-        for word in company_words:
-            if word in text:
-                return True
-        return False
+    def _build_entity_resolution_prompt(
+        name: str, company: str, role: str, location: str, candidates: list[CandidateGroup]
+    ) -> str:
+        """User prompt con el prospecto y los resultados numerados a clasificar (uno por grupo de copias)."""
+        return "\n".join([*prospect_block(name, company, role, location, candidates), single_instruction(len(candidates))])
 
     @staticmethod
     def _filter_contradictory_hallazgos(hallazgos: list[dict], role: str) -> list[dict]:
@@ -747,7 +727,7 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
             # Solo filtrar hallazgos que hablan de cargos LinkedIn
             mentions_cargo = any(m in content for m in cargo_markers)
             if mentions_cargo and role_lower not in content:
-                print(f"[Research] Hallazgo filtrado (cargo contradictorio): {h.get('content', '')[:80]}...")
+                logger.debug("Hallazgo filtrado (cargo contradictorio): %s...", h.get("content", "")[:80])
                 continue
             filtered.append(h)
         return filtered
@@ -783,10 +763,10 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
             same_as_corp = bool(corp_netloc) and netloc == corp_netloc
             if same_as_corp and corresponde is False:
                 # El LLM determinó que el dominio descubierto es de otra empresa
-                print(f"[Research] sitio_web descartado (LLM: dominio homónimo de otra empresa): {sitio}")
+                logger.debug("sitio_web descartado (LLM: dominio homónimo de otra empresa): %s", sitio)
                 result.empresa["sitio_web"] = ""
             elif not same_as_corp and not CorporateSiteScraper._domain_matches_company(netloc, company):
-                print(f"[Research] sitio_web descartado (dominio de tercero): {sitio}")
+                logger.debug("sitio_web descartado (dominio de tercero): %s", sitio)
                 result.empresa["sitio_web"] = ""
         # Rellenar con el dominio descubierto solo si el LLM no lo vetó
         if corporate_domain and corresponde is not False and not result.empresa.get("sitio_web"):
@@ -799,7 +779,7 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
             ]
             removed = before - len(result.raw_sources)
             if removed:
-                print(f"[Research] {removed} fuentes del dominio vetado removidas ({corp_netloc})")
+                logger.debug("%s fuentes del dominio vetado removidas (%s)", removed, corp_netloc)
 
     @staticmethod
     def _fill_if_empty(d: dict, key: str, value: str):
@@ -825,5 +805,5 @@ NO inventes nada. Responde SOLO con el JSON estructurado."""
         try:
             return json.loads(text)
         except json.JSONDecodeError as e:
-            print(f"[Research] Error parseando JSON: {e}")
+            logger.warning("Error parseando JSON: %s", e)
             return None
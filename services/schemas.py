@@ -86,27 +86,50 @@ RESEARCH_SCHEMA = {
     "additionalProperties": False,
 }
 
+_CLASIFICACIONES = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "indice": {"type": "integer"},
+            "categoria": {
+                "type": "string",
+                "enum": ["prospecto", "empresa", "irrelevante"],
+            },
+            "razon": _STR,
+        },
+        "required": ["indice", "categoria", "razon"],
+        "additionalProperties": False,
+    },
+}
+
 ENTITY_RESOLUTION_SCHEMA = {
     "type": "object",
     "properties": {
-        "clasificaciones": {
+        "clasificaciones": _CLASIFICACIONES,
+    },
+    "required": ["clasificaciones"],
+    "additionalProperties": False,
+}
+
+# Varios prospectos en una llamada (ver services/entity_batcher.py)
+ENTITY_BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "grupos": {
             "type": "array",
             "items": {
                 "type": "object",
                 "properties": {
-                    "indice": {"type": "integer"},
-                    "categoria": {
-                        "type": "string",
-                        "enum": ["prospecto", "empresa", "irrelevante"],
-                    },
-                    "razon": _STR,
+                    "grupo": {"type": "integer"},
+                    "clasificaciones": _CLASIFICACIONES,
                 },
-                "required": ["indice", "categoria", "razon"],
+                "required": ["grupo", "clasificaciones"],
                 "additionalProperties": False,
             },
         },
     },
-    "required": ["clasificaciones"],
+    "required": ["grupos"],
     "additionalProperties": False,
 }
 
@@ -0,0 +1,215 @@
+"""Cache persistente de veredictos de la resolución de entidades (SQLite).
+
+Re-investigar a un prospecto, o investigar a un colega de la misma empresa,
+volvía a mandar al clasificador los mismos perfiles, notas y directorios que
+ya había clasificado. Aquí se guarda el veredicto de cada item
+(prospecto/empresa/irrelevante) con clave:
+
+- alcance: identidad normalizada del prospecto (nombre + empresa) o, para
+  items de nivel empresa, solo la empresa;
+- URL canónica (services/dedup.py);
+- hash del contenido que vio el clasificador (título + snippet plegados):
+  si el snippet cambió, el item vuelve a clasificarse.
+
+Van al alcance de empresa los items de noticias y todo lo que el LLM marcó
+como "empresa": una nota sobre la empresa vale para cualquier prospecto de
+ella. Un perfil "prospecto" o "irrelevante" depende de la persona y se queda
+en el alcance del prospecto. Ambos alcances incluyen la versión del prompt
+del clasificador: al editar `entity_resolver.md` el cache arranca de cero.
+
+Solo se guardan veredictos explícitos del LLM (no los índices omitidos ni
+la heurística de fallback). Cada veredicto queda además, con el item y el
+prospecto que lo originó, en la tabla `samples`: el log de entrenamiento del
+preclasificador (services/preclassifier.py). Esa tabla no vence con el TTL:
+una vez activo el preclasificador solo llegan al LLM los candidatos ambiguos
+más una muestra de auditoría de los que decidió él (con su decisión en
+`preclassified`), y el log no se angosta a esos con el tiempo. Como la
+cola, las operaciones son cortas y bloqueantes; desde código async se llaman
+con `asyncio.to_thread`.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from scraper.base import ScrapedItem
+from scraper.matching import fold
+from scraper.singleflight import normalize_key
+from services.dedup import canonical_url
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    scope TEXT NOT NULL,
+    url TEXT NOT NULL,
+    content TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (scope, url, content)
+);
+CREATE INDEX IF NOT EXISTS idx_verdicts_created ON verdicts (created_at);
+CREATE TABLE IF NOT EXISTS samples (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    name TEXT NOT NULL,
+    company TEXT NOT NULL,
+    source TEXT NOT NULL,
+    item_url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    snippet TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    preclassified TEXT
+);
+"""
+
+_SAMPLE_COLUMNS = ("name", "company", "source", "item_url", "title", "snippet")
+
+VERDICTS = ("prospecto", "empresa", "irrelevante")
+# Fuentes cuyos items son de nivel empresa (su veredicto vale para los colegas)
+COMPANY_LEVEL_SOURCES = frozenset({"duckduckgo_news", "google_news"})
+
+
+def content_hash(item: ScrapedItem) -> str:
+    """Hash del texto que ve el clasificador: título + primeros 300 caracteres del snippet."""
+    text = fold(f"{item.title or ''}\n{(item.snippet or '').strip()[:300]}")
+    return hashlib.blake2b(" ".join(text.split()).encode(), digest_size=16).hexdigest()
+
+
+def _item_key(item: ScrapedItem) -> tuple[str, str]:
+    return canonical_url(item.url) if item.url else "", content_hash(item)
+
+
+class VerdictCache:
+    """Veredictos por (alcance, URL canónica, hash de contenido), con vencimiento."""
+
+    def __init__(self, db_path: str, ttl_seconds: float = 30 * 86400):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            if ttl_seconds > 0:
+                self._conn.execute("DELETE FROM verdicts WHERE created_at < ?", (time.time() - ttl_seconds,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def scopes(name: str, company: str, version: str = "") -> tuple[str, Optional[str]]:
+        """(alcance del prospecto, alcance de la empresa o None si no hay empresa)."""
+        name_key, company_key = normalize_key(name, company)
+        prospect = f"p|{version}|{name_key}|{company_key}"
+        return prospect, (f"c|{version}|{company_key}" if company_key else None)
+
+    def lookup(self, name: str, company: str, items: list[ScrapedItem], version: str = "") -> dict[int, str]:
+        """Veredictos vigentes de `items`, por posición (primero el del prospecto, luego el de la empresa)."""
+        prospect, company_scope = self.scopes(name, company, version)
+        keys = [_item_key(it) for it in items]
+        scopes = [s for s in (prospect, company_scope) if s]
+        urls = sorted({url for url, _ in keys})
+        if not urls:
+            return {}
+        since = time.time() - self.ttl_seconds if self.ttl_seconds > 0 else 0
+        query = (
+            f"SELECT scope, url, content, verdict FROM verdicts WHERE scope IN ({','.join('?' * len(scopes))}) "
+            f"AND url IN ({','.join('?' * len(urls))}) AND created_at >= ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, (*scopes, *urls, since)).fetchall()
+        stored = {(scope, url, content): verdict for scope, url, content, verdict in rows}
+        found: dict[int, str] = {}
+        for i, (url, content) in enumerate(keys):
+            verdict = stored.get((prospect, url, content))
+            if verdict is None and company_scope:
+                verdict = stored.get((company_scope, url, content))
+            if verdict is not None:
+                found[i] = verdict
+        return found
+
+    def store(self, name: str, company: str, verdicts: list[tuple[ScrapedItem, str]], version: str = "",
+              preclassified: Optional[dict[int, str]] = None):
+        """Guardar veredictos del LLM; los de nivel empresa quedan para los colegas del prospecto.
+
+        `preclassified`: decisión del preclasificador (keep/drop) de los
+        veredictos de auditoría, por posición en `verdicts`.
+        """
+        prospect, company_scope = self.scopes(name, company, version)
+        preclassified = preclassified or {}
+        now = time.time()
+        rows, samples = [], []
+        for i, (item, verdict) in enumerate(verdicts):
+            if verdict not in VERDICTS:
+                continue
+            company_level = verdict == "empresa" or item.source in COMPANY_LEVEL_SOURCES
+            scope = company_scope if company_level and company_scope else prospect
+            rows.append((scope, *_item_key(item), verdict, now))
+            samples.append((now, name, company, item.source, item.url or "", item.title or "", item.snippet or "",
+                            verdict, preclassified.get(i)))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO verdicts (scope, url, content, verdict, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.executemany(
+                f"INSERT INTO samples (created_at, {', '.join(_SAMPLE_COLUMNS)}, verdict, preclassified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                samples,
+            )
+
+    def samples(self) -> list[tuple[str, str, ScrapedItem, str]]:
+        """(nombre, empresa, item, veredicto) del log de entrenamiento, en orden cronológico."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, company, source, item_url, title, snippet, verdict FROM samples ORDER BY id"
+            ).fetchall()
+        return [(name, company, ScrapedItem(url, title, snippet, source), verdict)
+                for name, company, source, url, title, snippet, verdict in rows]
+
+    def audits(self) -> list[tuple[str, str]]:
+        """(decisión del preclasificador, veredicto del LLM) de la muestra de auditoría."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT preclassified, verdict FROM samples WHERE preclassified IS NOT NULL ORDER BY id"
+            ).fetchall()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+
+_cache: Optional[VerdictCache] = None
+_configured = False
+
+
+def get_verdict_cache() -> Optional[VerdictCache]:
+    """Instancia del proceso, o None si está desactivado (ENTITY_VERDICT_CACHE_PATH vacío)."""
+    global _cache, _configured
+    if not _configured:
+        from config.settings import get_settings
+
+        cfg = get_settings().entity_resolution
+        if cfg.verdict_cache_path:
+            try:
+                _cache = VerdictCache(cfg.verdict_cache_path, cfg.verdict_ttl_days * 86400)
+            except sqlite3.Error as e:
+                logger.warning("Cache de veredictos no disponible (%s): se clasifica todo con el LLM", e)
+        _configured = True
+    return _cache
+
+
+def set_verdict_cache(cache: Optional[VerdictCache]) -> Optional[VerdictCache]:
+    """Reemplazar el cache del proceso (tests, bench/); devuelve el anterior."""
+    global _cache, _configured
+    previous, _cache, _configured = _cache, cache, True
+    return previous
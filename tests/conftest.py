@@ -0,0 +1,24 @@
+import pytest
+
+from services.verdict_cache import VerdictCache
+
+
+@pytest.fixture
+def verdict_cache(monkeypatch):
+    """Cache de veredictos en memoria y vacío (desactivado por defecto: ENTITY_VERDICT_CACHE_PATH vacío)."""
+    cache = VerdictCache(":memory:")
+    monkeypatch.setattr("services.researcher.get_verdict_cache", lambda: cache)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture(autouse=True)
+def no_preclassifier(monkeypatch):
+    """Sin el modelo entrenado de data/: cada candidato va al LLM del test."""
+    monkeypatch.setattr("services.researcher.get_preclassifier", lambda: None)
+
+
+@pytest.fixture(autouse=True)
+def no_page_cache(monkeypatch):
+    """Sin el cache de páginas de data/: las páginas corporativas se piden con `_make_request`."""
+    monkeypatch.setattr("scraper.corporate_site.get_page_cache", lambda: None)
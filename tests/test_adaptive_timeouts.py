@@ -0,0 +1,88 @@
+"""Tests de los timeouts adaptativos por scraper."""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from scraper.base import ScrapedItem
+from scraper.deadline import Deadline
+from scraper.latency import AdaptiveTimeouts, parse_bounds
+from scraper.orchestrator import PERPLEXITY_TIMEOUT, WEB_SCRAPE_TIMEOUT, ScraperOrchestrator
+
+
+def test_percentil_con_margen_acotado_a_piso_y_techo():
+    timeouts = AdaptiveTimeouts(percentile=0.9, multiplier=1.5, min_samples=10,
+                                bounds={"Rapido": (2, 20), "Lento": (2, 20)})
+    assert timeouts.timeout("Rapido", 12) == 12  # sin muestras: el default
+
+    for i in range(10):
+        timeouts.observe("Rapido", 0.1 * (i + 1))
+        timeouts.observe("Lento", 30)
+        timeouts.observe("Medio", 4)
+    assert timeouts.timeout("Rapido", 12) == 2  # p90 = 0.9 s * 1.5 < piso
+    assert timeouts.timeout("Lento", 12) == 20  # techo
+    assert timeouts.timeout("Medio", 12) == 6  # sin límites propios: DEFAULT_BOUNDS
+
+
+def test_ventana_movil_olvida_latencias_viejas():
+    timeouts = AdaptiveTimeouts(percentile=1.0, multiplier=1.0, window=5, min_samples=5,
+                                bounds={"S": (1, 60)})
+    for _ in range(5):
+        timeouts.observe("S", 40)
+    assert timeouts.timeout("S", 12) == 40
+    for _ in range(5):
+        timeouts.observe("S", 3)
+    assert timeouts.timeout("S", 12) == 3
+
+
+def test_parse_bounds_ignora_entradas_invalidas():
+    assert parse_bounds("A=6:20, B=30:10,C=x:1,") == {"A": (6.0, 20.0), "B": (10.0, 30.0)}
+
+
+def test_orquestador_aplica_timeout_por_scraper():
+    orch = ScraperOrchestrator()
+    orch.timeouts = AdaptiveTimeouts(min_samples=3, bounds={"LinkedInScraper": (0.05, 0.1)})
+    for _ in range(3):
+        orch.timeouts.observe("LinkedInScraper", 0.02)
+    assert orch.timeout_for(orch.linkedin_scraper) == 0.05
+    assert orch.timeout_for(orch.google_scraper) == WEB_SCRAPE_TIMEOUT
+    assert orch.timeout_for(orch.perplexity_scraper) == PERPLEXITY_TIMEOUT
+
+    async def slow(*args):
+        await asyncio.sleep(5)
+        return []
+
+    # LinkedIn vence con su timeout aprendido; Google (más lento que eso) no se corta
+    async def google(*args):
+        await asyncio.sleep(0.2)
+        return [ScrapedItem(url="https://g.test", title="t", snippet="s", source="google")]
+
+    with patch.object(orch.linkedin_scraper, "search", slow), \
+            patch.object(orch.google_scraper, "search", google), \
+            patch.object(orch.news_scraper, "search", AsyncMock(return_value=[])), \
+            patch.object(orch.corporate_scraper, "search", AsyncMock(return_value=[])), \
+            patch.object(orch.perplexity_scraper, "search", AsyncMock(return_value=[])):
+        items = asyncio.run(orch.search_all("Ana", "Acme"))
+
+    assert [i.source for i in items] == ["google"]
+    # El vencimiento entra como observación censurada (= timeout aplicado)
+    assert list(orch.timeouts._samples["LinkedInScraper"])[-1] == 0.05
+    assert 0.2 <= list(orch.timeouts._samples["GoogleSearchScraper"])[-1] < 1
+
+
+def test_corte_por_deadline_no_es_observacion():
+    orch = ScraperOrchestrator()
+    orch.timeouts = AdaptiveTimeouts()
+
+    async def slow(*args):
+        await asyncio.sleep(5)
+        return []
+
+    with patch.object(orch.linkedin_scraper, "search", slow), \
+            patch.object(orch.google_scraper, "search", AsyncMock(return_value=[])), \
+            patch.object(orch.news_scraper, "search", AsyncMock(return_value=[])), \
+            patch.object(orch.corporate_scraper, "search", AsyncMock(return_value=[])), \
+            patch.object(orch.perplexity_scraper, "search", AsyncMock(return_value=[])):
+        asyncio.run(orch.search_all("Ana", "Acme", deadline=Deadline(0.05)))
+
+    # Vencido por el deadline (0.05 s), no por su timeout de 12 s: no achica el percentil
+    assert "LinkedInScraper" not in orch.timeouts._samples
+    assert len(orch.timeouts._samples["GoogleSearchScraper"]) == 1
@@ -0,0 +1,42 @@
+"""Smoke test del benchmark end-to-end contra el stand-in (sin latencia)."""
+from bench.bench_e2e import print_report, run_bench
+from bench.standin import Upstreams, load_corpus, load_profile
+
+
+def test_corpus_y_perfil_cubren_todos_los_upstreams():
+    corpus = load_corpus()
+    assert len(corpus) >= 50
+    assert len({p["id"] for p in corpus}) == len(corpus)
+    assert set(load_profile()) >= {"google", "ddg", "corporate", "linkedin", "perplexity", "deepseek", "anthropic"}
+
+
+def test_stand_in_clasifica_homonimos_como_irrelevantes():
+    upstreams = Upstreams(load_corpus(), {}, latency_scale=0)
+    p = next(p for p in upstreams.corpus if p["homonyms"])
+    results = upstreams.ddg("text", f'"{p["name"]}" {p["company"]} linkedin', 10)
+    assert len(results) == 1 + p["homonyms"]
+    user = "\n".join(f"[{i}] {r['title']}\n{r['body']}" for i, r in enumerate(results))
+    content = upstreams.llm_content("# Resolución de Entidades", f"Empresa: {p['company']}\n\n{user}")
+    categories = [c["categoria"] for c in __import__("json").loads(content)["clasificaciones"]]
+    assert categories[0] != "irrelevante"
+    assert set(categories[1:]) <= {"irrelevante"}
+
+
+def test_bench_e2e_sin_latencia(capsys):
+    report = run_bench(limit=3, concurrency=2, latency_scale=0, allocations=True)
+
+    assert report["prospects"] == 3 and report["errors"] == 0
+    assert {"scraping", "analysis", "email", "end_to_end"} <= set(report["stages"])
+    assert report["stages"]["end_to_end"]["n"] == 3
+    assert report["allocations"]["peak_mib"] > 0
+    print_report(report)
+    assert "end_to_end" in capsys.readouterr().out
+
+
+def test_bench_graba_y_reproduce_cassette(tmp_path):
+    cassette = str(tmp_path / "bench.json.gz")
+    recorded = run_bench(limit=2, concurrency=2, latency_scale=0, allocations=False, record=cassette)
+    replayed = run_bench(limit=2, concurrency=2, latency_scale=0, allocations=False, replay=cassette)
+
+    assert recorded["errors"] == replayed["errors"] == 0
+    assert replayed["stages"]["end_to_end"]["n"] == 2
@@ -0,0 +1,101 @@
+"""Tests de las políticas de terminación temprana del scraping."""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from scraper.base import ScrapedItem
+from scraper.completion import CompletionPolicy, Quorum, get_policy, is_validated_profile
+from scraper.latency import AdaptiveTimeouts
+from scraper.orchestrator import ScraperOrchestrator
+
+
+def _item(source, url="https://x.test", title="t", snippet="s"):
+    return ScrapedItem(url=url, title=title, snippet=snippet, source=source)
+
+
+PROFILE = _item("linkedin", "https://cl.linkedin.com/in/ana-perez", "Ana Pérez - Gerente | LinkedIn")
+
+
+def test_perfil_validado_por_nombre_completo_o_empresa():
+    assert is_validated_profile(PROFILE, "Ana Perez", "Otra")
+    assert is_validated_profile(_item("linkedin", "https://linkedin.com/in/a", "Ana López", "Acme Corp"), "Ana Perez", "Acme Corp")
+    assert not is_validated_profile(_item("linkedin", "https://linkedin.com/in/a", "Ana López"), "Ana Perez", "Acme")
+    assert not is_validated_profile(_item("linkedin", "https://linkedin.com/company/acme", "Ana Perez"), "Ana Perez", "Acme")
+
+
+def test_quorum_exige_perplexity_perfil_y_noticias():
+    quorum = Quorum(min_news=2)
+    results = {"PerplexityScraper": [_item("perplexity_persona")], "LinkedInScraper": [PROFILE]}
+    assert not quorum.satisfied(results, "Ana Perez", "Acme")
+    results["GoogleNewsScraper"] = [_item("duckduckgo_news")]
+    assert not quorum.satisfied(results, "Ana Perez", "Acme")
+    results["PerplexityScraper"].append(_item("perplexity_news"))
+    assert quorum.satisfied(results, "Ana Perez", "Acme")
+    assert not CompletionPolicy().satisfied(results, "Ana Perez", "Acme")
+
+
+def test_politica_desconocida():
+    assert get_policy().name == "complete"
+    with pytest.raises(ValueError):
+        get_policy("nope")
+
+
+def test_orquestador_cancela_lo_pendiente_al_alcanzar_el_quorum():
+    orch = ScraperOrchestrator()
+    orch.timeouts = AdaptiveTimeouts(min_samples=5)
+    for _ in range(5):
+        orch.timeouts.observe("CorporateSiteScraper", 8.0)
+    before = orch.timeouts.timeout("CorporateSiteScraper", 12)
+    cancelled = asyncio.Event()
+
+    async def slow(*args):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return [_item("corporate")]
+
+    with patch.object(orch.linkedin_scraper, "search", AsyncMock(return_value=[PROFILE])), \
+            patch.object(orch.corporate_scraper, "search", slow), \
+            patch.object(orch.google_scraper, "search", AsyncMock(return_value=[_item("google_search")])), \
+            patch.object(orch.news_scraper, "search", AsyncMock(return_value=[_item("duckduckgo_news")] * 2)), \
+            patch.object(orch.perplexity_scraper, "search", AsyncMock(return_value=[_item("perplexity_persona")])):
+
+        async def run():
+            t0 = asyncio.get_running_loop().time()
+            items = await orch.search_all("Ana Perez", "Acme", policy=get_policy("quorum"))
+            return items, asyncio.get_running_loop().time() - t0, cancelled.is_set()
+
+        items, elapsed, was_cancelled = asyncio.run(run())
+
+    assert elapsed < 2 and was_cancelled
+    # El cancelado por el quórum no se observa: lo transcurrido no es su
+    # latencia y achicaría su timeout
+    assert list(orch.timeouts._samples["CorporateSiteScraper"]) == [8.0] * 5
+    assert orch.timeouts.timeout("CorporateSiteScraper", 12) == before
+    assert [i.source for i in items] == ["linkedin", "google_search", "duckduckgo_news", "duckduckgo_news",
+                                         "perplexity_persona"]
+
+
+def test_api_valida_y_propaga_la_politica():
+    from webapp.app import app
+    from services.researcher import ResearchResult, ResearchService
+
+    client = TestClient(app)
+    body = {"name": "Ana Perez", "company": "Acme", "role": "CEO"}
+    assert client.post("/api/research/json", json={**body, "completion": "nope"}).status_code == 422
+
+    seen = {}
+
+    async def fake_investigate(self, *args, **kwargs):
+        from scraper.completion import current_policy
+        seen["policy"] = current_policy()
+        return ResearchResult()
+
+    with patch.object(ResearchService, "_investigate", fake_investigate):
+        response = client.post("/api/research/json", json={**body, "completion": "fast"})
+    assert response.status_code == 200
+    assert seen["policy"].name == "fast"
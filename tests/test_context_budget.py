@@ -0,0 +1,108 @@
+"""Tests de la compactación del contexto de análisis (presupuesto de tokens)."""
+from scraper.base import ScrapedItem
+from services.context_builder import ContextCompactor, _trim, estimate_tokens
+from services.researcher import ResearchService
+from services.verifier import Verifier, VerifiedFact
+
+# Campos que el LLM de análisis necesita encontrar en el contexto (fixture
+# caso Desert King): educación, ubicación, cargo, noticia y rubro.
+KEY_FIELDS = ("ESUCOMEX", "Valparaíso", "Jefa de Operaciones", "ampliación de planta", "quillay")
+
+_TOPICS = [
+    "planta", "exportación", "sostenibilidad", "laboratorio", "certificación",
+    "logística", "investigación", "calidad", "innovación", "comunidad",
+]
+
+
+def _corporate_page(i: int) -> ScrapedItem:
+    topic = _TOPICS[i]
+    body = " ".join(f"{topic}{j} proceso{i}x{j} detalle{i}y{j} área{i}z{j}." for j in range(40))
+    return ScrapedItem(
+        url=f"https://desertking.com/{topic}",
+        title=f"Desert King - {topic.title()}",
+        snippet=f"Desert King produce extractos de quillay y yucca. {body}"[:1500],
+        source="corporate",
+    )
+
+
+def _fixture_items() -> list[ScrapedItem]:
+    items = [_corporate_page(i) for i in range(5)]
+    items += [
+        ScrapedItem(url="https://cl.linkedin.com/in/nadia-rl", title="Nadia Ramirez Lara - Jefa de Operaciones - Desert King",
+                    snippet="Instituto Profesional ESUCOMEX. Ubicación: Valparaíso", source="linkedin"),
+        ScrapedItem(url="https://www.portalminero.com/dk", title="Desert King anuncia ampliación de planta",
+                    snippet="Desert King anuncia ampliación de planta en Quillota con inversión de USD 20M", source="duckduckgo_news"),
+        ScrapedItem(url="", title="Nadia - perfil", snippet="Cargo: Jefa de Operaciones. Empresa: Desert King",
+                    source="perplexity_persona"),
+    ]
+    # Resultados de buscador con ruido variado (no relacionados entre sí)
+    for i in range(12):
+        items.append(ScrapedItem(
+            url=f"https://directorio{i}.cl/desert-king",
+            title=f"Ficha {i} Desert King",
+            snippet=f"Registro{i} comercial{i} rubro{i} teléfono{i} dirección{i} código{i} giro{i} patente{i}",
+            source="duckduckgo",
+        ))
+    return items
+
+
+def _context(service: ResearchService, facts) -> str:
+    return service._build_llm_context("Nadia Ramirez Lara", "Desert King", "", facts, "", "")
+
+
+def _service(budget: int, corporate_chars: int) -> ResearchService:
+    svc = ResearchService.__new__(ResearchService)
+    svc.compactor = ContextCompactor(budget, corporate_chars)
+    return svc
+
+
+class TestFixtureCompaction:
+    def test_prompt_mas_chico_sin_perder_campos(self):
+        facts = Verifier().verify(_fixture_items())
+        unbounded = _context(_service(10**9, 10**9), facts)
+        compact = _context(_service(900, 400), facts)
+
+        assert estimate_tokens(compact) < 0.6 * estimate_tokens(unbounded)
+        for field in KEY_FIELDS:
+            assert field in unbounded
+            assert field in compact, f"{field} perdido al compactar"
+
+
+class TestContextCompactor:
+    def _fact(self, content, sources=("https://a.com",), names=("duckduckgo",), confidence="partial"):
+        return VerifiedFact(content=content, sources=list(sources), source_names=list(names), confidence=confidence)
+
+    def test_descarta_discarded_y_duplicados(self):
+        a = self._fact("Desert King produce extractos de quillay para bebidas en Chile")
+        dup = self._fact("Desert King produce extractos de quillay para bebidas", sources=("https://b.com",))
+        gone = self._fact("Otra cosa sin fuente", sources=(), confidence="discarded")
+        assert ContextCompactor().compact([a, dup, gone]) == [a]
+
+    def test_verified_antes_que_partial(self):
+        partial = self._fact("Dato parcial sobre planta de cobre en Antofagasta")
+        verified = self._fact("Dato verificado sobre nueva gerencia comercial", sources=("https://x.com", "https://y.com"),
+                              names=("google_news", "duckduckgo"), confidence="verified")
+        assert ContextCompactor().compact([partial, verified])[0] is verified
+
+    def test_respeta_presupuesto(self):
+        facts = [self._fact(f"Hecho número {i} " + "palabra " * 50, sources=(f"https://s{i}.com",)) for i in range(20)]
+        compactor = ContextCompactor(token_budget=300)
+        selected = compactor.compact(facts)
+        assert 0 < len(selected) < 20
+        assert sum(compactor.fact_tokens(f) for f in selected) <= 300
+
+    def test_corporativo_largo_se_recorta(self):
+        fact = self._fact("Frase corporativa. " * 200, names=("corporate",))
+        (trimmed,) = ContextCompactor(corporate_max_chars=300).compact([fact])
+        assert len(trimmed.content) <= 302
+        assert len(fact.content) > 3000  # el original no se muta
+
+
+def test_trim_corta_en_oracion():
+    assert _trim("Primera oración larga aquí. Segunda oración", 35) == "Primera oración larga aquí. …"
+    assert _trim("corto", 50) == "corto"
+
+
+def test_estimate_tokens_orden_de_magnitud():
+    text = "Desert King anuncia ampliación de su planta de Quillota, Chile."
+    assert 10 <= estimate_tokens(text) <= 20
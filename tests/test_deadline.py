@@ -0,0 +1,140 @@
+"""Tests del deadline de request propagado por el pipeline."""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from scraper.deadline import Deadline, DeadlineExceeded, budget, current_deadline, use_deadline
+from scraper.google_search import GoogleSearchScraper
+from scraper.orchestrator import ScraperOrchestrator
+from services.llm_client import LLMClient, LLMResponse, LLMUsage
+from services.researcher import ResearchResult, ResearchService
+
+
+def test_deadline_reserva_y_budget():
+    deadline = Deadline(10)
+    assert 9 < deadline.remaining() <= 10 and not deadline.expired
+    assert 4 < deadline.reserve(5).remaining() <= 5
+    assert deadline.reserve(20).expired
+    # Con tope proporcional un deadline corto se reparte en vez de vencer
+    assert 5 < deadline.reserve(25, 0.4).remaining() <= 6
+    assert 4 < deadline.reserve(5, 0.9).remaining() <= 5
+
+    assert budget(8) == 8  # sin deadline activo: el cap
+    with use_deadline(Deadline(2)):
+        assert budget(8) <= 2
+        assert budget(1) == 1
+    assert current_deadline() is None
+
+    with pytest.raises(DeadlineExceeded):
+        Deadline(0).check("analizar")
+
+
+def test_make_request_no_sale_sin_tiempo():
+    scraper = GoogleSearchScraper()
+    with patch("scraper.base.get_transport") as transport:
+        async def run():
+            with use_deadline(Deadline(0)):
+                return await scraper._make_request("https://www.google.com/search")
+        assert asyncio.run(run()) is None
+    transport.assert_not_called()
+
+
+def test_ddg_con_plazo_vencido_retiene_el_lock_hasta_que_termina_el_thread(monkeypatch):
+    release = threading.Event()
+    active, peak = [0], [0]
+
+    def ddg(kind, query, max_results):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        if query == "lenta":
+            release.wait(5)
+        active[0] -= 1
+        return [{"title": query}]
+
+    monkeypatch.setattr("scraper.base.get_transport", lambda: SimpleNamespace(ddg=ddg))
+    scraper = GoogleSearchScraper()
+
+    async def run():
+        with use_deadline(Deadline(0.2)):
+            slow = await scraper._ddg_text_search("lenta")
+        fast = asyncio.create_task(scraper._ddg_text_search("rápida"))
+        await asyncio.sleep(0.1)
+        assert not fast.done()  # esperando a que el thread de "lenta" termine
+        release.set()
+        return slow, await fast
+
+    assert asyncio.run(run()) == ([], [{"title": "rápida"}])
+    assert peak[0] == 1
+
+def test_llm_acota_timeout_y_no_llama_si_vencio():
+    client = LLMClient()
+    usage = LLMUsage(input_tokens=10, output_tokens=5)
+    call = AsyncMock(return_value=LLMResponse(content="{}", model_used="deepseek-chat", fallback=False, usage=usage))
+    with patch.object(client.settings.llm, "deepseek_api_key", "k"), patch.object(client, "_call_deepseek", call):
+        asyncio.run(client.complete("S", "U", deadline=Deadline(5)))
+        assert call.call_args.args[3] <= 5
+
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(client.complete("S", "U", deadline=Deadline(0)))
+    assert call.await_count == 1
+
+
+def test_orquestador_corta_al_deadline_y_los_scrapers_lo_heredan():
+    orch = ScraperOrchestrator()
+    seen = []
+
+    async def slow(*args):
+        seen.append(current_deadline())
+        await asyncio.sleep(5)
+        return []
+
+    deadline = Deadline(0.2)
+    with patch.object(orch.google_scraper, "search", slow), \
+            patch.object(orch.linkedin_scraper, "search", slow), \
+            patch.object(orch.news_scraper, "search", AsyncMock(return_value=[])), \
+            patch.object(orch.corporate_scraper, "search", AsyncMock(return_value=[])), \
+            patch.object(orch.perplexity_scraper, "search", slow):
+        t0 = time.perf_counter()
+        items = asyncio.run(orch.search_all("Ana", "Acme", deadline=deadline))
+        elapsed = time.perf_counter() - t0
+
+    assert items == [] and elapsed < 1.5
+    assert seen and all(d is deadline for d in seen)
+
+
+def test_investigate_activa_deadline_por_defecto():
+    seen = []
+
+    async def pipeline(self, name, company, role="", location=""):
+        seen.append(current_deadline())
+        return ResearchResult(score=50)
+
+    service = ResearchService.__new__(ResearchService)
+    with patch.object(ResearchService, "_investigate", pipeline):
+        asyncio.run(service.investigate("Ana", "Acme Deadline"))
+        explicit = Deadline(7)
+        asyncio.run(service.investigate("Ana", "Acme Deadline 2", deadline=explicit))
+
+    assert 80 < seen[0].remaining() <= 90
+    assert seen[1] is explicit
+
+
+def test_api_acepta_deadline_del_cliente_con_tope():
+    from webapp.app import app
+
+    investigate = AsyncMock(return_value=ResearchResult(score=10))
+    client = TestClient(app)
+    with patch.object(ResearchService, "investigate", investigate):
+        client.post("/api/research/json", json={"name": "ana", "company": "Acme", "role": "CFO", "deadline_seconds": 20})
+        client.post("/api/research/json", json={"name": "ana", "company": "Acme", "role": "CFO", "deadline_seconds": 9999})
+        bad = client.post("/api/research/json", json={"name": "ana", "company": "Acme", "role": "CFO", "deadline_seconds": -1})
+
+    first, second = (c.kwargs["deadline"] for c in investigate.call_args_list)
+    assert 19 < first.remaining() <= 20
+    assert 290 < second.remaining() <= 300
+    assert bad.status_code == 422
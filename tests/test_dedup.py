@@ -0,0 +1,79 @@
+"""Tests del colapso de casi duplicados antes de la resolución de entidades."""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from scraper.base import ScrapedItem
+from services.dedup import canonical_url, collapse_candidates, hamming, simhash
+from services.researcher import ResearchService
+
+NEWS = "Desert King anuncia nueva planta de extractos de quillay en Copiapó"
+
+
+def _item(url: str, title: str, snippet: str = "", source: str = "duckduckgo") -> ScrapedItem:
+    return ScrapedItem(url=url, title=title, snippet=snippet, source=source)
+
+
+def test_url_canonica():
+    assert canonical_url("https://cl.linkedin.com/in/Nadia-RL/?trk=public_profile") == "linkedin.com/in/nadia-rl"
+    assert canonical_url("http://www.linkedin.com/in/nadia-rl") == "linkedin.com/in/nadia-rl"
+    assert (canonical_url("https://www.df.cl/nota?utm_source=x&id=7&gclid=abc#top")
+            == canonical_url("https://df.cl/nota/?id=7"))
+    assert canonical_url("https://df.cl/nota?id=7") != canonical_url("https://df.cl/nota?id=8")
+
+
+def test_simhash_cercano_para_copias():
+    assert hamming(simhash(NEWS), simhash(NEWS + " - Diario Financiero")) <= 12
+    assert hamming(simhash(NEWS), simhash("Codelco adjudica contrato de transporte a Sitrans por US$ 30 millones")) > 12
+
+
+def test_colapsa_variantes_de_url_y_texto_con_fuentes_fusionadas():
+    items = [
+        _item("https://cl.linkedin.com/in/nadia-rl", "Nadia Ramirez Lara - Gerente", source="linkedin"),
+        _item("https://www.google.com/url?q=1", NEWS, source="google_news"),
+        _item("https://www.linkedin.com/in/nadia-rl/?trk=x", "Nadia Ramirez Lara - Gerente - Desert King"),
+        _item("https://df.cl/nota", NEWS + " - Diario Financiero", "La planta producirá extractos", "duckduckgo_news"),
+    ]
+    groups = collapse_candidates(items)
+    assert len(groups) == 2
+    profile, news = groups
+    assert profile.sources == ["linkedin", "duckduckgo"]
+    assert profile.item is items[2]  # el miembro con más texto
+    assert news.sources == ["google_news", "duckduckgo_news"]
+    assert news.item is items[3]
+
+
+def test_no_colapsa_contenidos_distintos():
+    items = [
+        _item("https://a.cl/1", "Codelco adjudica contrato de mantención a Faymex por US$ 12 millones"),
+        _item("https://b.cl/2", "Codelco adjudica contrato de transporte a Sitrans por US$ 30 millones"),
+        # Homónimos con headline casi igual: perfiles distintos nunca se agrupan por texto
+        _item("https://cl.linkedin.com/in/a", "Nadia Ramirez Lara - Gerente de Operaciones en Chile", source="linkedin"),
+        _item("https://mx.linkedin.com/in/b", "Nadia Ramirez Lara - Gerente de Operaciones en México", source="linkedin"),
+    ]
+    assert len(collapse_candidates(items)) == 4
+    # Solo por URL
+    dup = [_item("https://a.cl/1", NEWS), _item("https://b.cl/2", NEWS)]
+    assert len(collapse_candidates(dup)) == 1
+    assert len(collapse_candidates(dup, max_distance=-1)) == 2
+
+
+def test_resolucion_clasifica_un_candidato_por_grupo_y_aplica_el_veredicto_a_las_copias():
+    items = [
+        _item("https://cl.linkedin.com/in/nadia-rl", "Nadia Ramirez Lara - Gerente - Desert King", source="linkedin"),
+        _item("https://df.cl/otra?utm_source=tw", "Otra Nadia Ramirez en California", source="google_news"),
+        _item("https://www.linkedin.com/in/nadia-rl/", "Nadia Ramirez Lara - Gerente"),
+        _item("https://www.df.cl/otra", "Otra Nadia Ramirez en California", source="duckduckgo_news"),
+    ]
+    svc = ResearchService.__new__(ResearchService)
+    content = json.dumps({"clasificaciones": [
+        {"indice": 0, "categoria": "prospecto", "razon": "t"},
+        {"indice": 1, "categoria": "irrelevante", "razon": "t"},
+    ]})
+    svc.llm = SimpleNamespace(complete=AsyncMock(return_value=SimpleNamespace(content=content, model_used="mock")))
+    result = asyncio.run(svc._resolve_entities("Nadia Ramirez Lara", "Desert King", "", "", items))
+    assert result == [items[0], items[2]]
+    prompt = svc.llm.complete.call_args.args[1]
+    assert "[1] fuente=google_news+duckduckgo_news" in prompt
+    assert "[2]" not in prompt
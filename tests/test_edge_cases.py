@@ -239,7 +239,7 @@ async def test_corporate_discovers_domain_and_internal_links():
     """El corporate scraper debe adivinar el dominio y seguir links internos de la homepage."""
     scraper = CorporateSiteScraper()
 
-    async def mock_request(url, params=None):
+    async def mock_request(url, params=None, max_bytes=None):
         if "sobre-nosotros" in url:
             return MOCK_CORPORATE_ABOUT
         elif "faymex.cl" in url:
@@ -633,6 +633,21 @@ async def test_perplexity_no_api_key_returns_empty():
     assert results == [], f"Esperado [], obtuve {results}"
 
 
+def _sse_stream(api_response: dict):
+    """Reemplazo de Transport._stream: el contenido de `api_response` en chunks SSE."""
+    content = api_response["choices"][0]["message"]["content"]
+    citations = api_response.get("citations", [])
+
+    async def fake_stream(self, client, method, url, **kwargs):
+        for i in range(0, len(content), 40):
+            chunk = {"choices": [{"delta": {"content": content[i:i + 40]}}], "citations": citations}
+            yield f"data: {json.dumps(chunk)}"
+            yield ""
+        yield "data: [DONE]"
+
+    return fake_stream
+
+
 # =============================================================================
 # TEST 21: Perplexity scraper parsea respuesta exitosa en ScrapedItems
 # =============================================================================
@@ -676,12 +691,8 @@ async def test_perplexity_successful_response():
         }]
     }
 
-    mock_response = MagicMock()
-    mock_response.json.return_value = mock_api_response
-    mock_response.raise_for_status = MagicMock()
-
     with patch.object(scraper.settings, "perplexity_api_key", "pplx-test-key"), \
-         patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=mock_response):
+         patch("scraper.transport.Transport._stream", _sse_stream(mock_api_response)):
         results = await scraper.search("Henry Zabala Sarmiento", "Copec", role="Gerente de Operaciones")
 
     # Solo persona + empresa (hallazgos/noticias se ignoran por riesgo de alucinación)
@@ -712,9 +723,12 @@ async def test_perplexity_api_error_returns_empty():
     """Si la API de Perplexity falla, debe retornar [] sin crashear."""
     scraper = PerplexityScraper()
 
+    async def failing_stream(self, client, method, url, **kwargs):
+        raise httpx.HTTPStatusError("Server Error", request=MagicMock(), response=MagicMock(status_code=500))
+        yield
+
     with patch.object(scraper.settings, "perplexity_api_key", "pplx-test-key"), \
-         patch("httpx.AsyncClient.post", new_callable=AsyncMock, side_effect=httpx.HTTPStatusError(
-             "Server Error", request=MagicMock(), response=MagicMock(status_code=500))):
+         patch("scraper.transport.Transport._stream", failing_stream):
         results = await scraper.search("Test User", "TestCo")
 
     assert results == [], f"Esperado [] tras error de API, obtuve {results}"
@@ -736,12 +750,8 @@ async def test_perplexity_invalid_json_returns_empty():
         }]
     }
 
-    mock_response = MagicMock()
-    mock_response.json.return_value = mock_api_response
-    mock_response.raise_for_status = MagicMock()
-
     with patch.object(scraper.settings, "perplexity_api_key", "pplx-test-key"), \
-         patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=mock_response):
+         patch("scraper.transport.Transport._stream", _sse_stream(mock_api_response)):
         results = await scraper.search("Test User", "TestCo")
 
     assert results == [], f"Esperado [] para JSON inválido, obtuve {results}"
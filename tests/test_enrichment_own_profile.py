@@ -5,6 +5,7 @@ ubicación. El item del LinkedIn scraper viene de una búsqueda ya acotada por
 empresa, así que basta el nombre completo para conservarlo."""
 
 from scraper.base import ScrapedItem
+from scraper.matching import prospect_matcher
 from services.researcher import ResearchService, ResearchResult
 
 
@@ -18,25 +19,23 @@ def _nadia_item(source="linkedin"):
     )
 
 
+def _full_name(text: str, name: str) -> bool:
+    return prospect_matcher(name, "").mentions_full_name(text)
+
+
 class TestTextMentionsFullName:
     def test_nombre_completo_presente(self):
-        assert ResearchService._text_mentions_full_name(
-            "nadia ramirez lara - ingeniera industrial", "nadia ramirez lara"
-        )
+        assert _full_name("nadia ramirez lara - ingeniera industrial", "nadia ramirez lara")
 
     def test_nombre_incompleto_no_matchea(self):
         # Solo apellido coincide → homónimo potencial, no aceptar
-        assert not ResearchService._text_mentions_full_name(
-            "miguel ramirez - supervisor de producción - eaton", "nadia ramirez lara"
-        )
+        assert not _full_name("miguel ramirez - supervisor de producción - eaton", "nadia ramirez lara")
 
     def test_orden_distinto_si_matchea(self):
-        assert ResearchService._text_mentions_full_name(
-            "perfil de lara, nadia ramirez en linkedin", "nadia ramirez lara"
-        )
+        assert _full_name("perfil de lara, nadia ramirez en linkedin", "nadia ramirez lara")
 
     def test_nombre_vacio_no_matchea(self):
-        assert not ResearchService._text_mentions_full_name("cualquier texto", "")
+        assert not _full_name("cualquier texto", "")
 
 
 class TestEnrichmentOwnProfile:
@@ -75,8 +74,7 @@ class TestIsRelevantItem:
     """Regresión caso Nadia de California: items de homónimos llegaban al LLM
     como hechos y contaminaban educación/ubicación del prospecto real."""
 
-    def _svc(self):
-        return ResearchService.__new__(ResearchService)
+    matcher = prospect_matcher("nadia ramirez lara", "desert king")
 
     def test_homonimo_linkedin_excluido_del_analisis(self):
         # El caso real: perfil de otra Nadia Ramirez (sin 'Lara', sin empresa)
@@ -86,10 +84,10 @@ class TestIsRelevantItem:
             snippet="California State Polytechnic University-Pomona · San Jose",
             source="linkedin",
         )
-        assert not self._svc()._is_relevant_item(it, "nadia ramirez lara", "desert king")
+        assert not self.matcher.is_relevant(it)
 
     def test_perfil_propio_con_nombre_completo_pasa(self):
-        assert self._svc()._is_relevant_item(_nadia_item(), "nadia ramirez lara", "desert king")
+        assert self.matcher.is_relevant(_nadia_item())
 
     def test_item_que_menciona_empresa_pasa(self):
         it = ScrapedItem(
@@ -98,7 +96,7 @@ class TestIsRelevantItem:
             snippet="Nadia lidera el equipo de producción",
             source="duckduckgo",
         )
-        assert self._svc()._is_relevant_item(it, "nadia ramirez lara", "desert king")
+        assert self.matcher.is_relevant(it)
 
     def test_noticia_irrelevante_excluida(self):
         it = ScrapedItem(
@@ -107,12 +105,12 @@ class TestIsRelevantItem:
             snippet="Producción de cobre sube en el norte",
             source="google_news",
         )
-        assert not self._svc()._is_relevant_item(it, "nadia ramirez lara", "desert king")
+        assert not self.matcher.is_relevant(it)
 
     def test_corporate_y_perplexity_pasan_siempre(self):
         for source in ("corporate", "perplexity_persona", "perplexity_empresa"):
             it = ScrapedItem(url="https://x.com", title="t", snippet="s", source=source)
-            assert self._svc()._is_relevant_item(it, "nadia ramirez lara", "desert king")
+            assert self.matcher.is_relevant(it)
 
 
 class TestPerplexityHomonymGate:
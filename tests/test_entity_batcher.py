@@ -0,0 +1,142 @@
+"""Tests de la resolución de entidades en lote entre investigaciones concurrentes."""
+import asyncio
+import json
+import re
+import time
+from types import SimpleNamespace
+
+from scraper.base import ScrapedItem
+from services import entity_batcher
+from services.entity_batcher import EntityBatcher
+from services.researcher import ResearchService
+from services.schemas import ENTITY_BATCH_SCHEMA
+
+
+class FakeLLM:
+    """Clasifica 'irrelevante' lo que diga 'homónimo'; responde en el formato del esquema pedido."""
+
+    def __init__(self, drop_group=None, fail=False):
+        self.calls = []
+        self.drop_group = drop_group
+        self.fail = fail
+
+    async def complete(self, system, user, json_schema=None):
+        self.calls.append((system, user, json_schema))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("LLM caído")
+
+        def classify(text):
+            out = []
+            for m in re.finditer(r"^\[(\d+)\] .*\n(?:    .*\n)*", text + "\n", re.M):
+                out.append({"indice": int(m.group(1)), "razon": "t",
+                            "categoria": "irrelevante" if "homónimo" in m.group(0) else "prospecto"})
+            return out
+
+        if json_schema is ENTITY_BATCH_SCHEMA:
+            parts = re.split(r"\n# Grupo (\d+)\n", user)
+            groups = [{"grupo": int(n), "clasificaciones": classify(t)} for n, t in zip(parts[1::2], parts[2::2])
+                      if int(n) != self.drop_group]
+            return SimpleNamespace(content=json.dumps({"grupos": groups}), model_used="fake")
+        return SimpleNamespace(content=json.dumps({"clasificaciones": classify(user)}), model_used="fake")
+
+
+def _block(company, *titles):
+    lines = ["## Prospecto", f"- Empresa: {company}", ""]
+    for i, t in enumerate(titles):
+        lines += [f"[{i}] fuente=duckduckgo url=https://x/{i}", f"    título: {t}", ""]
+    return lines
+
+
+def _classify(batcher, llm, company, *titles):
+    return batcher.classify(llm, "SYSTEM", _block(company, *titles), len(titles), json.loads)
+
+
+def test_agrupa_investigaciones_concurrentes_en_una_llamada():
+    llm = FakeLLM()
+    batcher = EntityBatcher(window_seconds=0.05)
+
+    async def run():
+        return await asyncio.gather(
+            _classify(batcher, llm, "Acme", "Ana en Acme", "Ana homónimo"),
+            _classify(batcher, llm, "Faymex", "Luis en Faymex"),
+        )
+
+    a, b = asyncio.run(run())
+    assert len(llm.calls) == 1
+    system, user, schema = llm.calls[0]
+    assert schema is ENTITY_BATCH_SCHEMA and "Modo lote" in system
+    assert "# Grupo 1" in user and "# Grupo 2" in user
+    assert [c["categoria"] for c in a["clasificaciones"]] == ["prospecto", "irrelevante"]
+    assert [c["categoria"] for c in b["clasificaciones"]] == ["prospecto"]
+
+
+def test_solo_en_la_ventana_usa_el_prompt_de_siempre():
+    llm = FakeLLM()
+    batcher = EntityBatcher(window_seconds=0.01)
+    result = asyncio.run(_classify(batcher, llm, "Acme", "Ana en Acme"))
+    assert len(llm.calls) == 1
+    _, user, schema = llm.calls[0]
+    assert schema is not ENTITY_BATCH_SCHEMA
+    assert "# Grupo" not in user and "Clasifica cada índice de [0] a [0]" in user
+    assert result["clasificaciones"][0]["categoria"] == "prospecto"
+
+
+def test_limite_de_prospectos_manda_sin_esperar_la_ventana():
+    llm = FakeLLM()
+    batcher = EntityBatcher(window_seconds=10, max_prospects=2)
+
+    async def run():
+        t0 = time.monotonic()
+        await asyncio.gather(_classify(batcher, llm, "Acme", "a"), _classify(batcher, llm, "Faymex", "b"))
+        return time.monotonic() - t0
+
+    assert asyncio.run(run()) < 1
+    assert len(llm.calls) == 1
+
+
+def test_limite_de_candidatos_parte_el_lote():
+    llm = FakeLLM()
+    batcher = EntityBatcher(window_seconds=0.01, max_candidates=3)
+
+    async def run():
+        await asyncio.gather(_classify(batcher, llm, "Acme", "a", "b"), _classify(batcher, llm, "Faymex", "c", "d"))
+
+    asyncio.run(run())
+    assert len(llm.calls) == 2
+
+
+def test_grupo_sin_respuesta_y_fallas():
+    batcher = EntityBatcher(window_seconds=0.01)
+
+    async def run(llm):
+        return await asyncio.gather(_classify(batcher, llm, "Acme", "a"), _classify(batcher, llm, "Faymex", "b"),
+                                    return_exceptions=True)
+
+    a, b = asyncio.run(run(FakeLLM(drop_group=2)))
+    assert a["clasificaciones"] and b is None
+    errors = asyncio.run(run(FakeLLM(fail=True)))
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+
+def test_researcher_en_modo_lote(monkeypatch):
+    llm = FakeLLM()
+    batcher = EntityBatcher(window_seconds=0.05)
+    monkeypatch.setattr("services.researcher.get_entity_batcher", lambda: batcher)
+    svc = ResearchService.__new__(ResearchService)
+    svc.llm = llm
+    acme = [ScrapedItem("https://a.cl/1", "Ana Soto en Acme", "", "duckduckgo"),
+            ScrapedItem("https://b.cl/2", "Ana Soto homónimo en Texas", "", "duckduckgo")]
+    faymex = [ScrapedItem("https://c.cl/3", "Luis Mora en Faymex", "", "google_news")]
+
+    async def run():
+        return await asyncio.gather(svc._resolve_entities("Ana Soto", "Acme", "", "", acme),
+                                    svc._resolve_entities("Luis Mora", "Faymex", "", "", faymex))
+
+    kept_acme, kept_faymex = asyncio.run(run())
+    assert len(llm.calls) == 1
+    assert kept_acme == acme[:1] and kept_faymex == faymex
+
+
+def test_desactivado_por_defecto():
+    assert entity_batcher.get_entity_batcher() is None
@@ -2,7 +2,7 @@
 
 Capa primaria contra contaminación por homónimos: clasifica cada resultado de
 búsqueda en prospecto/empresa/irrelevante antes del análisis. Con fallback a la
-heurística `_is_relevant_item` si la llamada LLM falla o no parsea.
+heurística `ProspectMatcher.is_relevant` si la llamada LLM falla o no parsea.
 """
 import asyncio
 import json
@@ -0,0 +1,39 @@
+"""Tests del motor de extracción de campos desde snippets de LinkedIn."""
+from bench.bench_extraction import build_cases, check
+from services.extraction import extract_education, extract_location, extract_profile_fields, scan_markers
+from services.researcher import ResearchService
+
+
+def test_salidas_identicas_a_la_implementacion_anterior():
+    assert check(build_cases()) > 200
+
+
+def test_marcadores_sin_distinguir_mayusculas():
+    markers = scan_markers("INGENIERO CIVIL · Ubicación: VALPARAÍSO")
+    assert {"edu_degree", "loc_label", "loc_city"} <= markers
+    assert "tray_label" not in markers
+    assert scan_markers("") == frozenset()
+
+
+def test_texto_sin_marcadores_no_extrae():
+    text = "Gerente General en Minera Norte · 500+ contactos"
+    assert scan_markers(text) == frozenset()
+    assert extract_education(text) == ""
+    assert extract_location(text) == ""
+
+
+def test_campos_del_perfil():
+    fields = extract_profile_fields(
+        ["Ana Soto - Gerente de Operaciones - Minera Norte | LinkedIn Educación: Universidad de Chile · "
+         "Ubicación: Antofagasta, Chile · 500+ contactos"],
+        "Ana Soto",
+    )
+    assert fields.educacion.startswith("Universidad de Chile")
+    assert fields.ubicacion == "Antofagasta, Chile"
+    assert fields.trayectoria.startswith("Gerente de Operaciones")
+
+
+def test_wrappers_del_researcher():
+    text = "Ubicación: Valparaíso 172 contactos | MBA UC"
+    assert ResearchService._extract_location(text) == "Valparaíso"
+    assert ResearchService._extract_education(text) == extract_education(text)
@@ -0,0 +1,195 @@
+"""Tests de la cola persistente de investigaciones y su pool de workers."""
+import asyncio
+import time
+
+from services.job_queue import JobQueue, WorkerPool
+
+
+def _queue(tmp_path, **kwargs) -> JobQueue:
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), **kwargs)
+
+
+class TestJobQueue:
+    def test_submit_claim_complete(self, tmp_path):
+        q = _queue(tmp_path)
+        job_id = q.submit("research", {"name": "Ana"})
+        assert q.get(job_id).status == "queued"
+
+        job = q.claim("w1")
+        assert job.id == job_id and job.status == "running" and job.attempts == 1
+        assert q.claim("w2") is None
+
+        assert q.complete(job_id, "w1", {"ok": True})
+        done = q.get(job_id)
+        assert done.status == "done" and done.result == {"ok": True} and done.finished
+
+    def test_orden_fifo_y_posicion(self, tmp_path):
+        q = _queue(tmp_path)
+        ids = [q.submit("research", {"i": i}) for i in range(3)]
+        assert [q.position(i) for i in ids] == [0, 1, 2]
+        assert q.claim("w").id == ids[0]
+
+    def test_persistente_entre_instancias(self, tmp_path):
+        job_id = _queue(tmp_path).submit("research", {"name": "Ana"})
+        assert _queue(tmp_path).get(job_id).payload == {"name": "Ana"}
+
+    def test_lease_vencido_se_retoma(self, tmp_path):
+        q = _queue(tmp_path, lease_seconds=0)
+        job_id = q.submit("research", {})
+        q.claim("muerto")
+        time.sleep(0.01)
+        job = q.claim("vivo")
+        assert job.id == job_id and job.attempts == 2
+        # El worker original ya no puede cerrar el job
+        assert not q.complete(job_id, "muerto", {})
+        assert q.complete(job_id, "vivo", {})
+
+    def test_agota_intentos(self, tmp_path):
+        q = _queue(tmp_path, lease_seconds=0, max_attempts=1)
+        job_id = q.submit("research", {})
+        q.claim("w1")
+        time.sleep(0.01)
+        assert q.claim("w2") is None
+        assert q.get(job_id).status == "failed"
+
+    def test_cancelar(self, tmp_path):
+        q = _queue(tmp_path)
+        job_id = q.submit("research", {})
+        assert q.cancel(job_id)
+        assert q.claim("w") is None
+        assert not q.cancel(job_id)
+
+    def test_purge_solo_terminados_y_viejos(self, tmp_path):
+        q = _queue(tmp_path)
+        done, cancelled, queued = (q.submit("research", {}) for _ in range(3))
+        q.claim("w")
+        q.complete(done, "w", {"ok": True})
+        q.cancel(cancelled)
+        assert q.purge(time.time() - 60) == 0
+        assert q.purge(time.time() + 1) == 2
+        assert q.get(done) is None and q.get(cancelled) is None
+        assert q.get(queued).status == "queued"
+
+
+class TestWorkerPool:
+    def _run(self, q, handlers, until):
+        async def main():
+            pool = WorkerPool(q, handlers, concurrency=2, poll_interval=0.01)
+            pool.start()
+            for _ in range(300):
+                if until():
+                    break
+                await asyncio.sleep(0.01)
+            await pool.stop()
+        asyncio.run(main())
+
+    def test_ejecuta_jobs_y_guarda_error(self, tmp_path):
+        q = _queue(tmp_path)
+
+        async def handler(payload):
+            if payload.get("boom"):
+                raise RuntimeError("falló scraping")
+            return {"echo": payload["x"]}
+
+        ok = q.submit("research", {"x": 1})
+        bad = q.submit("research", {"boom": True})
+        unknown = q.submit("otro", {})
+        self._run(q, {"research": handler}, lambda: all(q.get(j).finished for j in (ok, bad, unknown)))
+
+        assert q.get(ok).result == {"echo": 1}
+        assert q.get(bad).status == "failed" and "falló scraping" in q.get(bad).error
+        assert q.get(unknown).status == "failed"
+
+    def test_pool_purga_jobs_terminados(self, tmp_path):
+        q = _queue(tmp_path)
+        old = q.submit("research", {})
+        q.cancel(old)
+        q._conn.execute("UPDATE jobs SET finished_at = ?", (time.time() - 7200,))
+
+        async def main():
+            pool = WorkerPool(q, {}, concurrency=0, retention_seconds=3600)
+            pool.start()
+            for _ in range(100):
+                if q.get(old) is None:
+                    break
+                await asyncio.sleep(0.01)
+            await pool.stop()
+
+        asyncio.run(main())
+        assert q.get(old) is None
+
+    def test_cancelacion_detiene_handler(self, tmp_path):
+        q = _queue(tmp_path, lease_seconds=1)
+        started, interrupted = [], []
+
+        async def slow(payload):
+            started.append(True)
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                interrupted.append(True)
+                raise
+            return {}
+
+        job_id = q.submit("research", {})
+
+        def cancel_when_started():
+            if started and q.get(job_id).status == "running":
+                q.cancel(job_id)
+            return bool(interrupted)
+
+        t0 = time.monotonic()
+        self._run(q, {"research": slow}, cancel_when_started)
+        assert interrupted and q.get(job_id).status == "cancelled"
+        assert time.monotonic() - t0 < 5
+
+
+class TestResearchJobEndpoints:
+    def _client(self, tmp_path, monkeypatch):
+        from fastapi.testclient import TestClient
+        import services.job_queue as job_queue
+        from webapp.app import app
+
+        q = _queue(tmp_path)
+        monkeypatch.setattr(job_queue, "_queue", q)
+        return TestClient(app), q  # sin lifespan: ningún worker consume la cola
+
+    def test_formulario_encola_y_devuelve_polling(self, tmp_path, monkeypatch):
+        client, q = self._client(tmp_path, monkeypatch)
+        resp = client.post("/api/research", data={"name": "ana perez", "company": "Acme", "role": "CFO"})
+        assert resp.status_code == 200
+        assert 'id="research-job"' in resp.text and "hx-get" in resp.text
+        job = q.claim("w")
+        assert job.payload["name"] == "Ana Perez" and job.payload["generate_email"]
+
+    def test_api_json_y_resultado_html(self, tmp_path, monkeypatch):
+        client, q = self._client(tmp_path, monkeypatch)
+        resp = client.post("/api/research/jobs", json={"name": "Ana", "company": "Acme", "role": "CFO"})
+        assert resp.status_code == 202
+        job_id = resp.json()["job_id"]
+        assert client.get(f"/api/research/jobs/{job_id}").json()["status"] == "queued"
+
+        q.claim("w")
+        q.complete(job_id, "w", {"research": {"score": 0, "error": "Sin datos"}, "email": None})
+        html = client.get(f"/api/research/jobs/{job_id}/html")
+        assert "Sin datos" in html.text and "research-job" not in html.text
+        assert client.get("/api/research/jobs/nada").status_code == 404
+
+    def test_cancelar_job(self, tmp_path, monkeypatch):
+        client, q = self._client(tmp_path, monkeypatch)
+        job_id = q.submit("research", {"name": "Ana", "company": "Acme"})
+        assert client.delete(f"/api/research/jobs/{job_id}").json()["cancelled"]
+        assert "detenida" in client.get(f"/api/research/jobs/{job_id}/html").text
+
+
+def test_job_hereda_request_id(tmp_path):
+    from config.log import reset_request_id, set_request_id
+
+    q = _queue(tmp_path)
+    token = set_request_id("req-42")
+    try:
+        job_id = q.submit("research", {})
+    finally:
+        reset_request_id(token)
+    assert q.get(job_id).request_id == "req-42"
+    assert q.get(q.submit("research", {})).request_id is None
@@ -0,0 +1,47 @@
+"""Tests del parser incremental de JSON en streaming."""
+import json
+import random
+
+from scraper.json_stream import JSONStreamParser
+
+DOC = {
+    "persona": {"nombre": 'Ana "la jefa" Pérez', "notas": "llaves } y [ dentro de strings", "cargos": [1, 2]},
+    "score": 7.5,
+    "activo": True,
+    "ruta": "C:\\\\datos\\\\",
+    "empresa": {},
+    "hallazgos": [{"titulo": "Nueva planta"}, "texto", 3, [1, [2]], None],
+}
+
+
+def _feed_in_pieces(parser: JSONStreamParser, text: str, rng: random.Random) -> list[str]:
+    closed, i = [], 0
+    while i < len(text):
+        n = rng.randint(1, 9)
+        closed += parser.feed(text[i:i + n])
+        i += n
+    return closed
+
+
+def test_valores_cerrados_en_orden_con_cualquier_particion():
+    text = "Resultado:\n```json\n" + json.dumps(DOC, ensure_ascii=False, indent=2) + "\n```\nNota final {x}"
+    rng = random.Random(3)
+    for _ in range(50):
+        parser = JSONStreamParser()
+        assert _feed_in_pieces(parser, text, rng) == list(DOC)
+        assert parser.values == DOC and parser.done
+        assert parser.items["hallazgos"] == DOC["hallazgos"]
+
+
+def test_valores_disponibles_antes_del_cierre_y_array_truncado():
+    text = json.dumps({"persona": {"a": 1}, "empresa": {"b": 2}, "hallazgos": [{"t": "uno"}, {"t": "dos"}]})
+    parser = JSONStreamParser()
+    closed = parser.feed(text[: text.index('{"t": "dos"') + 5])
+    assert closed == ["persona", "empresa"] and not parser.done
+    assert parser.partial() == {"persona": {"a": 1}, "empresa": {"b": 2}, "hallazgos": [{"t": "uno"}]}
+
+
+def test_texto_sin_json():
+    parser = JSONStreamParser()
+    assert parser.feed("No encontré información sobre esta persona.") == []
+    assert not parser.started and parser.values == {}
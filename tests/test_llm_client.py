@@ -0,0 +1,70 @@
+"""Tests del LLMClient: prefijo cacheable (cache_control / DeepSeek) y usage."""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+from services.llm_client import LLMClient
+from services.schemas import ENTITY_RESOLUTION_SCHEMA
+
+
+def _response(url, payload):
+    return httpx.Response(200, json=payload, request=httpx.Request("POST", url))
+
+
+DEEPSEEK_OK = {
+    "choices": [{"message": {"content": '{"ok": true}'}}],
+    "usage": {
+        "prompt_tokens": 5000, "completion_tokens": 300,
+        "prompt_cache_hit_tokens": 4608, "prompt_cache_miss_tokens": 392,
+    },
+}
+ANTHROPIC_OK = {
+    "content": [{"type": "text", "text": '{"ok": true}'}],
+    "usage": {
+        "input_tokens": 400, "output_tokens": 250,
+        "cache_read_input_tokens": 4700, "cache_creation_input_tokens": 0,
+    },
+}
+
+
+def _call(method, payload):
+    client = LLMClient()
+    post = AsyncMock(return_value=_response("https://llm", payload))
+    with patch.object(httpx.AsyncClient, "post", post):
+        resp = asyncio.run(getattr(client, method)("SISTEMA", "datos del prospecto", ENTITY_RESOLUTION_SCHEMA))
+    return resp, post.call_args.kwargs["json"]
+
+
+class TestHaikuPromptCaching:
+    def test_system_intacto_con_cache_control(self):
+        _, payload = _call("_call_haiku", ANTHROPIC_OK)
+        assert payload["system"] == [{"type": "text", "text": "SISTEMA", "cache_control": {"type": "ephemeral"}}]
+        # El dato variable nunca entra al prefijo cacheado
+        assert payload["messages"] == [{"role": "user", "content": "datos del prospecto"}]
+
+    def test_usage_suma_tokens_de_cache(self):
+        resp, _ = _call("_call_haiku", ANTHROPIC_OK)
+        assert resp.usage.input_tokens == 5100
+        assert resp.usage.cached_input_tokens == 4700
+        assert resp.usage.uncached_input_tokens == 400
+        assert resp.usage.output_tokens == 250
+
+
+class TestDeepSeekPrefix:
+    def test_system_intacto_y_datos_en_user(self):
+        _, payload = _call("_call_deepseek", DEEPSEEK_OK)
+        system, user = payload["messages"]
+        assert system["content"] == "SISTEMA"
+        assert user["content"] == "datos del prospecto"
+
+    def test_usage_cache_hit(self):
+        resp, _ = _call("_call_deepseek", DEEPSEEK_OK)
+        assert resp.usage.input_tokens == 5000
+        assert resp.usage.cached_input_tokens == 4608
+        assert resp.usage.uncached_input_tokens == 392
+
+    def test_usage_ausente_no_rompe(self):
+        resp, _ = _call("_call_deepseek", {"choices": [{"message": {"content": "{}"}}]})
+        assert resp.content == "{}"
+        assert resp.usage.input_tokens == 0
@@ -0,0 +1,28 @@
+"""Smoke test del load test (app real + stand-in, sin latencia)."""
+import pytest
+
+from bench.load_test import _parse_error_rates, _prospects_for, run_load_test
+from bench.standin import load_corpus, load_profile
+
+
+def test_prospectos_unicos_aunque_se_recorra_el_corpus_de_nuevo():
+    corpus = load_corpus()
+    prospects = _prospects_for(corpus, len(corpus) + 5, 10)
+    assert len({(p["name"], p["company"]) for p in prospects}) == len(prospects)
+
+
+def test_error_rate_por_upstream():
+    profile = _parse_error_rates(["ddg=0.5"], load_profile())
+    assert profile["ddg"]["error_rate"] == 0.5 and profile["ddg"]["p50"] > 0
+    with pytest.raises(SystemExit):
+        _parse_error_rates(["bing=0.1"], load_profile())
+
+
+def test_load_test_sin_latencia():
+    report = run_load_test(levels=(1, 2), per_worker=1, latency_scale=0)
+
+    assert [r["concurrency"] for r in report["levels"]] == [1, 2]
+    for row in report["levels"]:
+        assert row["requests"] == row["concurrency"]
+        assert row["error_rate"] == 0 and row["throughput_rps"] > 0
+        assert row["loop_lag_max_ms"] >= 0
@@ -0,0 +1,78 @@
+"""Tests del logging estructurado (cola + request_id + niveles por módulo)."""
+import io
+import json
+import logging
+import logging.handlers
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config.log import (
+    parse_module_levels, reset_request_id, set_request_id, setup_logging, shutdown_logging,
+)
+
+
+@pytest.fixture
+def log_stream():
+    root = logging.getLogger()
+    previous_level = root.level
+    stream = io.StringIO()
+    yield stream
+    shutdown_logging()
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    root.setLevel(previous_level)
+    for name in ("scraper", "services"):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+
+
+def _records(stream) -> list[dict]:
+    shutdown_logging()  # vacía la cola del hilo escritor
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_registro_json_con_request_id_y_campos_extra(log_stream):
+    setup_logging("INFO", "", "json", log_stream)
+    token = set_request_id("abc123")
+    try:
+        logging.getLogger("services.researcher").info("Investigando", extra={"empresa": "Acme"})
+    finally:
+        reset_request_id(token)
+    logging.getLogger("services.researcher").info("sin request")
+
+    first, second = _records(log_stream)
+    assert first["msg"] == "Investigando" and first["request_id"] == "abc123"
+    assert first["logger"] == "services.researcher" and first["empresa"] == "Acme"
+    assert second["request_id"] == "-"
+
+
+def test_root_solo_encola(log_stream):
+    setup_logging("INFO", "", "json", log_stream)
+    handlers = logging.getLogger().handlers
+    assert any(isinstance(h, logging.handlers.QueueHandler) for h in handlers)
+    assert not any(type(h) is logging.StreamHandler for h in handlers)
+
+
+def test_niveles_por_modulo(log_stream):
+    setup_logging("DEBUG", "scraper=WARNING", "json", log_stream)
+    logging.getLogger("scraper.base").debug("ddgs text: 5 results")
+    logging.getLogger("scraper.base").warning("bloqueado")
+    logging.getLogger("services.researcher").debug("Item irrelevante")
+
+    assert [r["msg"] for r in _records(log_stream)] == ["bloqueado", "Item irrelevante"]
+
+
+def test_parse_module_levels_ignora_basura():
+    assert parse_module_levels(" scraper = warning ,x, y=NOPE,services.llm_client=DEBUG") == {
+        "scraper": logging.WARNING, "services.llm_client": logging.DEBUG,
+    }
+
+
+def test_middleware_asigna_y_propaga_request_id():
+    from webapp.app import app
+
+    client = TestClient(app)
+    generated = client.get("/health").headers["X-Request-ID"]
+    assert len(generated) == 12
+    assert client.get("/health", headers={"X-Request-ID": "externo-1"}).headers["X-Request-ID"] == "externo-1"
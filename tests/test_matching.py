@@ -0,0 +1,79 @@
+"""Tests del matcher de nombre/empresa compartido por las etapas del pipeline."""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from scraper.base import ScrapedItem
+from scraper.completion import is_validated_profile
+from scraper.corporate_site import CorporateSiteScraper
+from scraper.matching import ProspectMatcher, fold, prospect_matcher
+from services.researcher import ResearchService
+
+
+def _item(source: str, url: str, title: str, snippet: str = "") -> ScrapedItem:
+    return ScrapedItem(source=source, url=url, title=title, snippet=snippet)
+
+
+def test_fold_minusculas_sin_tildes():
+    assert fold("Juliá NÚÑEZ") == "julia nunez"
+    assert fold("Compañía") == "compania"  # marcas combinantes sueltas
+    assert fold("Faymex SpA") == "faymex spa"
+
+
+def test_precalculo():
+    m = ProspectMatcher("Nadia Ramírez Lara", "Compañía Minera del Norte SpA")
+    assert m.name_words == ("nadia", "ramirez", "lara")
+    assert m.company_words == ("compania", "minera", "norte")
+    assert m.domain_candidates == ("companiamineradelnortespa", "minera", "norte")
+
+
+def test_empresa_y_nombre_sin_importar_tildes():
+    m = ProspectMatcher("Sebastián Núñez", "Química Pacífico")
+    assert m.mentions_company("Gerente en QUIMICA PACIFICO S.A.")
+    assert m.mentions_company("noticias de pacífico")  # palabra significativa
+    assert not m.mentions_company("Minera del Sur")
+    assert m.mentions_full_name("Nunez Sebastian - Jefe de Planta")
+    assert not m.mentions_full_name("Sebastián Soto")
+    assert m.domain_matches("www.quimicapacifico.cl")
+
+
+def test_relevancia_por_fuente():
+    m = ProspectMatcher("Nadia Ramirez Lara", "Desert King")
+    assert m.is_relevant(_item("duckduckgo", "https://www.desertking.cl/", "Inicio"))
+    assert m.is_relevant(_item("linkedin", "https://cl.linkedin.com/in/x", "Nadia Ramírez Lara - Gerente"))
+    assert not m.is_relevant(_item("google_search", "https://x.com", "Nadia Ramírez Lara - Gerente"))
+    assert m.is_relevant(_item("google_news", "https://diario.cl/a", "Entrevista a Nadia Ramirez Lara"))
+    assert not m.is_relevant(_item("google_news", "https://diario.cl/b", "Otra empresa crece"))
+    assert m.is_relevant(_item("corporate", "https://otra.cl", "Cualquier cosa"))
+
+
+def test_etapas_dan_la_misma_respuesta():
+    profile = _item("linkedin", "https://cl.linkedin.com/in/a", "Nadia Ramírez Lara - Gerente de Operaciones")
+    m = prospect_matcher("Nadia Ramirez Lara", "Desert King")
+    assert prospect_matcher("Nadia Ramirez Lara", "Desert King") is m
+    assert m.item_mentions_full_name(profile)
+    assert prospect_matcher("nadia ramirez lara", "").mentions_full_name(f"{profile.title} {profile.snippet}")
+    assert is_validated_profile(profile, "Nadia Ramirez Lara", "Desert King")
+    assert CorporateSiteScraper._domain_matches_company("desertking.cl", "Desert King")
+
+
+def test_cache_de_textos_acotado():
+    m = ProspectMatcher("Ana Soto", "Acme")
+    for i in range(1500):
+        m.item_text(_item("linkedin", "u", f"titulo {i}"))
+    assert len(m._texts) <= 128
+    assert m.item_text(_item("linkedin", "u", "Título")) == "titulo "
+
+
+def test_investigate_suelta_los_matchers():
+    async def pipeline(self, name, company, role="", location=""):
+        prospect_matcher(name, company).item_text(_item("news", "u", "Ana Soto en Acme"))
+        assert prospect_matcher.cache_info().currsize >= 1
+        raise RuntimeError("scraping caído")
+
+    service = ResearchService.__new__(ResearchService)
+    with patch.object(ResearchService, "_investigate", pipeline):
+        with pytest.raises(RuntimeError):
+            asyncio.run(service.investigate("Ana Soto", "Acme Matchers"))
+    assert prospect_matcher.cache_info().currsize == 0
@@ -0,0 +1,85 @@
+"""Tests de las métricas Prometheus del pipeline (/metrics)."""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import scraper.orchestrator as orchestrator_mod
+from scraper.base import ScrapedItem
+from scraper.latency import AdaptiveTimeouts
+from scraper.orchestrator import ScraperOrchestrator
+from services.llm_client import LLMClient, LLMResponse, LLMUsage
+from config.metrics import current_stage, stage_timer
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _item(source):
+    return ScrapedItem(url=f"https://{source}.test", title="t", snippet="s", source=source)
+
+
+def test_orquestador_registra_desenlace_por_scraper():
+    orch = ScraperOrchestrator()
+    orch.timeouts = AdaptiveTimeouts()  # sin historial: timeouts de arranque en frío
+
+    async def slow(*args):
+        await asyncio.sleep(5)
+        return []
+
+    async def boom(*args):
+        raise RuntimeError("bloqueado")
+
+    before = {
+        "ok": _sample("scraper_duration_seconds_count", scraper="GoogleSearchScraper", outcome="ok"),
+        "timeout": _sample("scraper_duration_seconds_count", scraper="LinkedInScraper", outcome="timeout"),
+        "error": _sample("scraper_duration_seconds_count", scraper="GoogleNewsScraper", outcome="error"),
+        "items": _sample("scraper_items_sum", scraper="GoogleSearchScraper"),
+    }
+    with patch.object(orchestrator_mod, "WEB_SCRAPE_TIMEOUT", 0.05), \
+            patch.object(orch.google_scraper, "search", AsyncMock(return_value=[_item("g"), _item("g2")])), \
+            patch.object(orch.linkedin_scraper, "search", slow), \
+            patch.object(orch.news_scraper, "search", boom), \
+            patch.object(orch.corporate_scraper, "search", AsyncMock(return_value=[])), \
+            patch.object(orch.perplexity_scraper, "search", AsyncMock(return_value=[_item("p")])):
+        items = asyncio.run(orch.search_all("Ana", "Acme"))
+
+    assert len(items) == 3
+    assert _sample("scraper_duration_seconds_count", scraper="GoogleSearchScraper", outcome="ok") == before["ok"] + 1
+    assert _sample("scraper_duration_seconds_count", scraper="LinkedInScraper", outcome="timeout") == before["timeout"] + 1
+    assert _sample("scraper_duration_seconds_count", scraper="GoogleNewsScraper", outcome="error") == before["error"] + 1
+    assert _sample("scraper_items_sum", scraper="GoogleSearchScraper") == before["items"] + 2
+
+
+def test_tokens_llm_por_proveedor_y_etapa():
+    client = LLMClient()
+    usage = LLMUsage(input_tokens=1000, cached_input_tokens=800, output_tokens=50, latency_s=1.2)
+    resp = LLMResponse(content="{}", model_used="deepseek-chat", fallback=False, usage=usage)
+    before = _sample("llm_tokens_total", provider="deepseek", purpose="email", kind="input_cached")
+
+    async def run():
+        with stage_timer("email"):
+            assert current_stage() == "email"
+            await client.complete("S", "U")
+        return current_stage()
+
+    with patch.object(client.settings.llm, "deepseek_api_key", "sk-test"), \
+            patch.object(client, "_call_deepseek", AsyncMock(return_value=resp)):
+        assert asyncio.run(run()) == "other"
+
+    assert _sample("llm_tokens_total", provider="deepseek", purpose="email", kind="input_cached") == before + 800
+    assert _sample("llm_request_duration_seconds_count", provider="deepseek", purpose="email") >= 1
+    assert _sample("pipeline_stage_duration_seconds_count", stage="email") >= 1
+
+
+def test_endpoint_metrics():
+    from webapp.app import app
+
+    with stage_timer("verify"):
+        pass
+    resp = TestClient(app).get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'pipeline_stage_duration_seconds_count{stage="verify"}' in resp.text
@@ -0,0 +1,130 @@
+"""Tests de la revalidación condicional de páginas corporativas."""
+import asyncio
+import time
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from scraper.corporate_site import CorporateSiteScraper
+from scraper.page_cache import PageCache
+from scraper.snapshots import SnapshotStore
+from scraper.transport import RECORD, REPLAY, Transport
+
+URL = "https://acme.cl/"
+HTML = "<html><head><title>Acme</title></head><body>Acme industrial</body></html>"
+
+
+class TestPageCache:
+    def test_solo_guarda_paginas_con_validadores(self):
+        cache = PageCache(":memory:")
+        assert not cache.put(URL, HTML)
+        assert cache.put(URL, HTML, etag='"v1"')
+        page = cache.get(URL)
+        assert page.body == HTML and page.validators() == {"If-None-Match": '"v1"'}
+        # La misma URL ahora sin validadores: la copia vieja ya no sirve
+        assert not cache.put(URL, HTML + "x")
+        assert cache.get(URL) is None
+
+    def test_vencimiento_y_touch(self):
+        cache = PageCache(":memory:", ttl_seconds=60)
+        cache.put(URL, HTML, last_modified="Wed, 01 Oct 2026 10:00:00 GMT")
+        cache._conn.execute("UPDATE pages SET validated_at = ?", (time.time() - 120,))
+        assert cache.get(URL) is None
+        cache.touch(URL)
+        assert cache.get(URL).validators() == {"If-Modified-Since": "Wed, 01 Oct 2026 10:00:00 GMT"}
+
+    def test_persiste_en_disco(self, tmp_path):
+        path = str(tmp_path / "pages.sqlite3")
+        cache = PageCache(path)
+        cache.put(URL, HTML, etag='"v1"')
+        cache.close()
+        assert PageCache(path).get(URL).body == HTML
+
+    def test_cuerpo_en_los_blobs_de_los_snapshots(self):
+        blobs = SnapshotStore(":memory:")
+        cache = PageCache(":memory:", blobs=blobs)
+        blobs.put(URL, HTML)
+        cache.put(URL, HTML, etag='"v1"')
+        assert cache._conn.execute("SELECT body FROM pages").fetchone() == ("",)
+        assert cache.get(URL).body == HTML
+        # Sin blob (snapshot fuera de retención) la página cuenta como no guardada
+        blobs.prune(time.time() + 1)
+        assert cache.get(URL) is None
+        # Lo que los snapshots no tienen se guarda aquí
+        cache.put(URL, HTML + "x", etag='"v2"')
+        assert cache.get(URL).body == HTML + "x"
+
+
+@pytest.fixture
+def page_cache(monkeypatch):
+    cache = PageCache(":memory:")
+    monkeypatch.setattr("scraper.corporate_site.get_page_cache", lambda: cache)
+    yield cache
+    cache.close()
+
+
+def _scraper(responses: list[httpx.Response]) -> tuple[CorporateSiteScraper, list[dict]]:
+    scraper = CorporateSiteScraper()
+    sent = []
+
+    async def get(url, params=None, extra_headers=None, max_bytes=None):
+        sent.append(extra_headers or {})
+        return responses.pop(0)
+
+    scraper._get = get
+    return scraper, sent
+
+
+class TestFetchHtml:
+    def test_304_sirve_la_copia_guardada(self, page_cache):
+        scraper, sent = _scraper([
+            httpx.Response(200, text=HTML, headers={"etag": '"v1"'}),
+            httpx.Response(304),
+        ])
+        assert asyncio.run(scraper._fetch_html(URL)) == HTML
+        assert asyncio.run(scraper._fetch_html(URL)) == HTML
+        assert sent == [{}, {"If-None-Match": '"v1"'}]
+
+    def test_pagina_cambiada_reemplaza_la_copia(self, page_cache):
+        scraper, sent = _scraper([
+            httpx.Response(200, text=HTML, headers={"etag": '"v1"'}),
+            httpx.Response(200, text=HTML + "nuevo", headers={"etag": '"v2"'}),
+        ])
+        asyncio.run(scraper._fetch_html(URL))
+        assert asyncio.run(scraper._fetch_html(URL)) == HTML + "nuevo"
+        assert page_cache.get(URL).etag == '"v2"'
+
+    def test_error_no_borra_la_copia(self, page_cache, monkeypatch):
+        monkeypatch.setattr("scraper.tls_client.tls_fetch", AsyncMock(return_value=(403, "")))
+        scraper, sent = _scraper([
+            httpx.Response(200, text=HTML, headers={"etag": '"v1"'}),
+            httpx.Response(503),
+            httpx.Response(304),
+        ])
+        asyncio.run(scraper._fetch_html(URL))
+        assert asyncio.run(scraper._fetch_html(URL)) is None
+        assert asyncio.run(scraper._fetch_html(URL)) == HTML
+
+    def test_pagina_cortada_no_se_guarda(self, page_cache):
+        scraper, _ = _scraper([httpx.Response(200, text=HTML[:40], headers={"etag": '"v1"'})])
+        assert asyncio.run(scraper._fetch_html(URL, max_bytes=40)) == HTML[:40]
+        assert page_cache.get(URL) is None
+
+
+def test_replay_conserva_validadores(tmp_path):
+    def handler(request):
+        return httpx.Response(200, text=HTML, headers={"content-type": "text/html", "etag": '"v1"',
+                                                         "last-modified": "Wed, 01 Oct 2026 10:00:00 GMT"})
+
+    async def fetch(transport):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await transport.request(client, "GET", URL)
+
+    cassette = str(tmp_path / "c.json.gz")
+    recorder = Transport(RECORD, cassette)
+    asyncio.run(fetch(recorder))
+    recorder.save()
+    replayed = asyncio.run(fetch(Transport(REPLAY, cassette)))
+    assert replayed.headers["etag"] == '"v1"'
+    assert replayed.headers["last-modified"] == "Wed, 01 Oct 2026 10:00:00 GMT"
@@ -0,0 +1,159 @@
+"""Tests de las consultas separadas de persona y empresa a Perplexity."""
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from scraper import perplexity as perplexity_mod
+from scraper.perplexity import PerplexityScraper, clear_company_cache
+
+PERSONA = {"nombre_completo": "Ana Pérez", "cargo_actual": "Gerente de Planta", "empresa_actual": "Acme"}
+EMPRESA = {"nombre": "Acme", "industria": "Minería", "descripcion": "Explosivos para minería"}
+HALLAZGOS = [{"titulo": "Acme abre planta en Antofagasta", "resumen": "Nueva planta", "fecha": "2026"}]
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    clear_company_cache()
+    yield
+    clear_company_cache()
+
+
+class FakePerplexity:
+    """Responde en streaming según el esquema pedido en el system prompt, contando llamadas."""
+
+    def __init__(self, fail_company: bool = False, delay: float = 0.0):
+        self.calls: list[dict] = []
+        self.fail_company = fail_company
+        self.delay = delay
+
+    async def stream(self, client, method, url, **kwargs):
+        system, user = (m["content"] for m in kwargs["json"]["messages"])
+        is_company = '"empresa"' in system
+        self.calls.append({"kind": "empresa" if is_company else "persona", "user": user})
+        await asyncio.sleep(self.delay)
+        if is_company and self.fail_company:
+            content, citations = "sin datos", []
+        elif is_company:
+            content = json.dumps({"empresa": EMPRESA, "hallazgos": HALLAZGOS})
+            citations = ["https://acme.cl/", "https://news.example.com/acme-planta"]
+        else:
+            content = json.dumps({"persona": PERSONA})
+            citations = ["https://cl.linkedin.com/in/ana-perez"]
+        for i in range(0, len(content), 25):
+            yield "data: " + json.dumps({"choices": [{"delta": {"content": content[i:i + 25]}}],
+                                         "citations": citations})
+        yield "data: [DONE]"
+
+    def kinds(self) -> list[str]:
+        return sorted(c["kind"] for c in self.calls)
+
+
+def _search(fake, *prospects):
+    scrapers = [PerplexityScraper() for _ in prospects]
+
+    async def run():
+        return await asyncio.gather(*(s.search(name, "Acme", "Gerente", "Chile")
+                                      for s, name in zip(scrapers, prospects)))
+
+    with patch.object(scrapers[0].settings, "perplexity_api_key", "pplx-test"), \
+            patch("scraper.transport.Transport._stream", fake.stream):
+        return scrapers, asyncio.run(run())
+
+
+def test_persona_y_empresa_en_consultas_separadas():
+    fake = FakePerplexity()
+    (scraper,), (items,) = _search(fake, "Ana Pérez")
+
+    assert fake.kinds() == ["empresa", "persona"]
+    company_prompt = next(c["user"] for c in fake.calls if c["kind"] == "empresa")
+    assert "Ana" not in company_prompt  # reutilizable entre prospectos de la empresa
+    by_source = {i.source: i for i in items}
+    assert set(by_source) == {"perplexity_persona", "perplexity_empresa", "perplexity_news"}
+    # Cada item toma las citations de su propia consulta
+    assert by_source["perplexity_persona"].url == "https://cl.linkedin.com/in/ana-perez"
+    assert by_source["perplexity_news"].url == "https://news.example.com/acme-planta"
+    assert scraper.last_result == {"persona": PERSONA, "empresa": EMPRESA}
+
+
+def test_segundo_prospecto_usa_la_empresa_cacheada():
+    fake = FakePerplexity()
+    _search(fake, "Ana Pérez")
+    _, (items,) = _search(fake, "Luis Soto")
+
+    assert fake.kinds() == ["empresa", "persona", "persona"]
+    assert any(i.source == "perplexity_empresa" and "Minería" in i.snippet for i in items)
+
+
+def test_prospectos_concurrentes_comparten_la_consulta_de_empresa():
+    fake = FakePerplexity(delay=0.05)
+    _, results = _search(fake, "Ana Pérez", "Luis Soto", "Marta Díaz")
+
+    assert fake.kinds() == ["empresa", "persona", "persona", "persona"]
+    assert all(any(i.source == "perplexity_empresa" for i in items) for items in results)
+
+
+def test_fallo_de_empresa_no_se_cachea_ni_pierde_la_persona():
+    fake = FakePerplexity(fail_company=True)
+    _, (items,) = _search(fake, "Ana Pérez")
+    assert [i.source for i in items] == ["perplexity_persona"]
+
+    fake.fail_company = False
+    _search(fake, "Ana Pérez")
+    assert fake.kinds().count("empresa") == 2
+
+
+def test_cache_vence_con_el_ttl():
+    fake = FakePerplexity()
+    _search(fake, "Ana Pérez")
+    for key, (_, value) in list(perplexity_mod._company_cache.items()):
+        perplexity_mod._company_cache[key] = (0.0, value)  # vencida
+    _search(fake, "Luis Soto")
+    assert fake.kinds().count("empresa") == 2
+
+
+def test_stream_corta_la_cola_de_hallazgos():
+    """Con la empresa cerrada, los hallazgos tienen solo el margen de gracia."""
+    content = json.dumps({"empresa": EMPRESA, "hallazgos": HALLAZGOS + [{"titulo": "Otra", "resumen": "x"}]})
+    cut = content.index('{"titulo": "Otra"')
+    finished = []
+
+    async def stalled_stream(self, client, method, url, **kwargs):
+        system = kwargs["json"]["messages"][0]["content"]
+        if '"empresa"' not in system:
+            yield "data: " + json.dumps({"choices": [{"delta": {"content": json.dumps({"persona": PERSONA})}}]})
+            return
+        citations = ["https://acme.cl/", "https://news.example.com/acme-planta"]
+        yield "data: " + json.dumps({"choices": [{"delta": {"content": content[:cut]}}], "citations": citations})
+        await asyncio.sleep(5)  # la cola que ya no se espera
+        finished.append(True)
+        yield "data: " + json.dumps({"choices": [{"delta": {"content": content[cut:]}}]})
+
+    scraper = PerplexityScraper()
+
+    async def run():
+        t0 = asyncio.get_running_loop().time()
+        items = await scraper.search("Ana Pérez", "Acme")
+        return items, asyncio.get_running_loop().time() - t0
+
+    with patch.object(scraper.settings, "perplexity_api_key", "pplx-test"), \
+            patch.object(scraper.settings.perplexity, "tail_grace_seconds", 0.1), \
+            patch("scraper.transport.Transport._stream", stalled_stream):
+        items, elapsed = asyncio.run(run())
+
+    assert elapsed < 1 and not finished
+    assert any(i.source == "perplexity_empresa" for i in items)
+    # Solo el hallazgo que alcanzó a cerrarse
+    assert [i.title for i in items if i.source == "perplexity_news"] == ["Acme abre planta en Antofagasta"]
+    # Hallazgos cortados: sirven a este prospecto pero no se cachean para los siguientes
+    assert not perplexity_mod._company_cache
+
+
+def test_empresa_vacia_no_se_cachea():
+    fake = FakePerplexity()
+    with patch(f"{__name__}.EMPRESA", {"nombre": "", "industria": ""}):
+        _search(fake, "Ana Pérez")
+    assert not perplexity_mod._company_cache
+    _search(fake, "Luis Soto")
+    assert fake.kinds().count("empresa") == 2
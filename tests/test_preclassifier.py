@@ -0,0 +1,113 @@
+"""Tests del preclasificador local de la resolución de entidades."""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from config.settings import get_settings
+from scraper.base import ScrapedItem
+from scraper.matching import prospect_matcher
+from services.preclassifier import DROP, KEEP, PreClassifier, calibrate, evaluate, features, train
+from services.researcher import ResearchService
+from services.verdict_cache import VerdictCache
+
+OWN = ScrapedItem("https://cl.linkedin.com/in/ana-soto", "Ana Soto - Gerente Comercial - Acme | LinkedIn",
+                  "Gerente comercial en Acme. Santiago, Chile", "linkedin")
+OTHER = ScrapedItem("https://www.directorio.cl/x", "Pedro Soto - Directorio", "Contacto de Retail Andino.",
+                    "duckduckgo")
+NEWS = ScrapedItem("https://www.diario.cl/a", "Acme anuncia expansión", "La empresa invertirá en el norte.",
+                   "google_news")
+AMBIGUOUS = ScrapedItem("https://www.linkedin.com/in/ana-soto-2", "Ana Soto - Consultora | LinkedIn",
+                        "Consultora independiente. Santiago, Chile", "duckduckgo")
+
+
+def _samples(n: int = 30) -> list:
+    """Veredictos "del LLM" para n prospectos ficticios de Acme/Faymex."""
+    out = []
+    for i in range(n):
+        name, company = f"Ana Soto{'x' * i}", "Acme" if i % 2 else "Faymex"
+        own = ScrapedItem(f"https://cl.linkedin.com/in/p{i}", f"{name} - Gerente - {company} | LinkedIn",
+                          f"Gerente en {company}", "linkedin")
+        news = ScrapedItem(f"https://diario.cl/{i}", f"{company} anuncia resultados", "Nota", "google_news")
+        other = ScrapedItem(f"https://dir.cl/{i}", "Pedro Soto - Directorio", "Retail Andino", "duckduckgo")
+        out += [(name, company, own, "prospecto"), (name, company, news, "empresa"),
+                (name, company, other, "irrelevante")]
+    return out
+
+
+def test_features():
+    matcher = prospect_matcher("Ana Soto", "Acme")
+    own, other, news = (features(it, matcher) for it in (OWN, OTHER, NEWS))
+    assert own["full_name"] == own["company"] == own["profile_url"] == own["source_linkedin"] == 1.0
+    assert other["name_partial"] == 0.5 and other["company"] == 0.0
+    assert news["company_in_title"] == news["source_news"] == 1.0 and news["full_name"] == 0.0
+
+
+def test_calibrate_respeta_objetivo_y_empates():
+    scored = [(0.9, 1)] * 30 + [(0.6, 1)] * 10 + [(0.6, 0)] * 10 + [(0.1, 0)] * 30
+    assert calibrate(scored, 0.99) == (0.9, 0.1)
+    # Con objetivo bajo ambos umbrales se quedan con el grupo empatado en 0.6: sin margen, no decide
+    assert calibrate(scored, 0.75) == (1.01, -0.01)
+    assert calibrate([(0.9, 1)] * 5, 0.99) == (1.01, -0.01)  # sin soporte suficiente
+
+
+def test_entrena_decide_y_evalua():
+    model = train(_samples(), target=0.99)
+    matcher = prospect_matcher("Ana Soto", "Acme")
+    assert model.decide(OWN, matcher) == KEEP
+    assert model.decide(NEWS, matcher) == KEEP
+    assert model.decide(OTHER, matcher) == DROP
+    report = evaluate(model, _samples(4))
+    assert report["agreement"] == 1.0 and report["llm_calls_saved"] == report["prospects"] == 4
+    restored = PreClassifier.from_dict(json.loads(json.dumps(model.to_dict())))
+    assert restored.decide(OTHER, matcher) == DROP
+
+
+def test_modelo_sin_umbrales_no_decide():
+    assert PreClassifier({"bias": 5.0}).decide(OWN, prospect_matcher("Ana Soto", "Acme")) is None
+
+
+def test_muestras_desde_el_cache(tmp_path):
+    path = str(tmp_path / "v.sqlite3")
+    cache = VerdictCache(path)
+    cache.store("Ana Soto", "Acme", [(OTHER, "irrelevante")])
+    cache._conn.execute("UPDATE verdicts SET created_at = 1")
+    cache.close()
+    cache = VerdictCache(path)  # el TTL borra el veredicto viejo, no su muestra
+    cache.store("Ana Soto", "Acme", [(OWN, "prospecto"), (NEWS, "empresa")], preclassified={0: KEEP})
+    assert cache.count() == 2
+    assert cache.samples() == [("Ana Soto", "Acme", OTHER, "irrelevante"), ("Ana Soto", "Acme", OWN, "prospecto"),
+                               ("Ana Soto", "Acme", NEWS, "empresa")]
+    assert cache.audits() == [(KEEP, "prospecto")]
+    cache.close()
+
+
+def test_researcher_solo_manda_ambiguos(monkeypatch, verdict_cache):
+    monkeypatch.setattr("services.researcher.get_preclassifier", lambda: train(_samples()))
+    monkeypatch.setattr(get_settings().entity_resolution, "preclassifier_audit_rate", 0.0)
+    svc = ResearchService.__new__(ResearchService)
+    svc.llm = SimpleNamespace(complete=AsyncMock(return_value=SimpleNamespace(
+        content=json.dumps({"clasificaciones": [{"indice": 0, "categoria": "irrelevante", "razon": "t"}]}),
+        model_used="mock")))
+    kept = asyncio.run(svc._resolve_entities("Ana Soto", "Acme", "", "", [OWN, OTHER, NEWS, AMBIGUOUS]))
+    assert kept == [OWN, NEWS]
+    prompt = svc.llm.complete.await_args.args[1]
+    assert AMBIGUOUS.url in prompt and OWN.url not in prompt and OTHER.url not in prompt
+    # Las decisiones locales no se guardan como veredictos del LLM
+    assert verdict_cache.count() == 1
+
+
+def test_muestra_de_auditoria_va_al_llm(monkeypatch, verdict_cache):
+    monkeypatch.setattr("services.researcher.get_preclassifier", lambda: train(_samples()))
+    monkeypatch.setattr(get_settings().entity_resolution, "preclassifier_audit_rate", 1.0)
+    svc = ResearchService.__new__(ResearchService)
+    svc.llm = SimpleNamespace(complete=AsyncMock(return_value=SimpleNamespace(
+        content=json.dumps({"clasificaciones": [{"indice": 0, "categoria": "prospecto", "razon": "t"},
+                                                {"indice": 1, "categoria": "irrelevante", "razon": "t"}]}),
+        model_used="mock")))
+    kept = asyncio.run(svc._resolve_entities("Ana Soto", "Acme", "", "", [OWN, OTHER]))
+    assert kept == [OWN]
+    prompt = svc.llm.complete.await_args.args[1]
+    assert OWN.url in prompt and OTHER.url in prompt
+    # Veredicto del LLM junto a la decisión local, en el log que no vence
+    assert verdict_cache.audits() == [(KEEP, "prospecto"), (DROP, "irrelevante")]
@@ -0,0 +1,67 @@
+"""Tests del registro de prompts compilados (carga única + recarga por mtime)."""
+import os
+
+from services.prompt_registry import PROMPTS_DIR, PromptRegistry, PromptTemplate
+
+
+def _registry(tmp_path, **files):
+    for name, text in files.items():
+        (tmp_path / name).write_text(text, encoding="utf-8")
+    reg = PromptRegistry(tmp_path, check_interval=0)
+    reg.load_all()
+    return reg
+
+
+class TestPromptTemplate:
+    def test_render_equivale_a_str_replace(self):
+        text = (PROMPTS_DIR / "email_generator.md").read_text(encoding="utf-8")
+        values = {"nombre": "Ana", "cargo": "CFO", "empresa": "Acme", "sender_name": "Gustavo"}
+        legacy = text
+        for k, v in values.items():
+            legacy = legacy.replace("{" + k + "}", v)
+        assert PromptTemplate.compile("email_generator.md", text).render(**values) == legacy
+
+    def test_llaves_dobles_y_json_intactos(self):
+        tpl = PromptTemplate.compile("x.md", '{{\n  "asunto": "{nombre}"\n}}')
+        assert tpl.placeholders == {"nombre"}
+        assert tpl.render(nombre="Ana") == '{{\n  "asunto": "Ana"\n}}'
+
+    def test_placeholder_sin_valor_queda_literal(self):
+        tpl = PromptTemplate.compile("x.md", "Hola {nombre} de {empresa}")
+        assert tpl.render(nombre="Ana") == "Hola Ana de {empresa}"
+
+    def test_valor_con_placeholder_no_se_resustituye(self):
+        tpl = PromptTemplate.compile("x.md", "{research_summary} / {sender_name}")
+        assert tpl.render(research_summary="{sender_name}", sender_name="G") == "{sender_name} / G"
+
+    def test_version_depende_del_contenido(self):
+        a = PromptTemplate.compile("x.md", "uno")
+        assert a.version == PromptTemplate.compile("y.md", "uno").version
+        assert a.version != PromptTemplate.compile("x.md", "dos").version
+
+
+class TestPromptRegistry:
+    def test_carga_todos_los_prompts_del_repo(self):
+        reg = PromptRegistry()
+        assert reg.load_all() >= 4
+        assert "Quedo atento" in reg.text("email_generator.md")
+
+    def test_prompt_inexistente_devuelve_vacio(self, tmp_path):
+        reg = _registry(tmp_path, **{"a.md": "A"})
+        assert reg.get("no_existe.md") is None
+        assert reg.text("no_existe.md") == ""
+
+    def test_recarga_si_cambia_mtime(self, tmp_path):
+        reg = _registry(tmp_path, **{"a.md": "version uno"})
+        v1 = reg.version("a.md")
+        path = tmp_path / "a.md"
+        path.write_text("version dos", encoding="utf-8")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert reg.text("a.md") == "version dos"
+        assert reg.version("a.md") != v1
+
+    def test_sin_cambios_no_relee_disco(self, tmp_path):
+        reg = _registry(tmp_path, **{"a.md": "fijo"})
+        first = reg.get("a.md")
+        assert reg.get("a.md") is first
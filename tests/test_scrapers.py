@@ -2,7 +2,8 @@
 import pytest
 from unittest.mock import AsyncMock, patch
 
-from scraper.base import ScrapedItem
+from config.settings import get_settings
+from scraper.base import BaseScraper, ScrapedItem
 from scraper.google_search import GoogleSearchScraper
 from scraper.google_news import GoogleNewsScraper
 from scraper.linkedin import LinkedInScraper
@@ -101,7 +102,7 @@ async def test_linkedin_scraper():
 async def test_corporate_scraper():
     scraper = CorporateSiteScraper()
 
-    async def mock_request(url, params=None):
+    async def mock_request(url, params=None, max_bytes=None):
         if "codelco.com" in url or "codelco.cl" in url:
             return MOCK_CORPORATE_HTML
         return None
@@ -167,3 +168,23 @@ async def test_orchestrator_handles_errors():
         results = await orchestrator.search_all("Test", "Test")
 
     assert len(results) == 2
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_keeps_shared_client_open():
+    # Otras investigaciones del proceso pueden estar usando el cliente
+    orchestrator = ScraperOrchestrator()
+    client = await BaseScraper._get_client(get_settings())
+
+    async def mock_search(self, name, company, role="", location=""):
+        return []
+
+    with patch.object(GoogleSearchScraper, "search", mock_search), \
+         patch.object(GoogleNewsScraper, "search", mock_search), \
+         patch.object(LinkedInScraper, "search", mock_search), \
+         patch.object(CorporateSiteScraper, "search", mock_search):
+        await orchestrator.search_all("Test", "Test")
+
+    assert not client.is_closed
+    await BaseScraper.cleanup()
+    assert client.is_closed
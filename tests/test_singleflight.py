@@ -0,0 +1,136 @@
+"""Tests de coalescencia de investigaciones idénticas en vuelo."""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from scraper.corporate_site import CorporateSiteScraper
+from scraper.base import ScrapedItem
+from scraper.singleflight import SingleFlight, normalize_key
+from services.researcher import ResearchResult, ResearchService
+
+
+def test_normalize_key():
+    assert normalize_key("  Ana  Pérez ", "ACME") == normalize_key("ana pérez", "acme") == ("ana perez", "acme")
+
+
+class TestSingleFlight:
+    def test_llamadas_concurrentes_comparten_ejecucion(self):
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        async def main():
+            sf = SingleFlight()
+            results = await asyncio.gather(*[sf.do("k", work) for _ in range(5)])
+            assert not sf.in_flight("k")
+            # Terminada la ejecución, una nueva llamada vuelve a ejecutar
+            await sf.do("k", work)
+            return results
+
+        assert asyncio.run(main()) == ["ok"] * 5
+        assert len(calls) == 2
+
+    def test_excepcion_se_propaga_a_todos(self):
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise ValueError("x")
+
+        async def main():
+            sf = SingleFlight()
+            return await asyncio.gather(sf.do("k", boom), sf.do("k", boom), return_exceptions=True)
+
+        assert all(isinstance(r, ValueError) for r in asyncio.run(main()))
+
+    def test_cancelar_un_llamador_no_afecta_a_los_demas(self):
+        async def main():
+            sf = SingleFlight()
+
+            async def work():
+                await asyncio.sleep(0.05)
+                return 42
+
+            first = asyncio.create_task(sf.do("k", work))
+            second = asyncio.create_task(sf.do("k", work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(main()) == 42
+
+    def test_sin_llamadores_se_cancela_la_tarea(self):
+        async def main():
+            sf = SingleFlight()
+            cancelled = []
+
+            async def work():
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+
+            caller = asyncio.create_task(sf.do("k", work))
+            await asyncio.sleep(0.01)
+            caller.cancel()
+            await asyncio.gather(caller, return_exceptions=True)
+            await asyncio.sleep(0)
+            return cancelled, sf.in_flight("k")
+
+        cancelled, in_flight = asyncio.run(main())
+        assert cancelled and not in_flight
+
+
+def test_investigate_coalesce_prospectos_identicos():
+    calls = []
+
+    async def fake_pipeline(self, name, company, role="", location=""):
+        calls.append(name)
+        await asyncio.sleep(0.01)
+        return ResearchResult(persona={"nombre": name}, score=70)
+
+    async def main():
+        with patch.object(ResearchService, "_investigate", fake_pipeline):
+            a, b = ResearchService.__new__(ResearchService), ResearchService.__new__(ResearchService)
+            return await asyncio.gather(
+                a.investigate("Ana Pérez", "Acme", "CFO"),
+                b.investigate("ana perez", "ACME ", "cfo"),
+                a.investigate("Otra Persona", "Acme", "CFO"),
+            )
+
+    r1, r2, r3 = asyncio.run(main())
+    assert len(calls) == 2
+    assert r1.score == r2.score == 70 and r1 is not r2  # cada llamador con su copia
+    r1.persona["nombre"] = "mutado"
+    assert r2.persona["nombre"] == "Ana Pérez"
+    assert r3.persona["nombre"] == "Otra Persona"
+
+
+def test_descubrimiento_de_dominio_coalescido_por_empresa():
+    guesses = []
+
+    async def fake_guess(self, company):
+        guesses.append(company)
+        await asyncio.sleep(0.01)
+        return "https://acme.cl"
+
+    async def fake_site(self, domain):
+        await asyncio.sleep(0.01)
+        return [ScrapedItem(url=domain, title="Acme", snippet="Acme SpA", source="corporate")]
+
+    async def main():
+        with patch.object(CorporateSiteScraper, "_guess_company_domain", fake_guess), \
+                patch.object(CorporateSiteScraper, "_scrape_homepage_and_links", fake_site):
+            return await asyncio.gather(
+                CorporateSiteScraper().search("Ana", "Acme"),
+                CorporateSiteScraper().search("Luis", "acme"),
+            )
+
+    a, b = asyncio.run(main())
+    assert guesses == ["Acme"]
+    assert a[0].url == b[0].url == "https://acme.cl" and a[0] is not b[0]
@@ -0,0 +1,149 @@
+"""Tests del crawl corporativo por prioridad (scraper/site_crawl.py)."""
+import asyncio
+
+from scraper.corporate_site import CorporateSiteScraper
+from scraper.site_crawl import parse_robots, parse_sitemap, pick_child_sitemap, plan_crawl, score_url
+
+HOME = "https://www.acme.cl/"
+LINKS = [
+    ("/en", "English"), ("/politica-de-privacidad", "Privacidad"), ("/intranet", "Intranet"),
+    ("https://clientes.acme.cl/login", "Acceso clientes"), ("#top", "Inicio"), ("mailto:info@acme.cl", "Correo"),
+    ("/catalogo.pdf", "Catálogo"), ("/contacto", "Contacto"), ("/servicios/", "Servicios"),
+    ("/servicios/mantencion", "Mantención"), ("/quienes-somos", "Quiénes somos"), ("/galeria", "Galería"),
+]
+
+
+class TestPlan:
+    def test_prioriza_por_tema_y_descarta_ruido(self):
+        plan = plan_crawl(HOME, LINKS, [])
+        assert plan[:3] == ["https://www.acme.cl/quienes-somos", "https://www.acme.cl/servicios",
+                            "https://www.acme.cl/contacto"]
+        assert set(plan[3:]) == {"https://www.acme.cl/servicios/mantencion", "https://www.acme.cl/galeria"}
+
+    def test_un_tema_de_cada_uno_antes_de_repetir(self):
+        sitemap = ["https://acme.cl/servicios/a", "https://acme.cl/sustentabilidad", "https://acme.cl/noticias",
+                   "https://acme.cl/2024/05/post-sin-tema"]
+        plan = plan_crawl(HOME, LINKS, sitemap, limit=5)
+        assert plan == ["https://www.acme.cl/quienes-somos", "https://www.acme.cl/servicios",
+                        "https://acme.cl/sustentabilidad", "https://acme.cl/noticias", "https://www.acme.cl/contacto"]
+
+    def test_respeta_robots(self):
+        robots = parse_robots("User-agent: Googlebot\nDisallow: /\n\nUser-agent: *\nDisallow: /servicios*\n")
+        assert "https://www.acme.cl/servicios" not in plan_crawl(HOME, LINKS, [], robots)
+
+    def test_sitio_en_ingles_no_penaliza_su_prefijo(self):
+        links = [("/en/about-us", "About"), ("/en/services", "Services"), ("/es/nosotros", "Español")]
+        assert plan_crawl("https://acme.com/", links, []) == ["https://acme.com/en/about-us",
+                                                              "https://acme.com/en/services"]
+
+    def test_palabras_que_contienen_ruido(self):
+        assert score_url("https://acme.cl/gestion-de-riesgos")[0] > 0  # "riesgo" contiene "esg"
+        assert score_url("https://acme.cl/cartera-de-proyectos")[1] == "proyectos"
+
+
+class TestRobotsYSitemap:
+    def test_robots(self):
+        robots = parse_robots("# comentario\nUser-agent: *\nUser-agent: bot\nDisallow: /intranet\nAllow: /\n"
+                              "Disallow:\nSitemap: https://acme.cl/sitemap_index.xml\n")
+        assert robots.disallow == ["/intranet"]
+        assert robots.sitemaps == ["https://acme.cl/sitemap_index.xml"]
+        assert not robots.allowed("https://acme.cl/intranet/x") and robots.allowed("https://acme.cl/nosotros")
+
+    def test_indice_de_sitemaps(self):
+        xml = ('<?xml version="1.0"?><sitemapindex><sitemap><loc>https://acme.cl/post-sitemap.xml</loc></sitemap>'
+               "<sitemap><loc>https://acme.cl/page-sitemap.xml</loc></sitemap></sitemapindex>")
+        pages, children = parse_sitemap(xml)
+        assert pages == [] and pick_child_sitemap(children)[0] == "https://acme.cl/page-sitemap.xml"
+        assert parse_sitemap("<urlset><url><loc> https://acme.cl/a?x=1&amp;y=2 </loc></url></urlset>") == (
+            ["https://acme.cl/a?x=1&y=2"], [])
+
+
+def _page(title: str, size: int = 0) -> str:
+    return f"<html><head><title>{title}</title></head><body><p>{title} " + "contenido útil " * 10 + "</p>" + \
+        " " * size + "</body></html>"
+
+
+def _scraper(monkeypatch, pages: dict[str, str], requests: dict[str, str],
+             **cfg) -> tuple[CorporateSiteScraper, list[str]]:
+    scraper = CorporateSiteScraper()
+    for key, value in cfg.items():
+        monkeypatch.setattr(scraper.settings.corporate_crawl, key, value)
+    fetched = []
+
+    async def fetch_html(url, max_bytes=None):
+        fetched.append(url)
+        body = pages.get(url)
+        return body[:max_bytes] if body and max_bytes else body
+
+    async def make_request(url, params=None, max_bytes=None):
+        fetched.append(url)
+        body = requests.get(url)
+        return body[:max_bytes] if body and max_bytes else body
+
+    scraper._fetch_html = fetch_html
+    scraper._make_request = make_request
+    return scraper, fetched
+
+
+class TestCorporateCrawl:
+    HOMEPAGE = "<html><head><title>Acme</title></head><body>" + "".join(
+        f'<a href="{h}">{t}</a>' for h, t in LINKS) + "<p>" + "Acme industrial " * 10 + "</p></body></html>"
+
+    def test_rellena_fallidas_y_suma_sitemap(self, monkeypatch):
+        pages = {"https://acme.cl/": self.HOMEPAGE, "https://acme.cl/servicios": _page("Servicios"),
+                 "https://acme.cl/contacto": _page("Contacto"), "https://acme.cl/proyectos": _page("Proyectos"),
+                 "https://acme.cl/galeria": _page("Galería")}
+        requests = {"https://acme.cl/sitemap.xml": "<urlset><url><loc>https://acme.cl/proyectos</loc></url></urlset>"}
+        scraper, fetched = _scraper(monkeypatch, pages, requests, max_pages=3, max_bytes=2_000_000, sitemap=True)
+        items = asyncio.run(scraper._scrape_homepage_and_links("https://acme.cl"))
+        # quienes-somos falla (404): su lugar lo toma la siguiente candidata
+        assert [it.title for it in items] == ["Acme", "Servicios", "Proyectos", "Contacto"]
+        assert "https://acme.cl/politica-de-privacidad" not in fetched and "https://acme.cl/en" not in fetched
+        assert {"https://acme.cl/robots.txt", "https://acme.cl/sitemap.xml"} <= set(fetched)
+
+    def test_presupuesto_de_bytes(self, monkeypatch):
+        pages = {"https://acme.cl/": self.HOMEPAGE, "https://acme.cl/quienes-somos": _page("Nosotros", 5000),
+                 "https://acme.cl/servicios": _page("Servicios", 5000), "https://acme.cl/contacto": _page("Contacto")}
+        scraper, fetched = _scraper(monkeypatch, pages, {}, max_pages=3, max_bytes=len(self.HOMEPAGE) + 1200,
+                                    sitemap=False)
+        fetch_html, sizes = scraper._fetch_html, []
+
+        async def measured(url, max_bytes=None):
+            html = await fetch_html(url, max_bytes)
+            sizes.append(len(html or ""))
+            return html
+
+        scraper._fetch_html = measured
+        items = asyncio.run(scraper._scrape_homepage_and_links("https://acme.cl"))
+        # Una sola tanda que pedida entera gastaría 10 KB: cada página se
+        # corta en su parte (400) y el total queda dentro del presupuesto
+        assert [it.title for it in items] == ["Acme", "Nosotros", "Servicios", "Contacto"]
+        assert fetched == ["https://acme.cl/", "https://acme.cl/quienes-somos", "https://acme.cl/servicios",
+                           "https://acme.cl/contacto"]
+        assert sizes[1:3] == [400, 400]
+        assert sum(sizes) <= scraper.settings.corporate_crawl.max_bytes
+
+    def test_presupuesto_libre_pasa_a_la_siguiente_tanda(self, monkeypatch):
+        pages = {"https://acme.cl/": self.HOMEPAGE, "https://acme.cl/quienes-somos": _page("Nosotros", 5000),
+                 "https://acme.cl/servicios": _page("Servicios")}
+        scraper, fetched = _scraper(monkeypatch, pages, {}, max_pages=3, max_bytes=len(self.HOMEPAGE) + 1200,
+                                    sitemap=False)
+        items = asyncio.run(scraper._scrape_homepage_and_links("https://acme.cl"))
+        # contacto falla y servicios gasta menos que su parte: lo que sobra va a la siguiente candidata
+        assert [it.title for it in items][:3] == ["Acme", "Nosotros", "Servicios"]
+        assert fetched[:4] == ["https://acme.cl/", "https://acme.cl/quienes-somos", "https://acme.cl/servicios",
+                               "https://acme.cl/contacto"]
+        assert len(fetched) > 4
+
+    def test_sitemap_acotado_y_fuera_del_presupuesto(self, monkeypatch):
+        pages = {"https://acme.cl/": self.HOMEPAGE, "https://acme.cl/servicios": _page("Servicios")}
+        locs = "".join(f"<url><loc>https://acme.cl/p{i}</loc></url>" for i in range(5000))
+        requests = {"https://acme.cl/sitemap.xml": f"<urlset>{locs}</urlset>"}
+        scraper, _ = _scraper(monkeypatch, pages, requests, max_pages=3, max_bytes=len(self.HOMEPAGE) + 1000,
+                              sitemap=True, max_sitemap_bytes=10_000)
+        robots, urls = asyncio.run(scraper._discover_sitemap("https://acme.cl"))
+        assert 0 < len(urls) < 400  # solo lo leído hasta el tope
+        # Un sitemap más grande que max_bytes no agota el presupuesto de páginas
+        items = asyncio.run(scraper._scrape_homepage_and_links("https://acme.cl"))
+        assert "Servicios" in [it.title for it in items]
+
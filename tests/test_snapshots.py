@@ -0,0 +1,118 @@
+"""Tests de los snapshots comprimidos del HTML bajado (scraper/snapshots.py)."""
+import asyncio
+import time
+from dataclasses import replace
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from scraper.corporate_site import CorporateSiteScraper
+from scraper.page_cache import PageCache
+from scraper.snapshots import SnapshotStore, _extract
+from scraper.tls_client import tls_fetch
+
+URL = "https://acme.cl/nosotros"
+HTML = ("<html><head><title>Nosotros | Acme</title></head><body><p>"
+        + "Acme fabrica equipos para minería desde 1990. " * 40 + "</p></body></html>")
+
+
+class TestSnapshotStore:
+    def test_un_blob_por_contenido(self):
+        store = SnapshotStore(":memory:")
+        first = store.put(URL, HTML)
+        assert store.put("https://acme.cl/nosotros?ref=home", HTML, "tls") == first
+        store.put(URL, HTML + "<!-- v2 -->")
+        stats = store.stats()
+        assert (stats["fetches"], stats["urls"], stats["blobs"]) == (3, 2, 2)
+        assert stats["stored_bytes"] < stats["html_chars"] / 5
+        assert store.body(store.latest(URL).hash) == HTML + "<!-- v2 -->"
+        assert [s.via for s in store.fetches(url_contains="ref=")] == ["tls"]
+
+    def test_reuso_y_offline(self):
+        store = SnapshotStore(":memory:")
+        store.put(URL, HTML)
+        assert store.reusable(URL) is None  # por defecto siempre se baja
+        store.reuse_seconds = 60
+        assert store.reusable(URL) == HTML
+        store._conn.execute("UPDATE fetches SET fetched_at = ?", (time.time() - 120,))
+        assert store.reusable(URL) is None
+        store.offline = True
+        assert store.reusable(URL) == HTML
+
+    def test_retencion_borra_blobs_huerfanos(self, tmp_path):
+        path = str(tmp_path / "snapshots.sqlite3")
+        store = SnapshotStore(path)
+        store.put(URL, HTML)
+        store._conn.execute("UPDATE fetches SET fetched_at = ?", (time.time() - 3600,))
+        store.put("https://acme.cl/", "<html>home</html>")
+        store.close()
+        stats = SnapshotStore(path, retention_seconds=60).stats()
+        assert (stats["fetches"], stats["blobs"]) == (1, 1)
+
+    def test_retencion_periodica(self):
+        store = SnapshotStore(":memory:", retention_seconds=60, prune_every=3)
+        store.put(URL, HTML)
+        store._conn.execute("UPDATE fetches SET fetched_at = ?", (time.time() - 3600,))
+        store.put("https://acme.cl/", "<html>home</html>")
+        assert store.stats()["fetches"] == 2
+        store.put("https://acme.cl/contacto", "<html>contacto</html>")
+        assert (store.stats()["fetches"], store.stats()["blobs"]) == (2, 2)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = SnapshotStore(":memory:")
+    for module in ("scraper.base", "scraper.tls_client", "scraper.corporate_site"):
+        monkeypatch.setattr(f"{module}.get_snapshot_store", lambda: store)
+    yield store
+    store.close()
+
+
+class TestScrapers:
+    def test_get_guarda_200_y_reusa(self, store, monkeypatch):
+        calls = []
+
+        async def request(client, method, url, params=None, **kwargs):
+            calls.append(url)
+            status = 200 if "nosotros" in url else 404
+            return httpx.Response(status, text=HTML, request=httpx.Request(method, url, params=params))
+
+        monkeypatch.setattr("scraper.base.get_transport", lambda: type("T", (), {"request": staticmethod(request)}))
+        scraper = CorporateSiteScraper()
+        assert asyncio.run(scraper._make_request(URL, {"p": "1"})) == HTML
+        assert asyncio.run(scraper._make_request("https://acme.cl/x")) is None
+        assert [s.url for s in store.fetches()] == [URL + "?p=1"]
+        store.reuse_seconds = 60
+        assert asyncio.run(scraper._make_request(URL, {"p": "1"})) == HTML
+        assert len(calls) == 2
+
+    def test_reuso_no_toca_el_cache_de_paginas(self, store, monkeypatch):
+        pages = PageCache(":memory:", blobs=store)
+        monkeypatch.setattr("scraper.corporate_site.get_page_cache", lambda: pages)
+        store.put(URL, HTML)
+        pages.put(URL, HTML, etag='"v1"')
+        store.reuse_seconds = 60
+        monkeypatch.setattr("scraper.base.get_transport", lambda: pytest.fail("fue a la red"))
+        counted = lambda: sum(REGISTRY.get_sample_value("corporate_page_cache_total", {"result": r}) or 0
+                              for r in ("revalidated", "changed", "miss"))
+        before = counted()
+        assert asyncio.run(CorporateSiteScraper()._fetch_html(URL)) == HTML
+        assert pages.get(URL).etag == '"v1"'
+        assert counted() == before
+
+    def test_offline_no_sale_a_la_red(self, store, monkeypatch):
+        monkeypatch.setattr("scraper.tls_client.get_transport", lambda: pytest.fail("fue a la red"))
+        store.put("https://cl.linkedin.com/in/ana", HTML, "tls")
+        store.offline = True
+        assert asyncio.run(tls_fetch("https://cl.linkedin.com/in/ana")) == (200, HTML)
+        assert asyncio.run(tls_fetch("https://cl.linkedin.com/in/otra")) == (0, "")
+
+
+def test_extractores_sobre_snapshots():
+    store = SnapshotStore(":memory:")
+    store.put(URL, HTML)
+    snapshot = store.latest(URL)
+    result = _extract(snapshot, store.body(snapshot.hash))
+    assert result["extractor"] == "corporate" and result["data"]["title"] == "Nosotros | Acme"
+    assert _extract(replace(snapshot, url="https://acme.cl/sitemap.xml"), "<urlset/>") is None
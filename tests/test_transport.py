@@ -0,0 +1,144 @@
+"""Tests de la capa de transporte (passthrough / record / replay)."""
+import asyncio
+
+import httpx
+import pytest
+
+from scraper.transport import PASSTHROUGH, RECORD, REPLAY, CassetteMiss, Transport
+
+
+class FakeNetwork(Transport):
+    """I/O "real" simulado: cuenta llamadas y responde de forma determinista."""
+
+    calls = 0
+
+    def _ddg(self, kind, query, max_results):
+        FakeNetwork.calls += 1
+        if "ratelimit" in query:
+            raise RuntimeError("202 Ratelimit")
+        return [{"title": f"{kind}:{query}", "href": "https://ejemplo.cl", "body": ""}][:max_results]
+
+    def _tls(self, url, profile, timeout):
+        FakeNetwork.calls += 1
+        return 999, "authwall"
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    FakeNetwork.calls += 1
+    if request.url.path == "/lento":
+        raise httpx.ReadTimeout("timeout", request=request)
+    body = request.content.decode() or str(request.url.params)
+    return httpx.Response(200, text=f"eco {body}", headers={"content-type": "text/plain"})
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+
+
+async def _session(transport: Transport) -> dict:
+    async with _client() as client:
+        get = await transport.request(client, "GET", "https://ejemplo.cl/buscar", params={"q": "Desert King"})
+        post = await transport.request(client, "POST", "https://api.ejemplo.com/chat", json={"prompt": "hola"})
+        with pytest.raises(httpx.TimeoutException):
+            await transport.request(client, "GET", "https://ejemplo.cl/lento")
+    ddg = await asyncio.to_thread(transport.ddg, "news", "Desert King", 3)
+    with pytest.raises(RuntimeError):
+        transport.ddg("text", "ratelimit")
+    tls = transport.tls("https://cl.linkedin.com/in/x", None)
+    return {"get": (get.status_code, get.text), "post": post.text, "ddg": ddg, "tls": tls}
+
+
+def test_record_y_replay_sin_red(tmp_path):
+    cassette = tmp_path / "sesion.json.gz"
+    FakeNetwork.calls = 0
+    recorder = FakeNetwork(RECORD, str(cassette))
+    recorded = asyncio.run(_session(recorder))
+    recorder.save()
+    assert FakeNetwork.calls == 6 and cassette.exists()
+
+    FakeNetwork.calls = 0
+    replayed = asyncio.run(_session(FakeNetwork(REPLAY, str(cassette))))
+    assert FakeNetwork.calls == 0
+    assert replayed == recorded
+    assert recorded["get"] == (200, "eco q=Desert+King") and recorded["tls"] == (999, "authwall")
+
+
+def test_replay_sin_match_exacto_usa_el_request_mas_parecido(tmp_path):
+    cassette = tmp_path / "c.json.gz"
+    recorder = FakeNetwork(RECORD, str(cassette))
+    recorder.ddg("text", "Nadia Ramirez Desert King linkedin")
+    recorder.ddg("text", "Felipe Sepulveda Noracid linkedin")
+    recorder.save()
+
+    replay = FakeNetwork(REPLAY, str(cassette))
+    # Otra fecha/orden en el prompt: no hay match exacto, sí uno parecido
+    result = replay.ddg("text", "Felipe Sepulveda Noracid linkedin 2026")
+    assert result[0]["title"] == "text:Felipe Sepulveda Noracid linkedin"
+    # Repetir un request idéntico devuelve la misma respuesta
+    assert replay.ddg("text", "Nadia Ramirez Desert King linkedin")[0]["title"].startswith("text:Nadia")
+    assert replay.ddg("text", "Nadia Ramirez Desert King linkedin")[0]["title"].startswith("text:Nadia")
+    with pytest.raises(CassetteMiss):
+        replay.ddg("news", "Desert King")
+
+
+def test_passthrough_no_graba(tmp_path):
+    transport = FakeNetwork(PASSTHROUGH)
+    transport.ddg("text", "Desert King")
+    assert transport._interactions == []
+    transport.save()  # no-op fuera de record
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cuerpo_acotado_en_max_bytes():
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, text="<urlset>" + "x" * 10_000))) as client:
+            return await Transport(PASSTHROUGH).request(client, "GET", "https://ejemplo.cl/sitemap.xml",
+                                                        max_bytes=100)
+
+    response = asyncio.run(run())
+    assert response.status_code == 200 and response.text == "<urlset>" + "x" * 92
+
+
+def test_modos_invalidos():
+    with pytest.raises(ValueError):
+        Transport("grabar", "x.json.gz")
+    with pytest.raises(ValueError):
+        Transport(REPLAY)
+    with pytest.raises(FileNotFoundError):
+        Transport(REPLAY, "/no/existe.json.gz")
+
+
+def _sse_handler(request: httpx.Request) -> httpx.Response:
+    FakeNetwork.calls += 1
+    if request.url.path == "/caido":
+        return httpx.Response(503, text="sobrecargado")
+    return httpx.Response(200, text="data: uno\n\ndata: dos\n\ndata: tres\n\n",
+                          headers={"content-type": "text/event-stream"})
+
+
+async def _stream_session(transport: Transport) -> list[str]:
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_sse_handler)) as client:
+        lines = [line async for line in transport.stream_lines(client, "POST", "https://api.ejemplo.com/sse",
+                                                               json={"stream": True})]
+        # El llamador corta antes del final: se graba (y reproduce) lo recibido
+        partial = transport.stream_lines(client, "POST", "https://api.ejemplo.com/sse", json={"corte": 1})
+        first = await anext(partial)
+        await partial.aclose()
+        with pytest.raises(httpx.HTTPStatusError):
+            async for _ in transport.stream_lines(client, "POST", "https://api.ejemplo.com/caido"):
+                pass
+    return [line for line in lines if line] + [first]
+
+
+def test_stream_record_y_replay(tmp_path):
+    cassette = tmp_path / "stream.json.gz"
+    FakeNetwork.calls = 0
+    recorder = FakeNetwork(RECORD, str(cassette))
+    recorded = asyncio.run(_stream_session(recorder))
+    recorder.save()
+    assert recorded == ["data: uno", "data: dos", "data: tres", "data: uno"] and FakeNetwork.calls == 3
+
+    FakeNetwork.calls = 0
+    assert asyncio.run(_stream_session(FakeNetwork(REPLAY, str(cassette)))) == recorded
+    assert FakeNetwork.calls == 0
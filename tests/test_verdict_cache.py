@@ -0,0 +1,111 @@
+"""Tests del cache persistente de veredictos de la resolución de entidades."""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from scraper.base import ScrapedItem
+from services.researcher import ResearchService
+from services.verdict_cache import VerdictCache, content_hash
+
+PROFILE = ScrapedItem("https://cl.linkedin.com/in/ana-soto", "Ana Soto - Gerente - Acme | LinkedIn",
+                      "Gerente comercial en Acme. Santiago, Chile", "linkedin")
+HOMONYM = ScrapedItem("https://www.linkedin.com/in/ana-soto-tx", "Ana Soto - Nurse | LinkedIn",
+                      "Registered nurse. Austin, Texas", "duckduckgo")
+NEWS = ScrapedItem("https://www.diario.cl/acme-expansion", "Acme anuncia expansión en el norte",
+                   "La empresa invertirá en una nueva planta.", "google_news")
+
+
+def _svc(*responses):
+    svc = ResearchService.__new__(ResearchService)
+    mock = AsyncMock(side_effect=[SimpleNamespace(content=json.dumps({"clasificaciones": [
+        {"indice": i, "categoria": c, "razon": "test"} for i, c in pairs
+    ]}), model_used="mock") for pairs in responses])
+    svc.llm = SimpleNamespace(complete=mock)
+    return svc
+
+
+def _prompt_urls(call) -> list[str]:
+    return [line.split("url=")[1] for line in call.args[1].splitlines() if "url=" in line]
+
+
+class TestVerdictCache:
+    def test_clave_por_url_canonica_y_contenido(self):
+        cache = VerdictCache(":memory:")
+        cache.store("Ana Soto", "Acme", [(PROFILE, "prospecto")])
+        copy = ScrapedItem("https://www.linkedin.com/in/ana-soto/?trk=abc", PROFILE.title, PROFILE.snippet, "duckduckgo")
+        changed = ScrapedItem(PROFILE.url, PROFILE.title, "Gerente general en Acme. Santiago, Chile", "linkedin")
+        assert cache.lookup("ANA SOTO", "acme ", [copy, changed]) == {0: "prospecto"}
+
+    def test_perfil_no_se_comparte_con_colegas(self):
+        cache = VerdictCache(":memory:")
+        cache.store("Ana Soto", "Acme", [(PROFILE, "prospecto"), (HOMONYM, "irrelevante")])
+        assert cache.lookup("Luis Mora", "Acme", [PROFILE, HOMONYM]) == {}
+
+    def test_empresa_y_noticias_valen_para_la_empresa(self):
+        cache = VerdictCache(":memory:")
+        site = ScrapedItem("https://acme.cl/nosotros", "Nosotros | Acme", "Acme es líder en logística.", "duckduckgo")
+        cache.store("Ana Soto", "Acme", [(site, "empresa"), (NEWS, "irrelevante")])
+        assert cache.lookup("Luis Mora", "Acme", [site, NEWS]) == {0: "empresa", 1: "irrelevante"}
+        assert cache.lookup("Luis Mora", "Faymex", [site, NEWS]) == {}
+
+    def test_version_del_prompt_y_vencimiento(self):
+        cache = VerdictCache(":memory:", ttl_seconds=60)
+        cache.store("Ana Soto", "Acme", [(PROFILE, "prospecto")], version="v1")
+        assert cache.lookup("Ana Soto", "Acme", [PROFILE], version="v2") == {}
+        cache._conn.execute("UPDATE verdicts SET created_at = ?", (time.time() - 120,))
+        assert cache.lookup("Ana Soto", "Acme", [PROFILE], version="v1") == {}
+
+    def test_persiste_en_disco(self, tmp_path):
+        path = str(tmp_path / "verdicts.sqlite3")
+        cache = VerdictCache(path)
+        cache.store("Ana Soto", "Acme", [(HOMONYM, "irrelevante"), (PROFILE, "otra")])
+        cache.close()
+        reopened = VerdictCache(path)
+        assert reopened.count() == 1
+        assert reopened.lookup("Ana Soto", "Acme", [HOMONYM]) == {0: "irrelevante"}
+
+    def test_hash_ignora_mayusculas_y_espacios(self):
+        other = ScrapedItem(NEWS.url, NEWS.title.upper(), "  La empresa   invertirá en una nueva planta. ", NEWS.source)
+        assert content_hash(other) == content_hash(NEWS)
+
+
+@pytest.mark.usefixtures("verdict_cache")
+class TestResolveEntitiesConCache:
+    def test_segunda_corrida_sin_llamada(self, verdict_cache):
+        svc = _svc([(0, "prospecto"), (1, "irrelevante"), (2, "empresa")])
+        items = [PROFILE, HOMONYM, NEWS]
+        first = asyncio.run(svc._resolve_entities("Ana Soto", "Acme", "", "", items))
+        second = asyncio.run(svc._resolve_entities("Ana Soto", "Acme", "", "", items))
+        assert first == second == [PROFILE, NEWS]
+        assert svc.llm.complete.await_count == 1
+        assert verdict_cache.count() == 3
+
+    def test_solo_candidatos_nuevos_van_al_llm(self):
+        svc = _svc([(0, "prospecto"), (1, "empresa")], [(0, "irrelevante")])
+        asyncio.run(svc._resolve_entities("Ana Soto", "Acme", "", "", [PROFILE, NEWS]))
+        kept = asyncio.run(svc._resolve_entities("Ana Soto", "Acme", "", "", [PROFILE, HOMONYM, NEWS]))
+        assert kept == [PROFILE, NEWS]
+        assert _prompt_urls(svc.llm.complete.await_args_list[1]) == [HOMONYM.url]
+
+    def test_colega_reutiliza_noticias_de_la_empresa(self):
+        colleague = ScrapedItem("https://cl.linkedin.com/in/luis-mora", "Luis Mora - CFO - Acme | LinkedIn",
+                                "CFO en Acme", "linkedin")
+        svc = _svc([(0, "prospecto"), (1, "empresa")], [(0, "prospecto")])
+        asyncio.run(svc._resolve_entities("Ana Soto", "Acme", "", "", [PROFILE, NEWS]))
+        kept = asyncio.run(svc._resolve_entities("Luis Mora", "Acme", "", "", [colleague, NEWS]))
+        assert kept == [colleague, NEWS]
+        assert _prompt_urls(svc.llm.complete.await_args_list[1]) == [colleague.url]
+
+    def test_indice_omitido_y_fallback_no_se_guardan(self, verdict_cache):
+        svc = _svc([(0, "prospecto")])
+        asyncio.run(svc._resolve_entities("Ana Soto", "Acme", "", "", [PROFILE, HOMONYM]))
+        assert verdict_cache.count() == 1
+        failing = ResearchService.__new__(ResearchService)
+        failing.llm = SimpleNamespace(complete=AsyncMock(side_effect=RuntimeError("caído")))
+        kept = asyncio.run(failing._resolve_entities("Luis Mora", "Acme", "", "", [NEWS]))
+        assert kept == [NEWS]
+        assert verdict_cache.count() == 1
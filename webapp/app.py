@@ -6,17 +6,47 @@ WEBAPP_DIR = Path(__file__).parent
 PROJECT_ROOT = WEBAPP_DIR.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from webapp.routers import research, emails
+from services.prompt_registry import get_prompt_registry
+from services.job_queue import build_worker_pool
+from scraper.base import BaseScraper
+from config.metrics import render_latest
+from config.settings import get_settings
+from config.log import new_request_id, reset_request_id, set_request_id, setup_logging
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Logging al arrancar el servidor, no al importar el módulo (tests, scripts)
+    setup_logging()
+    # Compilar todos los prompts una sola vez al arrancar (hot reload por mtime)
+    get_prompt_registry()
+    # Workers de la cola de investigaciones dentro del proceso web
+    # (RESEARCH_WORKERS=0 para usar solo `python -m services.job_queue`)
+    pool = None
+    if get_settings().queue.workers > 0:
+        pool = build_worker_pool()
+        pool.start()
+    app.state.worker_pool = pool
+    yield
+    if pool is not None:
+        await pool.stop()
+    # El cliente HTTP es compartido por todas las investigaciones del proceso
+    await BaseScraper.cleanup()
+
 
 app = FastAPI(
     title="Investigador de Prospectos",
     description="Herramienta de investigación B2B para Faymex",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -27,6 +57,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    # ID de correlación: todos los logs del request (y del job que encole) lo llevan
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    token = set_request_id(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        reset_request_id(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 app.mount("/static", StaticFiles(directory=str(WEBAPP_DIR / "static")), name="static")
 templates = Jinja2Templates(directory=str(WEBAPP_DIR / "templates"))
 
@@ -39,6 +82,12 @@ async def index(request: Request):
     return templates.TemplateResponse(request, "index.html")
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/health")
 async def health():
     return {"status": "healthy", "version": "1.0.0"}
@@ -1,12 +1,19 @@
 """Endpoints de investigación."""
+import asyncio
 import dataclasses
 import json
 
-from fastapi import APIRouter, Request, Form
+from fastapi import APIRouter, HTTPException, Request, Form
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from pathlib import Path
+from typing import Optional
+
+from config.settings import get_settings
+from scraper.completion import get_policy
+from scraper.deadline import Deadline
+from services.job_queue import get_job_queue
 
 router = APIRouter()
 templates = Jinja2Templates(directory=str(Path(__file__).parent.parent / "templates"))
@@ -18,6 +25,23 @@ class ResearchRequest(BaseModel):
     company: str
     role: str
     location: str = ""
+    # Tiempo total para la investigación; se acota a RESEARCH_MAX_DEADLINE_SECONDS
+    deadline_seconds: Optional[float] = Field(None, gt=0)
+    # Política de terminación temprana del scraping (complete, quorum, fast);
+    # None = COMPLETION_POLICY
+    completion: Optional[str] = None
+
+    @field_validator("completion")
+    @classmethod
+    def _known_policy(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None:
+            get_policy(value)  # ValueError → 422
+        return value
+
+
+def _deadline_seconds(requested: Optional[float]) -> float:
+    cfg = get_settings().deadline
+    return min(requested or cfg.default_seconds, cfg.max_seconds)
 
 
 @router.post("/research/json")
@@ -28,7 +52,9 @@ async def do_research_json(req: ResearchRequest):
     from services.researcher import ResearchService
 
     service = ResearchService()
-    result = await service.investigate(name, req.company, req.role, req.location)
+    deadline = Deadline(_deadline_seconds(req.deadline_seconds))
+    result = await service.investigate(name, req.company, req.role, req.location, deadline=deadline,
+                                       completion=req.completion)
 
     return dataclasses.asdict(result)
 
@@ -41,51 +67,106 @@ async def do_research(
     role: str = Form(...),
     location: str = Form(""),
 ):
-    """Execute prospect research, auto-generate email, and return HTML partial."""
+    """Encolar la investigación y devolver el partial que consulta su estado.
+
+    El pipeline (30-60 s) corre en los workers de la cola; el request HTTP
+    responde al instante y la UI hace polling a /research/jobs/{id}/html.
+    """
     # Normalizar capitalización del nombre de persona
     name = _title_case(name)
 
     try:
-        from services.researcher import ResearchService
-        from services.email_generator import EmailGenerator
-
-        service = ResearchService()
-        result = await service.investigate(name, company, role, location)
-
-        if result.error and result.score == 0:
-            return templates.TemplateResponse(
-                request, "partials/error.html",
-                {"error": result.error},
-            )
-
-        # Auto-generate email
-        email = None
-        if result.score > 0:
-            try:
-                generator = EmailGenerator()
-                email = await generator.generate(result)
-                print(f"[Research] Email generado automaticamente")
-            except Exception as e:
-                print(f"[Research] Error generando email: {e}")
-
-        # Convert dataclass to dict for JSON serialization in template
-        result_dict = dataclasses.asdict(result)
-
+        job_id = await asyncio.to_thread(get_job_queue().submit, "research", {
+            "name": name, "company": company, "role": role, "location": location,
+            "generate_email": True,
+        })
+    except Exception as e:
         return templates.TemplateResponse(
-            request, "partials/research_result.html",
-            {
-                "result": result,
-                "result_json": json.dumps(result_dict, ensure_ascii=False),
-                "name": name,
-                "company": company,
-                "email": email,
-            },
+            request, "partials/error.html",
+            {"error": f"No se pudo encolar la investigación: {e}"},
         )
-    except Exception as e:
+    return templates.TemplateResponse(
+        request, "partials/job_pending.html",
+        {"job_id": job_id, "position": 0},
+    )
+
+
+@router.post("/research/jobs", status_code=202)
+async def submit_research_job(req: ResearchRequest):
+    """Encolar una investigación (API). Consultar el estado en status_url."""
+    job_id = await asyncio.to_thread(get_job_queue().submit, "research", {
+        "name": _title_case(req.name), "company": req.company, "role": req.role,
+        "location": req.location, "generate_email": False,
+        "deadline_seconds": _deadline_seconds(req.deadline_seconds), "completion": req.completion,
+    })
+    return {"job_id": job_id, "status": "queued", "status_url": f"/api/research/jobs/{job_id}"}
+
+
+@router.get("/research/jobs/{job_id}")
+async def get_research_job(job_id: str):
+    """Estado del job y, si terminó, su resultado."""
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return job.to_dict()
+
+
+@router.delete("/research/jobs/{job_id}")
+async def cancel_research_job(job_id: str):
+    """Cancelar un job en cola o en curso (el worker lo detecta en el heartbeat)."""
+    cancelled = await asyncio.to_thread(get_job_queue().cancel, job_id)
+    return {"job_id": job_id, "cancelled": cancelled}
+
+
+@router.get("/research/jobs/{job_id}/html", response_class=HTMLResponse)
+async def research_job_html(request: Request, job_id: str):
+    """Partial para el polling de la UI: sigue esperando o muestra el resultado."""
+    queue = get_job_queue()
+    job = await asyncio.to_thread(queue.get, job_id)
+    if job is None:
+        return templates.TemplateResponse(
+            request, "partials/error.html", {"error": "La investigación ya no existe."},
+        )
+    if not job.finished:
+        position = await asyncio.to_thread(queue.position, job_id) if job.status == "queued" else 0
+        return templates.TemplateResponse(
+            request, "partials/job_pending.html", {"job_id": job_id, "position": position},
+        )
+    if job.status == "cancelled":
+        return templates.TemplateResponse(
+            request, "partials/error.html", {"error": "Investigación detenida."},
+        )
+    if job.status == "failed":
+        return templates.TemplateResponse(
+            request, "partials/error.html", {"error": job.error or "Error desconocido"},
+        )
+    return _render_result(request, job.payload, job.result)
+
+
+def _render_result(request: Request, payload: dict, data: dict) -> HTMLResponse:
+    """Reconstruir ResearchResult/EmailResult desde el JSON del job y renderizar."""
+    from services.researcher import ResearchResult
+    from services.email_generator import EmailResult
+
+    result_dict = data["research"]
+    result = ResearchResult(**result_dict)
+    if result.error and result.score == 0:
         return templates.TemplateResponse(
             request, "partials/error.html",
-            {"error": str(e)},
+            {"error": result.error},
         )
+    email = EmailResult(**data["email"]) if data.get("email") else None
+
+    return templates.TemplateResponse(
+        request, "partials/research_result.html",
+        {
+            "result": result,
+            "result_json": json.dumps(result_dict, ensure_ascii=False),
+            "name": payload["name"],
+            "company": payload["company"],
+            "email": email,
+        },
+    )
 
 
 # Preposiciones/artículos que no se capitalizan en nombres
@@ -228,6 +228,12 @@ function resetPage() {
 var activeXhr = null;
 
 function stopResearch() {
+    // Cancel the queued/running job on the server and stop polling
+    var job = document.getElementById('research-job');
+    if (job) {
+        fetch('/api/research/jobs/' + job.dataset.jobId, { method: 'DELETE' });
+        job.remove();
+    }
     if (activeXhr) {
         activeXhr.abort();
         activeXhr = null;
@@ -263,6 +269,12 @@ document.addEventListener('htmx:beforeRequest', function(event) {
 });
 
 document.addEventListener('htmx:afterSwap', function(event) {
+    // Job still pending: keep the stop button, polling continues
+    if (document.getElementById('research-job')) {
+        activeXhr = null;
+        return;
+    }
+
     // Hide stop button and scroll to results
     var stopBtn = document.getElementById('stop-btn');
     if (stopBtn) {